@@ -0,0 +1,99 @@
+"""
+Benchmark: SSTable point lookups through a block cache, and scan resistance
+
+Writes one SSTable of --entries entries, then runs --lookups lookups of
+a skewed key set (90% of them on a hot 5% of the keys) three times:
+without a cache, with a cold --cache-mb cache and with that cache warm.
+Then it scans the whole file once at low priority (as a compaction
+does) and once normally, and reports the hit rate of the first --probe
+lookups after each: the low-priority scan should leave it unchanged.
+
+Usage:
+    python benchmarks/bench_block_cache.py [--entries 200000]
+        [--lookups 50000] [--cache-mb 8] [--probe 2000]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from block_cache import BlockCache
+from sstable import SSTableReader, SSTableWriter
+
+
+def run_lookups(reader, keys, cache=None):
+    """Microseconds per lookup and the cache hit rate over them"""
+    before = cache.stats if cache is not None else None
+    start = time.perf_counter()
+    for key in keys:
+        reader.get_entry(key)
+    elapsed = (time.perf_counter() - start) / len(keys) * 1e6
+    if cache is None:
+        return elapsed, None
+    after = cache.stats
+    hits = after['hits'] - before['hits']
+    return elapsed, hits / (hits + after['misses'] - before['misses'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=200000)
+    parser.add_argument('--lookups', type=int, default=50000)
+    parser.add_argument('--value-size', type=int, default=100)
+    parser.add_argument('--cache-mb', type=float, default=8)
+    parser.add_argument('--probe', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    keys = [b"user:%012d" % i for i in range(args.entries)]
+    hot = keys[:max(1, args.entries // 20)]
+    lookups = [rng.choice(hot) if rng.random() < 0.9 else rng.choice(keys)
+               for _ in range(args.lookups)]
+    
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, 'bench.sst')
+        writer = SSTableWriter(path)
+        for i, key in enumerate(keys):
+            writer.add(key, b"v" * args.value_size, i)
+        writer.finalize()
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        
+        cache = BlockCache(int(args.cache_mb * 1024 * 1024))
+        uncached = SSTableReader(path)
+        cached = SSTableReader(path, block_cache=cache)
+        
+        print(f"{args.entries:,} entries ({size_mb:.1f} MB, {len(cached.index):,} blocks), "
+              f"{args.lookups:,} lookups, {args.cache_mb:g} MB cache")
+        print(f"{'run':>22} {'us/lookup':>10} {'hit rate':>9}")
+        rows = [('no cache', *run_lookups(uncached, lookups)),
+                ('cold cache', *run_lookups(cached, lookups, cache)),
+                ('warm cache', *run_lookups(cached, lookups, cache))]
+        probe = lookups[:args.probe]
+        rows.append((f'warm, first {len(probe):,}', *run_lookups(cached, probe, cache)))
+        list(cached.iter_entries(low_priority=True))
+        rows.append(('after low-prio scan', *run_lookups(cached, probe, cache)))
+        list(cached.iter_entries())
+        rows.append(('after normal scan', *run_lookups(cached, probe, cache)))
+        for name, micros, hit_rate in rows:
+            rate = "-" if hit_rate is None else f"{hit_rate:.1%}"
+            print(f"{name:>22} {micros:>10.1f} {rate:>9}")
+        stats = cache.stats
+        print(f"cache: {stats['usage'] / 1024 / 1024:.1f} MB used "
+              f"({stats['pinned_usage'] / 1024:.0f} KB pinned), "
+              f"{stats['evictions']:,} evictions")
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark: negative lookups across many SSTables, with and without Bloom filters
+
+Writes --tables SSTables of --entries keys each whose key ranges all
+overlap (like L0 files: a lookup has to probe every one), once per
+bits-per-key setting, then looks up --lookups keys that none of them
+holds in every table, as a store's get() would. Reports the time per
+lookup (all tables), the filter counters (misses: no block read,
+false positives: a block read for nothing), filter size and write time.
+
+Usage:
+    python benchmarks/bench_bloom_filter.py [--tables 100]
+        [--entries 10000] [--lookups 2000] [--bits 0,5,10,20]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from sstable import SSTableReader, SSTableWriter
+
+
+def build_tables(dirpath, tables, entries, value, bits_per_key):
+    """Table t holds keys t, t + 2 * tables, ...: all even, all ranges overlapping"""
+    readers = []
+    for table in range(tables):
+        path = os.path.join(dirpath, f"{bits_per_key}-{table:03d}.sst")
+        writer = SSTableWriter(path, bits_per_key=bits_per_key)
+        for i in range(entries):
+            writer.add(b"user:%012d" % (2 * (table + i * tables)), value, i)
+        writer.finalize()
+        readers.append(SSTableReader(path))
+    return readers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tables', type=int, default=100)
+    parser.add_argument('--entries', type=int, default=10000)
+    parser.add_argument('--lookups', type=int, default=2000)
+    parser.add_argument('--value-size', type=int, default=100)
+    parser.add_argument('--bits', default='0,5,10,20',
+                        help='Comma-separated bits per key (0: no filter)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    value = b"v" * args.value_size
+    span = 2 * args.tables * args.entries
+    absent = [b"user:%012d" % (rng.randrange(span // 2) * 2 + 1) for _ in range(args.lookups)]
+    probes = args.tables * args.lookups
+    
+    print(f"{args.tables} tables x {args.entries:,} entries, {args.lookups:,} absent keys "
+          f"probed in every table ({probes:,} table lookups)")
+    print(f"{'bits/key':>8} {'us/lookup':>10} {'us/table':>9} {'misses':>9} "
+          f"{'false pos':>10} {'fp rate':>8} {'filter MB':>10} {'write s':>8}")
+    tmp = tempfile.mkdtemp()
+    try:
+        for bits_per_key in (int(bits) for bits in args.bits.split(',')):
+            start = time.perf_counter()
+            readers = build_tables(tmp, args.tables, args.entries, value, bits_per_key)
+            write_time = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            for key in absent:
+                for reader in readers:
+                    reader.get_entry(key)
+            elapsed = time.perf_counter() - start
+            
+            misses = sum(reader.filter_stats['misses'] for reader in readers)
+            false_positives = sum(reader.filter_stats['false_positives'] for reader in readers)
+            filter_mb = sum(len(reader.bloom) for reader in readers if reader.bloom) / 1024 / 1024
+            fp_rate = f"{false_positives / probes:.2%}" if bits_per_key else "-"
+            print(f"{bits_per_key:>8} {elapsed / args.lookups * 1e6:>10.0f} "
+                  f"{elapsed / probes * 1e6:>9.2f} {misses:>9,} {false_positives:>10,} "
+                  f"{fp_rate:>8} {filter_mb:>10.2f} {write_time:>8.2f}")
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmark: write, space and read amplification of a compaction strategy
+
+Writes --total-mb of user data (key + value bytes) as random overwrites
+over a key space of a quarter as many keys (every key is written about
+four times), with every 20th write a delete, then waits for compaction
+to settle and reports:
+    - write amp: bytes written to SSTables (flushes + compactions) per
+      user byte
+    - space amp: bytes of live SSTables per byte of live user data
+    - read amp: SSTables whose key range holds a key (files a point
+      lookup may probe, no bloom filters), mean and worst over --reads
+      random keys, plus the measured get() latency
+    - throughput, compactions and stall time
+
+The leveled strategy is scaled from --memtable-mb: L0 trigger 4 files,
+L1 = 4 memtables, output files of half a memtable. The tiered one
+merges 4 similar runs at a time and everything at 200% space
+amplification. Run both to compare.
+
+Usage:
+    python benchmarks/bench_compaction_amplification.py [--total-mb 10240]
+        [--strategy leveled|tiered] [--memtable-mb 4] [--value-size 100]
+"""
+
+import argparse
+import random
+import shutil
+import sys
+import tempfile
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from compaction import LeveledCompaction, TieredCompaction
+from lsm_tree import LSMTree
+
+
+def leveled(memtable_size):
+    return LeveledCompaction(level0_file_trigger=4,
+                             max_bytes_for_level_base=4 * memtable_size,
+                             level_size_multiplier=10,
+                             target_file_size=memtable_size // 2)
+
+
+def tiered(memtable_size):
+    return TieredCompaction(min_merge_width=4)
+
+
+STRATEGIES = {
+    'leveled': leveled,
+    'tiered': tiered,
+}
+
+
+def files_probed(levels, key):
+    """SSTables a lookup of key may have to read (no early exit)"""
+    count = sum(1 for meta in levels[0] if meta.smallest <= key <= meta.largest)
+    for files in levels[1:]:
+        index = bisect_left([meta.largest for meta in files], key)
+        if index < len(files) and files[index].smallest <= key:
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--total-mb', type=float, default=64)
+    parser.add_argument('--strategy', choices=sorted(STRATEGIES), default='leveled')
+    parser.add_argument('--memtable-mb', type=float, default=1)
+    parser.add_argument('--value-size', type=int, default=100)
+    parser.add_argument('--reads', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    
+    memtable_size = int(args.memtable_mb * 1024 * 1024)
+    strategy = STRATEGIES[args.strategy](memtable_size)
+    key_size = len(b"key%012d" % 0)
+    writes = int(args.total_mb * 1024 * 1024) // (key_size + args.value_size)
+    num_keys = max(1, writes // 4)
+    rng = random.Random(args.seed)
+    value = b"v" * args.value_size
+    
+    tmp = tempfile.mkdtemp()
+    try:
+        with LSMTree(tmp, memtable_size=memtable_size, compaction=strategy) as db:
+            live = {}
+            user_bytes = 0
+            start = time.perf_counter()
+            for i in range(writes):
+                index = rng.randrange(num_keys)
+                key = b"key%012d" % index
+                if i % 20 == 19:
+                    db.delete(key)
+                    live.pop(index, None)
+                    user_bytes += key_size
+                else:
+                    db.put(key, value)
+                    live[index] = True
+                    user_bytes += key_size + args.value_size
+            db.flush()
+            db.wait_for_compactions()
+            elapsed = time.perf_counter() - start
+            
+            stats = db.stats
+            written = stats['bytes_flushed'] + stats['compaction_bytes_written']
+            sstable_bytes = sum(meta.file_size for meta in db.sstables())
+            live_bytes = len(live) * (key_size + args.value_size)
+            
+            levels = db.levels()
+            keys = [b"key%012d" % rng.randrange(num_keys) for _ in range(args.reads)]
+            probes = [files_probed(levels, key) for key in keys]
+            read_start = time.perf_counter()
+            for key in keys:
+                db.get(key)
+            read_time = time.perf_counter() - read_start
+    finally:
+        shutil.rmtree(tmp)
+    
+    print(f"strategy: {strategy}")
+    print(f"{writes:,} writes ({user_bytes / 1024 / 1024:.1f} MB) over {num_keys:,} keys, "
+          f"{len(live):,} live")
+    print(f"  load + settle      {elapsed:>9.1f} s  ({writes / elapsed:,.0f} writes/s, "
+          f"stalled {stats['stall_time']:.1f} s)")
+    print(f"  flushes            {stats['flushes']:>9,}")
+    print(f"  compactions        {stats['compactions']:>9,}  "
+          f"(+{stats['trivial_moves']} trivial moves)")
+    print(f"  write amp          {written / user_bytes:>9.2f}")
+    print(f"  space amp          {sstable_bytes / live_bytes:>9.2f}  "
+          f"({sstable_bytes / 1024 / 1024:.1f} MB of SSTables)")
+    print(f"  read amp           {sum(probes) / len(probes):>9.2f}  (max {max(probes)}, "
+          f"{len(db.sstables())} files, per level {[len(files) for files in levels]})")
+    print(f"  get()              {read_time / len(keys) * 1e6:>9.1f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: bulk load through put() vs ingest_external_file()
+
+Loads --entries sorted keys into a fresh store twice: once through the
+normal write path (WAL + memtable + flush), once by writing SSTables
+offline with SSTableWriter and ingesting them. Reports entries per
+second and MB per second of SSTable data for each.
+
+Usage:
+    python benchmarks/bench_ingest.py [--entries 1000000]
+        [--files 4] [--value-size 100]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from lsm_tree import LSMTree
+from sstable import SSTableWriter
+
+
+def load_with_puts(dirpath, keys, value):
+    """Every entry goes through the WAL and a memtable"""
+    start = time.perf_counter()
+    with LSMTree(dirpath, memtable_size=16 * 1024 * 1024) as db:
+        for key in keys:
+            db.put(key, value)
+        db.flush()
+    return time.perf_counter() - start
+
+
+def load_with_ingest(dirpath, keys, value, files):
+    """Write SSTables offline, then link them into the store"""
+    start = time.perf_counter()
+    per_file = -(-len(keys) // files)
+    paths = []
+    for i in range(0, len(keys), per_file):
+        path = os.path.join(dirpath, f"external-{i}.sst")
+        writer = SSTableWriter(path)
+        for key in keys[i:i + per_file]:
+            writer.add(key, value)
+        writer.finalize()
+        paths.append(path)
+    written = time.perf_counter()
+    
+    with LSMTree(os.path.join(dirpath, 'db')) as db:
+        db.ingest_external_file(paths, move=True)
+    return written - start, time.perf_counter() - written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=200000)
+    parser.add_argument('--files', type=int, default=4)
+    parser.add_argument('--value-size', type=int, default=100)
+    args = parser.parse_args()
+    
+    keys = [b"key%012d" % i for i in range(args.entries)]
+    value = b"v" * args.value_size
+    mb = args.entries * (len(keys[0]) + args.value_size + 16) / 1024 / 1024
+    
+    tmp = tempfile.mkdtemp()
+    try:
+        put_time = load_with_puts(os.path.join(tmp, 'puts'), keys, value)
+        write_time, ingest_time = load_with_ingest(tmp, keys, value, args.files)
+    finally:
+        shutil.rmtree(tmp)
+    
+    total = write_time + ingest_time
+    print(f"{args.entries:,} entries ({mb:.1f} MB of SSTable data), {args.files} files")
+    print(f"{'path':>24} {'seconds':>9} {'entries/s':>12} {'MB/s':>8}")
+    for name, seconds in (('put() + flush', put_time),
+                          ('SSTableWriter + ingest', total),
+                          ('  of which ingest', ingest_time)):
+        print(f"{name:>24} {seconds:>9.2f} {args.entries / seconds:>12,.0f} "
+              f"{mb / seconds:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
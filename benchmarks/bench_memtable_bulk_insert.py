@@ -0,0 +1,69 @@
+"""
+Benchmark: Memtable.put one key at a time vs put_many
+
+Inserts --entries pairs in sorted and in random key order, in batches
+of --batch-size, and reports inserts per second for each method. The
+resulting memtables are compared so both paths are known to agree.
+
+Usage:
+    python benchmarks/bench_memtable_bulk_insert.py [--entries 1000000]
+        [--batch-size 10000] [--key-size 16] [--value-size 100]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from memtable import Memtable
+
+
+def load_single(pairs, batch_size):
+    """One put() per pair"""
+    memtable = Memtable(max_size_bytes=1 << 40)
+    start = time.perf_counter()
+    for sequence, (key, value) in enumerate(pairs, 1):
+        memtable.put(key, value, sequence)
+    return memtable, time.perf_counter() - start
+
+
+def load_bulk(pairs, batch_size):
+    """One put_many() per batch"""
+    memtable = Memtable(max_size_bytes=1 << 40)
+    start = time.perf_counter()
+    for pos in range(0, len(pairs), batch_size):
+        memtable.put_many(pairs[pos:pos + batch_size], pos + 1)
+    return memtable, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=200000)
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--key-size', type=int, default=16)
+    parser.add_argument('--value-size', type=int, default=100)
+    args = parser.parse_args()
+    
+    rng = random.Random(42)
+    keys = sorted({rng.randbytes(args.key_size) for _ in range(args.entries)})
+    value = b"v" * args.value_size
+    orders = {'sorted': keys, 'random': rng.sample(keys, len(keys))}
+    
+    print(f"{len(keys):,} entries, batches of {args.batch_size:,}")
+    print(f"{'order':>8} {'put/s':>12} {'put_many/s':>12} {'speedup':>8}")
+    for name, order in orders.items():
+        pairs = [(key, value) for key in order]
+        single, single_time = load_single(pairs, args.batch_size)
+        bulk, bulk_time = load_bulk(pairs, args.batch_size)
+        assert bulk.size_bytes() == single.size_bytes()
+        assert list(bulk.iter_entries()) == list(single.iter_entries())
+        print(f"{name:>8} {len(pairs) / single_time:>12,.0f} "
+              f"{len(pairs) / bulk_time:>12,.0f} {single_time / bulk_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
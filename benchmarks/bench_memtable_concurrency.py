@@ -0,0 +1,91 @@
+"""
+Benchmark: mixed read/write memtable throughput with many threads
+
+Compares the current Memtable behind one global lock against
+SkipListMemtable (lock-free readers, short writer lock). Every thread
+runs the same mix of gets and puts on a preloaded memtable.
+
+Usage:
+    python benchmarks/bench_memtable_concurrency.py [--threads 1 2 4 8 16]
+        [--ops 20000] [--write-ratio 0.1] [--keys 100000]
+"""
+
+import argparse
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from memtable import Memtable
+from skiplist_memtable import SkipListMemtable
+
+
+class LockedMemtable:
+    """Memtable made thread-safe the simple way: one lock for everything"""
+    
+    def __init__(self):
+        self._memtable = Memtable(max_size_bytes=1 << 40)
+        self._lock = threading.Lock()
+    
+    def put(self, key, value, sequence=0):
+        with self._lock:
+            self._memtable.put(key, value, sequence)
+    
+    def get(self, key):
+        with self._lock:
+            return self._memtable.get(key)
+
+
+def run(memtable, threads: int, ops: int, write_ratio: float, keys: list) -> float:
+    """Return total operations per second across all threads"""
+    barrier = threading.Barrier(threads + 1)
+    value = b"v" * 100
+    
+    def worker(seed):
+        rng = random.Random(seed)
+        plan = [(rng.random() < write_ratio, rng.choice(keys)) for _ in range(ops)]
+        barrier.wait()
+        for is_write, key in plan:
+            if is_write:
+                memtable.put(key, value, seed)
+            else:
+                memtable.get(key)
+    
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return threads * ops / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--ops', type=int, default=20000, help='Operations per thread')
+    parser.add_argument('--write-ratio', type=float, default=0.1)
+    parser.add_argument('--keys', type=int, default=100000)
+    args = parser.parse_args()
+    
+    keys = [f"key{i:012d}".encode() for i in range(args.keys)]
+    print(f"{args.keys:,} preloaded keys, {args.write_ratio:.0%} writes, "
+          f"{args.ops:,} ops per thread")
+    print(f"{'threads':>8} {'locked Memtable':>16} {'SkipListMemtable':>17}")
+    for threads in args.threads:
+        rates = []
+        for cls in (LockedMemtable, lambda: SkipListMemtable(max_size_bytes=1 << 40)):
+            memtable = cls()
+            for key in keys:
+                memtable.put(key, b"v" * 100)
+            rates.append(run(memtable, threads, args.ops, args.write_ratio, keys))
+        print(f"{threads:>8} {rates[0]:>14,.0f}/s {rates[1]:>15,.0f}/s")
+
+
+if __name__ == '__main__':
+    main()
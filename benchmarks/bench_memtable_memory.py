@@ -0,0 +1,74 @@
+"""
+Benchmark: real memory of Memtable vs ArenaMemtable
+
+Inserts --entries random 16 B keys with random 100 B values into each
+implementation (in a fresh child process) and reports the RSS growth,
+scaled to one million entries, next to what size_bytes() claims.
+
+Usage:
+    python benchmarks/bench_memtable_memory.py [--entries 1000000]
+        [--key-size 16] [--value-size 100]
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from arena_memtable import ArenaMemtable
+from memtable import Memtable
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes"""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def fill(name: str, entries: int, key_size: int, value_size: int, queue):
+    """Insert fresh key/value objects, as a WAL replay or client would"""
+    cls = {'Memtable': Memtable, 'ArenaMemtable': ArenaMemtable}[name]
+    rng = random.Random(42)
+    
+    before = current_rss()
+    memtable = cls(max_size_bytes=1 << 40)
+    start = time.perf_counter()
+    for sequence in range(1, entries + 1):
+        memtable.put(rng.randbytes(key_size), rng.randbytes(value_size), sequence)
+    elapsed = time.perf_counter() - start
+    rss = current_rss() - before
+    queue.put((rss, memtable.size_bytes(), elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=200000)
+    parser.add_argument('--key-size', type=int, default=16)
+    parser.add_argument('--value-size', type=int, default=100)
+    args = parser.parse_args()
+    
+    raw = args.entries * (args.key_size + args.value_size)
+    scale = 1000000 / args.entries
+    print(f"{args.entries:,} entries, {args.key_size} B keys, {args.value_size} B values "
+          f"({raw / 1024 / 1024:.1f} MB raw)")
+    print(f"{'memtable':>14} {'RSS MB/1M':>10} {'reported MB/1M':>15} {'x raw':>6} {'puts/s':>10}")
+    for name in ('Memtable', 'ArenaMemtable'):
+        queue = multiprocessing.Queue()
+        proc = multiprocessing.Process(
+            target=fill, args=(name, args.entries, args.key_size, args.value_size, queue))
+        proc.start()
+        rss, reported, elapsed = queue.get()
+        proc.join()
+        print(f"{name:>14} {rss * scale / 1024 / 1024:>10.1f} "
+              f"{reported * scale / 1024 / 1024:>15.1f} {rss / raw:>6.2f} "
+              f"{args.entries / elapsed:>10,.0f}")
+
+
+if __name__ == '__main__':
+    main()
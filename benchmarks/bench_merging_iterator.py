@@ -0,0 +1,97 @@
+"""
+Benchmark: MergingIterator over many sorted sources
+
+Merges --sources sorted sources of --entries entries each. Keys are
+generated on the fly, so the sources themselves hold no memory, and
+neighbouring sources share half their keys (newest wins). Reports:
+    - raw: reading every source on its own (the floor)
+    - merge: MergingIterator, tombstones kept
+    - merge + drop: MergingIterator with drop_tombstones=True
+    - sorted(): materialize everything and sort (the naive way)
+plus the peak memory each one allocates (tracemalloc, in a second run).
+
+Usage:
+    python benchmarks/bench_merging_iterator.py [--sources 10]
+        [--entries 1000000] [--skip-sorted]
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from merging_iterator import MergingIterator
+
+
+def source(index, entries, num_sources):
+    """Sorted (key, value, sequence); every 7th entry is a tombstone"""
+    value = b"v" * 100
+    step = num_sources // 2 or 1
+    for i in range(entries):
+        yield (b"key%012d" % (i * step + index % step),
+               None if i % 7 == 0 else value,
+               index * entries + i)
+
+
+def run(name, make, total):
+    """Time make(), then run it again traced for its peak memory"""
+    start = time.perf_counter()
+    count = make()
+    elapsed = time.perf_counter() - start
+    
+    tracemalloc.start()  # Slows allocations down: not part of the timing
+    make()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{name:>14} {count:>12,} {elapsed:>9.2f} {total / elapsed:>12,.0f} "
+          f"{peak / 1024 / 1024:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sources', type=int, default=10)
+    parser.add_argument('--entries', type=int, default=100000)
+    parser.add_argument('--skip-sorted', action='store_true',
+                        help="Skip the materialize-and-sort baseline")
+    args = parser.parse_args()
+    
+    n, m = args.sources, args.entries
+    total = n * m
+    
+    def sources():
+        return [source(i, m, n) for i in range(n)]
+    
+    def raw():
+        return sum(sum(1 for _ in src) for src in sources())
+    
+    def merge(drop):
+        def count():
+            return sum(1 for _ in MergingIterator(sources(), drop_tombstones=drop))
+        return count
+    
+    def materialize():
+        entries = sorted((key, -sequence, value)
+                         for src in sources() for key, value, sequence in src)
+        count = 0
+        previous = None
+        for key, _, _ in entries:
+            if key != previous:
+                count += 1
+                previous = key
+        return count
+    
+    print(f"{n} sources x {m:,} entries = {total:,} input entries")
+    print(f"{'method':>14} {'output':>12} {'seconds':>9} {'input/s':>12} {'peak MB':>9}")
+    run('raw', raw, total)
+    run('merge', merge(False), total)
+    run('merge + drop', merge(True), total)
+    if not args.skip_sorted:
+        run('sorted()', materialize, total)
+
+
+if __name__ == '__main__':
+    main()
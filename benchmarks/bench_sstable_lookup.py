@@ -0,0 +1,98 @@
+"""
+Benchmark: SSTable point lookups, flat v2 format vs block-based v3
+
+Writes --entries sorted entries once in the flat v2 layout (built here
+entry by entry, the way the v2 writer did) and once with SSTableWriter
+(v3 blocks), then times SSTableReader.get_entry for --lookups random
+present keys and as many absent keys. Reports file size and
+microseconds per lookup.
+
+Usage:
+    python benchmarks/bench_sstable_lookup.py [--entries 1000000]
+        [--lookups 100000] [--value-size 100] [--block-size 4096]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import struct
+import sys
+import tempfile
+import time
+from binascii import crc32
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from sstable import SSTableReader, SSTableWriter
+
+
+def write_v2(path, keys, value):
+    """The flat v2 layout: 16-byte entry headers, every 16th key indexed"""
+    data = bytearray(struct.pack('<QIQ I', SSTableWriter.MAGIC_NUMBER, 2, len(keys), 0))
+    index = bytearray()
+    for i, key in enumerate(keys):
+        if i % SSTableWriter.INDEX_INTERVAL == 0:
+            index += struct.pack('<I', len(key)) + key + struct.pack('<Q', len(data))
+        data += struct.pack('<IIQ', len(key), len(value), i) + key + value
+    data += index
+    data += struct.pack('<Q', len(data) - len(index))
+    data += struct.pack('<Q', crc32(data) & 0xFFFFFFFF)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def write_v3(path, keys, value, block_size):
+    writer = SSTableWriter(path, block_size=block_size)
+    for i, key in enumerate(keys):
+        writer.add(key, value, i)
+    writer.finalize()
+
+
+def time_lookups(reader, keys):
+    start = time.perf_counter()
+    for key in keys:
+        reader.get_entry(key)
+    return (time.perf_counter() - start) / len(keys) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=200000)
+    parser.add_argument('--lookups', type=int, default=50000)
+    parser.add_argument('--value-size', type=int, default=100)
+    parser.add_argument('--block-size', type=int, default=SSTableWriter.BLOCK_SIZE)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    keys = [b"user:%012d" % (i * 2) for i in range(args.entries)]
+    value = b"v" * args.value_size
+    present = [rng.choice(keys) for _ in range(args.lookups)]
+    absent = [b"user:%012d" % (rng.randrange(args.entries) * 2 + 1)
+              for _ in range(args.lookups)]
+    
+    tmp = tempfile.mkdtemp()
+    try:
+        v2_path = os.path.join(tmp, 'v2.sst')
+        v3_path = os.path.join(tmp, 'v3.sst')
+        write_v2(v2_path, keys, value)
+        start = time.perf_counter()
+        write_v3(v3_path, keys, value, args.block_size)
+        v3_write = time.perf_counter() - start
+        
+        print(f"{args.entries:,} entries, {args.lookups:,} lookups each, "
+              f"v3 blocks of {args.block_size} bytes (written in {v3_write:.2f} s)")
+        print(f"{'format':>8} {'size MB':>9} {'hit us':>8} {'miss us':>8}")
+        for name, path in (('v2 flat', v2_path), ('v3 block', v3_path)):
+            reader = SSTableReader(path)
+            print(f"{name:>8} {os.path.getsize(path) / 1024 / 1024:>9.1f} "
+                  f"{time_lookups(reader, present):>8.1f} {time_lookups(reader, absent):>8.1f}")
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
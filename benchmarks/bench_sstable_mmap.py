@@ -0,0 +1,89 @@
+"""
+Benchmark: memory-mapped SSTableReader vs positioned reads
+
+Writes one SSTable of --entries entries and opens it three ways: the
+default reader (one os.pread per block), use_mmap=True (entries parsed
+in place, values returned as memoryview slices) and use_mmap=True with
+copy_values=True (values as bytes). Each runs --lookups random present
+and absent point lookups (bits_per_key=0 by default so absent keys read
+a block too), a full scan and --ranges range scans of --range-size keys.
+The file is in the page cache throughout: this measures syscall and
+copy overhead, not disk reads.
+
+Usage:
+    python benchmarks/bench_sstable_mmap.py [--entries 200000]
+        [--lookups 50000] [--ranges 2000] [--range-size 100] [--bits 0]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from sstable import SSTableReader, SSTableWriter
+
+
+def per_call(func, items):
+    """Microseconds per call of func over items"""
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=200000)
+    parser.add_argument('--lookups', type=int, default=50000)
+    parser.add_argument('--ranges', type=int, default=2000)
+    parser.add_argument('--range-size', type=int, default=100)
+    parser.add_argument('--value-size', type=int, default=100)
+    parser.add_argument('--bits', type=int, default=0, help='Bloom filter bits per key')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    keys = [b"user:%012d" % (i * 2) for i in range(args.entries)]
+    present = [rng.choice(keys) for _ in range(args.lookups)]
+    absent = [b"user:%012d" % (rng.randrange(args.entries) * 2 + 1)
+              for _ in range(args.lookups)]
+    starts = [rng.randrange(max(1, args.entries - args.range_size)) for _ in range(args.ranges)]
+    ranges = [(keys[i], keys[i + args.range_size]) for i in starts]
+    
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, 'bench.sst')
+        writer = SSTableWriter(path, bits_per_key=args.bits)
+        for i, key in enumerate(keys):
+            writer.add(key, b"v" * args.value_size, i)
+        writer.finalize()
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        
+        print(f"{args.entries:,} entries ({size_mb:.1f} MB), {args.lookups:,} lookups, "
+              f"{args.ranges:,} ranges of {args.range_size}, {args.bits} bits/key")
+        print(f"{'reader':>14} {'hit us':>7} {'miss us':>8} {'scan s':>7} {'range us':>9}")
+        for name, options in (('pread', {}),
+                              ('mmap view', {'use_mmap': True}),
+                              ('mmap bytes', {'use_mmap': True, 'copy_values': True})):
+            with SSTableReader(path, **options) as reader:
+                hit = per_call(reader.get_entry, present)
+                miss = per_call(reader.get_entry, absent)
+                start = time.perf_counter()
+                for _ in reader.iter_entries():
+                    pass
+                scan = time.perf_counter() - start
+                scan_range = per_call(lambda bounds: list(reader.iter_entries(*bounds)), ranges)
+            print(f"{name:>14} {hit:>7.1f} {miss:>8.1f} {scan:>7.2f} {scan_range:>9.1f}")
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark: compaction throughput with subcompactions
+
+Writes --files overlapping SSTables of --entries entries each (every key
+appears in about half of them, every 13th entry a tombstone), then
+merges them with run_compaction into one level, first in this process,
+then split by key range over 2, 4, ... --max-workers worker processes.
+Reports input MB/s and the speedup over the single merge. Scaling is
+bounded by os.cpu_count() and by the disk.
+
+Usage:
+    python benchmarks/bench_subcompactions.py [--files 4]
+        [--entries 500000] [--max-workers 8]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from compaction import Compaction, run_compaction
+from manifest import FileMetadata
+from sstable import SSTableReader, SSTableWriter
+
+
+def build_inputs(dirpath, files, entries, value_size):
+    """Overlapping input files, newest first"""
+    inputs = []
+    readers = {}
+    value = b"v" * value_size
+    step = max(1, files // 2)
+    for number in range(files, 0, -1):
+        path = os.path.join(dirpath, f"input-{number}.sst")
+        writer = SSTableWriter(path)
+        for i in range(entries):
+            writer.add(b"key%012d" % (i * step + number % step),
+                       None if i % 13 == 0 else value, number * entries + i)
+        writer.finalize()
+        readers[number] = SSTableReader(path)
+        inputs.append(FileMetadata(number, 0, writer.first_key, writer.last_key,
+                                   writer.smallest_sequence, writer.largest_sequence,
+                                   writer.num_entries, os.path.getsize(path)))
+    return Compaction(0, 1, inputs, drop_tombstones=True), readers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=4)
+    parser.add_argument('--entries', type=int, default=200000)
+    parser.add_argument('--value-size', type=int, default=100)
+    parser.add_argument('--max-workers', type=int, default=8)
+    parser.add_argument('--target-file-mb', type=float, default=2)
+    args = parser.parse_args()
+    
+    tmp = tempfile.mkdtemp()
+    try:
+        compaction, readers = build_inputs(tmp, args.files, args.entries, args.value_size)
+        mb = compaction.input_bytes / 1024 / 1024
+        target = int(args.target_file_mb * 1024 * 1024)
+        counter = [0]
+        
+        def new_output():
+            counter[0] += 1
+            return counter[0], os.path.join(tmp, f"output-{counter[0]}.sst")
+        
+        def merge(executor=None, workers=1):
+            start = time.perf_counter()
+            outputs, _ = run_compaction(compaction, readers, new_output, target,
+                                        executor=executor, max_subcompactions=workers,
+                                        scratch_prefix=os.path.join(tmp, "scratch-"),
+                                        min_subcompaction_bytes=0)
+            elapsed = time.perf_counter() - start
+            for _, reader in outputs:
+                os.remove(reader.filepath)
+            return elapsed, len(outputs)
+        
+        print(f"{args.files} inputs x {args.entries:,} entries = {mb:.1f} MB, "
+              f"{os.cpu_count()} CPUs")
+        print(f"{'workers':>8} {'outputs':>8} {'seconds':>9} {'MB/s':>8} {'speedup':>8}")
+        base, outputs = merge()
+        print(f"{'inline':>8} {outputs:>8} {base:>9.2f} {mb / base:>8.1f} {1:>8.2f}")
+        
+        workers = 2
+        while workers <= args.max_workers:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(int, range(workers)))  # Start the workers outside the timing
+                elapsed, outputs = merge(pool, workers)
+            print(f"{workers:>8} {outputs:>8} {elapsed:>9.2f} {mb / elapsed:>8.1f} "
+                  f"{base / elapsed:>8.2f}")
+            workers *= 2
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark: SSTable point lookups with persistent file handles, from 1 and N threads
+
+Writes --tables SSTables of --entries entries each, then runs --lookups
+random present-key lookups (random table each) split over 1 and
+--threads threads, first with every reader open (one descriptor each,
+positioned reads), then through a TableCache allowed fewer open files
+than there are tables (--max-open, comma-separated): misses reopen the
+file (index and filter, no full-file checksum), as a store with
+max_open_files does. Reports microseconds per lookup, lookups per
+second and the table cache hit rate.
+
+Usage:
+    python benchmarks/bench_table_cache.py [--tables 50]
+        [--entries 20000] [--lookups 40000] [--threads 4] [--max-open 40,10]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from sstable import SSTableReader, SSTableWriter
+from table_cache import TableCache
+
+
+def run_threads(lookup, probes, threads):
+    """Seconds to run every (table, key) probe, split over threads"""
+    def worker(chunk):
+        for table, key in chunk:
+            lookup(table, key)
+    
+    workers = [threading.Thread(target=worker, args=(probes[n::threads],))
+               for n in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tables', type=int, default=50)
+    parser.add_argument('--entries', type=int, default=20000)
+    parser.add_argument('--lookups', type=int, default=40000)
+    parser.add_argument('--value-size', type=int, default=100)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--max-open', default='40,10',
+                        help='Comma-separated TableCache sizes')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    probes = [(rng.randrange(args.tables), b"user:%012d" % rng.randrange(args.entries))
+              for _ in range(args.lookups)]
+    
+    tmp = tempfile.mkdtemp()
+    try:
+        paths = []
+        for table in range(args.tables):
+            path = os.path.join(tmp, f"{table:06d}.sst")
+            writer = SSTableWriter(path)
+            for i in range(args.entries):
+                writer.add(b"user:%012d" % i, b"v" * args.value_size, i)
+            writer.finalize()
+            paths.append(path)
+        
+        print(f"{args.tables} tables x {args.entries:,} entries, {args.lookups:,} lookups")
+        print(f"{'readers':>16} {'threads':>7} {'us/lookup':>10} {'lookups/s':>10} {'hit rate':>9}")
+        
+        readers = [SSTableReader(path) for path in paths]
+        for threads in (1, args.threads):
+            elapsed = run_threads(lambda table, key: readers[table].get_entry(key),
+                                  probes, threads)
+            print(f"{'all open':>16} {threads:>7} {elapsed / args.lookups * 1e6:>10.1f} "
+                  f"{args.lookups / elapsed:>10,.0f} {'-':>9}")
+        for reader in readers:
+            reader.close()
+        
+        for max_open in (int(size) for size in args.max_open.split(',')):
+            cache = TableCache(lambda table: SSTableReader(paths[table], verify_checksum=False),
+                               max_open)
+            for table, path in enumerate(paths):
+                cache.insert(table, SSTableReader(path))
+            
+            def lookup(table, key):
+                reader = cache.acquire(table)
+                try:
+                    reader.get_entry(key)
+                finally:
+                    cache.release(reader)
+            
+            for threads in (1, args.threads):
+                before = cache.stats
+                elapsed = run_threads(lookup, probes, threads)
+                after = cache.stats
+                hits = after['hits'] - before['hits']
+                hit_rate = hits / (hits + after['misses'] - before['misses'])
+                print(f"{f'cache of {max_open}':>16} {threads:>7} "
+                      f"{elapsed / args.lookups * 1e6:>10.1f} {args.lookups / elapsed:>10,.0f} "
+                      f"{hit_rate:>9.1%}")
+            cache.close()
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark: WAL group commit
+
+Measures durable write throughput (sync_on_write=True) with and without
+group commit as the number of concurrent writer threads grows.
+
+Usage:
+    python benchmarks/bench_wal_group_commit.py [--ops N] [--threads 1,2,4,8,16]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from wal import WAL
+
+
+def run(wal_path: str, num_threads: int, ops_per_thread: int, group_commit: bool):
+    """Run one configuration, return (ops/s, fsyncs)"""
+    if os.path.exists(wal_path):
+        os.remove(wal_path)
+    wal = WAL(wal_path, sync_on_write=True, group_commit=group_commit)
+    value = b"v" * 100
+    
+    # A plain WAL is not thread-safe, so the baseline serializes writers
+    lock = threading.Lock()
+    
+    def writer(tid):
+        for i in range(ops_per_thread):
+            key = f"t{tid:02d}-{i:08d}".encode()
+            if group_commit:
+                wal.write(key, value)
+            else:
+                with lock:
+                    wal.write(key, value)
+    
+    threads = [threading.Thread(target=writer, args=(t,)) for t in range(num_threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    
+    syncs = wal.num_syncs
+    wal.close()
+    return num_threads * ops_per_thread / elapsed, syncs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ops', type=int, default=2000, help='total ops per run')
+    parser.add_argument('--threads', default='1,2,4,8,16', help='comma separated thread counts')
+    args = parser.parse_args()
+    
+    test_dir = tempfile.mkdtemp()
+    wal_path = os.path.join(test_dir, "bench.wal")
+    
+    print(f"{'threads':>8} {'mode':>14} {'ops/s':>12} {'fsyncs':>8}")
+    try:
+        for n in [int(t) for t in args.threads.split(',')]:
+            per_thread = max(1, args.ops // n)
+            for group_commit in (False, True):
+                ops, syncs = run(wal_path, n, per_thread, group_commit)
+                mode = "group-commit" if group_commit else "fsync/write"
+                print(f"{n:>8} {mode:>14} {ops:>12,.0f} {syncs:>8}")
+    finally:
+        shutil.rmtree(test_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
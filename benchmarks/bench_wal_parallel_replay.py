@@ -0,0 +1,91 @@
+"""
+Benchmark: restart time with parallel WAL replay
+
+Builds a WAL of --records entries, then measures the time to rebuild the
+memtable with the sequential read_all() + put loop and with
+parallel_replay for each worker count.
+
+Usage:
+    python benchmarks/bench_wal_parallel_replay.py [--records 5000000]
+        [--workers 1 4 8] [--value-size 100] [--block-format]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from memtable import Memtable
+from recovery import parallel_replay
+from wal import WAL
+
+
+def build_log(wal_path: str, records: int, value_size: int, block_format: bool) -> None:
+    value = b"v" * value_size
+    wal = WAL(wal_path, sync_on_write=False, block_format=block_format,
+              preallocate_bytes=0)
+    for start in range(0, records, 10000):
+        ops = [(f"key{i:012d}".encode(), value)
+               for i in range(start, min(start + 10000, records))]
+        wal.write_many(ops)
+    wal.close()
+
+
+def replay_sequential(wal_path: str, block_format: bool) -> int:
+    memtable = Memtable(max_size_bytes=1 << 40)
+    wal = WAL(wal_path, sync_on_write=False, block_format=block_format)
+    for entry in wal.read_all():
+        if entry.is_tombstone:
+            memtable.delete(entry.key, entry.sequence)
+        else:
+            memtable.put(entry.key, entry.value, entry.sequence)
+    wal.close()
+    return len(memtable)
+
+
+def replay_parallel(wal_path: str, block_format: bool, workers: int) -> int:
+    memtable = Memtable(max_size_bytes=1 << 40)
+    parallel_replay([wal_path], memtable, workers=workers, block_format=block_format)
+    return len(memtable)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=200000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--value-size', type=int, default=100)
+    parser.add_argument('--block-format', action='store_true')
+    args = parser.parse_args()
+    
+    test_dir = tempfile.mkdtemp()
+    wal_path = os.path.join(test_dir, "replay.wal")
+    try:
+        build_log(wal_path, args.records, args.value_size, args.block_format)
+        print(f"WAL: {os.path.getsize(wal_path) / 1024 / 1024:.0f} MB, "
+              f"{args.records:,} records, {os.cpu_count()} CPUs")
+        print(f"{'mode':>14} {'seconds':>9} {'records/s':>12}")
+        
+        start = time.perf_counter()
+        n = replay_sequential(wal_path, args.block_format)
+        elapsed = time.perf_counter() - start
+        assert n == args.records
+        print(f"{'read_all+put':>14} {elapsed:>9.2f} {n / elapsed:>12,.0f}")
+        
+        for workers in args.workers:
+            start = time.perf_counter()
+            n = replay_parallel(wal_path, args.block_format, workers)
+            elapsed = time.perf_counter() - start
+            assert n == args.records
+            print(f"{f'{workers} workers':>14} {elapsed:>9.2f} {n / elapsed:>12,.0f}")
+    finally:
+        shutil.rmtree(test_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark: WAL recovery time and peak memory
+
+Builds a WAL of the requested size, then measures WAL.read_all (mmap,
+lazy) against the old strategy of reading the whole file into one bytes
+object. Each mode runs in a fresh child process so peak RSS is isolated.
+
+Usage:
+    python benchmarks/bench_wal_recovery.py [--size-mb 1024] [--value-size 100]
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from wal import WAL, WALEntry
+
+
+def build_log(wal_path: str, size_bytes: int, value_size: int) -> int:
+    """Write entries until the log reaches size_bytes, return entry count"""
+    value = b"v" * value_size
+    count = 0
+    written = 0
+    chunk = []
+    with open(wal_path, 'wb') as f:
+        while written < size_bytes:
+            record = WALEntry(f"key{count:012d}".encode(), value, count + 1).serialize()
+            chunk.append(record)
+            written += len(record)
+            count += 1
+            if len(chunk) >= 10000:
+                f.write(b''.join(chunk))
+                chunk = []
+        f.write(b''.join(chunk))
+    return count
+
+
+def recover_mmap(wal_path: str, queue):
+    start = time.perf_counter()
+    wal = WAL(wal_path, sync_on_write=False)
+    count = sum(1 for _ in wal.read_all())
+    wal.close()
+    elapsed = time.perf_counter() - start
+    queue.put((count, elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+
+
+def recover_read_whole(wal_path: str, queue):
+    """Baseline: f.read() everything, then deserialize from the bytes"""
+    start = time.perf_counter()
+    with open(wal_path, 'rb') as f:
+        data = f.read()
+    count = 0
+    offset = 0
+    while offset < len(data):
+        _, offset = WALEntry.deserialize(data, offset)
+        count += 1
+    elapsed = time.perf_counter() - start
+    queue.put((count, elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+
+
+def measure(target, wal_path: str):
+    queue = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=target, args=(wal_path, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size-mb', type=int, default=64, help='WAL size in MB (1024 = 1 GB)')
+    parser.add_argument('--value-size', type=int, default=100)
+    args = parser.parse_args()
+    
+    test_dir = tempfile.mkdtemp()
+    wal_path = os.path.join(test_dir, "recovery.wal")
+    try:
+        count = build_log(wal_path, args.size_mb * 1024 * 1024, args.value_size)
+        print(f"WAL: {os.path.getsize(wal_path) / 1024 / 1024:.0f} MB, {count:,} entries")
+        print(f"{'mode':>12} {'seconds':>9} {'entries/s':>12} {'peak RSS MB':>12}")
+        for name, target in (("read-whole", recover_read_whole), ("mmap", recover_mmap)):
+            n, elapsed, max_rss_kb = measure(target, wal_path)
+            assert n == count
+            print(f"{name:>12} {elapsed:>9.2f} {n / elapsed:>12,.0f} {max_rss_kb / 1024:>12.1f}")
+    finally:
+        shutil.rmtree(test_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
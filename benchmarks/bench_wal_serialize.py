@@ -0,0 +1,121 @@
+"""
+Benchmark: WAL serialization throughput
+
+Compares, for small records (16 B key, 16 B / 100 B values):
+    - baseline:     the original concatenation-based serializer
+    - serialize:    WALEntry.serialize (includes building the WALEntry)
+    - pack_into:    headers packed into one reused bytearray, CRC over
+                    memoryview slices (the approach encode_records rejected)
+    - encode:       encode_records (precompiled Struct.pack, chained CRC)
+    - WAL.write:    one write() syscall per record (sync off)
+    - write_many:   one os.writev per batch (sync off)
+
+Usage:
+    python benchmarks/bench_wal_serialize.py [--ops 200000] [--batch 1000]
+"""
+
+import argparse
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+from binascii import crc32
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from wal import WAL, WALEntry, encode_records, _HEADER, _CHECKSUM
+
+
+def baseline_serialize(key: bytes, value: bytes, sequence: int) -> bytes:
+    """The serializer as it was: three concatenations per record"""
+    header = struct.pack('<QII', sequence, len(key), len(value))
+    data = header + key + value
+    checksum = crc32(data) & 0xFFFFFFFF
+    return data + struct.pack('<I', checksum)
+
+
+def pack_into_encode(ops, sequence: int, buffer: bytearray):
+    """Reusable-buffer variant: pack_into + CRC over memoryview slices"""
+    view = memoryview(buffer)
+    iov = []
+    offset = 0
+    for key, value in ops:
+        _HEADER.pack_into(buffer, offset, sequence, len(key), len(value))
+        checksum = crc32(value, crc32(key, crc32(view[offset:offset + 16])))
+        _CHECKSUM.pack_into(buffer, offset + 16, checksum & 0xFFFFFFFF)
+        iov += (view[offset:offset + 16], key, value, view[offset + 16:offset + 20])
+        offset += 20
+        sequence += 1
+    return iov
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ops', type=int, default=200000)
+    parser.add_argument('--batch', type=int, default=1000, help='records per write_many/encode')
+    args = parser.parse_args()
+    
+    test_dir = tempfile.mkdtemp()
+    try:
+        print(f"{'value':>6} {'method':>12} {'ops/s':>14}")
+        for value_size in (16, 100):
+            value = b"v" * value_size
+            ops = [(f"key{i:013d}".encode(), value) for i in range(args.ops)]
+            batches = [ops[i:i + args.batch] for i in range(0, len(ops), args.batch)]
+            
+            def run_baseline():
+                for i, (k, v) in enumerate(ops):
+                    baseline_serialize(k, v, i)
+            
+            def run_serialize():
+                for i, (k, v) in enumerate(ops):
+                    WALEntry(k, v, i).serialize()
+            
+            buffer = bytearray(args.batch * 20)
+            
+            def run_pack_into():
+                seq = 0
+                for batch in batches:
+                    pack_into_encode(batch, seq, buffer)
+                    seq += len(batch)
+            
+            def run_encode():
+                seq = 0
+                for batch in batches:
+                    encode_records(batch, seq)
+                    seq += len(batch)
+            
+            def run_wal_write():
+                path = os.path.join(test_dir, f"write-{value_size}.wal")
+                with WAL(path, sync_on_write=False) as wal:
+                    for k, v in ops:
+                        wal.write(k, v)
+            
+            def run_write_many():
+                path = os.path.join(test_dir, f"many-{value_size}.wal")
+                with WAL(path, sync_on_write=False) as wal:
+                    for batch in batches:
+                        wal.write_many(batch)
+            
+            for name, fn in (("baseline", run_baseline), ("serialize", run_serialize),
+                             ("pack_into", run_pack_into), ("encode", run_encode),
+                             ("WAL.write", run_wal_write),
+                             ("write_many", run_write_many)):
+                elapsed = timed(fn)
+                print(f"{value_size:>5}B {name:>12} {args.ops / elapsed:>14,.0f}")
+    finally:
+        shutil.rmtree(test_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: WAL write throughput per sync policy
+
+Single writer, one record per write() call. Reports writes/s, the
+number of fsyncs issued and the speedup over SyncPolicy.always().
+
+Usage:
+    python benchmarks/bench_wal_sync_policy.py [--records 20000] [--value-size 100]
+        [--interval-ms 10] [--sync-bytes 1048576] [--dir /path/on/real/disk]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from wal import WAL, SyncPolicy
+
+
+def run(wal_path: str, policy: SyncPolicy, records: int, value_size: int):
+    if os.path.exists(wal_path):
+        os.remove(wal_path)
+    value = b"v" * value_size
+    wal = WAL(wal_path, sync_policy=policy)
+    start = time.perf_counter()
+    for i in range(records):
+        wal.write(f"key{i:012d}".encode(), value)
+    wal.sync()  # Same durability at the end for every policy
+    elapsed = time.perf_counter() - start
+    wal.close()
+    return elapsed, wal.num_syncs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=20000)
+    parser.add_argument('--value-size', type=int, default=100)
+    parser.add_argument('--interval-ms', type=float, default=10)
+    parser.add_argument('--sync-bytes', type=int, default=1024 * 1024)
+    parser.add_argument('--dir', default=None,
+                        help='Directory for the log (tmpfs makes fsync free)')
+    args = parser.parse_args()
+    
+    test_dir = tempfile.mkdtemp(dir=args.dir)
+    wal_path = os.path.join(test_dir, "sync.wal")
+    policies = [
+        SyncPolicy.always(),
+        SyncPolicy.every(args.interval_ms),
+        SyncPolicy.bytes(args.sync_bytes),
+        SyncPolicy.os(),
+    ]
+    try:
+        print(f"{args.records:,} writes of {args.value_size} B values")
+        print(f"{'policy':>26} {'seconds':>9} {'writes/s':>12} {'fsyncs':>8} {'speedup':>8}")
+        baseline = None
+        for policy in policies:
+            elapsed, syncs = run(wal_path, policy, args.records, args.value_size)
+            rate = args.records / elapsed
+            baseline = baseline or rate
+            print(f"{policy!r:>26} {elapsed:>9.3f} {rate:>12,.0f} {syncs:>8} {rate / baseline:>7.1f}x")
+    finally:
+        shutil.rmtree(test_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
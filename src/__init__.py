@@ -5,20 +5,61 @@ A simple Log-Structured Merge Tree key-value store.
 
 Main components:
     - WAL: Write-Ahead Log for durability
+    - SegmentedWAL: WAL split into rotating, recyclable segments
+    - parallel_replay: multi-process WAL recovery
     - Memtable: In-memory sorted storage
+    - ArenaMemtable: Memtable variant with compact, accurately sized storage
+    - SkipListMemtable: Memtable variant with lock-free concurrent readers
     - SSTable: On-disk sorted storage
+    - BloomFilter: per-SSTable filter that skips lookups of absent keys
+    - BlockCache: SSTable block cache shared across readers and stores
+    - TableCache: bounded LRU of open SSTable readers
+    - MergingIterator: newest-wins merge of memtables and SSTables
+    - Manifest: persistent list of live SSTables
+    - LeveledCompaction / TieredCompaction: compaction strategies
+    - LSMTree: the store (memtable queue + background flush and compaction)
+    - WriteBufferManager: memtable memory budget shared across stores
 """
 
-from .wal import WAL, WALEntry
+from .wal import WAL, WALEntry, WriteBatch, SyncPolicy
+from .segmented_wal import SegmentedWAL
+from .recovery import parallel_replay
 from .memtable import Memtable, MemtableIterator
+from .arena_memtable import ArenaMemtable
+from .skiplist_memtable import SkipListMemtable
 from .sstable import SSTableReader, SSTableWriter
+from .bloom_filter import BloomFilter
+from .block_cache import BlockCache
+from .table_cache import TableCache
+from .merging_iterator import MergingIterator
+from .manifest import FileMetadata, Manifest
+from .compaction import Compaction, LeveledCompaction, TieredCompaction
+from .lsm_tree import LSMTree
+from .write_buffer_manager import WriteBufferManager
 
 __version__ = "0.1.0"
 __all__ = [
     'WAL',
     'WALEntry',
+    'WriteBatch',
+    'SyncPolicy',
+    'SegmentedWAL',
+    'parallel_replay',
     'Memtable',
     'MemtableIterator',
+    'ArenaMemtable',
+    'SkipListMemtable',
     'SSTableReader',
     'SSTableWriter',
+    'BloomFilter',
+    'BlockCache',
+    'TableCache',
+    'MergingIterator',
+    'FileMetadata',
+    'Manifest',
+    'Compaction',
+    'LeveledCompaction',
+    'TieredCompaction',
+    'LSMTree',
+    'WriteBufferManager',
 ]
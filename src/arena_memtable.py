@@ -0,0 +1,305 @@
+"""
+Arena Memtable Module
+
+Purpose:
+    Drop-in alternative to Memtable that keeps its memory budget honest.
+    A SortedDict of Python bytes objects costs several times the raw
+    key/value size in real RSS (object headers, tuples, dict and list
+    slots), so a "4 MB" Memtable holds far more than 4 MB.
+
+Design:
+    - Arena: keys and values are copied into fixed-size bytearray chunks.
+      One record per write:
+        [key_size(4)][value_size(4)][sequence(8)][key][value]
+      (value_size 0xFFFFFFFF marks a tombstone)
+    - Index: record locations (chunk << 32 | offset) in array('Q')
+      buckets sorted by key, plus the largest key of each bucket for a
+      first bisect. 8 bytes per entry instead of a Python object graph.
+    - Overwrites append a new record and repoint the index slot; the old
+      record stays in the arena until the memtable is flushed.
+    - size_bytes() counts the chunks actually allocated plus the index,
+      so is_full() tracks real memory.
+
+Usage:
+    memtable = ArenaMemtable(max_size_bytes=4 * 1024 * 1024)
+    memtable.put(b"key", b"value", sequence=1)
+    memtable.get(b"key")
+"""
+
+import bisect
+import struct
+import sys
+from array import array
+from typing import Iterator, List, Optional, Tuple
+
+try:
+    from .memtable import Memtable
+except ImportError:
+    from memtable import Memtable
+
+
+_RECORD_HEADER = struct.Struct('<IIQ')  # key_size, value_size, sequence
+_TOMBSTONE_SIZE = 0xFFFFFFFF
+_BUCKET_OVERHEAD = sys.getsizeof(array('Q')) + 16  # Array object + list slots
+
+
+class ArenaMemtable:
+    """
+    Memtable storing keys and values in a contiguous arena
+    
+    Same interface as Memtable (put/get/get_entry/delete/iter_all/
+    iter_entries/is_full/clear, sequence numbers, TOMBSTONE sentinel),
+    so it can be flushed by the same code.
+    """
+    
+    TOMBSTONE = Memtable.TOMBSTONE  # Shared so flush code works with both
+    DEFAULT_MAX_SIZE = Memtable.DEFAULT_MAX_SIZE
+    CHUNK_SIZE = 256 * 1024     # Arena allocation unit
+    MIN_CHUNKS = 4              # Chunks that fit in the budget at least
+    BUCKET_SIZE = 512           # Index entries per bucket before a split
+    
+    def __init__(self, max_size_bytes: int = DEFAULT_MAX_SIZE,
+                 chunk_size: int = CHUNK_SIZE):
+        """
+        Args:
+            max_size_bytes: Maximum size in bytes before flush is triggered
+            chunk_size: Size of each arena chunk (records larger than this
+                get a chunk of their own). Capped at max_size_bytes /
+                MIN_CHUNKS: a chunk counts in full once allocated, so one
+                as big as the budget would fill the memtable at once.
+        """
+        self.max_size_bytes = max_size_bytes
+        self.chunk_size = max(1, min(chunk_size, max_size_bytes // self.MIN_CHUNKS))
+        self.max_sequence = 0  # Highest sequence number stored
+        self.clear()
+    
+    def put(self, key: bytes, value: bytes, sequence: Optional[int] = None) -> None:
+        """
+        Insert or update a key-value pair
+        
+        Args:
+            key: The key (must be bytes)
+            value: The value (must be bytes)
+            sequence: Sequence number of the write. A write older than the
+                stored entry (smaller sequence) is ignored; a write without
+                one always replaces the stored entry.
+        """
+        if not isinstance(key, bytes):
+            raise TypeError("Key must be bytes")
+        if not isinstance(value, bytes):
+            raise TypeError("Value must be bytes")
+        
+        self._set(key, value, sequence)
+    
+    def delete(self, key: bytes, sequence: Optional[int] = None) -> None:
+        """
+        Mark a key as deleted (insert tombstone)
+        
+        Args:
+            key: The key to delete
+            sequence: Sequence number of the delete (None: always applies)
+        """
+        if not isinstance(key, bytes):
+            raise TypeError("Key must be bytes")
+        
+        self._set(key, None, sequence)
+    
+    def get(self, key: bytes) -> Optional[bytes]:
+        """
+        Retrieve value for a key
+        
+        Returns:
+            The value if key exists and not deleted, None otherwise
+        """
+        entry = self.get_entry(key)
+        if entry is None or entry[0] is self.TOMBSTONE:
+            return None
+        return entry[0]
+    
+    def get_entry(self, key: bytes) -> Optional[Tuple[object, int]]:
+        """
+        Retrieve the raw entry for a key
+        
+        Returns:
+            (value, sequence) where value may be TOMBSTONE, or None if the
+            key is not in the memtable
+        """
+        if not isinstance(key, bytes):
+            raise TypeError("Key must be bytes")
+        
+        i, pos, found = self._locate(key)
+        if not found:
+            return None
+        _, value, sequence = self._read(self._buckets[i][pos])
+        return value, sequence
+    
+    def _set(self, key: bytes, value: Optional[bytes], sequence: Optional[int]) -> None:
+        """Append a record and point the index at it (value None = tombstone)"""
+        if sequence is None:
+            sequence = self.max_sequence  # Unsequenced: as new as anything stored
+        i, pos, found = self._locate(key)
+        if found:
+            chunk, offset = self._split_location(self._buckets[i][pos])
+            if _RECORD_HEADER.unpack_from(chunk, offset)[2] > sequence:
+                return  # Stale write (e.g. replayed or reordered), keep newer
+        
+        location = self._append(key, value, sequence)
+        if sequence > self.max_sequence:
+            self.max_sequence = sequence
+        
+        if found:
+            self._buckets[i][pos] = location
+            return
+        
+        self._count += 1
+        if not self._buckets:
+            self._buckets.append(array('Q', [location]))
+            self._maxes.append(key)
+            self._maxes_bytes += sys.getsizeof(key)
+            return
+        if i == len(self._buckets):
+            i -= 1  # Past the last key: append to the last bucket
+            pos = len(self._buckets[i])
+        bucket = self._buckets[i]
+        bucket.insert(pos, location)
+        if pos == len(bucket) - 1:
+            self._maxes_bytes += sys.getsizeof(key) - sys.getsizeof(self._maxes[i])
+            self._maxes[i] = key
+        if len(bucket) > 2 * self.BUCKET_SIZE:
+            self._split_bucket(i)
+    
+    def _locate(self, key: bytes) -> Tuple[int, int, bool]:
+        """
+        Find the bucket and slot for a key
+        
+        Returns:
+            (bucket index, position in bucket, whether the key is there).
+            The bucket index equals len(buckets) if key is past the end.
+        """
+        i = bisect.bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            return i, 0, False
+        
+        bucket = self._buckets[i]
+        lo, hi = 0, len(bucket)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(bucket[mid]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        found = lo < len(bucket) and self._key_at(bucket[lo]) == key
+        return i, lo, found
+    
+    def _split_bucket(self, i: int) -> None:
+        bucket = self._buckets[i]
+        half = len(bucket) // 2
+        self._buckets[i:i + 1] = [bucket[:half], bucket[half:]]
+        key = self._key_at(bucket[half - 1])
+        self._maxes.insert(i, key)
+        self._maxes_bytes += sys.getsizeof(key)
+    
+    def _append(self, key: bytes, value: Optional[bytes], sequence: int) -> int:
+        """Copy a record into the arena, return its location"""
+        value_size = _TOMBSTONE_SIZE if value is None else len(value)
+        size = _RECORD_HEADER.size + len(key) + (0 if value is None else value_size)
+        
+        if not self._chunks or self._chunk_used + size > len(self._chunks[-1]):
+            self._chunks.append(bytearray(max(self.chunk_size, size)))
+            self._arena_bytes += len(self._chunks[-1])
+            self._chunk_used = 0
+        
+        chunk = self._chunks[-1]
+        offset = self._chunk_used
+        _RECORD_HEADER.pack_into(chunk, offset, len(key), value_size, sequence)
+        start = offset + _RECORD_HEADER.size
+        chunk[start:start + len(key)] = key
+        if value is not None:
+            start += len(key)
+            chunk[start:start + value_size] = value
+        self._chunk_used = offset + size
+        return (len(self._chunks) - 1) << 32 | offset
+    
+    def _split_location(self, location: int) -> Tuple[bytearray, int]:
+        return self._chunks[location >> 32], location & 0xFFFFFFFF
+    
+    def _key_at(self, location: int) -> bytes:
+        chunk = self._chunks[location >> 32]
+        offset = location & 0xFFFFFFFF
+        key_size = _RECORD_HEADER.unpack_from(chunk, offset)[0]
+        start = offset + _RECORD_HEADER.size
+        return bytes(chunk[start:start + key_size])
+    
+    def _read(self, location: int) -> Tuple[bytes, object, int]:
+        """Decode the record at location into (key, value or TOMBSTONE, sequence)"""
+        chunk = self._chunks[location >> 32]
+        offset = location & 0xFFFFFFFF
+        key_size, value_size, sequence = _RECORD_HEADER.unpack_from(chunk, offset)
+        start = offset + _RECORD_HEADER.size
+        key = bytes(chunk[start:start + key_size])
+        if value_size == _TOMBSTONE_SIZE:
+            return key, self.TOMBSTONE, sequence
+        start += key_size
+        return key, bytes(chunk[start:start + value_size]), sequence
+    
+    def is_full(self) -> bool:
+        """Check if memtable has reached size threshold"""
+        return self.size_bytes() >= self.max_size_bytes
+    
+    def size_bytes(self) -> int:
+        """
+        Memory held by the memtable in bytes
+        
+        Arena chunks count in full as soon as they are allocated; the
+        index counts its 8-byte slots plus per-bucket object overhead.
+        """
+        return (self._arena_bytes + 8 * self._count
+                + _BUCKET_OVERHEAD * len(self._buckets) + self._maxes_bytes)
+    
+    def num_entries(self) -> int:
+        """Get number of entries (including tombstones)"""
+        return self._count
+    
+    def is_empty(self) -> bool:
+        """Check if memtable is empty"""
+        return self._count == 0
+    
+    def iter_all(self) -> Iterator[Tuple[bytes, object]]:
+        """
+        Iterate over all entries in sorted order
+        
+        Yields:
+            Tuples of (key, value) where value may be TOMBSTONE
+        """
+        for key, value, _ in self.iter_entries():
+            yield key, value
+    
+    def iter_entries(self) -> Iterator[Tuple[bytes, object, int]]:
+        """
+        Iterate over all entries in sorted order, with sequence numbers
+        
+        Yields:
+            Tuples of (key, value, sequence) where value may be TOMBSTONE
+        """
+        read = self._read
+        for bucket in self._buckets:
+            for location in bucket:
+                yield read(location)
+    
+    def clear(self):
+        """Clear all entries (called after successful flush)"""
+        self._chunks: List[bytearray] = []
+        self._chunk_used = 0
+        self._arena_bytes = 0
+        self._buckets: List[array] = []
+        self._maxes: List[bytes] = []
+        self._maxes_bytes = 0
+        self._count = 0
+        self.max_sequence = 0
+    
+    def __len__(self):
+        return self._count
+    
+    def __repr__(self):
+        return (f"ArenaMemtable(entries={self._count}, "
+                f"size={self.size_bytes()}/{self.max_size_bytes} bytes)")
@@ -0,0 +1,172 @@
+"""
+Block Cache Module
+
+Purpose:
+    Keeps recently read SSTable blocks in memory, so hot lookups and
+    scans don't re-read and re-check them. One cache is meant to be
+    shared by every reader (and store) in the process, under one byte
+    budget.
+
+How It Works:
+    - Entries are keyed by (file id, block offset); every reader gets a
+      fresh file id from new_id(), so a deleted file's blocks are never
+      looked up again and just age out
+    - The budget is split over shards (power of two), each an LRU list
+      with its own lock, so concurrent readers rarely contend
+    - Inserting past a shard's share evicts from its cold end
+    - Low-priority inserts (compaction reads) go to the cold end: a
+      one-pass scan only cycles through the space it is given, instead of
+      evicting the hot blocks; a later hit moves a block to the hot end
+    - Pinned entries (index and filter blocks of open readers) are
+      charged to the budget but never evicted, until released
+
+Usage:
+    cache = BlockCache(64 * 1024 * 1024)
+    db1 = LSMTree("data1", block_cache=cache)
+    db2 = LSMTree("data2", block_cache=cache)
+    cache.stats                             # hits, misses, evictions, ...
+"""
+
+import itertools
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class _Shard:
+    """One LRU list (oldest first) and its pinned entries"""
+    
+    __slots__ = ('lock', 'capacity', 'entries', 'pinned', 'usage', 'pinned_usage',
+                 'hits', 'misses', 'inserts', 'evictions')
+    
+    def __init__(self, capacity: int):
+        self.lock = threading.Lock()
+        self.capacity = capacity
+        self.entries = OrderedDict()    # key -> (value, charge)
+        self.pinned = {}                # key -> (value, charge)
+        self.usage = 0                  # Charge of entries + pinned
+        self.pinned_usage = 0
+        self.hits = 0
+        self.misses = 0
+        self.inserts = 0
+        self.evictions = 0
+
+
+class BlockCache:
+    """
+    Byte-budgeted, sharded LRU cache of SSTable blocks (thread-safe)
+    """
+    
+    DEFAULT_SHARD_BITS = 4  # 16 shards
+    
+    def __init__(self, capacity: int, shard_bits: int = DEFAULT_SHARD_BITS):
+        """
+        Args:
+            capacity: Budget for all entries (pinned ones included), in bytes
+            shard_bits: Split the budget over 2 ** shard_bits shards
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        num_shards = 1 << shard_bits
+        self._mask = num_shards - 1
+        self._shards = [_Shard(capacity // num_shards) for _ in range(num_shards)]
+        self._ids = itertools.count(1)
+    
+    def new_id(self) -> int:
+        """A file id no other reader of this cache uses"""
+        return next(self._ids)  # count() is atomic under the GIL
+    
+    def _shard(self, key: Hashable) -> _Shard:
+        return self._shards[hash(key) & self._mask]
+    
+    def lookup(self, key: Hashable) -> Optional[Any]:
+        """
+        Returns:
+            The cached value (now the most recently used), or None
+        """
+        shard = self._shard(key)
+        with shard.lock:
+            entry = shard.entries.get(key)
+            if entry is not None:
+                shard.entries.move_to_end(key)
+                shard.hits += 1
+                return entry[0]
+            entry = shard.pinned.get(key)
+            if entry is not None:
+                shard.hits += 1
+                return entry[0]
+            shard.misses += 1
+            return None
+    
+    def insert(self, key: Hashable, value: Any, charge: int,
+               low_priority: bool = False, pinned: bool = False) -> None:
+        """
+        Add or replace an entry, evicting the least recently used ones
+        
+        Args:
+            key: (file id, block offset)
+            value: The block
+            charge: Bytes it counts for against the budget
+            low_priority: Insert at the cold end (first to be evicted),
+                for blocks read once by a compaction or bulk scan
+            pinned: Never evict it; release() it when the file is closed
+        """
+        shard = self._shard(key)
+        with shard.lock:
+            self._remove(shard, key)
+            shard.inserts += 1
+            shard.usage += charge
+            if pinned:
+                shard.pinned[key] = (value, charge)
+                shard.pinned_usage += charge
+            else:
+                shard.entries[key] = (value, charge)
+                if low_priority:
+                    shard.entries.move_to_end(key, last=False)
+            while shard.usage > shard.capacity and shard.entries:
+                _, (_, evicted) = shard.entries.popitem(last=False)
+                shard.usage -= evicted
+                shard.evictions += 1
+    
+    def release(self, key: Hashable) -> None:
+        """Drop an entry (pinned or not), e.g. when its file is closed"""
+        shard = self._shard(key)
+        with shard.lock:
+            self._remove(shard, key)
+    
+    @staticmethod
+    def _remove(shard: _Shard, key: Hashable) -> None:
+        """Drop key from a shard (lock held)"""
+        entry = shard.entries.pop(key, None)
+        if entry is None:
+            entry = shard.pinned.pop(key, None)
+            if entry is None:
+                return
+            shard.pinned_usage -= entry[1]
+        shard.usage -= entry[1]
+    
+    @property
+    def usage(self) -> int:
+        """Bytes charged to the cache"""
+        return sum(shard.usage for shard in self._shards)
+    
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Snapshot of usage and counters, summed over the shards"""
+        totals = dict.fromkeys(('hits', 'misses', 'inserts', 'evictions', 'usage',
+                                'pinned_usage', 'entries'), 0)
+        for shard in self._shards:
+            with shard.lock:
+                totals['hits'] += shard.hits
+                totals['misses'] += shard.misses
+                totals['inserts'] += shard.inserts
+                totals['evictions'] += shard.evictions
+                totals['usage'] += shard.usage
+                totals['pinned_usage'] += shard.pinned_usage
+                totals['entries'] += len(shard.entries) + len(shard.pinned)
+        totals['capacity'] = self.capacity
+        return totals
+    
+    def __repr__(self):
+        return f"BlockCache(usage={self.usage}/{self.capacity} bytes, shards={self._mask + 1})"
@@ -0,0 +1,116 @@
+"""
+Bloom Filter Module
+
+Purpose:
+    Answers "is this key possibly in the SSTable?" from memory, so a
+    lookup of a key the file does not hold skips the disk read.
+
+Key Features:
+    - No false negatives; false positives at about 1% for 10 bits per key
+    - Double hashing: one 64-bit hash per key, probe i tests bit
+      (h1 + i * h2) mod m with h1/h2 its low/high 32 bits
+    - Built in one batch from the key hashes collected by the writer:
+      probe round by probe round, each a pass over an array of positions
+      (the layout a vectorized build would use)
+
+Block Layout:
+    [bit array (bit b = byte b // 8, bit b % 8)][num_probes(4)]
+
+Usage:
+    hashes = [key_hash(key) for key in keys]
+    data = BloomFilter.build(hashes, bits_per_key=10)
+    BloomFilter(data).might_contain(b"key")
+"""
+
+import hashlib
+import struct
+from operator import add
+from typing import Sequence
+
+
+_UINT32 = struct.Struct('<I')
+_LOW32 = 0xFFFFFFFF
+_BITS = bytes.maketrans(b'\x00\x01', b'01')
+
+
+def key_hash(key: bytes) -> int:
+    """64-bit hash of a key, stable across processes (unlike hash())"""
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+
+
+class BloomFilter:
+    """
+    Read side of a filter block
+    
+    Usage:
+        bloom = BloomFilter(data)
+        if not bloom.might_contain(key):
+            return None  # Skip disk read
+    """
+    
+    MIN_BITS = 64  # Keeps a filter of very few keys from saturating
+    MAX_PROBES = 30
+    
+    def __init__(self, data: bytes):
+        """
+        Args:
+            data: Filter block written by build()
+        """
+        if len(data) < 4:
+            raise ValueError("Invalid filter block: too short")
+        self._bits = bytes(data[:-4])
+        self._num_bits = len(self._bits) * 8
+        (self.num_probes,) = _UINT32.unpack_from(data, len(data) - 4)
+    
+    @staticmethod
+    def num_probes_for(bits_per_key: int) -> int:
+        """Probes minimizing false positives: bits_per_key * ln 2"""
+        return max(1, min(BloomFilter.MAX_PROBES, round(bits_per_key * 0.69)))
+    
+    @classmethod
+    def build(cls, hashes: Sequence[int], bits_per_key: int) -> bytes:
+        """
+        Build a filter block
+        
+        Args:
+            hashes: key_hash() of every key
+            bits_per_key: Filter bits per key
+        
+        Returns:
+            The filter block
+        """
+        num_probes = cls.num_probes_for(bits_per_key)
+        num_bytes = (max(cls.MIN_BITS, len(hashes) * bits_per_key) + 7) // 8
+        num_bits = num_bytes * 8
+        
+        # One byte per bit while setting (a plain store per position),
+        # packed to bits at the end
+        flags = bytearray(num_bits)
+        positions = [h & _LOW32 for h in hashes]
+        steps = [h >> 32 for h in hashes]
+        for probe in range(num_probes):
+            for position in positions:
+                flags[position % num_bits] = 1
+            if probe + 1 < num_probes:
+                positions = list(map(add, positions, steps))
+        
+        # Reversed, the flags read as a base-2 number whose bit b is flag b
+        bits = int(flags[::-1].translate(_BITS), 2).to_bytes(num_bytes, 'little')
+        return bits + _UINT32.pack(num_probes)
+    
+    def might_contain(self, key: bytes) -> bool:
+        """False if the key was certainly not added"""
+        h = key_hash(key)
+        position, step = h & _LOW32, h >> 32
+        bits = self._bits
+        num_bits = self._num_bits
+        for _ in range(self.num_probes):
+            bit = position % num_bits
+            if not bits[bit >> 3] & (1 << (bit & 7)):
+                return False
+            position += step
+        return True
+    
+    def __len__(self):
+        """Size of the bit array in bytes"""
+        return len(self._bits)
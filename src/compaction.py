@@ -0,0 +1,564 @@
+"""
+Compaction Module
+
+Purpose:
+    Merges SSTables so that reads probe a bounded number of files and
+    the space held by overwritten and deleted keys is given back.
+
+Leveled Layout:
+    - L0: flushed memtables as they are; their key ranges overlap, so a
+      read may have to check every L0 file
+    - L1..Ln: each level is one sorted run of files with disjoint key
+      ranges (a read checks at most one file per level), and each level
+      may hold level_size_multiplier times more bytes than the one above
+      (max_bytes_for_level_base for L1)
+
+Picking:
+    Every level gets a score: L0 = files / level0_file_trigger, Ln =
+    bytes / max_bytes_for_level(n). The level with the highest score
+    >= 1 is compacted:
+    - L0: all L0 files + the L1 files they overlap
+    - Ln: one file (round-robin over the key space) + the Ln+1 files it
+      overlaps
+    The inputs are merged (MergingIterator: newest version wins) into new
+    files of about target_file_size in the next level. Tombstones are
+    dropped when no older level below can hold the key any more. A single
+    file that overlaps nothing in the next level is just moved there.
+
+Tiered Layout (TieredCompaction):
+    Every file is one sorted run in L0, newest first; no other level is
+    used. Runs are merged, never rewritten into a next level, so each
+    byte is rewritten about once per tier instead of once per level:
+    lower write amplification, at the price of more files per read and
+    more space held by dead versions. A compaction merges runs that are
+    adjacent in time (so the newest-first order of L0 stays valid):
+    - space amplification: if all runs but the oldest take more than
+      max_size_amplification_percent of the oldest, merge everything
+    - size tiers: from the newest run on, take the next older run while
+      it is at most size_ratio times the runs taken so far; a tier of
+      min_merge_width..max_merge_width runs is merged
+    - too many runs (max_sorted_runs): merge the newest ones regardless
+      of size
+    Tombstones are dropped when the oldest run takes part.
+
+Subcompactions:
+    A large compaction's key space can be cut into disjoint [start, end)
+    ranges at the inputs' sparse index keys, about equal in input size.
+    Each range is merged by a worker process into its own output files
+    (SSTableReader.iter_entries(start, end) reads only that part of each
+    input); the parent then installs all outputs in one manifest update.
+
+Strategies share one interface (num_levels, target_file_size, pick,
+needs_compaction, ingest_level, stall_writes); a store uses the one
+given to it and can only reopen files the strategy has levels for.
+
+Usage:
+    strategy = LeveledCompaction(max_bytes_for_level_base=64 * 1024 * 1024)
+    db = LSMTree("data", compaction=strategy)
+    db = LSMTree("events", compaction=TieredCompaction(min_merge_width=4))
+"""
+
+import itertools
+import os
+from concurrent.futures import Executor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .manifest import FileMetadata
+    from .merging_iterator import MergingIterator
+    from .sstable import SSTableReader, SSTableWriter
+except ImportError:
+    from manifest import FileMetadata
+    from merging_iterator import MergingIterator
+    from sstable import SSTableReader, SSTableWriter
+
+
+MIN_SUBCOMPACTION_BYTES = 4 * 1024 * 1024   # Smaller ranges are not worth a process
+SCRATCH_SUFFIX = '.part'                    # Subcompaction outputs before install
+
+
+class Compaction:
+    """
+    One unit of compaction work: input files and where the output goes
+    """
+    
+    def __init__(self, level: int, output_level: int, inputs: List[FileMetadata],
+                 drop_tombstones: bool, score: float = 0.0):
+        """
+        Args:
+            level: Level the compaction was picked for
+            output_level: Level the merged files are written to
+            inputs: Files to merge, newest first
+            drop_tombstones: No older data for these keys exists below
+                output_level, so deleted keys can be left out
+            score: Score of the level when picked
+        """
+        self.level = level
+        self.output_level = output_level
+        self.inputs = inputs
+        self.drop_tombstones = drop_tombstones
+        self.score = score
+    
+    @property
+    def input_bytes(self) -> int:
+        return sum(meta.file_size for meta in self.inputs)
+    
+    @property
+    def is_trivial_move(self) -> bool:
+        """A single file with nothing to merge: move it, don't rewrite it"""
+        return len(self.inputs) == 1 and self.inputs[0].level == self.level
+    
+    def __repr__(self):
+        return (f"Compaction(L{self.level}->L{self.output_level}, "
+                f"inputs={[meta.number for meta in self.inputs]}, score={self.score:.2f})")
+
+
+def key_range(files: Sequence[FileMetadata]) -> Tuple[bytes, bytes]:
+    """Smallest and largest key over several files"""
+    return min(m.smallest for m in files), max(m.largest for m in files)
+
+
+def overlapping(files: Sequence[FileMetadata], smallest: bytes,
+                largest: bytes) -> List[FileMetadata]:
+    """Files whose key range intersects [smallest, largest]"""
+    return [meta for meta in files if meta.overlaps(smallest, largest)]
+
+
+class LeveledCompaction:
+    """
+    Compaction strategy for a leveled layout (see module docstring)
+    """
+    
+    def __init__(self, num_levels: int = 7, level0_file_trigger: int = 4,
+                 level0_stop_trigger: int = 12,
+                 max_bytes_for_level_base: int = 10 * 1024 * 1024,
+                 level_size_multiplier: int = 10,
+                 target_file_size: int = 2 * 1024 * 1024):
+        """
+        Args:
+            num_levels: Number of levels, L0 included
+            level0_file_trigger: L0 files that trigger an L0 compaction
+            level0_stop_trigger: L0 files at which writers stall until
+                compaction catches up
+            max_bytes_for_level_base: Size limit of L1
+            level_size_multiplier: Size ratio between adjacent levels
+            target_file_size: Compaction outputs are cut at this size
+        """
+        if num_levels < 2:
+            raise ValueError("num_levels must be at least 2")
+        self.num_levels = num_levels
+        self.level0_file_trigger = level0_file_trigger
+        self.level0_stop_trigger = max(level0_stop_trigger, level0_file_trigger)
+        self.max_bytes_for_level_base = max_bytes_for_level_base
+        self.level_size_multiplier = level_size_multiplier
+        self.target_file_size = target_file_size
+        self._compact_pointer: Dict[int, bytes] = {}  # level -> last compacted key
+    
+    def max_bytes_for_level(self, level: int) -> int:
+        """Size limit of a level (L1 and below)"""
+        return self.max_bytes_for_level_base * self.level_size_multiplier ** (level - 1)
+    
+    def level_scores(self, levels: Sequence[Sequence[FileMetadata]]) -> List[float]:
+        """Score of every level but the last (>= 1: needs compaction)"""
+        scores = [len(levels[0]) / self.level0_file_trigger]
+        for level in range(1, self.num_levels - 1):
+            size = sum(meta.file_size for meta in levels[level])
+            scores.append(size / self.max_bytes_for_level(level))
+        return scores
+    
+    def pick(self, levels: Sequence[Sequence[FileMetadata]]) -> Optional[Compaction]:
+        """
+        Choose the next compaction
+        
+        Args:
+            levels: Files per level; L0 newest first, other levels
+                ordered by smallest key
+        
+        Returns:
+            A Compaction, or None if every level is within its limits
+        """
+        score, level = max((score, level) for level, score in
+                           enumerate(self.level_scores(levels)))
+        if score < 1:
+            return None
+        
+        if level == 0:
+            inputs = list(levels[0])
+        else:
+            inputs = [self._next_file(level, levels[level])]
+        # Files of the next level in the inputs' range are rewritten too
+        # (levels below L0 must stay free of overlaps)
+        below = overlapping(levels[level + 1], *key_range(inputs))
+        
+        output_level = level + 1
+        bottommost = not any(overlapping(levels[deeper], *key_range(inputs + below))
+                             for deeper in range(output_level + 1, self.num_levels))
+        return Compaction(level, output_level, inputs + below, bottommost, score)
+    
+    def needs_compaction(self, levels: Sequence[Sequence[FileMetadata]]) -> bool:
+        """Whether pick() would return a compaction"""
+        return max(self.level_scores(levels)) >= 1
+    
+    def _next_file(self, level: int, files: Sequence[FileMetadata]) -> FileMetadata:
+        """Round-robin: the first file after the last one compacted here"""
+        pointer = self._compact_pointer.get(level)
+        chosen = files[0]
+        if pointer is not None:
+            for meta in files:
+                if meta.smallest > pointer:
+                    chosen = meta
+                    break
+        self._compact_pointer[level] = chosen.largest
+        return chosen
+    
+    def ingest_level(self, levels: Sequence[Sequence[FileMetadata]],
+                     smallest: bytes, largest: bytes) -> int:
+        """
+        Deepest level an ingested file can go to: every level above it,
+        and the level itself, must be free of its key range (the file is
+        newer than anything stored)
+        """
+        target = 0
+        for level in range(self.num_levels):
+            if overlapping(levels[level], smallest, largest):
+                break
+            target = level
+        return target
+    
+    def stall_writes(self, levels: Sequence[Sequence[FileMetadata]]) -> bool:
+        """Whether writers must wait for compaction before adding to L0"""
+        return len(levels[0]) >= self.level0_stop_trigger
+    
+    def __repr__(self):
+        return (f"LeveledCompaction(levels={self.num_levels}, "
+                f"l0_trigger={self.level0_file_trigger}, "
+                f"base={self.max_bytes_for_level_base}, "
+                f"multiplier={self.level_size_multiplier})")
+
+
+class TieredCompaction:
+    """
+    Size-tiered (universal) compaction strategy (see module docstring)
+    """
+    
+    num_levels = 1
+    target_file_size = None             # A merged run is one file (per subcompaction)
+    
+    def __init__(self, min_merge_width: int = 4, max_merge_width: int = 32,
+                 size_ratio: float = 1.01, max_size_amplification_percent: int = 200,
+                 max_sorted_runs: int = 12, stop_sorted_runs: int = 24):
+        """
+        Args:
+            min_merge_width: Fewest runs a size tier is merged with
+            max_merge_width: Most runs merged at once (space
+                amplification merges ignore it)
+            size_ratio: A run joins a tier if it is at most size_ratio
+                times the size of the newer runs already in it
+            max_size_amplification_percent: Merge everything once the
+                newer runs exceed this percentage of the oldest run
+            max_sorted_runs: Runs at which the newest are merged even if
+                their sizes differ
+            stop_sorted_runs: Runs at which writers stall until
+                compaction catches up
+        """
+        if min_merge_width < 2 or max_merge_width < min_merge_width:
+            raise ValueError("Need 2 <= min_merge_width <= max_merge_width")
+        self.min_merge_width = min_merge_width
+        self.max_merge_width = max_merge_width
+        self.size_ratio = size_ratio
+        self.max_size_amplification_percent = max_size_amplification_percent
+        self.max_sorted_runs = max(max_sorted_runs, min_merge_width)
+        self.stop_sorted_runs = max(stop_sorted_runs, self.max_sorted_runs)
+    
+    def size_amplification(self, runs: Sequence[FileMetadata]) -> float:
+        """Bytes of all runs but the oldest, in percent of the oldest"""
+        if len(runs) < 2:
+            return 0.0
+        newer = sum(meta.file_size for meta in runs[:-1])
+        return newer * 100 / max(runs[-1].file_size, 1)
+    
+    def pick(self, levels: Sequence[Sequence[FileMetadata]]) -> Optional[Compaction]:
+        """
+        Choose the next compaction
+        
+        Args:
+            levels: [runs], newest first
+        
+        Returns:
+            A Compaction of adjacent runs, or None if nothing is due
+        """
+        runs = levels[0]
+        if len(runs) < 2:
+            return None
+        
+        amplification = self.size_amplification(runs)
+        if amplification > self.max_size_amplification_percent:
+            return self._merge(runs, 0, len(runs),
+                               amplification / self.max_size_amplification_percent)
+        
+        for start in range(len(runs) - self.min_merge_width + 1):
+            taken = runs[start].file_size
+            end = start + 1
+            while (end < len(runs) and end - start < self.max_merge_width
+                   and runs[end].file_size <= taken * self.size_ratio):
+                taken += runs[end].file_size
+                end += 1
+            if end - start >= self.min_merge_width:
+                return self._merge(runs, start, end, (end - start) / self.min_merge_width)
+        
+        if len(runs) >= self.max_sorted_runs:
+            width = min(len(runs) - self.max_sorted_runs + self.min_merge_width,
+                        self.max_merge_width)
+            return self._merge(runs, 0, width, len(runs) / self.max_sorted_runs)
+        return None
+    
+    def _merge(self, runs: Sequence[FileMetadata], start: int, end: int,
+               score: float) -> Compaction:
+        """
+        Compaction of runs[start:end] back into L0; tombstones are dropped
+        if every other file is newer (a run split by subcompactions is
+        several files, so being last in L0 is not enough)
+        """
+        inputs = list(runs[start:end])
+        newest = max(meta.largest_sequence for meta in inputs)
+        others = list(runs[:start]) + list(runs[end:])
+        drop_tombstones = all(meta.smallest_sequence > newest for meta in others)
+        return Compaction(0, 0, inputs, drop_tombstones, score)
+    
+    def needs_compaction(self, levels: Sequence[Sequence[FileMetadata]]) -> bool:
+        """Whether pick() would return a compaction"""
+        return self.pick(levels) is not None
+    
+    def ingest_level(self, levels: Sequence[Sequence[FileMetadata]],
+                     smallest: bytes, largest: bytes) -> int:
+        """Ingested files are new runs"""
+        return 0
+    
+    def stall_writes(self, levels: Sequence[Sequence[FileMetadata]]) -> bool:
+        """Whether writers must wait for compaction before adding a run"""
+        return len(levels[0]) >= self.stop_sorted_runs
+    
+    def __repr__(self):
+        return (f"TieredCompaction(merge_width={self.min_merge_width}..{self.max_merge_width}, "
+                f"size_ratio={self.size_ratio}, "
+                f"max_size_amp={self.max_size_amplification_percent}%)")
+
+
+def subcompaction_ranges(compaction: Compaction, readers: Dict[int, SSTableReader],
+                         max_subcompactions: int,
+                         min_bytes: int = MIN_SUBCOMPACTION_BYTES) -> List[Tuple[Optional[bytes],
+                                                                                 Optional[bytes]]]:
+    """
+    Cut a compaction's key space into disjoint ranges of similar input size
+    
+    Boundaries are taken from the inputs' sparse indexes: every index
+    entry stands for one data block (INDEX_INTERVAL entries in v1/v2
+    files), so evenly spaced index keys split the inputs evenly without
+    reading them.
+    
+    Args:
+        compaction: What to split
+        readers: Open reader of every input file, by file number
+        max_subcompactions: Most ranges to return
+        min_bytes: Fewest input bytes per range
+    
+    Returns:
+        [(start, end)]: start inclusive, end exclusive, None = unbounded
+    """
+    count = max_subcompactions
+    if min_bytes > 0:
+        count = min(count, compaction.input_bytes // min_bytes)
+    if count <= 1:
+        return [(None, None)]
+    
+    keys = sorted(key for meta in compaction.inputs
+                  for key, _ in readers[meta.number].index)
+    count = min(count, len(keys))
+    boundaries = []
+    for i in range(1, count):
+        key = keys[len(keys) * i // count]
+        if not boundaries or key > boundaries[-1]:
+            boundaries.append(key)
+    return list(zip([None] + boundaries, boundaries + [None]))
+
+
+def run_compaction(compaction: Compaction, readers: Dict[int, SSTableReader],
+                   new_output: Callable[[], Tuple[int, str]],
+                   target_file_size: Optional[int], executor: Optional[Executor] = None,
+                   max_subcompactions: int = 1, scratch_prefix: Optional[str] = None,
+                   min_subcompaction_bytes: Optional[int] = None,
+                   bits_per_key: int = SSTableWriter.BITS_PER_KEY, block_cache=None,
+                   ) -> Tuple[List[Tuple[FileMetadata, SSTableReader]], Dict[str, int]]:
+    """
+    Merge a compaction's inputs into new files of its output level
+    
+    Args:
+        compaction: What to merge
+        readers: Open reader of every input file, by file number
+        new_output: Returns (number, path) for the next output file
+        target_file_size: Start a new output file past this many bytes
+            (None: one output file)
+        executor: Process pool for subcompactions (None: merge here)
+        max_subcompactions: Most key ranges merged in parallel
+        scratch_prefix: Path prefix for subcompaction outputs until they
+            are renamed to their numbers (required with an executor)
+        min_subcompaction_bytes: Fewest input bytes per key range
+            (default: MIN_SUBCOMPACTION_BYTES)
+        bits_per_key: Bloom filter bits per key of the outputs
+        block_cache: BlockCache of the output readers (input blocks are
+            read through the inputs' cache at low priority)
+    
+    Returns:
+        ([(metadata, reader)] of the outputs in key order, counters
+        'shadowed' and 'tombstones_dropped')
+    """
+    limit = float('inf') if target_file_size is None else target_file_size
+    ranges = [(None, None)]
+    if executor is not None and max_subcompactions > 1:
+        if min_subcompaction_bytes is None:
+            min_subcompaction_bytes = MIN_SUBCOMPACTION_BYTES
+        ranges = subcompaction_ranges(compaction, readers, max_subcompactions,
+                                      min_subcompaction_bytes)
+    if len(ranges) > 1:
+        return _run_subcompactions(compaction, readers, new_output, limit, executor,
+                                   ranges, scratch_prefix, bits_per_key, block_cache)
+    
+    sources = []
+    for meta in compaction.inputs:
+        entries = readers[meta.number].iter_entries(low_priority=True)
+        if meta.global_sequence:
+            entries = _with_sequence(entries, meta.global_sequence)
+        sources.append(entries)
+    merged = MergingIterator(sources, drop_tombstones=compaction.drop_tombstones)
+    
+    numbers = []
+    
+    def new_path():
+        number, path = new_output()
+        numbers.append(number)
+        return path
+    
+    writers = _write_outputs(merged, new_path, limit, bits_per_key)
+    outputs = [_finish(writer, number, compaction.output_level, block_cache)
+               for writer, number in zip(writers, numbers)]
+    return outputs, {'shadowed': merged.num_shadowed,
+                     'tombstones_dropped': merged.num_tombstones_dropped}
+
+
+def _run_subcompactions(compaction: Compaction, readers: Dict[int, SSTableReader],
+                        new_output: Callable[[], Tuple[int, str]], limit: float,
+                        executor: Executor, ranges, scratch_prefix: str, bits_per_key: int,
+                        block_cache):
+    """Merge every key range in a worker, then number the outputs in key order"""
+    inputs = [(readers[meta.number].filepath, meta.global_sequence)
+              for meta in compaction.inputs]
+    futures = [executor.submit(_subcompact, inputs, start, end, compaction.drop_tombstones,
+                               limit, f"{scratch_prefix}{i}-", bits_per_key)
+               for i, (start, end) in enumerate(ranges)]
+    
+    results = []
+    error = None
+    for future in futures:
+        try:
+            results.append(future.result())
+        except BaseException as e:
+            error = error or e
+    
+    outputs = []
+    counters = {'shadowed': 0, 'tombstones_dropped': 0}
+    try:
+        if error is not None:
+            raise error
+        for files, shadowed, dropped in results:
+            counters['shadowed'] += shadowed
+            counters['tombstones_dropped'] += dropped
+            for scratch, first_key, last_key, smallest_seq, largest_seq, entries in files:
+                number, path = new_output()
+                os.replace(scratch, path)
+                meta = FileMetadata(number, compaction.output_level, first_key, last_key,
+                                    smallest_seq, largest_seq, entries, os.path.getsize(path))
+                # Checksummed when written; the index is all that is needed
+                outputs.append((meta, SSTableReader(path, verify_checksum=False,
+                                                    block_cache=block_cache)))
+    except BaseException:
+        for files, _, _ in results:
+            for scratch, *_ in files:
+                if os.path.exists(scratch):
+                    os.remove(scratch)
+        for meta, reader in outputs:
+            os.remove(reader.filepath)
+        raise
+    return outputs, counters
+
+
+def _subcompact(inputs: List[Tuple[str, int]], start: Optional[bytes], end: Optional[bytes],
+                drop_tombstones: bool, limit: float, scratch_prefix: str,
+                bits_per_key: int):
+    """
+    Merge one key range of the inputs (runs in a worker)
+    
+    Returns:
+        ([(path, first_key, last_key, smallest_sequence, largest_sequence,
+        entries)] of the outputs, versions shadowed, tombstones dropped)
+    """
+    sources = []
+    for path, global_sequence in inputs:
+        entries = SSTableReader(path, verify_checksum=False).iter_entries(start, end)
+        sources.append(_with_sequence(entries, global_sequence) if global_sequence else entries)
+    merged = MergingIterator(sources, drop_tombstones=drop_tombstones)
+    
+    counter = itertools.count()
+    
+    def new_path():
+        return f"{scratch_prefix}{next(counter)}{SCRATCH_SUFFIX}"
+    
+    writers = _write_outputs(merged, new_path, limit, bits_per_key)
+    files = [(writer.filepath, writer.first_key, writer.last_key, writer.smallest_sequence,
+              writer.largest_sequence, writer.num_entries) for writer in writers]
+    return files, merged.num_shadowed, merged.num_tombstones_dropped
+
+
+def _write_outputs(entries, new_path: Callable[[], str], limit: float,
+                   bits_per_key: int) -> List[SSTableWriter]:
+    """Write sorted entries to finalized files cut at limit bytes"""
+    writers = []
+    writer = None
+    try:
+        for key, value, sequence in entries:
+            if writer is None:
+                writer = SSTableWriter(new_path(), bits_per_key=bits_per_key)
+                size = 0
+            writer.add(key, value, sequence)
+            size += 16 + len(key) + (len(value) if value is not None else 0)
+            if size >= limit:
+                writer.finalize()
+                writers.append(writer)
+                writer = None
+        if writer is not None:
+            writer.finalize()
+            writers.append(writer)
+            writer = None
+    except BaseException:
+        if writer is not None:
+            writer.__exit__(None, None, None)
+            writers.append(writer)
+        for written in writers:
+            if os.path.exists(written.filepath):
+                os.remove(written.filepath)
+        raise
+    return writers
+
+
+def _with_sequence(entries, sequence: int):
+    """Entries of an ingested file, all carrying its global sequence"""
+    for key, value, _ in entries:
+        yield key, value, sequence
+
+
+def _finish(writer: SSTableWriter, number: int, level: int,
+            block_cache=None) -> Tuple[FileMetadata, SSTableReader]:
+    """Describe a finalized output file"""
+    meta = FileMetadata(number, level, writer.first_key, writer.last_key,
+                        writer.smallest_sequence, writer.largest_sequence,
+                        writer.num_entries, os.path.getsize(writer.filepath))
+    return meta, SSTableReader(writer.filepath, block_cache=block_cache)
@@ -0,0 +1,799 @@
+"""
+LSM-Tree Store Module
+
+Purpose:
+    Ties the WAL, memtables and SSTables together into a key-value store
+    with put/get/delete.
+
+Write Path:
+    1. Append to the WAL (which assigns the sequence number)
+    2. Insert into the active memtable
+    3. Once the active memtable is full it is sealed: it joins the queue
+       of immutable memtables, a fresh memtable takes its place and the
+       WAL rotates to a new segment. The writer does not wait for I/O.
+    4. A background flusher writes immutable memtables, oldest first,
+       to level-0 SSTables, records them in the MANIFEST and releases
+       the WAL segments they covered.
+    5. A background compactor merges SSTables down the levels as the
+       compaction strategy decides (compaction.py).
+    Writers are throttled (blocked) only while max_immutable_memtables
+    memtables are already waiting for the flusher, or while the strategy
+    reports too many L0 files.
+
+Bulk Loads:
+    ingest_external_file() links SSTables written offline straight into
+    level 0, skipping the WAL and the memtables entirely.
+
+Read Path:
+    active memtable -> immutable memtables (newest first) -> L0 SSTables
+    (newest first) -> at most one SSTable per deeper level (binary search
+    on key ranges). The first entry found wins; a tombstone means the key
+    is deleted. SSTables are read through a TableCache that keeps at
+    most max_open_files readers open.
+
+Directory Layout:
+    data/
+        MANIFEST            <- live SSTables + WAL log number
+        000004.sst
+        000007.sst
+        wal/000009.wal      <- segments not yet flushed
+"""
+
+import copy
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+try:
+    from .compaction import SCRATCH_SUFFIX, LeveledCompaction, run_compaction
+    from .manifest import FileMetadata, Manifest
+    from .memtable import Memtable
+    from .segmented_wal import SegmentedWAL
+    from .sstable import SSTableReader, SSTableWriter
+    from .table_cache import TableCache
+    from .wal import WriteBatch
+except ImportError:
+    from compaction import SCRATCH_SUFFIX, LeveledCompaction, run_compaction
+    from manifest import FileMetadata, Manifest
+    from memtable import Memtable
+    from segmented_wal import SegmentedWAL
+    from sstable import SSTableReader, SSTableWriter
+    from table_cache import TableCache
+    from wal import WriteBatch
+
+
+class LSMTree:
+    """
+    Key-value store built from a WAL, memtables and SSTables
+    
+    Usage:
+        with LSMTree("data", memtable_size=4 * 1024 * 1024) as db:
+            db.put(b"key", b"value")
+            db.get(b"key")
+            db.delete(b"key")
+    """
+    
+    SSTABLE_SUFFIX = '.sst'
+    WAL_DIRNAME = 'wal'
+    DEFAULT_MAX_IMMUTABLE = 2
+    
+    def __init__(self, dirpath: str, memtable_size: int = Memtable.DEFAULT_MAX_SIZE,
+                 max_immutable_memtables: int = DEFAULT_MAX_IMMUTABLE,
+                 memtable_factory=Memtable, recovery_workers: int = 1,
+                 write_buffer_manager=None, compaction=None, max_subcompactions: int = 1,
+                 bloom_bits_per_key: int = SSTableWriter.BITS_PER_KEY, block_cache=None,
+                 max_open_files: int = TableCache.DEFAULT_MAX_OPEN_FILES, **wal_options):
+        """
+        Args:
+            dirpath: Directory holding the store
+            memtable_size: Seal the active memtable at this size
+            max_immutable_memtables: Sealed memtables allowed to wait for
+                the flusher before writers are stalled
+            memtable_factory: Memtable class (Memtable, ArenaMemtable,
+                SkipListMemtable), called with max_size_bytes
+            recovery_workers: Worker processes for WAL replay on open
+            write_buffer_manager: WriteBufferManager shared with other
+                stores to cap their combined memtable memory
+            compaction: Compaction strategy, LeveledCompaction (default)
+                or TieredCompaction
+            max_subcompactions: Worker processes a large compaction is
+                split over by key range (1: merge in the compactor thread)
+            bloom_bits_per_key: Bloom filter bits per key of new SSTables
+                (0: none, every lookup reads a block of each candidate file)
+            block_cache: BlockCache for SSTable blocks, shared with other
+                stores to cap their combined cache memory
+            max_open_files: SSTable readers (file descriptors) kept open;
+                the least recently used are closed and reopened on demand
+            wal_options: Passed to the SegmentedWAL (sync_policy,
+                segment_size, ...)
+        """
+        self.dirpath = dirpath
+        self.memtable_size = memtable_size
+        self.max_immutable_memtables = max(1, max_immutable_memtables)
+        self._memtable_factory = memtable_factory
+        self._write_buffer_manager = write_buffer_manager
+        self._compaction = compaction if compaction is not None else LeveledCompaction()
+        self.max_subcompactions = max(1, max_subcompactions)
+        self.bloom_bits_per_key = bloom_bits_per_key
+        self.block_cache = block_cache
+        self._subcompaction_pool = None         # Started with the first large compaction
+        
+        self._write_lock = threading.Lock()     # Orders WAL appends + memtable inserts
+        self._state_cond = threading.Condition(threading.Lock())  # Version, queue, manifest
+        self._flush_queue = deque()             # (memtable, log_number), oldest first
+        self._closed = False
+        self._bg_error = None                   # Sticky error from background work
+        self._tables = {}                       # number -> meta of live SSTables
+        self._compacting = None                 # Compaction being run
+        self._ingesting = False                 # An ingest is choosing levels
+        self.stats = {
+            'flushes': 0,
+            'bytes_flushed': 0,
+            'stalls': 0,
+            'stall_time': 0.0,
+            'files_ingested': 0,
+            'compactions': 0,
+            'trivial_moves': 0,
+            'compaction_bytes_read': 0,
+            'compaction_bytes_written': 0,
+        }
+        # Open readers of live SSTables; reopened ones skip the full-file
+        # checksum (checked when first opened, v3+ blocks on every read)
+        self.table_cache = TableCache(
+            lambda number: self._open_table(number, verify_checksum=False), max_open_files)
+        
+        os.makedirs(dirpath, exist_ok=True)
+        self._manifest = Manifest(dirpath)
+        self._remove_obsolete_files()
+        for meta in self._manifest.files.values():
+            if meta.level >= self._compaction.num_levels:
+                raise ValueError(f"SSTable {meta.number} is in level {meta.level}, "
+                                 f"the compaction strategy has {self._compaction.num_levels}")
+            self._tables[meta.number] = meta
+            self.table_cache.insert(meta.number, self._open_table(meta.number))
+        
+        # Readers take this tuple in one step: (active memtable,
+        # immutable memtables newest first, levels (see _build_levels))
+        self._version = (self._new_memtable(), (), self._build_levels())
+        
+        self._wal = SegmentedWAL(os.path.join(dirpath, self.WAL_DIRNAME), **wal_options)
+        self._recover(recovery_workers)
+        
+        if write_buffer_manager is not None:
+            write_buffer_manager.register(self)
+            write_buffer_manager.reserve(self, self._version[0].size_bytes())
+        
+        self._flusher = threading.Thread(target=self._flush_loop,
+                                         name="lsm-flusher", daemon=True)
+        self._flusher.start()
+        self._compactor = threading.Thread(target=self._compact_loop,
+                                           name="lsm-compactor", daemon=True)
+        self._compactor.start()
+    
+    def _new_memtable(self):
+        return self._memtable_factory(max_size_bytes=self.memtable_size)
+    
+    def _table_path(self, number: int) -> str:
+        return os.path.join(self.dirpath, f"{number:06d}{self.SSTABLE_SUFFIX}")
+    
+    def _open_table(self, number: int, verify_checksum: bool = True) -> SSTableReader:
+        return SSTableReader(self._table_path(number), verify_checksum=verify_checksum,
+                             block_cache=self.block_cache)
+    
+    def _build_levels(self) -> tuple:
+        """
+        Arrange the live SSTables for reads (state lock held)
+        
+        Returns:
+            One (files, largest_keys) pair per level: files are metadata,
+            L0 newest first, deeper levels by key with largest_keys for
+            binary search
+        """
+        levels = [[] for _ in range(self._compaction.num_levels)]
+        for meta in self._tables.values():
+            levels[meta.level].append(meta)
+        levels[0].sort(key=lambda meta: (meta.largest_sequence, meta.number), reverse=True)
+        for files in levels[1:]:
+            files.sort(key=lambda meta: meta.smallest)
+        return tuple((tuple(files), [meta.largest for meta in files]) for files in levels)
+    
+    def _install_tables(self, added=(), removed=()) -> None:
+        """
+        Swap SSTables in the live set and publish a new version (state lock held)
+        
+        Args:
+            added: (meta, reader) pairs; reader None for a file moved to
+                another level (its reader stays cached)
+            removed: File numbers
+        """
+        kept = {meta.number for meta, _ in added}  # Moved to another level
+        for number in removed:
+            del self._tables[number]
+            if number not in kept:
+                self.table_cache.evict(number)
+        for meta, reader in added:
+            self._tables[meta.number] = meta
+            if reader is not None:
+                self.table_cache.insert(meta.number, reader)
+        active, immutables, _ = self._version
+        self._version = (active, immutables, self._build_levels())
+    
+    def _level_files(self):
+        """Metadata of the live SSTables per level, as strategies take them"""
+        return [list(files) for files, _ in self._version[2]]
+    
+    def _remove_obsolete_files(self):
+        """Delete SSTables left behind by a flush or compaction that never reached the manifest"""
+        for name in os.listdir(self.dirpath):
+            stem, ext = os.path.splitext(name)
+            if ext == self.SSTABLE_SUFFIX and stem.isdigit():
+                if int(stem) not in self._manifest.files:
+                    os.remove(os.path.join(self.dirpath, name))
+            elif ext == SCRATCH_SUFFIX:
+                os.remove(os.path.join(self.dirpath, name))
+    
+    def _recover(self, workers: int):
+        """
+        Replay unflushed WAL segments into the active memtable
+        
+        If the replay overflowed the memtable, the rest is written out as
+        well so the manifest can move past every replayed segment;
+        otherwise the same segments would be flushed again on every open.
+        """
+        active = self._version[0]
+        self._recovered_tables = 0
+        self._wal.replay(active, min_segment=self._manifest.log_number,
+                         workers=workers, flush=self._flush_recovered)
+        self._wal.last_sequence = max(self._wal.last_sequence, self._manifest.last_sequence)
+        
+        if self._recovered_tables:
+            self._flush_recovered(active)
+            active.clear()
+            self._manifest.apply(log_number=self._wal.active_number)
+            self._wal.release(self._wal.active_number)
+    
+    def _flush_recovered(self, memtable):
+        """Write a memtable filled by replay straight to level 0"""
+        result = self._write_sstable(memtable)
+        if result is None:
+            return
+        with self._state_cond:
+            self._manifest.apply(added=[result[0]])  # WAL is still needed
+            self._install_tables(added=[result])
+        self._recovered_tables += 1
+    
+    def put(self, key: bytes, value: bytes) -> int:
+        """
+        Insert or update a key
+        
+        Returns:
+            Sequence number of the write
+        """
+        if not isinstance(value, bytes):
+            raise TypeError("Value must be bytes")
+        return self._write(key, value)
+    
+    def delete(self, key: bytes) -> int:
+        """
+        Delete a key (writes a tombstone)
+        
+        Returns:
+            Sequence number of the delete
+        """
+        return self._write(key, None)
+    
+    def write(self, batch: WriteBatch) -> int:
+        """
+        Apply a WriteBatch atomically
+        
+        Returns:
+            Sequence number of the first operation
+        """
+        if len(batch) == 0:
+            return self._wal.last_sequence
+        with self._write_lock:
+            self._check_writable()
+            sequence = self._wal.write_batch(batch)
+            active = self._version[0]
+            before = active.size_bytes()
+            batch.apply_to(active, sequence)
+            self._after_write(active, before)
+        if self._write_buffer_manager is not None:
+            self._write_buffer_manager.enforce()
+        return sequence
+    
+    def _write(self, key: bytes, value: Optional[bytes]) -> int:
+        if not isinstance(key, bytes):
+            raise TypeError("Key must be bytes")
+        
+        with self._write_lock:
+            self._check_writable()
+            sequence = self._wal.write(key, value)
+            active = self._version[0]
+            before = active.size_bytes()
+            if value is None:
+                active.delete(key, sequence)
+            else:
+                active.put(key, value, sequence)
+            self._after_write(active, before)
+        if self._write_buffer_manager is not None:
+            self._write_buffer_manager.enforce()  # No store lock held
+        return sequence
+    
+    def _after_write(self, active, before: int) -> None:
+        """Charge the growth of the active memtable, seal it if full (write lock held)"""
+        if self._write_buffer_manager is not None:
+            self._write_buffer_manager.reserve(self, active.size_bytes() - before)
+        if active.is_full():
+            self._seal_active()
+    
+    def _check_writable(self):
+        if self._closed:
+            raise RuntimeError("LSMTree is closed")
+        self._raise_bg_error()
+    
+    def _raise_bg_error(self):
+        if self._bg_error is not None:
+            raise IOError(f"Background work failed: {self._bg_error}")
+    
+    def _seal_active(self):
+        """
+        Turn the active memtable into an immutable one (write lock held)
+        
+        Stalls while the flush queue is full: this is the only place a
+        writer ever waits for the flusher.
+        """
+        with self._state_cond:
+            if self._must_stall():
+                self.stats['stalls'] += 1
+                stall_start = time.monotonic()
+                while self._must_stall() and self._bg_error is None:
+                    self._state_cond.wait()
+                self.stats['stall_time'] += time.monotonic() - stall_start
+            self._raise_bg_error()
+            
+            # New writes go to a new segment; everything up to the sealed
+            # one is covered by this memtable (or older ones)
+            sealed_number = self._wal.rotate()
+            active, immutables, levels = self._version
+            self._flush_queue.append((active, sealed_number + 1))
+            self._version = (self._new_memtable(), (active,) + immutables, levels)
+            self._state_cond.notify_all()
+        
+        if self._write_buffer_manager is not None:
+            self._write_buffer_manager.sealed(self, active.size_bytes())
+    
+    def _must_stall(self) -> bool:
+        """Flush queue full, or too many L0 files for the compactor (state lock held)"""
+        return (len(self._flush_queue) >= self.max_immutable_memtables
+                or self._compaction.stall_writes(self._level_files()))
+    
+    def switch_memtable(self) -> None:
+        """
+        Seal the active memtable without waiting for it to be flushed
+        
+        Called by the WriteBufferManager to free memory.
+        """
+        with self._write_lock:
+            if self._closed or self._bg_error is not None or self._version[0].is_empty():
+                if self._write_buffer_manager is not None:
+                    self._write_buffer_manager.sealed(self, 0)
+                return
+            self._seal_active()
+    
+    def _flush_loop(self):
+        """Background thread: write immutable memtables to SSTables"""
+        while True:
+            with self._state_cond:
+                while not self._flush_queue and not self._closed:
+                    self._state_cond.wait()
+                if not self._flush_queue:
+                    return  # Closed and drained
+                memtable, log_number = self._flush_queue[0]
+            
+            try:
+                result = self._write_sstable(memtable)
+                with self._state_cond:
+                    self._manifest.apply(added=[result[0]] if result else [],
+                                         log_number=log_number)
+                    self._flush_queue.popleft()
+                    active, immutables, levels = self._version
+                    immutables = tuple(m for m in immutables if m is not memtable)
+                    self._version = (active, immutables, levels)
+                    if result is not None:
+                        self._install_tables(added=[result])
+                        self.stats['bytes_flushed'] += result[0].file_size
+                    self.stats['flushes'] += 1
+                    
+                    # Data is in an SSTable and the manifest: the WAL can
+                    # go. Released before waiters wake up, so flush()
+                    # returns with the segments already handed over
+                    self._wal.release(log_number)
+                    self._state_cond.notify_all()
+            except Exception as e:
+                print(f"LSMTree: Background flush failed: {e}")
+                with self._state_cond:
+                    self._bg_error = e
+                    self._state_cond.notify_all()
+                if self._write_buffer_manager is not None:
+                    self._write_buffer_manager.unregister(self)  # Never freed now
+                return
+            
+            if self._write_buffer_manager is not None:
+                self._write_buffer_manager.free(self, memtable.size_bytes())
+    
+    def _compact_loop(self):
+        """Background thread: run the compactions the strategy picks"""
+        strategy = self._compaction
+        while True:
+            with self._state_cond:
+                while not self._closed and (self._bg_error is not None or self._ingesting
+                                            or not strategy.needs_compaction(self._level_files())):
+                    self._state_cond.wait()
+                if self._closed:
+                    return
+                compaction = strategy.pick(self._level_files())
+                self._compacting = compaction
+            
+            try:
+                self._run_compaction(compaction)
+            except Exception as e:
+                print(f"LSMTree: Background compaction failed: {e}")
+                with self._state_cond:
+                    self._compacting = None
+                    self._bg_error = e
+                    self._state_cond.notify_all()
+                return
+    
+    def _run_compaction(self, compaction) -> None:
+        """Merge (or move) a compaction's inputs and install the result"""
+        removed = [meta.number for meta in compaction.inputs]
+        if compaction.is_trivial_move:
+            meta = copy.copy(compaction.inputs[0])
+            meta.level = compaction.output_level
+            outputs = [(meta, None)]
+        else:
+            def new_output():
+                with self._state_cond:
+                    number = self._manifest.new_file_number()
+                return number, self._table_path(number)
+            readers = {}
+            try:
+                for number in removed:
+                    readers[number] = self.table_cache.acquire(number)
+                outputs, _ = run_compaction(
+                    compaction, readers, new_output, self._compaction.target_file_size,
+                    executor=self._subcompaction_executor(),
+                    max_subcompactions=self.max_subcompactions,
+                    scratch_prefix=os.path.join(self.dirpath, f"compaction-{removed[0]}-"),
+                    bits_per_key=self.bloom_bits_per_key, block_cache=self.block_cache)
+            finally:
+                for reader in readers.values():
+                    self.table_cache.release(reader)
+        
+        with self._state_cond:
+            try:
+                self._manifest.apply(added=[meta for meta, _ in outputs], removed=removed)
+            except BaseException:
+                if not compaction.is_trivial_move:
+                    for meta, reader in outputs:
+                        reader.close()
+                        os.remove(self._table_path(meta.number))
+                raise
+            self._install_tables(added=outputs, removed=removed)
+            self._compacting = None
+            if compaction.is_trivial_move:
+                self.stats['trivial_moves'] += 1
+            else:
+                self.stats['compactions'] += 1
+                self.stats['compaction_bytes_read'] += compaction.input_bytes
+                self.stats['compaction_bytes_written'] += sum(meta.file_size
+                                                              for meta, _ in outputs)
+            self._state_cond.notify_all()
+        
+        if not compaction.is_trivial_move:
+            # Readers still holding the old version retry on the new one
+            for number in removed:
+                os.remove(self._table_path(number))
+    
+    def _subcompaction_executor(self):
+        """Worker pool for subcompactions, or None if they are disabled"""
+        if self.max_subcompactions <= 1:
+            return None
+        if self._subcompaction_pool is None:
+            # Spawned, not forked: this process runs threads holding locks
+            self._subcompaction_pool = ProcessPoolExecutor(
+                max_workers=self.max_subcompactions,
+                mp_context=multiprocessing.get_context('spawn'))
+        return self._subcompaction_pool
+    
+    def wait_for_compactions(self) -> None:
+        """Block until flushes and compactions have caught up"""
+        self._wait_for_flushes()
+        with self._state_cond:
+            while (self._bg_error is None and not self._closed
+                   and (self._compacting is not None
+                        or self._compaction.needs_compaction(self._level_files()))):
+                self._state_cond.wait()
+        self._raise_bg_error()
+    
+    def _write_sstable(self, memtable) -> Optional[Tuple[FileMetadata, SSTableReader]]:
+        """
+        Write a memtable to a new level-0 SSTable
+        
+        Returns:
+            (metadata, reader) for the new file, or None if the memtable
+            was empty
+        """
+        if memtable.is_empty():
+            return None
+        with self._state_cond:
+            number = self._manifest.new_file_number()
+        path = self._table_path(number)
+        
+        tombstone = memtable.TOMBSTONE
+        writer = SSTableWriter(path, bits_per_key=self.bloom_bits_per_key)
+        try:
+            for key, value, sequence in memtable.iter_entries():
+                writer.add(key, None if value is tombstone else value, sequence)
+            writer.finalize()
+        except BaseException:
+            writer.__exit__(None, None, None)
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        
+        meta = FileMetadata(number, 0, writer.first_key, writer.last_key,
+                            writer.smallest_sequence, writer.largest_sequence,
+                            writer.num_entries, os.path.getsize(path))
+        return meta, SSTableReader(path, block_cache=self.block_cache)
+    
+    def get(self, key: bytes) -> Optional[bytes]:
+        """
+        Look up a key
+        
+        Returns:
+            The value, or None if the key is missing or deleted
+        """
+        if not isinstance(key, bytes):
+            raise TypeError("Key must be bytes")
+        
+        while True:
+            version = self._version
+            try:
+                return self._get_from(version, key)
+            except FileNotFoundError:
+                # A compaction removed a file of this version: retry
+                if self._version is version:
+                    raise
+    
+    def _get_from(self, version, key: bytes) -> Optional[bytes]:
+        """Look up a key in one version of the store"""
+        active, immutables, levels = version
+        for memtable in (active,) + immutables:
+            entry = memtable.get_entry(key)
+            if entry is not None:
+                value = entry[0]
+                return None if value is memtable.TOMBSTONE else value
+        
+        for meta in levels[0][0]:
+            if key < meta.smallest or key > meta.largest:
+                continue
+            entry = self._table_get(meta.number, key)
+            if entry is not None:
+                return entry[0]  # None for a tombstone
+        
+        # Deeper levels: key ranges are disjoint, one candidate per level
+        for files, largest_keys in levels[1:]:
+            index = bisect_left(largest_keys, key)
+            if index == len(files):
+                continue
+            meta = files[index]
+            if key < meta.smallest:
+                continue
+            entry = self._table_get(meta.number, key)
+            if entry is not None:
+                return entry[0]
+        return None
+    
+    def _table_get(self, number: int, key: bytes) -> Optional[Tuple[Optional[bytes], int]]:
+        """Look a key up in one SSTable, through the table cache"""
+        reader = self.table_cache.acquire(number)
+        try:
+            return reader.get_entry(key)
+        finally:
+            self.table_cache.release(reader)
+    
+    def flush(self) -> None:
+        """Seal the active memtable and wait until every memtable is on disk"""
+        with self._write_lock:
+            self._check_writable()
+            if not self._version[0].is_empty():
+                self._seal_active()
+        self._wait_for_flushes()
+    
+    def _wait_for_flushes(self) -> None:
+        """Block until the flush queue is empty"""
+        with self._state_cond:
+            while self._flush_queue and self._bg_error is None:
+                self._state_cond.wait()
+        self._raise_bg_error()
+    
+    def ingest_external_file(self, paths, move: bool = False) -> int:
+        """
+        Add SSTables built offline with SSTableWriter to the store
+        
+        The files are hard-linked into the store (copied only if linking
+        is impossible) and recorded in the manifest in one atomic update:
+        no WAL write, no memtable insert, no rewrite. All their entries
+        get one new sequence number, so they shadow every earlier write
+        and are shadowed by every later one. Unflushed memtables are
+        flushed first; otherwise their older entries would be read before
+        the ingested ones. Each file goes to the deepest level the
+        compaction strategy allows (no older data above it in its key
+        range), so ingesting into an empty range skips compaction.
+        
+        Args:
+            paths: SSTable files with non-overlapping key ranges
+            move: Delete the source files once ingested
+        
+        Returns:
+            The sequence number assigned to the ingested entries
+        
+        Raises:
+            ValueError: If a file is corrupt, empty or overlaps another
+        """
+        paths = [os.fspath(path) for path in paths]
+        if not paths:
+            return self.last_sequence
+        
+        with self._write_lock:
+            self._check_writable()
+            linked = []
+            ingested = []  # (path, number, reader, smallest, largest)
+            try:
+                for path in paths:
+                    with self._state_cond:
+                        number = self._manifest.new_file_number()
+                    self._link_file(path, self._table_path(number))
+                    linked.append(number)
+                
+                for path, number in zip(paths, linked):
+                    try:
+                        reader = self._open_table(number)
+                    except ValueError as e:
+                        raise ValueError(f"Cannot ingest {path}: {e}") from e
+                    ingested.append((path, number, reader, reader.first_key, reader.last_key))
+                    if reader.num_entries == 0:
+                        raise ValueError(f"Cannot ingest {path}: no entries")
+                
+                ingested.sort(key=lambda item: item[3])
+                for prev, item in zip(ingested, ingested[1:]):
+                    if item[3] <= prev[4]:
+                        raise ValueError(f"Cannot ingest {item[0]}: key range overlaps {prev[0]}")
+                
+                if not self._version[0].is_empty():
+                    self._seal_active()
+                self._wait_for_flushes()
+                
+                # Levels must hold still while targets are chosen
+                with self._state_cond:
+                    while self._compacting is not None and self._bg_error is None:
+                        self._state_cond.wait()
+                    self._raise_bg_error()
+                    self._ingesting = True
+                
+                sequence = self._wal.allocate_sequence()
+                levels = self._level_files()
+                results = [
+                    (FileMetadata(number,
+                                  self._compaction.ingest_level(levels, smallest, largest),
+                                  smallest, largest, sequence, sequence,
+                                  reader.num_entries, os.path.getsize(reader.filepath),
+                                  global_sequence=sequence), reader)
+                    for _, number, reader, smallest, largest in ingested
+                ]
+                with self._state_cond:
+                    self._manifest.apply(added=[meta for meta, _ in results])
+                    linked = []  # Live now: never removed below
+                    self._install_tables(added=results)
+                    self.stats['files_ingested'] += len(results)
+            except BaseException:
+                if linked:
+                    for _, _, reader, _, _ in ingested:
+                        reader.close()
+                for number in linked:
+                    path = self._table_path(number)
+                    if os.path.exists(path):
+                        os.remove(path)
+                raise
+            finally:
+                with self._state_cond:
+                    if self._ingesting:
+                        self._ingesting = False
+                        self._state_cond.notify_all()
+        
+        if move:
+            for path in paths:
+                os.remove(path)
+        return sequence
+    
+    def _link_file(self, src: str, dst: str) -> None:
+        """Hard-link src to dst, falling back to a copy, and make it durable"""
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copyfile(src, dst)  # Other file system, or no hard links
+        fd = os.open(dst, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    
+    @property
+    def num_immutable_memtables(self) -> int:
+        """Sealed memtables waiting for the flusher"""
+        return len(self._flush_queue)
+    
+    @property
+    def last_sequence(self) -> int:
+        """Sequence number of the latest write"""
+        return self._wal.last_sequence
+    
+    def sstables(self):
+        """Metadata of the live SSTables: L0 newest first, then each level by key"""
+        return [meta for files, _ in self._version[2] for meta in files]
+    
+    def levels(self):
+        """Metadata of the live SSTables per level (as sstables() orders them)"""
+        return self._level_files()
+    
+    def filter_stats(self) -> dict:
+        """
+        Bloom filter counters of SSTable lookups since the store was opened
+        
+        Returns:
+            'hits': lookups the filters let through (a block was read),
+            'misses': lookups they ruled out (no read), 'false_positives':
+            hits for a key the file did not hold
+        """
+        return self.table_cache.filter_stats()
+    
+    def close(self):
+        """
+        Flush queued immutable memtables and close the store
+        
+        The active memtable is not flushed: its WAL segments are replayed
+        on the next open.
+        """
+        with self._write_lock:
+            if self._closed:
+                return
+            with self._state_cond:
+                self._closed = True
+                self._state_cond.notify_all()
+        self._flusher.join()
+        self._compactor.join()
+        if self._subcompaction_pool is not None:
+            self._subcompaction_pool.shutdown()
+        self._wal.close()
+        self.table_cache.close()
+        if self._write_buffer_manager is not None:
+            self._write_buffer_manager.unregister(self)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def __repr__(self):
+        active, immutables, _ = self._version
+        return (f"LSMTree(dirpath={self.dirpath!r}, active={len(active)} entries, "
+                f"immutable={len(immutables)}, sstables={len(self._tables)})")
@@ -0,0 +1,200 @@
+"""
+Manifest Module
+
+Purpose:
+    Records which SSTable files make up the store, so a restart knows
+    exactly which files are live and which WAL segments still need to
+    be replayed.
+
+Contents:
+    - files: one FileMetadata per live SSTable (level, key range,
+      sequence range, size; ingested files carry one global sequence)
+    - log_number: WAL segments with a smaller number are fully flushed
+    - next_file_number: next number for an SSTable file
+    - last_sequence: highest sequence number persisted in SSTables
+
+Format:
+    A small JSON document (keys hex-encoded), rewritten as a whole on
+    every change: written to MANIFEST.tmp, fsynced, then renamed over
+    MANIFEST. The rename is atomic, so a crash leaves either the old or
+    the new version, never a mix.
+"""
+
+import json
+import os
+from typing import Dict, Iterable, List, Optional
+
+
+class FileMetadata:
+    """
+    Description of one live SSTable file
+    """
+    
+    def __init__(self, number: int, level: int, smallest: bytes, largest: bytes,
+                 smallest_sequence: int = 0, largest_sequence: int = 0,
+                 num_entries: int = 0, file_size: int = 0, global_sequence: int = 0):
+        """
+        Args:
+            number: File number (the file is NNNNNN.sst)
+            level: LSM level the file belongs to (0 = flushed memtables)
+            smallest: Smallest key in the file
+            largest: Largest key in the file
+            smallest_sequence: Smallest sequence number in the file
+            largest_sequence: Largest sequence number in the file
+            num_entries: Number of entries (including tombstones)
+            file_size: Size of the file in bytes
+            global_sequence: If non-zero, the sequence number of every
+                entry, whatever the file itself stores (ingested files)
+        """
+        self.number = number
+        self.level = level
+        self.smallest = smallest
+        self.largest = largest
+        self.smallest_sequence = smallest_sequence
+        self.largest_sequence = largest_sequence
+        self.num_entries = num_entries
+        self.file_size = file_size
+        self.global_sequence = global_sequence
+    
+    def overlaps(self, smallest: Optional[bytes], largest: Optional[bytes]) -> bool:
+        """Check whether the file's key range intersects [smallest, largest]"""
+        if smallest is not None and self.largest < smallest:
+            return False
+        if largest is not None and self.smallest > largest:
+            return False
+        return True
+    
+    def to_dict(self) -> dict:
+        return {
+            'number': self.number,
+            'level': self.level,
+            'smallest': self.smallest.hex(),
+            'largest': self.largest.hex(),
+            'smallest_sequence': self.smallest_sequence,
+            'largest_sequence': self.largest_sequence,
+            'num_entries': self.num_entries,
+            'file_size': self.file_size,
+            'global_sequence': self.global_sequence,
+        }
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'FileMetadata':
+        return cls(
+            number=data['number'],
+            level=data['level'],
+            smallest=bytes.fromhex(data['smallest']),
+            largest=bytes.fromhex(data['largest']),
+            smallest_sequence=data.get('smallest_sequence', 0),
+            largest_sequence=data.get('largest_sequence', 0),
+            num_entries=data.get('num_entries', 0),
+            file_size=data.get('file_size', 0),
+            global_sequence=data.get('global_sequence', 0),
+        )
+    
+    def __repr__(self):
+        return (f"FileMetadata(number={self.number}, level={self.level}, "
+                f"keys={self.smallest!r}..{self.largest!r}, "
+                f"seq={self.smallest_sequence}..{self.largest_sequence})")
+
+
+class Manifest:
+    """
+    Persistent list of live SSTables
+    
+    Not thread-safe: the store serializes calls to apply().
+    
+    Usage:
+        manifest = Manifest("data")
+        number = manifest.new_file_number()
+        ...                                    # write NNNNNN.sst
+        manifest.apply(added=[meta], log_number=sealed + 1)
+    """
+    
+    FILENAME = 'MANIFEST'
+    FORMAT_VERSION = 1
+    
+    def __init__(self, dirpath: str):
+        """
+        Args:
+            dirpath: Directory holding the MANIFEST file (created if needed)
+        """
+        self.dirpath = dirpath
+        self.path = os.path.join(dirpath, self.FILENAME)
+        self.files: Dict[int, FileMetadata] = {}
+        self.log_number = 0
+        self.next_file_number = 1
+        self.last_sequence = 0
+        
+        os.makedirs(dirpath, exist_ok=True)
+        if os.path.exists(self.path):
+            self._load()
+    
+    def _load(self):
+        with open(self.path, 'r') as f:
+            data = json.load(f)
+        if data.get('version') != self.FORMAT_VERSION:
+            raise ValueError(f"Unsupported manifest version: {data.get('version')}")
+        self.log_number = data['log_number']
+        self.next_file_number = data['next_file_number']
+        self.last_sequence = data['last_sequence']
+        for item in data['files']:
+            meta = FileMetadata.from_dict(item)
+            self.files[meta.number] = meta
+    
+    def new_file_number(self) -> int:
+        """Reserve a number for a new SSTable file"""
+        number = self.next_file_number
+        self.next_file_number += 1
+        return number
+    
+    def apply(self, added: Iterable[FileMetadata] = (), removed: Iterable[int] = (),
+              log_number: Optional[int] = None) -> None:
+        """
+        Apply one change atomically and persist it
+        
+        Args:
+            added: Files that became live
+            removed: Numbers of files that are no longer live
+            log_number: New WAL log number (only ever moves forward)
+        """
+        for number in removed:
+            self.files.pop(number, None)
+        for meta in added:
+            self.files[meta.number] = meta
+            self.last_sequence = max(self.last_sequence, meta.largest_sequence)
+        if log_number is not None:
+            self.log_number = max(self.log_number, log_number)
+        self.save()
+    
+    def save(self) -> None:
+        """Write the manifest to a temporary file and rename it into place"""
+        data = {
+            'version': self.FORMAT_VERSION,
+            'log_number': self.log_number,
+            'next_file_number': self.next_file_number,
+            'last_sequence': self.last_sequence,
+            'files': [meta.to_dict() for meta in sorted(self.files.values(),
+                                                        key=lambda m: m.number)],
+        }
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        
+        # Make the rename itself durable
+        dir_fd = os.open(self.dirpath, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    
+    def files_at(self, level: int) -> List[FileMetadata]:
+        """Files of one level, ordered by file number"""
+        return sorted((m for m in self.files.values() if m.level == level),
+                      key=lambda m: m.number)
+    
+    def __repr__(self):
+        return (f"Manifest(files={len(self.files)}, log_number={self.log_number}, "
+                f"last_sequence={self.last_sequence})")
@@ -10,17 +10,127 @@ Key Features:
     - Size-based flush threshold
     - Tombstone support for deletes
     - Efficient point lookups
+    - Per-entry sequence numbers (last writer wins by sequence, not by
+      arrival order)
+    - Bulk inserts (put_many / update_sorted) that skip per-key
+      SortedDict insertion when the keys are new
 
 Design:
     Using sortedcontainers.SortedDict for O(log n) operations with
     simple, battle-tested implementation.
+
+Memory Accounting:
+    size_bytes() counts what the entries really cost in this process,
+    not len(key) + len(value):
+    - payload: key and value bytes objects, rounded up the way CPython's
+      allocator rounds them (16-byte pool slots up to 512 B, malloc
+      header above); a tombstone is a shared sentinel and costs nothing
+    - overhead: the (sequence, value) tuple and the sequence int object
+    - index: SortedDict hash table + sorted key lists, using a per-entry
+      cost measured once at import by filling a sample SortedDict
 """
 
 from sortedcontainers import SortedDict
-from typing import Optional, Iterator, Tuple
+from typing import Dict, Optional, Iterator, Tuple
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from itertools import islice
+from operator import itemgetter, lt
 import sys
 
 
+_ALIGNMENT = 16 if sys.maxsize > 2 ** 32 else 8  # pymalloc size class step
+_SMALL_REQUEST = 512    # Larger requests go to malloc
+_MALLOC_HEADER = 16     # Per-block bookkeeping of the system allocator
+
+
+def _allocated(nbytes: int) -> int:
+    """Bytes the allocator hands out for a request of nbytes"""
+    if nbytes <= _SMALL_REQUEST:
+        return -(-nbytes // _ALIGNMENT) * _ALIGNMENT
+    return -(-(nbytes + _MALLOC_HEADER) // 16) * 16
+
+
+def _index_bytes(data: SortedDict) -> int:
+    """Bytes held by a SortedDict's hash table and sorted key lists"""
+    keys = data._list
+    size = (sys.getsizeof(data) + sys.getsizeof(keys._lists)
+            + sys.getsizeof(keys._maxes) + sys.getsizeof(keys._index))
+    return size + sum(sys.getsizeof(sublist) for sublist in keys._lists)
+
+
+def _calibrate_index(samples: int = 16384) -> float:
+    """Measure the average index cost of one entry (keys in random order)"""
+    data = SortedDict()
+    empty = _index_bytes(data)
+    for i in range(samples):
+        data[(i * 2654435761 % 2 ** 32).to_bytes(4, 'big')] = None
+    return (_index_bytes(data) - empty) / samples
+
+
+_INDEX_ENTRY_COST = _calibrate_index()
+_TUPLE_COST = _allocated(sys.getsizeof((0, None)))
+_INT_COST = _allocated(sys.getsizeof(2 ** 40))
+_EMPTY_BYTES = sys.getsizeof(b'')
+
+
+def _bytes_cost(objects: list) -> int:
+    """Allocated size of many bytes objects, computed per distinct length"""
+    return sum(_allocated(_EMPTY_BYTES + length) * count
+               for length, count in Counter(map(len, objects)).items())
+
+
+def _sequence_cost(sequence: int) -> int:
+    """Small ints are cached by the interpreter and cost nothing"""
+    return 0 if -5 <= sequence <= 256 else _INT_COST
+
+
+def _split(values: list, load: int) -> list:
+    """Cut a sorted list into even sublists of about load items"""
+    size = -(-len(values) // -(-len(values) // load))
+    return [values[p:p + size] for p in range(0, len(values), size)]
+
+
+def _merge_keys(sorted_list, keys: list) -> None:
+    """
+    Insert new, distinct keys into a SortedList in one pass
+    
+    The keys that fall into the same sublist are merged into it together
+    (a few bisect-inserts, or one sort of two sorted runs for many keys),
+    and keys past the current maximum become whole new sublists.
+    SortedList.update would instead re-sort everything or insert the keys
+    one by one through add().
+    """
+    keys = sorted(keys)  # Linear for input that is already sorted
+    lists, maxes, load = sorted_list._lists, sorted_list._maxes, sorted_list._load
+    touched = []
+    pos = 0
+    while maxes and pos < len(keys):
+        i = bisect_left(maxes, keys[pos])
+        if i == len(maxes):
+            break  # The rest is past the last key
+        end = bisect_right(keys, maxes[i], pos)
+        sublist = lists[i]
+        if (end - pos) * 8 < len(sublist):
+            for key in keys[pos:end]:
+                insort(sublist, key)
+        else:
+            sublist.extend(keys[pos:end])
+            sublist.sort()
+        touched.append(i)
+        pos = end
+    
+    for i in reversed(touched):  # Split from the back, indices stay valid
+        if len(lists[i]) > load << 1:
+            lists[i:i + 1] = _split(lists[i], load)
+    if pos < len(keys):
+        tail = lists.pop() + keys[pos:] if lists else keys[pos:]
+        lists.extend(_split(tail, load))
+    maxes[:] = [sublist[-1] for sublist in lists]
+    sorted_list._len += len(keys)
+    del sorted_list._index[:]  # Positional index is rebuilt on demand
+
+
 class Memtable:
     """
     In-memory sorted key-value store
@@ -37,32 +147,53 @@ class Memtable:
         Args:
             max_size_bytes: Maximum size in bytes before flush is triggered
         """
-        self._data = SortedDict()
+        self._data = SortedDict()  # key -> (sequence, value)
         self.max_size_bytes = max_size_bytes
-        self._size_bytes = 0
+        self._payload_bytes = 0   # Key and value objects
+        self._overhead_bytes = 0  # Entry tuples and sequence ints
+        self.max_sequence = 0  # Highest sequence number stored
     
-    def put(self, key: bytes, value: bytes) -> None:
+    def put(self, key: bytes, value: bytes, sequence: Optional[int] = None) -> None:
         """
         Insert or update a key-value pair
         
         Args:
             key: The key (must be bytes)
             value: The value (must be bytes)
+            sequence: Sequence number of the write. A write older than the
+                stored entry (smaller sequence) is ignored; a write without
+                one always replaces the stored entry.
         """
         if not isinstance(key, bytes):
             raise TypeError("Key must be bytes")
         if not isinstance(value, bytes):
             raise TypeError("Value must be bytes")
         
-        # Calculate size delta
-        old_size = self._get_entry_size(key, self._data.get(key))
-        new_size = self._get_entry_size(key, value)
+        self._set(key, value, sequence)
+    
+    def _set(self, key: bytes, value, sequence: Optional[int]) -> None:
+        """Store value (or TOMBSTONE) unless a newer version is present"""
+        if sequence is None:
+            sequence = self.max_sequence  # Unsequenced: as new as anything stored
+        old = self._data.get(key)
+        if old is not None and old[0] > sequence:
+            return  # Stale write (e.g. replayed or reordered), keep newer
+        
+        # Update size tracking (the dict keeps the first key object)
+        if old is None:
+            self._payload_bytes += self._object_cost(key)
+            self._overhead_bytes += _TUPLE_COST
+        else:
+            self._payload_bytes -= self._object_cost(old[1])
+            self._overhead_bytes -= _sequence_cost(old[0])
+        self._payload_bytes += self._object_cost(value)
+        self._overhead_bytes += _sequence_cost(sequence)
         
         # Update data
-        self._data[key] = value # SortedDict tự động sort
+        self._data[key] = (sequence, value) # SortedDict tự động sort
         
-        # Update size tracking
-        self._size_bytes = self._size_bytes - old_size + new_size
+        if sequence > self.max_sequence:
+            self.max_sequence = sequence
     
     def get(self, key: bytes) -> Optional[bytes]:
         """
@@ -77,46 +208,167 @@ class Memtable:
         if not isinstance(key, bytes):
             raise TypeError("Key must be bytes")
         
-        value = self._data.get(key)
+        entry = self._data.get(key)
+        if entry is None:
+            return None
         
+        value = entry[1]
         if value is self.TOMBSTONE:
             # Key is deleted
             return None
         
         return value
     
+    def get_entry(self, key: bytes) -> Optional[Tuple[object, int]]:
+        """
+        Retrieve the raw entry for a key
+        
+        Unlike get(), distinguishes a deleted key from a missing one.
+        
+        Returns:
+            (value, sequence) where value may be TOMBSTONE, or None if the
+            key is not in the memtable
+        """
+        if not isinstance(key, bytes):
+            raise TypeError("Key must be bytes")
+        
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        return entry[1], entry[0]
+    
     # Timeline:
     # 1. PUT(k1, v1) → SSTable[k1=v1]
     # 2. DELETE(k1) → Memtable[k1=TOMBSTONE]
     # 3. GET(k1) → Check Memtable trước → thấy TOMBSTONE → return None
     #             (không cần check SSTable)
-    def delete(self, key: bytes) -> None:
+    def delete(self, key: bytes, sequence: Optional[int] = None) -> None:
         """
         Mark a key as deleted (insert tombstone)
         
         Args:
             key: The key to delete
+            sequence: Sequence number of the delete (None: always applies)
         """
         if not isinstance(key, bytes):
             raise TypeError("Key must be bytes")
         
-        # Calculate size delta
-        old_size = self._get_entry_size(key, self._data.get(key))
-        new_size = self._get_entry_size(key, self.TOMBSTONE)
-        
         # Insert tombstone
-        self._data[key] = self.TOMBSTONE
+        self._set(key, self.TOMBSTONE, sequence)
+    
+    def put_many(self, pairs, sequence: Optional[int] = None) -> None:
+        """
+        Insert many PUT/DELETE entries at once
+        
+        Keys and values are validated up front (nothing is inserted if any
+        pair is invalid). When no key is already stored and none repeats,
+        the entries go into the SortedDict in one bulk update instead of
+        one O(log n) insertion each; input that is already sorted and lies
+        past the current last key is detected in a single pass.
+        
+        Args:
+            pairs: Iterable of (key, value) pairs, value None for DELETE
+            sequence: Sequence number of the first entry, the rest follow
+                consecutively (as WAL.write_many assigns them); None: every
+                entry always applies
+        """
+        pairs = pairs if isinstance(pairs, list) else list(pairs)
+        if not pairs:
+            return
+        keys = list(map(itemgetter(0), pairs))
+        values = list(map(itemgetter(1), pairs))
+        # Type checks run in C for the common all-bytes case
+        key_types = set(map(type, keys))
+        if key_types != {bytes} and not all(isinstance(key, bytes) for key in keys):
+            raise TypeError("Key must be bytes")
+        value_types = set(map(type, values))
+        deletes = type(None) in value_types
+        value_types.discard(type(None))
+        if value_types - {bytes} and not all(isinstance(value, bytes) for value in values
+                                             if value is not None):
+            raise TypeError("Value must be bytes")
+        
+        live = values
+        if deletes:
+            live = [value for value in values if value is not None]
+            values = [self.TOMBSTONE if value is None else value for value in values]
+        
+        ascending = all(map(lt, keys, islice(keys, 1, None)))
+        if ascending and self._data and keys[0] <= self._data.keys()[-1]:
+            ascending = False  # Sorted, but not past the last stored key
+        fresh = ascending
+        if not fresh:
+            # Any order: still bulk-insertable if every key is new and unique
+            data = self._data
+            fresh = (len(set(keys)) == len(keys)
+                     and not any(map(data.__contains__, keys)))
+        
+        if not fresh:
+            first = self.max_sequence if sequence is None else sequence
+            step = 0 if sequence is None else 1
+            for i, (key, value) in enumerate(zip(keys, values)):
+                self._set(key, value, first + i * step)
+            return
         
-        # Update size tracking
-        self._size_bytes = self._size_bytes - old_size + new_size
+        count = len(keys)
+        if sequence is None:
+            entries = [(self.max_sequence, value) for value in values]
+            sequence_bytes = count * _sequence_cost(self.max_sequence)
+        else:
+            entries = list(zip(range(sequence, sequence + count), values))
+            cached = max(0, min(sequence + count, 257) - max(sequence, -5))
+            sequence_bytes = (count - cached) * _INT_COST
+            self.max_sequence = max(self.max_sequence, sequence + count - 1)
+        dict.update(self._data, zip(keys, entries))
+        _merge_keys(self._data._list, keys)
+        
+        # Size accounting once for the whole batch
+        self._payload_bytes += (self._objects_cost(keys, key_types)
+                                + self._objects_cost(live, value_types))
+        self._overhead_bytes += count * _TUPLE_COST + sequence_bytes
+    
+    def update_sorted(self, pairs, sequence: Optional[int] = None) -> None:
+        """
+        Insert entries whose keys are strictly ascending
+        
+        Same as put_many(), but the caller promises sorted input (e.g. an
+        SSTable or a sorted export) and a mistake is reported instead of
+        silently taking the slower path.
+        
+        Raises:
+            ValueError: If the keys are not strictly ascending
+        """
+        pairs = pairs if isinstance(pairs, list) else list(pairs)
+        for (a, _), (b, _) in zip(pairs, pairs[1:]):
+            if not a < b:
+                raise ValueError(f"Keys not in ascending order: {a!r} >= {b!r}")
+        self.put_many(pairs, sequence)
     
     def is_full(self) -> bool:
         """Check if memtable has reached size threshold"""
-        return self._size_bytes >= self.max_size_bytes
+        return self.size_bytes() >= self.max_size_bytes
     
     def size_bytes(self) -> int:
-        """Get current size in bytes"""
-        return self._size_bytes
+        """Get current size in bytes (total of memory_usage())"""
+        return (self._payload_bytes + self._overhead_bytes
+                + int(len(self._data) * _INDEX_ENTRY_COST))
+    
+    def memory_usage(self) -> Dict[str, int]:
+        """
+        Break the memory used by the entries down
+        
+        Returns:
+            Dict with 'payload' (key/value objects), 'index' (SortedDict
+            structures), 'overhead' (entry tuples, sequence ints) and
+            'total', all in bytes
+        """
+        index = int(len(self._data) * _INDEX_ENTRY_COST)
+        return {
+            'payload': self._payload_bytes,
+            'index': index,
+            'overhead': self._overhead_bytes,
+            'total': self._payload_bytes + index + self._overhead_bytes,
+        }
     
     def num_entries(self) -> int:
         """Get number of entries (including tombstones)"""
@@ -133,52 +385,44 @@ class Memtable:
         Yields:
             Tuples of (key, value) where value may be TOMBSTONE
         """
-        for key, value in self._data.items():
+        for key, (_, value) in self._data.items():
             yield key, value
     
+    def iter_entries(self) -> Iterator[Tuple[bytes, object, int]]:
+        """
+        Iterate over all entries in sorted order, with sequence numbers
+        
+        Yields:
+            Tuples of (key, value, sequence) where value may be TOMBSTONE
+        """
+        for key, (sequence, value) in self._data.items():
+            yield key, value, sequence
+    
     def clear(self):
         """Clear all entries (called after successful flush)"""
         self._data.clear()
-        self._size_bytes = 0
+        self._payload_bytes = 0
+        self._overhead_bytes = 0
+        self.max_sequence = 0
     
-    def _get_entry_size(self, key: bytes, value) -> int:
-        """
-        Calculate approximate size of an entry
-        
-        Args:
-            key: The key
-            value: The value (may be TOMBSTONE or None)
-            
-        Returns:
-            Estimated size in bytes
-        """
-        if value is None:
-            # Entry doesn't exist
+    def _object_cost(self, obj) -> int:
+        """Allocated size of a key/value object (the tombstone is shared)"""
+        if obj is self.TOMBSTONE:
             return 0
-        
-        # Key size
-        size = len(key)
-        
-        # Value size
-        if value is self.TOMBSTONE:
-            # Tombstone takes minimal space (just marker)
-            size += 4  # Just the tombstone marker
-        else:
-            size += len(value)
-        
-        # Python object overhead (approximate)
-        # Each entry has reference overhead in SortedDict
-        size += sys.getsizeof(key) - len(key)  # Object overhead
-        size += 48  # Approximate SortedDict node overhead
-        
-        return size
+        return _allocated(sys.getsizeof(obj))
+    
+    def _objects_cost(self, objects: list, types: set) -> int:
+        """Allocated size of many key/value objects (no tombstones)"""
+        if types == {bytes}:
+            return _bytes_cost(objects)
+        return sum(map(self._object_cost, objects))
     
     def __len__(self):
         return len(self._data)
     
     def __repr__(self):
         return (f"Memtable(entries={len(self._data)}, "
-                f"size={self._size_bytes}/{self.max_size_bytes} bytes)")
+                f"size={self.size_bytes()}/{self.max_size_bytes} bytes)")
 
 # Flush Process
 # if memtable.is_full():  # _size_bytes >= 4MB
@@ -196,9 +440,9 @@ class Memtable:
     # wal.truncate()  # Data đã an toàn trên disk
 class MemtableIterator:
     """
-    Iterator for merging multiple memtables/SSTables
+    Peekable iterator over one memtable's (key, value) entries
     
-    Used during compaction to iterate over entries in sorted order
+    To merge several memtables and SSTables, use MergingIterator.
     """
     
     def __init__(self, memtable: Memtable):
@@ -0,0 +1,98 @@
+"""
+Merging Iterator Module
+
+Purpose:
+    Merges any number of sorted sources (memtables, immutable memtables,
+    SSTables) into one sorted stream, the way reads and compactions see
+    the store: one entry per key, the newest version wins.
+
+How It Works:
+    - A heap holds the current entry of every source, ordered by
+      (key, newest sequence first, source position)
+    - The top entry is emitted; every other entry with the same key is
+      older and skipped; each source advances lazily, so nothing is
+      materialized beyond one entry per source
+    - Tombstones are emitted as value None, or dropped entirely with
+      drop_tombstones=True (only safe when no older data can exist
+      below the merged sources, e.g. a compaction into the last level)
+
+Usage:
+    merged = MergingIterator([active, *immutables, *readers])
+    for key, value, sequence in merged:
+        ...                                    # value None = deleted
+"""
+
+from heapq import heapify, heappop, heapreplace
+from typing import Iterator, Optional, Tuple
+
+
+class MergingIterator:
+    """
+    Newest-wins merge of sorted (key, value, sequence) sources
+    
+    A source is anything with iter_entries() (Memtable, ArenaMemtable,
+    SkipListMemtable, SSTableReader) or an iterable of (key, value,
+    sequence) tuples. When two sources hold the same key with the same
+    sequence (e.g. v1 SSTables, where every sequence is 0), the one given
+    first wins, so pass sources newest first.
+    """
+    
+    def __init__(self, sources, drop_tombstones: bool = False):
+        """
+        Args:
+            sources: Sorted sources, newest first
+            drop_tombstones: Leave deleted keys out of the output instead
+                of emitting them with value None
+        """
+        self._sources = list(sources)
+        self.drop_tombstones = drop_tombstones
+        self.num_shadowed = 0           # Older versions skipped
+        self.num_tombstones_dropped = 0
+    
+    def __iter__(self) -> Iterator[Tuple[bytes, Optional[bytes], int]]:
+        """
+        Yields:
+            (key, value, sequence) in key order, value None for a
+            tombstone (unless tombstones are dropped)
+        """
+        heap = []
+        tombstones = []     # Per source: its tombstone marker (None for SSTables)
+        for index, source in enumerate(self._sources):
+            if hasattr(source, 'iter_entries'):
+                entries = source.iter_entries()
+            else:
+                entries = iter(source)
+            tombstones.append(getattr(source, 'TOMBSTONE', None))
+            entry = next(entries, None)
+            if entry is not None:
+                heap.append((entry[0], -entry[2], index, entry[1], entries))
+        heapify(heap)
+        
+        drop_tombstones = self.drop_tombstones
+        while heap:
+            key, neg_sequence, winner, value, entries = heap[0]
+            index = winner
+            
+            # Advance the top source, then skip the older versions of key
+            # in the other sources (advancing is inlined: hot loop)
+            while True:
+                entry = next(entries, None)
+                if entry is None:
+                    heappop(heap)
+                else:
+                    heapreplace(heap, (entry[0], -entry[2], index, entry[1], entries))
+                if not heap or heap[0][0] != key:
+                    break
+                index, entries = heap[0][2], heap[0][4]
+                self.num_shadowed += 1
+            
+            if value is None or value is tombstones[winner]:
+                if drop_tombstones:
+                    self.num_tombstones_dropped += 1
+                    continue
+                value = None
+            yield key, value, -neg_sequence
+    
+    def __repr__(self):
+        return (f"MergingIterator(sources={len(self._sources)}, "
+                f"drop_tombstones={self.drop_tombstones})")
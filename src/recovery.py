@@ -0,0 +1,260 @@
+"""
+Parallel WAL Recovery Module
+
+Purpose:
+    Cuts restart time by replaying large or segmented logs with a pool
+    of worker processes instead of one sequential read_all() loop.
+
+How It Works:
+    1. Every log file is cut into byte ranges of roughly equal size
+    2. Workers map the file, find the first record boundary in their
+       range, decode and CRC-check every record starting inside it, and
+       send back (key, value, sequence) tuples
+    3. The parent applies the ranges in log order, which is sequence
+       order, to the memtable. When the memtable fills up it is handed
+       to a flush callback (e.g. written as an L0 SSTable) and cleared.
+
+Finding Record Boundaries:
+    - Block format: ranges are block aligned. A worker skips trailing
+      fragments of a record begun in the previous range and finishes
+      the last record it started even if it runs past its range.
+    - v1 format has no sync markers. A worker slides forward byte by
+      byte until two consecutive records pass their CRC check (a false
+      match needs two 32-bit CRC collisions). The parent checks that
+      each range starts exactly where the previous one ended; if not
+      (corruption in between), the rest of the file is replayed
+      sequentially so replay stops at the first bad record, exactly
+      like WAL.read_all().
+
+Usage:
+    memtable = Memtable()
+    count, last_sequence = parallel_replay(paths, memtable, workers=8)
+"""
+
+import mmap
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+try:
+    from .wal import WAL, WALEntry, WriteBatch, _HEADER, _decode_record, _iter_block_records
+    from .memtable import Memtable
+except ImportError:
+    from wal import WAL, WALEntry, WriteBatch, _HEADER, _decode_record, _iter_block_records
+    from memtable import Memtable
+
+
+DEFAULT_RANGE_BYTES = 16 * 1024 * 1024  # 16 MB per task
+MIN_RANGE_BYTES = 1024 * 1024            # Smaller logs are not worth splitting
+
+
+def parallel_replay(paths: List[str], memtable: Memtable, workers: int = 4,
+                    block_format: bool = False, log_numbers: Optional[List[int]] = None,
+                    flush: Optional[Callable[[Memtable], None]] = None,
+                    range_bytes: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Replay WAL files into a memtable using a process pool
+    
+    Args:
+        paths: Log files, oldest first
+        memtable: Memtable receiving the entries (with their sequences)
+        workers: Worker processes; 1 replays in this process
+        block_format: Logs use the block format
+        log_numbers: Log number of each file (block format only,
+            defaults to 0 for every file)
+        flush: Called with the memtable whenever it is full, before it
+            is cleared. Without a callback the memtable just grows.
+        range_bytes: Target size of one task (default: the log split
+            evenly over the workers, at most 16 MB)
+    
+    Returns:
+        Tuple of (entries replayed, highest sequence seen)
+    """
+    if log_numbers is None:
+        log_numbers = [0] * len(paths)
+    
+    tasks = []
+    for path, log_number in zip(paths, log_numbers):
+        if os.path.exists(path):
+            tasks.extend(_split(path, block_format, log_number, workers, range_bytes))
+    
+    replayer = _Replayer(memtable, flush)
+    if workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            replayer.apply(task, _replay_range(task))
+        replayer.finish()
+        return replayer.count, replayer.last_sequence
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Keep a bounded number of ranges in flight so decoded entries
+        # never pile up faster than the memtable absorbs them
+        in_flight = deque()
+        pending = iter(tasks)
+        for task in pending:
+            in_flight.append((task, pool.submit(_replay_range, task)))
+            if len(in_flight) >= workers * 2:
+                break
+        while in_flight:
+            task, future = in_flight.popleft()
+            replayer.apply(task, future.result())
+            for task in pending:
+                in_flight.append((task, pool.submit(_replay_range, task)))
+                break
+    
+    replayer.finish()
+    return replayer.count, replayer.last_sequence
+
+
+def _split(path: str, block_format: bool, log_number: int, workers: int,
+           range_bytes: Optional[int]) -> List[tuple]:
+    """Cut one log into (path, block_format, log_number, start, stop, resync) tasks"""
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    if range_bytes is None:
+        range_bytes = min(DEFAULT_RANGE_BYTES, max(MIN_RANGE_BYTES, -(-size // workers)))
+    if block_format:
+        range_bytes = max(WAL.BLOCK_SIZE, range_bytes // WAL.BLOCK_SIZE * WAL.BLOCK_SIZE)
+    
+    return [(path, block_format, log_number, start, min(start + range_bytes, size), start > 0)
+            for start in range(0, size, range_bytes)]
+
+
+def _replay_range(task: tuple) -> Tuple[Optional[int], int, list, Optional[int]]:
+    """
+    Decode every record starting inside one range (runs in a worker)
+    
+    Returns:
+        Tuple of (first record offset or None if no record starts in the
+        range, offset after the last record, [(key, value, sequence)],
+        offset of a corrupted v1 record or None)
+    """
+    path, block_format, log_number, start, stop, resync = task
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mm)
+    try:
+        if block_format:
+            entries = [(e.key, e.value, e.sequence)
+                       for e in _iter_block_records(view, size, log_number, start, stop)]
+            return start, stop, entries, None
+        
+        pos = _find_record_start(view, start, stop, size) if resync else start
+        if pos is None:
+            return None, start, [], None
+        
+        first = pos
+        entries = []
+        error = None
+        while pos < stop:
+            try:
+                records, pos = _decode_record(view, pos)
+            except ValueError:
+                error = pos
+                break
+            entries.extend((e.key, e.value, e.sequence) for e in records)
+        return first, pos, entries, error
+    finally:
+        view.release()
+        mm.close()
+
+
+def _record_end(view: memoryview, pos: int, size: int) -> Optional[int]:
+    """End of the v1 record a header at pos claims, or None if it cannot fit"""
+    if pos + _HEADER.size + 4 > size:
+        return None
+    _, key_size, value_size = _HEADER.unpack_from(view, pos)
+    if key_size == WriteBatch.BATCH_MARKER:
+        end = pos + _HEADER.size + value_size + 4
+    elif value_size == WALEntry.TOMBSTONE_VALUE_SIZE:
+        end = pos + _HEADER.size + key_size + 4
+    else:
+        end = pos + _HEADER.size + key_size + value_size + 4
+    return end if end <= size else None
+
+
+def _find_record_start(view: memoryview, start: int, stop: int, size: int) -> Optional[int]:
+    """First offset in [start, stop) where a valid v1 record begins"""
+    for pos in range(start, stop):
+        end = _record_end(view, pos, size)
+        if end is None:
+            continue
+        try:
+            _decode_record(view, pos)
+            if end < size:
+                _decode_record(view, end)  # Confirm with the following record
+        except ValueError:
+            continue
+        return pos
+    return None
+
+
+class _Replayer:
+    """Applies range results in order and tracks where each log stands"""
+    
+    def __init__(self, memtable: Memtable, flush: Optional[Callable[[Memtable], None]]):
+        self.memtable = memtable
+        self.flush = flush
+        self.count = 0
+        self.last_sequence = 0
+        self._task = None       # Last task of the current log
+        self._expected = 0      # Offset where the next v1 range must start
+        self._stopped = False   # Current log is done (corruption or fallback)
+    
+    def apply(self, task: tuple, result: tuple) -> None:
+        if self._task is None or task[0] != self._task[0]:
+            self.finish()
+            self._expected = 0
+            self._stopped = False
+        self._task = task
+        if self._stopped:
+            return
+        
+        first, end, entries, error = result
+        if not task[1]:  # v1: ranges must line up record by record
+            if first is None:
+                return  # A record from an earlier range covers this one
+            if first != self._expected:
+                # The previous range ended on a corrupted record, or this
+                # worker synced on the wrong offset: replay the rest of the
+                # log sequentially
+                self._replay_tail()
+                return
+            self._expected = end
+            if error is not None:
+                print(f"WAL: Stopped reading {task[0]} at offset {error}")
+                self._stopped = True
+        
+        self._apply_entries(entries)
+    
+    def finish(self) -> None:
+        """Replay whatever the ranges of the current v1 log left uncovered"""
+        if self._task is not None and not self._task[1] and not self._stopped:
+            if self._expected < os.path.getsize(self._task[0]):
+                self._replay_tail()
+    
+    def _replay_tail(self) -> None:
+        """Replay the current log from _expected to its end, then skip its ranges"""
+        path, _, log_number, _, _, _ = self._task
+        size = os.path.getsize(path)
+        self._stopped = True
+        _, _, entries, error = _replay_range((path, False, log_number, self._expected, size, False))
+        if error is not None:
+            print(f"WAL: Stopped reading {path} at offset {error}")
+        self._apply_entries(entries)
+    
+    def _apply_entries(self, entries: list) -> None:
+        memtable = self.memtable
+        for key, value, sequence in entries:
+            if value is None:
+                memtable.delete(key, sequence)
+            else:
+                memtable.put(key, value, sequence)
+            if sequence > self.last_sequence:
+                self.last_sequence = sequence
+            if self.flush is not None and memtable.is_full():
+                self.flush(memtable)
+                memtable.clear()
+        self.count += len(entries)
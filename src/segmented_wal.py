@@ -0,0 +1,420 @@
+"""
+Segmented Write-Ahead Log Module
+
+Purpose:
+    Splits the WAL into numbered segment files so that a memtable flush
+    never has to stall writers to truncate the log.
+
+Key Features:
+    - Numbered segments: 000001.wal, 000002.wal, ...
+    - rotate() switches writers to a fresh segment (called when the
+      memtable is sealed)
+    - release(n) marks every segment older than n as obsolete once its
+      data is safely in an SSTable
+    - Obsolete segments are deleted or recycled by a background thread,
+      never on the write path
+    - Recovery can skip segments that were already flushed
+    - replay() recovers segments in parallel worker processes
+
+Directory Layout:
+    wal/
+        000007.wal          <- obsolete, waiting for the recycler
+        000008.wal          <- sealed, memtable not flushed yet
+        000009.wal          <- active segment
+        recycle-000001.wal  <- spare file, renamed into the next segment
+
+    With block_format=True each segment's log number is its file number,
+    so recycled files keep their preallocated blocks.
+"""
+
+import os
+import queue
+import threading
+from typing import Iterator, List, Optional, Tuple
+
+try:
+    from .wal import WAL, WALEntry, WriteBatch, SyncPolicy
+    from .recovery import parallel_replay
+except ImportError:
+    from wal import WAL, WALEntry, WriteBatch, SyncPolicy
+    from recovery import parallel_replay
+
+
+class SegmentedWAL:
+    """
+    Write-Ahead Log split into numbered, rotating segments
+    
+    Each segment is a regular WAL file, so the record format, group
+    commit and batch support are exactly those of WAL.
+    
+    Usage:
+        wal = SegmentedWAL("data/wal")
+        for entry in wal.read_all(min_segment=flushed_upto):
+            memtable.put(...)
+        wal.write(b"k", b"v")
+        sealed = wal.rotate()          # memtable sealed
+        ...                            # flush sealed memtable
+        wal.release(sealed + 1)        # segments <= sealed can go
+    """
+    
+    SEGMENT_SUFFIX = '.wal'
+    RECYCLE_PREFIX = 'recycle-'
+    DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024  # 64 MB
+    
+    def __init__(self, dirpath: str, segment_size: int = DEFAULT_SEGMENT_SIZE,
+                 max_recycled: int = 2, **wal_options):
+        """
+        Args:
+            dirpath: Directory holding the segment files
+            segment_size: Roll over to a new segment once the active one
+                reaches this many bytes
+            max_recycled: Number of obsolete segments kept for reuse;
+                extra ones are deleted
+            wal_options: Passed to each segment's WAL (sync_on_write,
+                sync_policy, group_commit, ...)
+        """
+        self.dirpath = dirpath
+        self.segment_size = segment_size
+        self.max_recycled = max_recycled
+        self._wal_options = wal_options
+        self._block_format = wal_options.get('block_format', False)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)  # Signalled when a WAL has no writers
+        self._writers = {}  # WAL -> number of writes in flight
+        
+        os.makedirs(dirpath, exist_ok=True)
+        
+        # Never append to a segment left over from a previous run: it may
+        # end in a torn record. Start a fresh one after the newest.
+        existing = self.segments()
+        self._next_number = (existing[-1] + 1) if existing else 1
+        self._sealed = {}  # number -> WAL, kept open until released
+        self.last_sequence = 0  # Shared by all segments
+        self._active = None
+        self._active_number = 0
+        
+        # Continue numbering after the newest segment that holds records
+        for number in reversed(existing):
+            wal = self._open_segment(number, sync_policy=SyncPolicy.os())
+            wal.close()
+            if wal.last_sequence:
+                self.last_sequence = wal.last_sequence
+                break
+        
+        self._open_next_segment()
+        
+        # Background recycler
+        self._obsolete = queue.Queue()
+        self._recycler = threading.Thread(target=self._recycle_loop,
+                                          name="wal-recycler", daemon=True)
+        self._recycler.start()
+    
+    def segment_path(self, number: int) -> str:
+        """Path of segment file with the given number"""
+        return os.path.join(self.dirpath, f"{number:06d}{self.SEGMENT_SUFFIX}")
+    
+    def segments(self) -> List[int]:
+        """Sorted numbers of all segment files on disk"""
+        numbers = []
+        for name in os.listdir(self.dirpath):
+            stem, ext = os.path.splitext(name)
+            if ext == self.SEGMENT_SUFFIX and stem.isdigit():
+                numbers.append(int(stem))
+        return sorted(numbers)
+    
+    def _recycled_files(self) -> List[str]:
+        return sorted(
+            name for name in os.listdir(self.dirpath)
+            if name.startswith(self.RECYCLE_PREFIX) and name.endswith(self.SEGMENT_SUFFIX)
+        )
+    
+    @property
+    def active_number(self) -> int:
+        """Number of the segment currently receiving writes"""
+        return self._active_number
+    
+    def write(self, key: bytes, value: Optional[bytes], sequence: int = None) -> int:
+        """
+        Write a PUT or DELETE entry to the active segment
+        
+        Returns:
+            The sequence number of the entry
+        """
+        sequence, wal = self._begin_write(sequence, 1)
+        try:
+            wal.write(key, value, sequence)
+            self._maybe_roll(wal)
+        finally:
+            self._end_write(wal)
+        return sequence
+    
+    def write_batch(self, batch: WriteBatch, sequence: int = None) -> int:
+        """
+        Write a batch as one atomic record to the active segment
+        
+        Returns:
+            The sequence number of the first operation
+        """
+        if len(batch) == 0:
+            return self.last_sequence
+        sequence, wal = self._begin_write(sequence, len(batch))
+        try:
+            wal.write_batch(batch, sequence)
+            self._maybe_roll(wal)
+        finally:
+            self._end_write(wal)
+        return sequence
+    
+    def write_many(self, ops, sequence: int = None) -> int:
+        """
+        Write many independent entries with one vectored write
+        
+        Returns:
+            The sequence number of the first entry
+        """
+        ops = list(ops)
+        if not ops:
+            return self.last_sequence
+        sequence, wal = self._begin_write(sequence, len(ops))
+        try:
+            wal.write_many(ops, sequence)
+            self._maybe_roll(wal)
+        finally:
+            self._end_write(wal)
+        return sequence
+    
+    def sync(self) -> None:
+        """Make every write issued so far durable (see WAL.sync)"""
+        with self._lock:
+            wals = list(self._sealed.values()) + [self._active]
+            for wal in wals:
+                self._writers[wal] = self._writers.get(wal, 0) + 1
+        for wal in wals:
+            try:
+                wal.sync()
+            finally:
+                self._end_write(wal)
+    
+    def allocate_sequence(self, count: int = 1) -> int:
+        """
+        Reserve sequence numbers for data that bypasses the log (e.g.
+        ingested SSTables), so later writes are numbered after it
+        
+        Returns:
+            The first reserved sequence number
+        """
+        with self._lock:
+            sequence = self.last_sequence + 1
+            self.last_sequence += count
+        return sequence
+    
+    def _begin_write(self, sequence: Optional[int], count: int) -> Tuple[int, WAL]:
+        """
+        Assign sequence numbers and pin the active segment
+        
+        Sequence numbers must keep growing across segments. The pinned
+        segment is not closed by the recycler until _end_write, even if a
+        rotate() + release() races with the write.
+        """
+        with self._lock:
+            if sequence is None:
+                sequence = self.last_sequence + 1
+            self.last_sequence = max(self.last_sequence, sequence + count - 1)
+            wal = self._active
+            self._writers[wal] = self._writers.get(wal, 0) + 1
+        return sequence, wal
+    
+    def _end_write(self, wal: WAL) -> None:
+        with self._idle:
+            self._writers[wal] -= 1
+            if not self._writers[wal]:
+                del self._writers[wal]
+                self._idle.notify_all()
+    
+    def _maybe_roll(self, wal: WAL):
+        """
+        Roll over to a new segment once the active one is full
+        
+        Called with wal still pinned: the active segment may be sealed and
+        released concurrently, and only a pinned one is safe to inspect.
+        """
+        if wal.tell() >= self.segment_size:
+            with self._lock:
+                if self._active is wal:
+                    self._rotate_locked()
+    
+    def rotate(self) -> int:
+        """
+        Seal the active segment and direct new writes to a fresh one
+        
+        Called when the memtable is sealed. The old segment stays open
+        (records racing with the rotation may still land in it) until it
+        is released.
+        
+        Returns:
+            Number of the segment that was sealed
+        """
+        with self._lock:
+            return self._rotate_locked()
+    
+    def _rotate_locked(self) -> int:
+        sealed_number = self._active_number
+        self._sealed[sealed_number] = self._active
+        self._open_next_segment()
+        return sealed_number
+    
+    def _open_next_segment(self):
+        """Open the next segment, reusing a recycled file when available"""
+        number = self._next_number
+        self._next_number += 1
+        path = self.segment_path(number)
+        
+        recycled = self._recycled_files()
+        if recycled:
+            # Renaming a spare file avoids creating a new inode. In block
+            # format its preallocated blocks are kept: stale fragments carry
+            # an older log number and are ignored by recovery. In the
+            # plain format the spare is emptied before the rename, so a
+            # crash can never leave flushed records under a live number.
+            spare = os.path.join(self.dirpath, recycled[0])
+            if not self._block_format:
+                with open(spare, 'r+b') as f:
+                    f.truncate(0)
+                    os.fsync(f.fileno())
+            os.rename(spare, path)
+        
+        self._active = self._open_segment(number)
+        self._active_number = number
+    
+    def _open_segment(self, number: int, **overrides) -> WAL:
+        """Open segment file as a WAL, stamped with its log number"""
+        options = dict(self._wal_options, **overrides)
+        if self._block_format:
+            options['log_number'] = number
+        return WAL(self.segment_path(number), **options)
+    
+    def release(self, upto_number: int) -> None:
+        """
+        Mark every segment with number < upto_number as obsolete
+        
+        Must only be called once all data in those segments has been
+        persisted to SSTables. Files are removed in the background.
+        
+        Args:
+            upto_number: First segment number that must be kept
+        """
+        upto_number = min(upto_number, self._active_number)
+        with self._lock:
+            for number in self.segments():
+                if number >= upto_number:
+                    break
+                wal = self._sealed.pop(number, None)
+                self._obsolete.put((number, wal))
+    
+    def _recycle_loop(self):
+        """Background thread: close and delete/recycle obsolete segments"""
+        while True:
+            item = self._obsolete.get()
+            try:
+                if item is None:
+                    return
+                number, wal = item
+                if wal is not None:
+                    with self._idle:
+                        while self._writers.get(wal):
+                            self._idle.wait()
+                    wal.close()
+                path = self.segment_path(number)
+                if not os.path.exists(path):
+                    continue
+                if len(self._recycled_files()) < self.max_recycled:
+                    spare = f"{self.RECYCLE_PREFIX}{number:06d}{self.SEGMENT_SUFFIX}"
+                    os.rename(path, os.path.join(self.dirpath, spare))
+                else:
+                    os.remove(path)
+            except OSError as e:
+                print(f"WAL: Failed to recycle segment {item[0]}: {e}")
+            finally:
+                self._obsolete.task_done()
+    
+    def wait_for_recycling(self) -> None:
+        """Block until every released segment has been processed"""
+        self._obsolete.join()
+    
+    def read_all(self, min_segment: int = 0) -> Iterator[WALEntry]:
+        """
+        Read entries from all segments, oldest first
+        
+        Args:
+            min_segment: Skip segments with a smaller number (their data
+                is already in SSTables)
+        
+        Yields:
+            WALEntry objects in log order. last_sequence is advanced past
+            every recovered entry.
+        """
+        for number in self.segments():
+            if number < min_segment:
+                continue
+            if number == self._active_number:
+                wal = self._active
+            else:
+                wal = self._sealed.get(number)
+            if wal is not None:
+                entries = wal.read_all()
+            else:
+                old = self._open_segment(number, sync_policy=SyncPolicy.os())
+                old.close()  # Only reading: read_all maps the file itself
+                entries = old.read_all()
+            for entry in entries:
+                if entry.sequence > self.last_sequence:
+                    self.last_sequence = entry.sequence
+                yield entry
+    
+    def replay(self, memtable, min_segment: int = 0, workers: int = 4,
+               flush=None) -> int:
+        """
+        Replay segments into a memtable with a pool of worker processes
+        
+        Faster than feeding read_all() to the memtable for large logs;
+        see recovery.parallel_replay for the details.
+        
+        Args:
+            memtable: Memtable receiving the entries
+            min_segment: Skip segments with a smaller number
+            workers: Worker processes (1 replays in this process)
+            flush: Called with the memtable whenever it fills up, before
+                it is cleared
+            
+        Returns:
+            Number of entries replayed. last_sequence is advanced past
+            every recovered entry.
+        """
+        numbers = [n for n in self.segments() if n >= min_segment]
+        count, last_sequence = parallel_replay(
+            [self.segment_path(n) for n in numbers], memtable, workers=workers,
+            block_format=self._block_format, log_numbers=numbers, flush=flush)
+        with self._lock:
+            self.last_sequence = max(self.last_sequence, last_sequence)
+        return count
+    
+    def close(self):
+        """Close all segments and stop the recycler"""
+        self._obsolete.put(None)
+        self._recycler.join()
+        with self._lock:
+            for wal in self._sealed.values():
+                wal.close()
+            self._sealed.clear()
+            if self._active:
+                self._active.close()
+                self._active = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def __repr__(self):
+        return f"SegmentedWAL(dirpath={self.dirpath!r}, active={self._active_number})"
@@ -0,0 +1,257 @@
+"""
+Skiplist Memtable Module
+
+Purpose:
+    Memtable that can be read while another thread writes to it, without
+    putting readers behind a lock.
+
+Design:
+    - Insert-only skiplist: nodes are never unlinked. A delete stores a
+      tombstone, an overwrite swaps the node's (sequence, value) tuple
+      in a single attribute assignment.
+    - Writers take a short lock around the search + splice, so two
+      writers never link into the same gap.
+    - A new node gets all of its forward pointers before it is linked,
+      and is linked bottom-up, so a reader following any pointer only
+      ever reaches fully built nodes. Readers take no lock at all.
+    - Iteration walks level 0 and sees a weakly consistent view: keys
+      inserted behind the cursor are missed, never half-seen.
+
+Usage:
+    memtable = SkipListMemtable()
+    memtable.put(b"key", b"value", sequence=1)   # any thread
+    memtable.get(b"key")                         # any thread, lock-free
+"""
+
+import random
+import sys
+import threading
+from typing import Iterator, List, Optional, Tuple
+
+try:
+    from .memtable import Memtable
+except ImportError:
+    from memtable import Memtable
+
+
+class _Node:
+    """Skiplist node: key, (sequence, value) entry and forward pointers"""
+    
+    __slots__ = ('key', 'entry', 'next')
+    
+    def __init__(self, key: Optional[bytes], entry: Optional[tuple], next_nodes: List):
+        self.key = key
+        self.entry = entry
+        self.next = next_nodes
+
+
+class SkipListMemtable:
+    """
+    Concurrent in-memory sorted key-value store
+    
+    Same interface as Memtable (put/get/get_entry/delete/iter_all/
+    iter_entries/is_full/clear, sequence numbers, TOMBSTONE sentinel).
+    Any number of threads may read while writers insert.
+    """
+    
+    TOMBSTONE = Memtable.TOMBSTONE  # Shared so flush code works with both
+    DEFAULT_MAX_SIZE = Memtable.DEFAULT_MAX_SIZE
+    MAX_HEIGHT = 16
+    BRANCHING = 4  # A node reaches the next level with probability 1/4
+    
+    _NODE_OVERHEAD = sys.getsizeof(_Node(None, None, [])) + sys.getsizeof(())
+    
+    def __init__(self, max_size_bytes: int = DEFAULT_MAX_SIZE):
+        """
+        Args:
+            max_size_bytes: Maximum size in bytes before flush is triggered
+        """
+        self.max_size_bytes = max_size_bytes
+        self._lock = threading.Lock()  # Writers only
+        self._reset()
+    
+    def _reset(self):
+        self._head = _Node(None, None, [None] * self.MAX_HEIGHT)
+        self._height = 1
+        self._count = 0
+        self._size_bytes = 0
+        self.max_sequence = 0  # Highest sequence number stored
+    
+    def put(self, key: bytes, value: bytes, sequence: Optional[int] = None) -> None:
+        """
+        Insert or update a key-value pair
+        
+        Args:
+            key: The key (must be bytes)
+            value: The value (must be bytes)
+            sequence: Sequence number of the write. A write older than the
+                stored entry (smaller sequence) is ignored; a write without
+                one always replaces the stored entry.
+        """
+        if not isinstance(key, bytes):
+            raise TypeError("Key must be bytes")
+        if not isinstance(value, bytes):
+            raise TypeError("Value must be bytes")
+        
+        self._set(key, value, sequence)
+    
+    def delete(self, key: bytes, sequence: Optional[int] = None) -> None:
+        """
+        Mark a key as deleted (insert tombstone)
+        
+        Args:
+            key: The key to delete
+            sequence: Sequence number of the delete (None: always applies)
+        """
+        if not isinstance(key, bytes):
+            raise TypeError("Key must be bytes")
+        
+        self._set(key, self.TOMBSTONE, sequence)
+    
+    def _set(self, key: bytes, value, sequence: Optional[int]) -> None:
+        """Splice a node in (or swap the entry of an existing one)"""
+        with self._lock:
+            if sequence is None:
+                sequence = self.max_sequence  # Unsequenced: as new as anything stored
+            preds = self._find_predecessors(key)
+            node = preds[0].next[0]
+            
+            if node is not None and node.key == key:
+                old_sequence, old_value = node.entry
+                if old_sequence > sequence:
+                    return  # Stale write (e.g. replayed or reordered), keep newer
+                node.entry = (sequence, value)  # Atomic swap for readers
+                self._size_bytes += self._value_size(value) - self._value_size(old_value)
+            else:
+                height = self._random_height()
+                new = _Node(key, (sequence, value),
+                            [preds[level].next[level] for level in range(height)])
+                # Bottom-up: once reachable at level i, the node is already
+                # reachable (and fully built) at every level below
+                for level in range(height):
+                    preds[level].next[level] = new
+                if height > self._height:
+                    self._height = height
+                self._count += 1
+                self._size_bytes += (len(key) + self._value_size(value)
+                                     + self._NODE_OVERHEAD + 8 * height)
+            
+            if sequence > self.max_sequence:
+                self.max_sequence = sequence
+    
+    def _find_predecessors(self, key: bytes) -> List[_Node]:
+        """Rightmost node before key at every level (writer lock held)"""
+        preds = [self._head] * self.MAX_HEIGHT
+        node = self._head
+        for level in range(self._height - 1, -1, -1):
+            nxt = node.next[level]
+            while nxt is not None and nxt.key < key:
+                node = nxt
+                nxt = node.next[level]
+            preds[level] = node
+        return preds
+    
+    def _random_height(self) -> int:
+        height = 1
+        while height < self.MAX_HEIGHT and random.randrange(self.BRANCHING) == 0:
+            height += 1
+        return height
+    
+    def _value_size(self, value) -> int:
+        # Sequence number + value bytes (a tombstone only costs its marker)
+        return 8 + (4 if value is self.TOMBSTONE else len(value))
+    
+    def _find(self, key: bytes) -> Optional[_Node]:
+        """Lock-free search for the node holding key"""
+        node = self._head
+        nxt = None
+        for level in range(self._height - 1, -1, -1):
+            nxt = node.next[level]
+            while nxt is not None and nxt.key < key:
+                node = nxt
+                nxt = node.next[level]
+        if nxt is not None and nxt.key == key:
+            return nxt
+        return None
+    
+    def get(self, key: bytes) -> Optional[bytes]:
+        """
+        Retrieve value for a key
+        
+        Returns:
+            The value if key exists and not deleted, None otherwise
+        """
+        entry = self.get_entry(key)
+        if entry is None or entry[0] is self.TOMBSTONE:
+            return None
+        return entry[0]
+    
+    def get_entry(self, key: bytes) -> Optional[Tuple[object, int]]:
+        """
+        Retrieve the raw entry for a key
+        
+        Returns:
+            (value, sequence) where value may be TOMBSTONE, or None if the
+            key is not in the memtable
+        """
+        if not isinstance(key, bytes):
+            raise TypeError("Key must be bytes")
+        
+        node = self._find(key)
+        if node is None:
+            return None
+        sequence, value = node.entry  # One read: never a torn pair
+        return value, sequence
+    
+    def is_full(self) -> bool:
+        """Check if memtable has reached size threshold"""
+        return self._size_bytes >= self.max_size_bytes
+    
+    def size_bytes(self) -> int:
+        """Get current size in bytes"""
+        return self._size_bytes
+    
+    def num_entries(self) -> int:
+        """Get number of entries (including tombstones)"""
+        return self._count
+    
+    def is_empty(self) -> bool:
+        """Check if memtable is empty"""
+        return self._count == 0
+    
+    def iter_all(self) -> Iterator[Tuple[bytes, object]]:
+        """
+        Iterate over all entries in sorted order
+        
+        Yields:
+            Tuples of (key, value) where value may be TOMBSTONE
+        """
+        for key, value, _ in self.iter_entries():
+            yield key, value
+    
+    def iter_entries(self) -> Iterator[Tuple[bytes, object, int]]:
+        """
+        Iterate over all entries in sorted order, with sequence numbers
+        
+        Safe to run while writers insert (see module docstring).
+        
+        Yields:
+            Tuples of (key, value, sequence) where value may be TOMBSTONE
+        """
+        node = self._head.next[0]
+        while node is not None:
+            sequence, value = node.entry
+            yield node.key, value, sequence
+            node = node.next[0]
+    
+    def clear(self):
+        """Clear all entries (called after successful flush)"""
+        with self._lock:
+            self._reset()
+    
+    def __len__(self):
+        return self._count
+    
+    def __repr__(self):
+        return (f"SkipListMemtable(entries={self._count}, "
+                f"size={self._size_bytes}/{self.max_size_bytes} bytes)")
@@ -8,6 +8,7 @@ Purpose:
 Key Features:
     - Immutable files (write once, read many)
     - Sparse index for binary search
+    - Bloom filter to skip lookups of absent keys (v4)
     - Checksum for data integrity
     - Support for tombstones
 
@@ -18,13 +19,85 @@ File Structure:
     Data Block: Sorted key-value entries
     Index Block: Sparse index (every 16th key)
     Footer: Index offset, checksum
+
+Versions:
+    v1: entry = [key_size(4)][value_size(4)][key][value]
+    v2: entry = [key_size(4)][value_size(4)][sequence(8)][key][value]
+    v3: block-based (below)
+    v4: v3 + a filter block (below)
+    Writers produce v4; readers accept all four (v1 entries have
+    sequence 0).
+
+v3 Blocks:
+    [Header][Block 0]...[Block n][Index Block][Footer]
+    
+    Block: entries of about BLOCK_SIZE bytes, then
+           [restart offset(4)] * r + [r(4)] + [crc32 of the block(4)]
+    Entry: [shared(2)][unshared(4)][value_size(4)][sequence(8)]
+           [key suffix][value]; the key is the previous key's first
+           shared bytes + the suffix, and every RESTART_INTERVAL-th
+           entry (a restart point) stores its full key
+    Index Block: [key_size(4)][last key of the block][block offset(8)]
+           per block
+    Footer: [index offset(8)][crc32 of header + index block(8)]
+    
+    A lookup binary searches the index for the one block that can hold
+    the key, reads it with one read, checks its CRC, binary searches
+    the restart points and decodes at most RESTART_INTERVAL entries.
+    A corrupt block fails only the reads that touch it.
+
+v4 Filter Block:
+    [Header][Block 0]...[Block n][Filter Block][Index Block][Footer]
+    
+    Filter Block: Bloom filter of every key (see bloom_filter.py),
+           empty when written with bits_per_key=0
+    Footer: [filter offset(8)][index offset(8)]
+           [crc32 of header + filter block + index block(8)]
+    
+    The filter is loaded with the index when the file is opened and
+    checked before a lookup reads any block: a key the filter rules out
+    costs no I/O.
+
+Block Cache:
+    A reader given a BlockCache (v3/v4 files) looks every data block up
+    there by (file id, block offset) before reading it, and charges its
+    index and filter to the cache as pinned entries until close().
+
+File Handle:
+    A reader opens its file once and keeps the descriptor until close();
+    every read is positioned (os.pread at an absolute offset), so
+    threads share a reader without a lock or a shared file position,
+    and a file unlinked by a compaction stays readable to it. Stores
+    bound their open readers with a TableCache (table_cache.py).
+
+Memory-Mapped Mode:
+    SSTableReader(path, use_mmap=True) maps the whole file: lookups and
+    scans parse entries in place with struct.unpack_from, with no read
+    syscall, and return values as memoryview slices of the mapping
+    (copy_values=True: bytes). Each block's CRC is checked the first
+    time it is used. The mapping is advised MADV_RANDOM, and
+    MADV_SEQUENTIAL for the length of a scan.
 """
 
+import mmap
 import os
 import struct
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
 from typing import Optional, Iterator, Tuple, List
 from binascii import crc32
 
+try:
+    from .bloom_filter import BloomFilter, key_hash
+except ImportError:
+    from bloom_filter import BloomFilter, key_hash
+
+
+_BLOCK_ENTRY = struct.Struct('<HIIQ')  # shared, unshared, value_size, sequence
+_UINT32 = struct.Struct('<I')
+_MAX_SHARED = 0xFFFF
+
 
 class SSTableWriter:
     """
@@ -38,22 +111,37 @@ class SSTableWriter:
     """
     
     MAGIC_NUMBER = 0x5353544142424C45  # "SSTABBLE" in hex
-    VERSION = 1
-    INDEX_INTERVAL = 16  # Index every 16th key
+    VERSION = 4
+    INDEX_INTERVAL = 16  # v1/v2 files index every 16th key
+    BLOCK_SIZE = 4096  # Cut a data block once it reaches this size
+    RESTART_INTERVAL = 16  # Full key every 16th entry of a block
+    BITS_PER_KEY = 10  # Bloom filter size: about 1% false positives
     TOMBSTONE_MARKER = 0xFFFFFFFF
     
-    def __init__(self, filepath: str):
+    def __init__(self, filepath: str, block_size: int = BLOCK_SIZE,
+                 bits_per_key: int = BITS_PER_KEY):
         """
         Args:
             filepath: Path to SSTable file to create
+            block_size: Target size of a data block in bytes
+            bits_per_key: Bloom filter bits per key (0: no filter)
         """
         self.filepath = filepath
+        self.block_size = block_size
+        self.bits_per_key = bits_per_key
+        self._key_hashes = array('Q') if bits_per_key > 0 else None
         self._file = None
         self._num_entries = 0
-        self._index_entries = []  # List of (key, offset)
+        self._index_entries = []  # List of (last key of block, block offset)
         self._data_start = 0
+        self._offset = 0  # File offset of the block being built
+        self._block = bytearray()
+        self._restarts = []  # Offsets of restart points in the block
+        self._block_entries = 0
         self._first_key = None
         self._last_key = None
+        self.smallest_sequence = None
+        self.largest_sequence = None
         
         # Create directory if needed
         os.makedirs(os.path.dirname(os.path.abspath(filepath)), exist_ok=True)
@@ -69,15 +157,16 @@ class SSTableWriter:
         # Format: magic(8) + version(4) + num_entries(8) + reserved(4)
         header = struct.pack('<QIQ I', self.MAGIC_NUMBER, self.VERSION, 0, 0)
         self._file.write(header)
-        self._data_start = self._file.tell()
+        self._data_start = self._offset = self._file.tell()
     
-    def add(self, key: bytes, value: Optional[bytes]) -> None:
+    def add(self, key: bytes, value: Optional[bytes], sequence: int = 0) -> None:
         """
         Add a key-value entry (must be added in sorted order)
         
         Args:
             key: The key
             value: The value, or None for tombstone
+            sequence: Sequence number of the write that produced the entry
         """
         if not isinstance(key, bytes):
             raise TypeError("Key must be bytes")
@@ -89,72 +178,102 @@ class SSTableWriter:
             self._first_key = key
         
         # Verify sorted order
-        if self._last_key is not None and key <= self._last_key:
-            raise ValueError(f"Keys must be added in sorted order: {key!r} <= {self._last_key!r}")
+        previous = self._last_key
+        if previous is not None and key <= previous:
+            raise ValueError(f"Keys must be added in sorted order: {key!r} <= {previous!r}")
         self._last_key = key
         
-        # Record offset for index
-        offset = self._file.tell() # Vị trí hiện tại
-        if self._num_entries % self.INDEX_INTERVAL == 0:
-            self._index_entries.append((key, offset))
+        # Prefix-compress against the previous key, except at restart points
+        block = self._block
+        if self._block_entries % self.RESTART_INTERVAL == 0:
+            self._restarts.append(len(block))
+            shared = 0
+        else:
+            shared = _shared_prefix(previous, key)
         
-        # Write entry: key_size(4) + value_size(4) + key + value
-        key_size = len(key)
         if value is None:
             # Tombstone
-            value_size = self.TOMBSTONE_MARKER
-            value_data = b''
+            block += _BLOCK_ENTRY.pack(shared, len(key) - shared, self.TOMBSTONE_MARKER, sequence)
+            block += key[shared:]
         else:
-            value_size = len(value)
-            value_data = value
+            block += _BLOCK_ENTRY.pack(shared, len(key) - shared, len(value), sequence)
+            block += key[shared:]
+            block += value
+        self._block_entries += 1
+        self._num_entries += 1
+        if self._key_hashes is not None:
+            self._key_hashes.append(key_hash(key))
+        if len(block) >= self.block_size:
+            self._finish_block()
         
-        entry = struct.pack('<II', key_size, value_size)
-        entry += key + value_data
+        # Track sequence range (stored by the caller, e.g. in a manifest)
+        if self.smallest_sequence is None or sequence < self.smallest_sequence:
+            self.smallest_sequence = sequence
+        if self.largest_sequence is None or sequence > self.largest_sequence:
+            self.largest_sequence = sequence
+    
+    @property
+    def first_key(self) -> Optional[bytes]:
+        """Smallest key added so far"""
+        return self._first_key
+    
+    @property
+    def last_key(self) -> Optional[bytes]:
+        """Largest key added so far"""
+        return self._last_key
+    
+    @property
+    def num_entries(self) -> int:
+        """Number of entries added so far"""
+        return self._num_entries
+    
+    def _finish_block(self) -> None:
+        """Append the restart array and CRC to the current block and write it"""
+        block = self._block
+        restarts = self._restarts
+        block += struct.pack(f'<{len(restarts)}I', *restarts)
+        block += _UINT32.pack(len(restarts))
+        block += _UINT32.pack(crc32(block))
+        self._file.write(block)
         
-        self._file.write(entry)
-        self._num_entries += 1
+        self._index_entries.append((self._last_key, self._offset))
+        self._offset += len(block)
+        self._block = bytearray()
+        self._restarts = []
+        self._block_entries = 0
     
     def finalize(self) -> None:
         """
-        Complete SSTable file by writing index and footer
+        Complete SSTable file by writing filter, index and footer
         Must be called after all entries are added
         """
-        # Write index block
-        index_offset = self._file.tell()
-        for key, offset in self._index_entries:
-            # Format: key_size(4) + key + offset(8)
-            index_entry = struct.pack('<I', len(key))
-            index_entry += key
-            index_entry += struct.pack('<Q', offset)
-            self._file.write(index_entry)
-        
-        # Write footer: index_offset(8) + checksum(8) - placeholder first
-        footer_offset = self._file.tell()
-        footer = struct.pack('<QQ', index_offset, 0)  # Temporary checksum
-        self._file.write(footer)
+        if self._block_entries:
+            self._finish_block()
         
-        # Update header with actual num_entries
-        self._file.seek(0)
-        header = struct.pack('<QIQ I', self.MAGIC_NUMBER, self.VERSION, 
-                           self._num_entries, 0)
-        self._file.write(header)
+        # Write filter block (empty without a filter)
+        filter_offset = self._offset
+        bloom = b''
+        if self._key_hashes is not None:
+            bloom = BloomFilter.build(self._key_hashes, self.bits_per_key)
+            self._key_hashes = None
+        self._file.write(bloom)
         
-        # Flush everything before calculating checksum
-        self._file.flush()
-        os.fsync(self._file.fileno())
+        # Write index block: key_size(4) + last key + block offset(8) per block
+        index_offset = filter_offset + len(bloom)
+        index = b''.join(struct.pack('<I', len(key)) + key + struct.pack('<Q', offset)
+                         for key, offset in self._index_entries)
+        self._file.write(index)
         
-        # Calculate checksum over everything except the last 8 bytes (checksum itself)
-        # This includes: header + data + index + index_offset (8 bytes)
-        with open(self.filepath, 'rb') as f:
-            data = f.read()  # Read entire file
-        # Checksum is over all data except last 8 bytes
-        data_to_check = data[:-8]  # Exclude placeholder checksum
-        checksum = crc32(data_to_check) & 0xFFFFFFFF
+        # Footer: filter_offset(8) + index_offset(8) + checksum(8) of
+        # header, filter and index (the blocks carry their own)
+        header = struct.pack('<QIQ I', self.MAGIC_NUMBER, self.VERSION,
+                             self._num_entries, 0)
+        checksum = crc32(index, crc32(bloom, crc32(header)))
+        self._file.write(struct.pack('<QQQ', filter_offset, index_offset, checksum))
         
-        # Write actual footer with real checksum
-        self._file.seek(footer_offset)
-        footer = struct.pack('<QQ', index_offset, checksum)
-        self._file.write(footer)
+        # Update header with actual num_entries
+        self._file.seek(0)
+        self._file.write(header)
         
         # Flush and close
         self._file.flush()
@@ -170,6 +289,114 @@ class SSTableWriter:
             self._file.close()
 
 
+def _shared_prefix(a: bytes, b: bytes) -> int:
+    """Length of the common prefix of two keys (capped for the 2-byte field)"""
+    n = min(len(a), len(b), _MAX_SHARED)
+    diff = int.from_bytes(a[:n], 'big') ^ int.from_bytes(b[:n], 'big')
+    return n - (diff.bit_length() + 7) // 8
+
+
+def _decode_block(data, start: int = 0, end: Optional[int] = None,
+                  values=None) -> Iterator[Tuple[bytes, Optional[bytes], int]]:
+    """
+    Entries of a v3 block (CRC already checked)
+    
+    The block is data[start:end] (data: the block, or a mapping of the
+    whole file); values are sliced from values (default data: a
+    memoryview there returns them without a copy)
+    """
+    end = (len(data) if end is None else end) - 8
+    if values is None:
+        values = data
+    (num_restarts,) = _UINT32.unpack_from(data, end)
+    entries_end = end - 4 * num_restarts
+    unpack = _BLOCK_ENTRY.unpack_from
+    header_size = _BLOCK_ENTRY.size
+    tombstone = SSTableWriter.TOMBSTONE_MARKER
+    key = b''
+    pos = start
+    while pos < entries_end:
+        shared, unshared, value_size, sequence = unpack(data, pos)
+        pos += header_size
+        key = key[:shared] + data[pos:pos + unshared]
+        pos += unshared
+        if value_size == tombstone:
+            yield key, None, sequence
+        else:
+            yield key, values[pos:pos + value_size], sequence
+            pos += value_size
+
+
+def _decode_entries(data, entry_header: struct.Struct, start: int = 0,
+                    end: Optional[int] = None,
+                    values=None) -> Iterator[Tuple[bytes, Optional[bytes], int]]:
+    """
+    Entries of a v1/v2 run: [key_size][value_size]([sequence])[key][value] back to back
+    
+    The run is data[start:end]; values are sliced from values (as in
+    _decode_block)
+    """
+    if end is None:
+        end = len(data)
+    if values is None:
+        values = data
+    unpack = entry_header.unpack_from
+    header_size = entry_header.size
+    tombstone = SSTableWriter.TOMBSTONE_MARKER
+    pos = start
+    while pos < end:
+        key_size, value_size, *rest = unpack(data, pos)
+        pos += header_size
+        key = data[pos:pos + key_size]
+        pos += key_size
+        if value_size == tombstone:
+            yield key, None, rest[0] if rest else 0
+        else:
+            yield key, values[pos:pos + value_size], rest[0] if rest else 0
+            pos += value_size
+
+
+def _block_get(data, key: bytes, start: int = 0, end: Optional[int] = None,
+               values=None) -> Optional[Tuple[Optional[bytes], int]]:
+    """Look a key up in a v3 block: binary search the restarts, then scan (see _decode_block)"""
+    end = (len(data) if end is None else end) - 8
+    (num_restarts,) = _UINT32.unpack_from(data, end)
+    entries_end = end - 4 * num_restarts
+    restarts = struct.unpack_from(f'<{num_restarts}I', data, entries_end)
+    unpack = _BLOCK_ENTRY.unpack_from
+    header_size = _BLOCK_ENTRY.size
+    
+    # Last restart point whose (full) key is <= key
+    pos = start + restarts[0]
+    left, right = 1, num_restarts - 1
+    while left <= right:
+        mid = (left + right) // 2
+        offset = start + restarts[mid]
+        unshared = unpack(data, offset)[1]
+        key_start = offset + header_size
+        if data[key_start:key_start + unshared] <= key:
+            pos = offset
+            left = mid + 1
+        else:
+            right = mid - 1
+    
+    entry_key = b''
+    while pos < entries_end:
+        shared, unshared, value_size, sequence = unpack(data, pos)
+        pos += header_size
+        entry_key = entry_key[:shared] + data[pos:pos + unshared]
+        pos += unshared
+        if entry_key >= key:
+            if entry_key != key:
+                return None
+            if value_size == SSTableWriter.TOMBSTONE_MARKER:
+                return None, sequence
+            return (data if values is None else values)[pos:pos + value_size], sequence
+        if value_size != SSTableWriter.TOMBSTONE_MARKER:
+            pos += value_size
+    return None
+
+
 class SSTableReader:
     """
     Reads an SSTable file with efficient lookups
@@ -179,47 +406,106 @@ class SSTableReader:
     
     MAGIC_NUMBER = 0x5353544142424C45
     TOMBSTONE_MARKER = 0xFFFFFFFF
+    SUPPORTED_VERSIONS = (1, 2, 3, 4)
     
-    def __init__(self, filepath: str):
+    def __init__(self, filepath: str, verify_checksum: bool = True, block_cache=None,
+                 use_mmap: bool = False, copy_values: bool = False):
         """
         Args:
             filepath: Path to SSTable file
+            verify_checksum: Read the whole file once to check its
+                checksum (skip only for files already verified); v3
+                blocks are also checked whenever they are read
+            block_cache: BlockCache shared with other readers (None: read
+                every block from the file)
+            use_mmap: Map the whole file and parse entries in place: no
+                read syscall per lookup or block (data blocks then
+                bypass the block cache: the page cache holds them)
+            copy_values: With use_mmap, return values as bytes instead
+                of memoryview slices of the mapping
         """
         self.filepath = filepath
+        self.verify_checksum = verify_checksum
+        self.block_cache = block_cache
+        self._pinned = []           # Cache keys of the index and filter
+        self._fd = None
+        self._map = None            # use_mmap: the whole file, and a view of it
+        self._view = None
+        self._values = None         # Values are sliced from this: the map or the view
+        self._seek_lock = threading.Lock()  # Only without os.pread
+        self.bloom = None
+        # Lookups the filter let through / ruled out, and let through
+        # for a key the file does not hold
+        self.filter_stats = {'hits': 0, 'misses': 0, 'false_positives': 0}
         
         if not os.path.exists(filepath):
             raise FileNotFoundError(f"SSTable not found: {filepath}")
         
-        # Load metadata
-        self._load_metadata()
+        # Kept open until close(): reads are positioned, so threads share it
+        self._fd = os.open(filepath, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        try:
+            if use_mmap:
+                self._map = mmap.mmap(self._fd, 0, access=mmap.ACCESS_READ)
+                self._view = memoryview(self._map)
+                self._values = self._map if copy_values else self._view
+                self._advise('MADV_RANDOM')  # Point lookups: no readahead
+            self._load_metadata()
+        except BaseException:
+            self.close()
+            raise
+    
+    def _read_at(self, offset: int, size: int) -> bytes:
+        """Read size bytes at offset (one positioned read, no shared file position)"""
+        if self._map is not None:
+            return self._map[offset:offset + size]
+        fd = self._fd
+        if fd is None:
+            raise ValueError(f"I/O on closed SSTableReader: {self.filepath}")
+        if not hasattr(os, 'pread'):
+            with self._seek_lock:
+                os.lseek(fd, offset, os.SEEK_SET)
+                return os.read(fd, size)
+        return os.pread(fd, size, offset)
     
     def _load_metadata(self):
         """Load header, footer, and index"""
-        with open(self.filepath, 'rb') as f:
-            # Read header
-            header_data = f.read(24)
-            if len(header_data) < 24:
-                raise ValueError("Invalid SSTable: header too short")
-            
-            magic, version, self.num_entries, _ = struct.unpack('<QIQ I', header_data)
-            
-            if magic != self.MAGIC_NUMBER:
-                raise ValueError(f"Invalid SSTable: wrong magic number {magic:016x}")
-            
-            if version != 1:
-                raise ValueError(f"Unsupported SSTable version: {version}")
-            
-            # Read footer (last 16 bytes)
-            f.seek(-16, os.SEEK_END)
-            footer_data = f.read(16)
+        # Read header
+        header_data = self._read_at(0, 24)
+        if len(header_data) < 24:
+            raise ValueError("Invalid SSTable: header too short")
+        
+        magic, version, self.num_entries, _ = struct.unpack('<QIQ I', header_data)
+        
+        if magic != self.MAGIC_NUMBER:
+            raise ValueError(f"Invalid SSTable: wrong magic number {magic:016x}")
+        
+        if version not in self.SUPPORTED_VERSIONS:
+            raise ValueError(f"Unsupported SSTable version: {version}")
+        
+        self.version = version
+        # v2 entries carry a sequence number after the two sizes
+        self._entry_header = struct.Struct('<II' if version == 1 else '<IIQ')
+        
+        # Read footer (last 16 bytes, v4: 24)
+        file_size = os.fstat(self._fd).st_size
+        footer_start = file_size - (24 if version >= 4 else 16)
+        if version >= 4:
+            self.filter_offset, self.index_offset, stored_checksum = \
+                struct.unpack('<QQQ', self._read_at(footer_start, 24))
+        else:
+            footer_data = self._read_at(footer_start, 16)
             self.index_offset, stored_checksum = struct.unpack('<QQ', footer_data)
-            
-            # Verify checksum - calculate over header + data + index + index_offset
-            f.seek(0)
+            self.filter_offset = self.index_offset
+        self.data_start = 24  # Right after header
+        
+        if version >= 3:
+            self._load_block_index(header_data, footer_start, stored_checksum)
+            return
+        
+        # Verify checksum - calculate over header + data + index + index_offset
+        if self.verify_checksum:
             # Read up to the checksum field (which is at index_offset + 8)
-            file_size = f.seek(0, os.SEEK_END)
-            f.seek(0)
-            data_to_check = f.read(file_size - 8)  # Exclude last 8 bytes (checksum)
+            data_to_check = self._read_at(0, file_size - 8)  # Exclude last 8 bytes (checksum)
             calculated_checksum = crc32(data_to_check) & 0xFFFFFFFF
             
             if stored_checksum != calculated_checksum:
@@ -227,16 +513,117 @@ class SSTableReader:
                     f"Checksum mismatch in {self.filepath}: "
                     f"stored={stored_checksum:016x}, calculated={calculated_checksum:016x}"
                 )
-            
-            # Load index
-            f.seek(self.index_offset)
-            footer_start = f.seek(-16, os.SEEK_END)
-            f.seek(self.index_offset)
-            
-            index_data = f.read(footer_start - self.index_offset)
-            self.index = self._parse_index(index_data)
-            
-            self.data_start = 24  # Right after header
+        
+        # Load index
+        index_data = self._read_at(self.index_offset, footer_start - self.index_offset)
+        self.index = self._parse_index(index_data)
+        # Runs of entries between index entries: a lookup reads one run
+        self._run_starts = [offset for _, offset in self.index]
+    
+    def _load_block_index(self, header_data: bytes, footer_start: int,
+                          stored_checksum: int) -> None:
+        """Load and check the v3 block index and filter (and every block if verifying)"""
+        meta_data = self._read_at(self.filter_offset, footer_start - self.filter_offset)
+        filter_data = meta_data[:self.index_offset - self.filter_offset]
+        index_data = meta_data[self.index_offset - self.filter_offset:]
+        calculated_checksum = crc32(index_data, crc32(filter_data, crc32(header_data)))
+        if stored_checksum != calculated_checksum:
+            raise ValueError(
+                f"Checksum mismatch in {self.filepath} (index): "
+                f"stored={stored_checksum:016x}, calculated={calculated_checksum:016x}"
+            )
+        
+        self.index = self._parse_index(index_data)
+        if filter_data:
+            self.bloom = BloomFilter(filter_data)
+        self._block_keys = [key for key, _ in self.index]
+        self._block_ends = [offset for _, offset in self.index[1:]] + [self.filter_offset]
+        if self.verify_checksum:
+            for block in range(len(self.index)):
+                self._read_block(block)
+        if self._map is not None:
+            # Mapped blocks are checked on first use only (see _map_block)
+            self._checked = bytearray([self.verify_checksum]) * len(self.index)
+        
+        cache = self.block_cache
+        if cache is not None:
+            # Kept parsed by this reader; pinned so they count against the budget
+            self._cache_id = cache.new_id()
+            self._pinned = [(self._cache_id, self.index_offset)]
+            cache.insert(self._pinned[0], self.index, len(index_data), pinned=True)
+            if filter_data:
+                self._pinned.append((self._cache_id, self.filter_offset))
+                cache.insert(self._pinned[1], self.bloom, len(filter_data), pinned=True)
+    
+    def _read_block(self, block: int) -> bytes:
+        """Read a v3 block and check its CRC"""
+        offset = self.index[block][1]
+        data = self._read_at(offset, self._block_ends[block] - offset)
+        self._check_block(block, memoryview(data))
+        return data
+    
+    def _check_block(self, block: int, view: memoryview) -> None:
+        """Raise ValueError unless a v3 block matches its trailing CRC"""
+        if len(view) < 12 or crc32(view[:-4]) != _UINT32.unpack_from(view, len(view) - 4)[0]:
+            raise ValueError(f"Checksum mismatch in {self.filepath}: "
+                             f"block {block} at offset {self.index[block][1]}")
+    
+    def _map_block(self, block: int) -> Tuple[int, int]:
+        """Bounds of a v3 block in the mapping, its CRC checked on first use"""
+        start, end = self.index[block][1], self._block_ends[block]
+        if not self._checked[block]:
+            self._check_block(block, self._view[start:end])
+            self._checked[block] = 1
+        return start, end
+    
+    def _get_block(self, block: int, low_priority: bool = False) -> bytes:
+        """
+        A v3 block from the block cache, or read and cached
+        
+        Args:
+            low_priority: Cache a block read here at the cold end
+        """
+        cache = self.block_cache
+        if cache is not None:
+            key = (self._cache_id, self.index[block][1])
+            data = cache.lookup(key)
+            if data is not None:
+                return data
+        data = self._read_block(block)
+        if cache is not None:
+            cache.insert(key, data, len(data), low_priority=low_priority)
+        return data
+    
+    def _iter_blocks(self, first_block: int = 0,
+                     low_priority: bool = False) -> Iterator[Tuple[bytes, Optional[bytes], int]]:
+        """Entries of the v3 blocks from first_block on"""
+        for block in range(first_block, len(self.index)):
+            if self._map is not None:
+                yield from _decode_block(self._map, *self._map_block(block), self._values)
+            else:
+                yield from _decode_block(self._get_block(block, low_priority))
+    
+    def _run_end(self, offset: int) -> int:
+        """End of the v1/v2 run starting at offset (the next index entry)"""
+        run = bisect_right(self._run_starts, offset)
+        return self._run_starts[run] if run < len(self._run_starts) else self.index_offset
+    
+    def _read_run(self, offset: int) -> bytes:
+        """The v1/v2 entries from offset up to the next index entry, in one read"""
+        return self._read_at(offset, self._run_end(offset) - offset)
+    
+    def _iter_runs(self, offset: int) -> Iterator[Tuple[bytes, Optional[bytes], int]]:
+        """Entries of the v1/v2 runs from offset on"""
+        if self._map is not None:
+            yield from _decode_entries(self._map, self._entry_header, offset,
+                                       self.index_offset, self._values)
+            return
+        while offset < self.index_offset:
+            data = self._read_run(offset)
+            if not data:
+                return  # Truncated file
+            yield from _decode_entries(data, self._entry_header)
+            offset += len(data)
     
     def _parse_index(self, index_data: bytes) -> List[Tuple[bytes, int]]:
         """Parse index block into list of (key, offset) tuples"""
@@ -276,48 +663,56 @@ class SSTableReader:
         Returns:
             The value if found, None if not found or deleted
         """
+        entry = self.get_entry(key)
+        if entry is None:
+            return None
+        return entry[0]
+    
+    def get_entry(self, key: bytes) -> Optional[Tuple[Optional[bytes], int]]:
+        """
+        Lookup a key, distinguishing a tombstone from a missing key
+        
+        Args:
+            key: The key to find
+            
+        Returns:
+            (value, sequence) with value None for a tombstone, or None if
+            the key is not in this SSTable
+        """
         if not isinstance(key, bytes):
             raise TypeError("Key must be bytes")
         
-        # Binary search in sparse index to find scan start position
-        scan_start = self._find_scan_start(key)
+        if self.version >= 3:
+            # The first block whose last key is >= key is the only candidate
+            block = bisect_left(self._block_keys, key)
+            if block == len(self._block_keys):
+                return None
+            bloom = self.bloom
+            if bloom is not None:
+                if not bloom.might_contain(key):
+                    self.filter_stats['misses'] += 1
+                    return None
+                self.filter_stats['hits'] += 1
+            if self._map is not None:
+                entry = _block_get(self._map, key, *self._map_block(block), self._values)
+            else:
+                entry = _block_get(self._get_block(block), key)
+            if entry is None and bloom is not None:
+                self.filter_stats['false_positives'] += 1
+            return entry
         
-        # Linear scan from that position
-        with open(self.filepath, 'rb') as f:
-            f.seek(scan_start)
-            
-            # Scan up to 16 entries (or until we pass the key)
-            for _ in range(16):
-                # Check if we're past index block
-                if f.tell() >= self.index_offset:
-                    break
-                
-                # Read entry header
-                header = f.read(8)
-                if len(header) < 8:
-                    break
-                
-                key_size, value_size = struct.unpack('<II', header)
-                
-                # Read key
-                entry_key = f.read(key_size)
-                
-                if entry_key == key:
-                    # Found it!
-                    if value_size == self.TOMBSTONE_MARKER:
-                        # Tombstone - key is deleted
-                        return None
-                    else:
-                        # Read and return value
-                        value = f.read(value_size)
-                        return value
-                elif entry_key > key:
-                    # We've passed the key - it doesn't exist
-                    break
-                else:
-                    # Skip value and continue
-                    if value_size != self.TOMBSTONE_MARKER:
-                        f.seek(value_size, os.SEEK_CUR)
+        # Binary search in sparse index, then scan that run (up to 16 entries)
+        scan_start = self._find_scan_start(key)
+        if self._map is not None:
+            entries = _decode_entries(self._map, self._entry_header, scan_start,
+                                      self._run_end(scan_start), self._values)
+        else:
+            entries = _decode_entries(self._read_run(scan_start), self._entry_header)
+        for entry_key, value, sequence in entries:
+            if entry_key == key:
+                return value, sequence  # value None: a tombstone
+            if entry_key > key:
+                break  # We've passed the key - it doesn't exist
         
         return None
     
@@ -347,6 +742,27 @@ class SSTableReader:
         
         return result_offset
     
+    @property
+    def first_key(self) -> Optional[bytes]:
+        """Smallest key in the file (the first index entry, or v3: the first entry)"""
+        if not self.index:
+            return None
+        if self.version >= 3:
+            return next(self._iter_blocks())[0]
+        return self.index[0][0]
+    
+    @property
+    def last_key(self) -> Optional[bytes]:
+        """Largest key in the file (scans the last indexed run only)"""
+        if not self.index:
+            return None
+        if self.version >= 3:
+            return self.index[-1][0]  # Blocks are indexed by their last key
+        key = None
+        for key, _, _ in _decode_entries(self._read_run(self.index[-1][1]), self._entry_header):
+            pass
+        return key
+    
     def iter_all(self) -> Iterator[Tuple[bytes, Optional[bytes]]]:
         """
         Iterate over all entries in sorted order
@@ -354,27 +770,57 @@ class SSTableReader:
         Yields:
             Tuples of (key, value) where value is None for tombstones
         """
-        with open(self.filepath, 'rb') as f:
-            f.seek(self.data_start)
-            
-            for _ in range(self.num_entries):
-                # Read entry header
-                header = f.read(8)
-                if len(header) < 8:
-                    break
-                
-                key_size, value_size = struct.unpack('<II', header)
-                
-                # Read key
-                key = f.read(key_size)
-                
-                # Read value
-                if value_size == self.TOMBSTONE_MARKER:
-                    value = None
-                else:
-                    value = f.read(value_size)
-                
-                yield key, value
+        for key, value, _ in self.iter_entries():
+            yield key, value
+    
+    def iter_entries(self, start_key: Optional[bytes] = None, end_key: Optional[bytes] = None,
+                     low_priority: bool = False) -> Iterator[Tuple[bytes, Optional[bytes], int]]:
+        """
+        Iterate over entries in sorted order, with sequence numbers
+        
+        Args:
+            start_key: Start of range (inclusive), None for beginning;
+                the scan starts at the sparse index entry before it
+            end_key: End of range (exclusive), None for end
+            low_priority: Blocks read are cached at the cold end of the
+                block cache (compactions: a one-pass read does not evict
+                the blocks lookups keep using)
+        
+        Yields:
+            Tuples of (key, value, sequence) where value is None for
+            tombstones and sequence is 0 for v1 files
+        """
+        if self._map is not None:
+            # Read ahead while scanning, back to RANDOM for lookups after
+            self._advise('MADV_SEQUENTIAL', self.data_start, self.filter_offset)
+        try:
+            if start_key is not None or end_key is not None:
+                yield from self._iter_range(start_key, end_key, low_priority)
+            elif self.version >= 3:
+                yield from self._iter_blocks(low_priority=low_priority)
+            else:
+                yield from self._iter_runs(self.data_start)
+        finally:
+            self._advise('MADV_RANDOM', self.data_start, self.filter_offset)
+    
+    def _iter_range(self, start_key: Optional[bytes], end_key: Optional[bytes],
+                    low_priority: bool = False) -> Iterator[Tuple[bytes, Optional[bytes], int]]:
+        """Entries in [start_key, end_key), seeking past earlier index runs"""
+        if self.version >= 3:
+            first = 0 if start_key is None else bisect_left(self._block_keys, start_key)
+            for entry in self._iter_blocks(first, low_priority):
+                if end_key is not None and entry[0] >= end_key:
+                    return
+                if start_key is None or entry[0] >= start_key:
+                    yield entry
+            return
+        
+        pos = self.data_start if start_key is None else self._find_scan_start(start_key)
+        for entry in self._iter_runs(pos):
+            if end_key is not None and entry[0] >= end_key:
+                return
+            if start_key is None or entry[0] >= start_key:
+                yield entry
     
     def get_range(self, start_key: Optional[bytes] = None, 
                   end_key: Optional[bytes] = None) -> Iterator[Tuple[bytes, Optional[bytes]]]:
@@ -388,12 +834,48 @@ class SSTableReader:
         Yields:
             Tuples of (key, value)
         """
-        for key, value in self.iter_all():
-            if start_key is not None and key < start_key:
-                continue
-            if end_key is not None and key >= end_key:
-                break
+        for key, value, _ in self.iter_entries(start_key, end_key):
             yield key, value
     
+    def _advise(self, name: str, start: int = 0, end: Optional[int] = None) -> None:
+        """madvise() part of the mapping; a hint, skipped without mmap or madvise"""
+        mapping = self._map
+        advice = getattr(mmap, name, None)
+        if mapping is None or advice is None:
+            return
+        start -= start % mmap.PAGESIZE  # Must be page aligned
+        end = len(mapping) if end is None else end
+        if end > start:
+            mapping.madvise(advice, start, end - start)
+    
+    def close(self) -> None:
+        """Close the file and release the index and filter pinned in the block cache"""
+        mapping, view = self._map, self._view
+        self._map = self._view = self._values = None
+        if mapping is not None:
+            view.release()
+            try:
+                mapping.close()
+            except BufferError:
+                pass  # Values handed out still use it: unmapped once they go
+        fd, self._fd = self._fd, None
+        if fd is not None:
+            os.close(fd)
+        pinned, self._pinned = self._pinned, []
+        for key in pinned:
+            self.block_cache.release(key)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def __del__(self):
+        # Unclosed reader: don't leak the descriptor (cache pins need close())
+        fd = getattr(self, '_fd', None)
+        if fd is not None:
+            os.close(fd)
+    
     def __repr__(self):
         return f"SSTableReader(filepath={self.filepath!r}, entries={self.num_entries})"
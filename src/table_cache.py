@@ -0,0 +1,182 @@
+"""
+Table Cache Module
+
+Purpose:
+    Keeps a bounded number of SSTableReaders open, so a store with
+    thousands of SSTables does not hold a file descriptor (and a pinned
+    index and filter) for every one of them.
+
+How It Works:
+    - Open readers are kept in LRU order by file number, at most
+      max_open_files of them
+    - acquire() returns a file's open reader, opening it on a miss
+      (outside the lock, so lookups of other files go on meanwhile);
+      release() hands it back
+    - Going over the limit closes the least recently used readers; one
+      still acquired (a lookup or compaction reading it) is closed by
+      its last release() instead
+    - Only live files are cached: insert() adds a file, evict() drops a
+      deleted one. A reader opened for a file that is no longer live
+      (a lookup on an old version) serves that caller and is closed
+    - Filter counters of closed readers are kept (filter_stats())
+
+Usage:
+    tables = TableCache(open_table, max_open_files=1000)
+    tables.insert(number, reader)       # A new file
+    reader = tables.acquire(number)
+    try:
+        reader.get_entry(key)
+    finally:
+        tables.release(reader)
+    tables.evict(number)                # Compacted away
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict
+
+
+class TableCache:
+    """
+    LRU cache of open SSTableReaders, bounded by file count (thread-safe)
+    """
+    
+    DEFAULT_MAX_OPEN_FILES = 1000
+    
+    def __init__(self, opener: Callable[[int], object],
+                 max_open_files: int = DEFAULT_MAX_OPEN_FILES):
+        """
+        Args:
+            opener: Opens the reader of a file number (a miss)
+            max_open_files: Readers kept open once released
+        """
+        if max_open_files <= 0:
+            raise ValueError("max_open_files must be positive")
+        self._opener = opener
+        self.max_open_files = max_open_files
+        self._lock = threading.Lock()
+        self._readers = OrderedDict()   # number -> reader, least recently used first
+        self._live = set()              # Numbers of live files
+        self._refs = {}                 # reader -> acquires not released yet
+        self._retired = set()           # Evicted while acquired: closed on release
+        self._closed_filter_stats = {'hits': 0, 'misses': 0, 'false_positives': 0}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def acquire(self, number: int):
+        """
+        A file's reader, open until release()
+        
+        Raises:
+            FileNotFoundError: If the file has to be opened and is gone
+        """
+        with self._lock:
+            reader = self._readers.get(number)
+            if reader is not None:
+                self._readers.move_to_end(number)
+                self.hits += 1
+                self._refs[reader] = self._refs.get(reader, 0) + 1
+                return reader
+            self.misses += 1
+        
+        reader = self._opener(number)
+        with self._lock:
+            cached = self._readers.get(number)
+            if cached is not None:
+                duplicate, reader = reader, cached  # Opened by another thread meanwhile
+                self._readers.move_to_end(number)
+            else:
+                duplicate = None
+                if number in self._live:
+                    self._readers[number] = reader
+                else:
+                    self._retired.add(reader)  # Only for this caller
+            self._refs[reader] = self._refs.get(reader, 0) + 1
+            if cached is None:
+                self._shrink()
+        if duplicate is not None:
+            duplicate.close()
+        return reader
+    
+    def release(self, reader) -> None:
+        """Hand back a reader from acquire()"""
+        with self._lock:
+            refs = self._refs[reader] - 1
+            if refs:
+                self._refs[reader] = refs
+                return
+            del self._refs[reader]
+            if reader in self._retired:
+                self._retired.discard(reader)
+                self._close(reader)
+    
+    def insert(self, number: int, reader) -> None:
+        """Add a live file with its open reader (the most recently used)"""
+        with self._lock:
+            self._live.add(number)
+            old = self._readers.pop(number, None)
+            if old is not None and old is not reader:
+                self._retire(old)
+            self._readers[number] = reader
+            self._shrink()
+    
+    def evict(self, number: int) -> None:
+        """Drop a file that is no longer live, closing its reader once unused"""
+        with self._lock:
+            self._live.discard(number)
+            reader = self._readers.pop(number, None)
+            if reader is not None:
+                self._retire(reader)
+    
+    def close(self) -> None:
+        """Close every reader (those still acquired on release)"""
+        with self._lock:
+            self._live.clear()
+            while self._readers:
+                self._retire(self._readers.popitem()[1])
+    
+    def _shrink(self) -> None:
+        """Close least recently used readers down to the limit (lock held)"""
+        while len(self._readers) > self.max_open_files:
+            self._retire(self._readers.popitem(last=False)[1])
+            self.evictions += 1
+    
+    def _retire(self, reader) -> None:
+        """Close a reader no longer cached now, or on its last release (lock held)"""
+        if reader in self._refs:
+            self._retired.add(reader)
+        else:
+            self._close(reader)
+    
+    def _close(self, reader) -> None:
+        """Close a reader, keeping its filter counters (lock held)"""
+        for name, count in reader.filter_stats.items():
+            self._closed_filter_stats[name] += count
+        reader.close()
+    
+    def filter_stats(self) -> Dict[str, int]:
+        """Bloom filter counters summed over every reader, open or closed"""
+        with self._lock:
+            totals = dict(self._closed_filter_stats)
+            readers = list(self._readers.values()) + list(self._retired)
+        for reader in readers:
+            for name, count in reader.filter_stats.items():
+                totals[name] += count
+        return totals
+    
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Snapshot of open readers and counters"""
+        with self._lock:
+            return {
+                'open_files': len(self._readers) + len(self._retired),
+                'max_open_files': self.max_open_files,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+    
+    def __repr__(self):
+        return (f"TableCache(open_files={len(self._readers)}/{self.max_open_files}, "
+                f"in_use={len(self._refs)})")
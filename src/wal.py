@@ -21,6 +21,13 @@ Key Features:
         else:
             print("✗ Data corrupted!")
     - Crash recovery
+    - Group commit: concurrent writers share a single write + fsync
+    - Atomic write batches (one record, one CRC for many operations)
+    - Vectored bulk writes (write_many): one os.writev per call, keys and
+      values are never copied
+    - Sync policies (SyncPolicy): fsync always, every n ms or every n
+      bytes from a background thread, or never; relaxed policies write
+      through a user-space buffer
     - Support for PUT and DELETE operations (tombstones)
     - Struct Pack
         # '<QII' là format string:
@@ -30,34 +37,80 @@ Key Features:
         # 'I'  = unsigned int (4 bytes, 32-bit)
 
 File Format (core LevelDB/RocksDB):
-    Each entry: [timestamp(8)][key_size(4)][value_size(4)][key][value][checksum(4)]
+    Each entry: [sequence(8)][key_size(4)][value_size(4)][key][value][checksum(4)]
     
-    - timestamp: uint64 (microseconds since epoch)
+    - sequence: uint64, monotonically increasing number assigned by the
+      write path (older logs stored a microsecond timestamp here, which
+      still replays in the right order)
     - key_size: uint32 (length of key in bytes)
     - value_size: uint32 (length of value, 0xFFFFFFFF for tombstone)
     - key: bytes
     - value: bytes (empty for tombstone)
     - checksum: uint32 (CRC32 of all preceding fields)
+
+    Batch record (WriteBatch), same 16-byte header shape:
+    [sequence(8)][0xFFFFFFFF(4)][payload_size(4)][payload][checksum(4)]
+    
+    - key_size == 0xFFFFFFFF marks a batch (no real key is 4 GB)
+    - sequence: number of the first operation; operation i gets sequence + i
+    - payload: count(4) + count * [key_size(4)][value_size(4)][key][value]
+    - checksum covers header + payload, so a torn batch fails as a whole
+
+Block Format (optional, LevelDB-style):
+    The file is a sequence of 32 KiB blocks. Each logical record above is
+    split into fragments that never cross a block boundary:
+    [crc(4)][length(2)][type(1)][log_number(4)][payload]
+    
+    - type: FULL, or FIRST/MIDDLE.../LAST for records spanning blocks
+    - crc: CRC32 of type + log_number + payload
+    - log_number: lets a recycled file be reused without zeroing it
+    - block tails smaller than a header are zero padded
+    
+    The file is preallocated with fallocate and synced with fdatasync.
+    A corrupted block is skipped instead of ending recovery.
+    Use convert_log() (or tools/convert_wal.py) to migrate v1 logs.
 """
 
+import mmap
 import os
 import struct
-import time
-from typing import Iterator, Tuple, Optional
+import threading
+from typing import Iterator, List, Tuple, Optional
 from binascii import crc32
 
 
+# Precompiled record layouts
+_HEADER = struct.Struct('<QII')     # sequence, key_size, value_size
+_CHECKSUM = struct.Struct('<I')     # crc32 (also used for uint32 fields)
+_OP_HEADER = struct.Struct('<II')   # key_size, value_size inside a batch
+
+# Block format: [crc(4)][length(2)][type(1)][log_number(4)][payload]
+_BLOCK_HEADER = struct.Struct('<IHBI')
+_TYPE_AND_LOG = struct.Struct('<BI')
+_ZERO_TYPE = 0      # Padding / preallocated space
+_FULL_TYPE = 1      # Whole record in one fragment
+_FIRST_TYPE = 2
+_MIDDLE_TYPE = 3
+_LAST_TYPE = 4
+
+# Max buffers per writev call
+try:
+    _IOV_MAX = os.sysconf('SC_IOV_MAX')
+except (AttributeError, ValueError, OSError):
+    _IOV_MAX = 1024
+
+
 class WALEntry:
     """Represents a single WAL entry (PUT or DELETE operation)"""
     
     TOMBSTONE_VALUE_SIZE = 0xFFFFFFFF  # Special marker for DELETE (số lớn nhất của uint32 (4 bytes))
     
-    def __init__(self, key: bytes, value: Optional[bytes], timestamp: int = None):
+    def __init__(self, key: bytes, value: Optional[bytes], sequence: int = 0):
         """
         Args:
             key: The key to write
             value: The value to write, or None for DELETE operation
-            timestamp: Timestamp in microseconds (auto-generated if None)
+            sequence: Sequence number assigned by the write path
         """
         if not isinstance(key, bytes):
             raise TypeError("Key must be bytes")
@@ -66,7 +119,7 @@ class WALEntry:
             
         self.key = key
         self.value = value
-        self.timestamp = timestamp or int(time.time() * 1_000_000)
+        self.sequence = sequence
         # is_tombstone -> Mục đích: Đánh dấu key đã bị XÓA (deleted)
         # Khi GET(key1):
             # 1. Check Memtable → Found TOMBSTONE → return None ✓
@@ -84,11 +137,11 @@ class WALEntry:
         # b'': empty bytes (byte string rỗng)
         value_data = b'' if self.is_tombstone else self.value
         
-        # Pack header: timestamp + key_size + value_size
+        # Pack header: sequence + key_size + value_size
         # Mục đích: Convert Python values → binary bytes (convert sang binary format cố định)
         header = struct.pack(
             '<QII',  # Little-endian: uint64, uint32, uint32
-            self.timestamp,
+            self.sequence,
             key_size,
             value_size
         )
@@ -104,13 +157,23 @@ class WALEntry:
         
         return entry
     
+    @property
+    def timestamp(self) -> int:
+        """Deprecated alias: the header field now holds the sequence number"""
+        return self.sequence
+    
     @classmethod
-    def deserialize(cls, data: bytes, offset: int = 0) -> Tuple['WALEntry', int]:
+    def deserialize(cls, data, offset: int = 0) -> Tuple['WALEntry', int]:
         """
         Deserialize entry from bytes and verify checksum
         
+        Works on any buffer (bytes, memoryview, mmap). Header fields are
+        parsed in place with unpack_from and the CRC is computed over a
+        memoryview slice, so the only copies made are the final key and
+        value bytes - and only after the checksum has been verified.
+        
         Args:
-            data: Raw bytes from WAL file
+            data: Raw bytes (or buffer) from WAL file
             offset: Starting position in data
             
         Returns:
@@ -119,55 +182,325 @@ class WALEntry:
         Raises:
             ValueError: If data is corrupted or checksum doesn't match
         """
+        view = data if isinstance(data, memoryview) else memoryview(data)
+        end = len(view)
+        
         # Read header (16 bytes: 8 + 4 + 4)
-        if len(data) < offset + 16:
+        if end < offset + 16:
             raise ValueError("Insufficient data for WAL entry header")
         
-        timestamp, key_size, value_size = struct.unpack('<QII', data[offset:offset+16])
-        offset += 16
+        sequence, key_size, value_size = _HEADER.unpack_from(view, offset)
+        key_start = offset + 16
         
-        # Read key
-        if len(data) < offset + key_size:
+        # Locate key
+        value_start = key_start + key_size
+        if end < value_start:
             raise ValueError("Insufficient data for key")
-        key = data[offset:offset+key_size]
-        offset += key_size
         
-        # Read value
+        # Locate value
         is_tombstone = (value_size == cls.TOMBSTONE_VALUE_SIZE)
         if is_tombstone:
-            value = None
-            actual_value_size = 0
+            value_end = value_start
         else:
-            actual_value_size = value_size
-            if len(data) < offset + actual_value_size:
+            value_end = value_start + value_size
+            if end < value_end:
                 raise ValueError("Insufficient data for value")
-            value = data[offset:offset+actual_value_size]
-            offset += actual_value_size
         
-        # Read and verify checksum
-        if len(data) < offset + 4:
+        # Read and verify checksum (all data except checksum itself)
+        if end < value_end + 4:
             raise ValueError("Insufficient data for checksum")
-        stored_checksum = struct.unpack('<I', data[offset:offset+4])[0]
-        offset += 4
+        stored_checksum = _CHECKSUM.unpack_from(view, value_end)[0]
+        calculated_checksum = crc32(view[offset:value_end]) & 0xFFFFFFFF
         
-        # Calculate expected checksum (all data except checksum itself)
-        entry_data_end = offset - 4
-        entry_data_start = offset - 4 - actual_value_size - key_size - 16
-        calculated_checksum = crc32(data[entry_data_start:entry_data_end]) & 0xFFFFFFFF
-        
-        # Verify checksum
         if stored_checksum != calculated_checksum:
             raise ValueError(
                 f"Checksum mismatch: stored={stored_checksum:08x}, "
                 f"calculated={calculated_checksum:08x}"
             )
         
-        entry = cls(key, value, timestamp)
-        return entry, offset
+        key = bytes(view[key_start:value_start])
+        value = None if is_tombstone else bytes(view[value_start:value_end])
+        
+        entry = cls(key, value, sequence)
+        return entry, value_end + 4
     
     def __repr__(self):
         value_repr = "<tombstone>" if self.is_tombstone else f"{len(self.value)} bytes"
-        return f"WALEntry(key={self.key!r}, value={value_repr}, ts={self.timestamp})"
+        return f"WALEntry(key={self.key!r}, value={value_repr}, seq={self.sequence})"
+
+
+def encode_records(ops: List[Tuple[bytes, Optional[bytes]]], sequence: int) -> List:
+    """
+    Encode many WAL entries at once for a vectored write
+    
+    Each header is packed with a precompiled Struct and the CRC is chained
+    over header, key and value (crc32(..., running)) instead of being
+    computed over a concatenated copy. Keys and values are never copied:
+    they are returned as separate buffers for os.writev.
+    
+    Args:
+        ops: (key, value) pairs, value None for DELETE
+        sequence: Sequence number of the first entry
+        
+    Returns:
+        Buffers whose concatenation is the serialization of every entry:
+        [header, key, checksum] for a DELETE, [header, key, value,
+        checksum] for a PUT
+    """
+    pack_header = _HEADER.pack
+    pack_checksum = _CHECKSUM.pack
+    tombstone = WALEntry.TOMBSTONE_VALUE_SIZE
+    
+    iov = []
+    for key, value in ops:
+        if not isinstance(key, bytes):
+            raise TypeError("Key must be bytes")
+        if value is None:
+            header = pack_header(sequence, len(key), tombstone)
+            checksum = crc32(key, crc32(header)) & 0xFFFFFFFF
+            iov += (header, key, pack_checksum(checksum))
+        elif isinstance(value, bytes):
+            header = pack_header(sequence, len(key), len(value))
+            checksum = crc32(value, crc32(key, crc32(header))) & 0xFFFFFFFF
+            iov += (header, key, value, pack_checksum(checksum))
+        else:
+            raise TypeError("Value must be bytes or None")
+        sequence += 1
+    
+    return iov
+
+
+class WriteBatch:
+    """
+    A group of PUT/DELETE operations applied atomically
+    
+    The whole batch is serialized as a single WAL record with one CRC, so
+    recovery sees either every operation of the batch or none of them.
+    
+    Usage:
+        batch = WriteBatch()
+        batch.put(b"k1", b"v1")
+        batch.delete(b"k2")
+        sequence = wal.write_batch(batch)
+        batch.apply_to(memtable, sequence)
+    """
+    
+    BATCH_MARKER = 0xFFFFFFFF  # Stored in the key_size slot of the header
+    TOMBSTONE_VALUE_SIZE = WALEntry.TOMBSTONE_VALUE_SIZE
+    
+    def __init__(self):
+        self._ops: List[Tuple[bytes, Optional[bytes]]] = []
+    
+    def put(self, key: bytes, value: bytes) -> None:
+        """Add a PUT operation to the batch"""
+        if not isinstance(key, bytes):
+            raise TypeError("Key must be bytes")
+        if not isinstance(value, bytes):
+            raise TypeError("Value must be bytes")
+        self._ops.append((key, value))
+    
+    def delete(self, key: bytes) -> None:
+        """Add a DELETE operation (tombstone) to the batch"""
+        if not isinstance(key, bytes):
+            raise TypeError("Key must be bytes")
+        self._ops.append((key, None))
+    
+    def clear(self) -> None:
+        """Remove all operations"""
+        self._ops.clear()
+    
+    def iter_ops(self) -> Iterator[Tuple[bytes, Optional[bytes]]]:
+        """
+        Iterate over operations in insertion order
+        
+        Yields:
+            Tuples of (key, value) where value is None for DELETE
+        """
+        return iter(self._ops)
+    
+    def apply_to(self, memtable, sequence: int) -> None:
+        """
+        Apply every operation to a memtable in one pass
+        
+        Args:
+            memtable: Any object with put(key, value, sequence) and
+                delete(key, sequence)
+            sequence: Sequence number of the first operation, as returned
+                by write_batch()
+        """
+        put = memtable.put
+        delete = memtable.delete
+        for i, (key, value) in enumerate(self._ops):
+            if value is None:
+                delete(key, sequence + i)
+            else:
+                put(key, value, sequence + i)
+    
+    def serialize(self, sequence: int = 0) -> bytes:
+        """
+        Serialize the batch as one framed WAL record
+        
+        Args:
+            sequence: Sequence number of the first operation; the others
+                get consecutive numbers
+            
+        Returns:
+            Serialized record ready to write to WAL file
+        """
+        parts = [None, _CHECKSUM.pack(len(self._ops))]  # parts[0]: header
+        payload_size = 4
+        for key, value in self._ops:
+            if value is None:
+                parts.append(_OP_HEADER.pack(len(key), self.TOMBSTONE_VALUE_SIZE))
+                parts.append(key)
+                payload_size += 8 + len(key)
+            else:
+                parts.append(_OP_HEADER.pack(len(key), len(value)))
+                parts.append(key)
+                parts.append(value)
+                payload_size += 8 + len(key) + len(value)
+        
+        parts[0] = _HEADER.pack(sequence, self.BATCH_MARKER, payload_size)
+        checksum = 0
+        for part in parts:
+            checksum = crc32(part, checksum)
+        parts.append(_CHECKSUM.pack(checksum & 0xFFFFFFFF))
+        return b''.join(parts)
+    
+    @classmethod
+    def deserialize(cls, data, offset: int = 0) -> Tuple[List[WALEntry], int]:
+        """
+        Deserialize a batch record and verify its checksum
+        
+        Args:
+            data: Raw bytes (or buffer) from WAL file
+            offset: Starting position of the batch record
+            
+        Returns:
+            Tuple of (list of WALEntry, next_offset)
+            
+        Raises:
+            ValueError: If the record is torn or the checksum doesn't match
+        """
+        view = data if isinstance(data, memoryview) else memoryview(data)
+        if len(view) < offset + 16:
+            raise ValueError("Insufficient data for WAL batch header")
+        
+        sequence, marker, payload_size = _HEADER.unpack_from(view, offset)
+        if marker != cls.BATCH_MARKER:
+            raise ValueError("Not a WAL batch record")
+        
+        payload_start = offset + 16
+        payload_end = payload_start + payload_size
+        if len(view) < payload_end + 4:
+            raise ValueError("Insufficient data for batch payload")
+        
+        # Verify checksum before decoding anything: all-or-nothing
+        stored_checksum = _CHECKSUM.unpack_from(view, payload_end)[0]
+        calculated_checksum = crc32(view[offset:payload_end]) & 0xFFFFFFFF
+        if stored_checksum != calculated_checksum:
+            raise ValueError(
+                f"Checksum mismatch: stored={stored_checksum:08x}, "
+                f"calculated={calculated_checksum:08x}"
+            )
+        
+        count = _CHECKSUM.unpack_from(view, payload_start)[0]
+        pos = payload_start + 4
+        entries = []
+        for i in range(count):
+            if pos + 8 > payload_end:
+                raise ValueError("Malformed batch payload")
+            key_size, value_size = _OP_HEADER.unpack_from(view, pos)
+            pos += 8
+            key = bytes(view[pos:pos+key_size])
+            pos += key_size
+            if value_size == cls.TOMBSTONE_VALUE_SIZE:
+                value = None
+            else:
+                value = bytes(view[pos:pos+value_size])
+                pos += value_size
+            entries.append(WALEntry(key, value, sequence + i))
+        
+        if pos != payload_end:
+            raise ValueError("Malformed batch payload")
+        
+        return entries, payload_end + 4
+    
+    def __len__(self):
+        return len(self._ops)
+    
+    def __repr__(self):
+        return f"WriteBatch(ops={len(self._ops)})"
+
+
+class SyncPolicy:
+    """
+    When a WAL forces its data to disk
+    
+    Policies:
+        always(): fsync before every write returns - nothing acknowledged
+            is ever lost
+        every(n_ms): a background thread syncs every n_ms milliseconds; a
+            crash loses at most the last n_ms of writes
+        bytes(n): a background thread syncs once n bytes are unsynced; a
+            crash loses roughly the last n bytes
+        os(): never fsync; the kernel writes dirty pages back on its own
+    
+    Except for always(), records are collected in a user-space buffer and
+    written out when it fills up, on sync() and on close(), so most
+    writes cost no syscall at all.
+    
+    Usage:
+        wal = WAL("data/wal.log", sync_policy=SyncPolicy.every(10))
+        wal.write(b"k", b"v")
+        wal.sync()  # Barrier: everything written so far is durable
+    """
+    
+    ALWAYS = 'always'
+    INTERVAL = 'interval'
+    BYTES = 'bytes'
+    OS = 'os'
+    
+    def __init__(self, mode: str, interval_ms: float = 0, max_bytes: int = 0):
+        if mode == self.INTERVAL and interval_ms <= 0:
+            raise ValueError("Sync interval must be positive")
+        if mode == self.BYTES and max_bytes <= 0:
+            raise ValueError("Sync byte threshold must be positive")
+        self.mode = mode
+        self.interval_ms = interval_ms
+        self.max_bytes = max_bytes
+    
+    @classmethod
+    def always(cls) -> 'SyncPolicy':
+        """fsync on every write (same as sync_on_write=True)"""
+        return cls(cls.ALWAYS)
+    
+    @classmethod
+    def every(cls, n_ms: float) -> 'SyncPolicy':
+        """fsync in the background every n_ms milliseconds"""
+        return cls(cls.INTERVAL, interval_ms=n_ms)
+    
+    @classmethod
+    def bytes(cls, n: int) -> 'SyncPolicy':
+        """fsync in the background once n bytes are unsynced"""
+        return cls(cls.BYTES, max_bytes=n)
+    
+    @classmethod
+    def os(cls) -> 'SyncPolicy':
+        """Leave write-back to the OS (same as sync_on_write=False)"""
+        return cls(cls.OS)
+    
+    @property
+    def background(self) -> bool:
+        """Whether this policy needs a syncer thread"""
+        return self.mode in (self.INTERVAL, self.BYTES)
+    
+    def __repr__(self):
+        if self.mode == self.INTERVAL:
+            return f"SyncPolicy.every({self.interval_ms})"
+        if self.mode == self.BYTES:
+            return f"SyncPolicy.bytes({self.max_bytes})"
+        return f"SyncPolicy.{self.mode}()"
 
 
 class WAL:
@@ -176,75 +509,590 @@ class WAL:
     
     All write operations (PUT/DELETE) are first written to WAL before
     being applied to the memtable. This ensures data is not lost on crash.
+    
+    Two on-disk formats are supported:
+        - v1 (default): raw stream of variable-length records
+        - block format: LevelDB-style 32 KiB blocks (see module docstring),
+          preallocated with fallocate and synced with fdatasync
     """
     
-    def __init__(self, filepath: str, sync_on_write: bool = True):
+    BLOCK_SIZE = 32 * 1024
+    DEFAULT_PREALLOCATE = 4 * 1024 * 1024  # Grow block-format files 4 MB at a time
+    DEFAULT_BUFFER_SIZE = 64 * 1024
+    
+    def __init__(self, filepath: str, sync_on_write: bool = True,
+                 group_commit: bool = False, block_format: bool = False,
+                 log_number: int = 0, preallocate_bytes: int = DEFAULT_PREALLOCATE,
+                 sync_policy: Optional[SyncPolicy] = None,
+                 buffer_size: Optional[int] = None):
         """
         Args:
             filepath: Path to WAL file
-            sync_on_write: If True, fsync after each write (slower but safer)
+            sync_on_write: If True, fsync after each write (slower but safer).
+                Shorthand for SyncPolicy.always() / SyncPolicy.os().
+            group_commit: If True (and sync_on_write), concurrent writers are
+                coalesced: one leader thread writes every pending record and
+                issues a single fsync for the whole group
+            block_format: If True, use the 32 KiB block format instead of v1
+            log_number: Stored in every block-format fragment; fragments
+                with another number (stale data in a recycled file) end
+                the log
+            preallocate_bytes: Block format only - fallocate the file in
+                chunks of this size (0 disables preallocation)
+            sync_policy: When to fsync; overrides sync_on_write
+            buffer_size: User-space write buffer for policies other than
+                always() (0 writes every record straight to the file).
+                Defaults to DEFAULT_BUFFER_SIZE with an explicit sync_policy
+                and to 0 with sync_on_write, so legacy callers still see
+                every write reach the file.
         """
+        if sync_policy is None:
+            sync_policy = SyncPolicy.always() if sync_on_write else SyncPolicy.os()
+            if buffer_size is None:
+                buffer_size = 0
+        elif buffer_size is None:
+            buffer_size = self.DEFAULT_BUFFER_SIZE
         self.filepath = filepath
-        self.sync_on_write = sync_on_write
+        self.sync_policy = sync_policy
+        self.sync_on_write = sync_policy.mode == SyncPolicy.ALWAYS
+        self.buffer_size = 0 if self.sync_on_write else buffer_size
+        self.group_commit = group_commit
+        self.block_format = block_format
+        self.log_number = log_number
+        self.preallocate_bytes = preallocate_bytes
+        self.num_syncs = 0  # Number of fsync calls issued (for stats/benchmarks)
+        self.last_sequence = 0  # Highest sequence number written or recovered
+        self._sequence_lock = threading.Lock()
         self._file = None
+        
+        # Block format write position
+        self._written_offset = 0    # Absolute file offset of the next write
+        self._block_offset = 0      # Offset inside the current block
+        self._allocated = 0         # Bytes reserved with fallocate
+        
+        # Group commit state (all guarded by _commit_cond)
+        self._commit_cond = threading.Condition(threading.Lock())
+        self._pending = []          # Serialized records waiting for a leader
+        self._next_ticket = 0       # Ticket of the last enqueued record
+        self._synced_ticket = 0     # All tickets <= this are durable
+        self._leader_active = False
+        self._commit_error = None   # Sticky I/O error from a failed group
+        
+        # Write buffer and background syncer state (guarded by _write_lock)
+        self._write_lock = threading.Lock()
+        self._syncer_cond = threading.Condition(self._write_lock)
+        self._fsync_lock = threading.Lock()
+        self._buffer = bytearray()
+        self._unsynced = 0          # Bytes written since the last sync
+        self._sync_error = None     # Sticky I/O error from the syncer
+        self._closing = False
+        self._syncer = None
+        
         self._open_file()
+        
+        # Reopening an existing log: continue numbering after its records
+        for _ in self.read_all():
+            pass
     
     def _open_file(self):
         """Open WAL file in append mode"""
         # Create directory if it doesn't exist
         os.makedirs(os.path.dirname(os.path.abspath(self.filepath)), exist_ok=True)
         
-        # Open in binary append mode
-        self._file = open(self.filepath, 'ab', buffering=0)  # Unbuffered for safety
+        if self.block_format:
+            self._open_block_file()
+        else:
+            # Open in binary append mode
+            self._file = open(self.filepath, 'ab', buffering=0)  # Unbuffered for safety
+        
+        self._closing = False
+        if self.sync_policy.background:
+            self._syncer = threading.Thread(target=self._sync_loop,
+                                            name="wal-syncer", daemon=True)
+            self._syncer.start()
     
-    def write(self, key: bytes, value: Optional[bytes]) -> None:
+    def _open_block_file(self):
+        """
+        Open a block-format file for writing at the end of its valid data
+        
+        Preallocated (zero) and recycled (foreign log number) blocks always
+        follow the blocks written by this log, so the first free block is
+        found with a binary search; only the last used block is scanned.
+        """
+        mode = 'r+b' if os.path.exists(self.filepath) else 'w+b'
+        self._file = open(self.filepath, mode, buffering=0)
+        fd = self._file.fileno()
+        size = os.fstat(fd).st_size
+        self._allocated = size
+        
+        # Binary search for the first block not written by this log
+        lo, hi = 0, (size + self.BLOCK_SIZE - 1) // self.BLOCK_SIZE
+        while lo < hi:
+            mid = (lo + hi) // 2
+            header = os.pread(fd, _BLOCK_HEADER.size, mid * self.BLOCK_SIZE)
+            if self._is_own_fragment(header):
+                lo = mid + 1
+            else:
+                hi = mid
+        
+        if lo == 0:
+            self._written_offset = 0
+            self._block_offset = 0
+            return
+        
+        # Resume right after the last valid fragment of the last used block
+        block_start = (lo - 1) * self.BLOCK_SIZE
+        block = os.pread(fd, self.BLOCK_SIZE, block_start)
+        pos = 0
+        while pos + _BLOCK_HEADER.size <= len(block):
+            crc, length, rtype, log = _BLOCK_HEADER.unpack_from(block, pos)
+            data_end = pos + _BLOCK_HEADER.size + length
+            if (rtype == _ZERO_TYPE or log != self.log_number or data_end > len(block)
+                    or _fragment_crc(rtype, log, block[pos + _BLOCK_HEADER.size:data_end]) != crc):
+                break
+            pos = data_end
+        
+        self._written_offset = block_start + pos
+        self._block_offset = pos
+    
+    def _is_own_fragment(self, header: bytes) -> bool:
+        """Check whether a block starts with a fragment of this log"""
+        if len(header) < _BLOCK_HEADER.size:
+            return False
+        _, length, rtype, log = _BLOCK_HEADER.unpack(header)
+        return rtype != _ZERO_TYPE and log == self.log_number
+    
+    def write(self, key: bytes, value: Optional[bytes], sequence: int = None) -> int:
         """
         Write a PUT or DELETE entry to WAL
         
         Args:
             key: The key
             value: The value (None for DELETE)
+            sequence: Sequence number; if None the WAL assigns the next one
+            
+        Returns:
+            The sequence number of the entry
+        """
+        sequence = self._assign_sequence(sequence, 1)
+        entry = WALEntry(key, value, sequence)
+        self._append(entry.serialize())
+        return sequence
+    
+    def write_batch(self, batch: WriteBatch, sequence: int = None) -> int:
+        """
+        Write all operations of a batch as a single atomic record
+        
+        One CRC, one write syscall and (at most) one fsync for the batch.
+        
+        Args:
+            batch: The WriteBatch to log
+            sequence: Sequence number of the first operation; if None the
+                WAL assigns the next len(batch) numbers
+            
+        Returns:
+            The sequence number of the first operation
+        """
+        if len(batch) == 0:
+            return self.last_sequence
+        sequence = self._assign_sequence(sequence, len(batch))
+        self._append(batch.serialize(sequence))
+        return sequence
+    
+    def write_many(self, ops, sequence: int = None) -> int:
+        """
+        Write many independent PUT/DELETE entries with one vectored write
+        
+        Unlike write_batch, each entry is its own record (no atomicity),
+        but all of them go out in a single os.writev call and at most one
+        fsync. Intended for bulk loaders.
+        
+        Args:
+            ops: Iterable of (key, value) pairs, value None for DELETE
+            sequence: Sequence number of the first entry; if None the WAL
+                assigns the next len(ops) numbers
+            
+        Returns:
+            The sequence number of the first entry
+        """
+        ops = list(ops)
+        if not ops:
+            return self.last_sequence
+        sequence = self._assign_sequence(sequence, len(ops))
+        iov = encode_records(ops, sequence)
+        
+        if self.block_format or (self.group_commit and self.sync_on_write):
+            # Fragments are framed per logical record: rebuild the records
+            records = []
+            pos = 0
+            for _, value in ops:
+                width = 3 if value is None else 4
+                records.append(b''.join(iov[pos:pos + width]))
+                pos += width
+            self._append_many(records)
+            return sequence
+        
+        with self._write_lock:
+            self._raise_sync_error()
+            if self.buffer_size:
+                self._buffer_write(b''.join(iov))
+                return sequence
+            self._writev(iov)
+            if self.sync_on_write:
+                self._sync()
+                self.num_syncs += 1
+            else:
+                self._note_unsynced(sum(len(buf) for buf in iov))
+        return sequence
+    
+    def _writev(self, iov: List) -> None:
+        """Write a list of buffers with as few syscalls as possible"""
+        if not hasattr(os, 'writev'):
+            self._file.write(b''.join(iov))
+            return
+        
+        fd = self._file.fileno()
+        for start in range(0, len(iov), _IOV_MAX):
+            chunk = iov[start:start + _IOV_MAX]
+            total = sum(len(buf) for buf in chunk)
+            written = os.writev(fd, chunk)
+            if written < total:
+                # Short write: finish the rest of this chunk the slow way
+                rest = memoryview(b''.join(chunk))[written:]
+                while rest:
+                    rest = rest[self._file.write(rest):]
+    
+    def _assign_sequence(self, sequence: Optional[int], count: int) -> int:
+        """Reserve count sequence numbers (or record explicitly given ones)"""
+        with self._sequence_lock:
+            if sequence is None:
+                sequence = self.last_sequence + 1
+            self.last_sequence = max(self.last_sequence, sequence + count - 1)
+        return sequence
+    
+    def _append(self, record: bytes) -> None:
+        """Append one serialized record, honoring sync/group commit settings"""
+        self._append_many([record])
+    
+    def _append_many(self, records: List[bytes]) -> None:
+        """Append serialized records with one write and at most one sync"""
+        if self.group_commit and self.sync_on_write:
+            self._commit(records)
+            return
+        
+        frame = self._frame
+        with self._write_lock:
+            self._raise_sync_error()
+            data = b''.join([frame(record) for record in records])
+            if self.buffer_size:
+                self._buffer_write(data)
+                return
+            self._write_raw(data)
+            
+            # Force write to disk if requested
+            if self.sync_on_write:
+                self._sync()
+                self.num_syncs += 1
+            else:
+                self._note_unsynced(len(data))
+    
+    def _buffer_write(self, data: bytes) -> None:
+        """Queue framed bytes in the user-space buffer (caller holds _write_lock)"""
+        self._buffer += data
+        if len(self._buffer) >= self.buffer_size:
+            self._flush_buffer()
+        self._note_unsynced(len(data))
+    
+    def _flush_buffer(self) -> None:
+        """Write the user-space buffer to the file (caller holds _write_lock)"""
+        if self._buffer:
+            data = bytes(self._buffer)
+            self._buffer.clear()
+            self._write_raw(data)
+    
+    def _note_unsynced(self, n: int) -> None:
+        """Count unsynced bytes and wake the syncer at its threshold"""
+        self._unsynced += n
+        policy = self.sync_policy
+        if policy.mode == SyncPolicy.BYTES and self._unsynced >= policy.max_bytes:
+            self._syncer_cond.notify()
+    
+    def sync(self) -> None:
+        """
+        Make every write issued so far durable
+        
+        Flushes the user-space buffer and fsyncs the file, whatever the
+        sync policy. Use it as a barrier before acknowledging a batch of
+        writes made under a relaxed policy.
+        """
+        with self._write_lock:
+            self._raise_sync_error()
+            if self._file is None:
+                return
+            self._flush_buffer()
+            self._unsynced = 0
+        with self._fsync_lock:
+            if self._file is not None:
+                self._sync()
+                self.num_syncs += 1
+    
+    def _sync_loop(self) -> None:
+        """Background thread: sync on the policy's timer or byte threshold"""
+        policy = self.sync_policy
+        while True:
+            with self._syncer_cond:
+                if policy.mode == SyncPolicy.INTERVAL:
+                    self._syncer_cond.wait(policy.interval_ms / 1000)
+                else:
+                    self._syncer_cond.wait_for(
+                        lambda: self._closing or self._unsynced >= policy.max_bytes)
+                if self._closing:
+                    return
+                if self._unsynced == 0:
+                    continue
+            try:
+                self.sync()
+            except (OSError, IOError) as e:
+                with self._write_lock:
+                    self._sync_error = e
+                return
+    
+    def _raise_sync_error(self):
+        """Fail writes once the background syncer has hit an I/O error"""
+        if self._sync_error is not None:
+            raise IOError(f"WAL background sync failed: {self._sync_error}")
+    
+    def _frame(self, record: bytes) -> bytes:
+        """
+        Wrap a logical record for the on-disk format
+        
+        v1 records are written as-is. In block format the record is split
+        into FULL/FIRST/MIDDLE/LAST fragments so that no fragment crosses a
+        block boundary; a block tail too small for a header is zero-padded.
+        Must be called in append order (it advances the block position).
+        """
+        if not self.block_format:
+            return record
+        
+        parts = []
+        view = memoryview(record)
+        pos = 0
+        left = len(record)
+        first = True
+        while True:
+            leftover = self.BLOCK_SIZE - self._block_offset
+            if leftover < _BLOCK_HEADER.size:
+                # Trailer: pad and switch to a new block
+                parts.append(b'\x00' * leftover)
+                self._block_offset = 0
+                leftover = self.BLOCK_SIZE
+            
+            length = min(left, leftover - _BLOCK_HEADER.size)
+            last = (length == left)
+            if first and last:
+                rtype = _FULL_TYPE
+            elif first:
+                rtype = _FIRST_TYPE
+            elif last:
+                rtype = _LAST_TYPE
+            else:
+                rtype = _MIDDLE_TYPE
+            
+            fragment = view[pos:pos + length]
+            crc = _fragment_crc(rtype, self.log_number, fragment)
+            parts.append(_BLOCK_HEADER.pack(crc, length, rtype, self.log_number))
+            parts.append(fragment)
+            
+            self._block_offset += _BLOCK_HEADER.size + length
+            pos += length
+            left -= length
+            first = False
+            if last:
+                return b''.join(parts)
+    
+    def _write_raw(self, data: bytes) -> None:
+        """Write framed bytes at the end of the log"""
+        if not self.block_format:
+            self._file.write(data)
+            return
+        
+        end = self._written_offset + len(data)
+        self._preallocate(end)
+        fd = self._file.fileno()
+        offset = self._written_offset
+        view = memoryview(data)
+        while view:
+            n = os.pwrite(fd, view, offset)
+            offset += n
+            view = view[n:]
+        self._written_offset = end
+    
+    def _preallocate(self, end: int) -> None:
         """
-        entry = WALEntry(key, value)
-        serialized = entry.serialize()
+        Reserve file space ahead of the write position
         
-        self._file.write(serialized)
+        With the size already covering the write, fdatasync does not need
+        to update inode metadata on every sync.
+        """
+        if end <= self._allocated or self.preallocate_bytes <= 0:
+            return
+        if not hasattr(os, 'posix_fallocate'):
+            return
         
-        # Force write to disk if requested
-        if self.sync_on_write:
-            self._file.flush()
+        new_size = max(end, self._allocated + self.preallocate_bytes)
+        new_size = -(-new_size // self.BLOCK_SIZE) * self.BLOCK_SIZE  # Round up to a block
+        try:
+            os.posix_fallocate(self._file.fileno(), self._allocated, new_size - self._allocated)
+            self._allocated = new_size
+        except OSError:
+            # Filesystem without fallocate support: grow on demand instead
+            self.preallocate_bytes = 0
+    
+    def _sync(self) -> None:
+        """Force written data to disk"""
+        self._file.flush()
+        if self.block_format and hasattr(os, 'fdatasync'):
+            os.fdatasync(self._file.fileno())
+        else:
             os.fsync(self._file.fileno())
     
+    def _commit(self, records: List[bytes]) -> None:
+        """
+        Group commit: enqueue records and block until they are durable
+        
+        The first writer that finds no leader becomes the leader: it takes
+        every pending record, writes them with one write() call and one
+        fsync, then wakes all waiters. Writers arriving while the leader is
+        doing I/O queue up and form the next group.
+        """
+        with self._commit_cond:
+            # Framing happens under the lock so fragments follow queue order
+            self._pending.extend([self._frame(record) for record in records])
+            self._next_ticket += 1
+            ticket = self._next_ticket
+            
+            # Wait until our record is synced by someone else, or until
+            # nobody is leading and we can take over
+            while self._leader_active and self._synced_ticket < ticket:
+                self._commit_cond.wait()
+            self._raise_commit_error()
+            if self._synced_ticket >= ticket:
+                return
+            
+            # Become the leader for everything queued so far
+            self._leader_active = True
+            group = self._pending
+            self._pending = []
+            last_ticket = self._next_ticket
+        
+        try:
+            self._write_raw(b''.join(group))
+            self._sync()
+        except OSError as e:
+            with self._commit_cond:
+                self._commit_error = e
+                self._leader_active = False
+                self._commit_cond.notify_all()
+            raise
+        
+        with self._commit_cond:
+            self.num_syncs += 1
+            self._synced_ticket = last_ticket
+            self._leader_active = False
+            self._commit_cond.notify_all()
+    
+    def _raise_commit_error(self):
+        """Fail fast once a group commit has hit an I/O error"""
+        if self._commit_error is not None:
+            raise IOError(f"WAL group commit failed: {self._commit_error}")
+    
     def read_all(self) -> Iterator[WALEntry]:
         """
         Read all entries from WAL
         
+        The log is memory-mapped and parsed lazily, so recovering a large
+        WAL never holds more than the current entry in Python memory.
+        
         Yields:
-            WALEntry objects in order
+            WALEntry objects in order (batches are expanded in place).
+            last_sequence is advanced past every recovered entry.
             
         Note:
-            Stops at first corrupted entry (partial write from crash)
+            v1: stops at first corrupted entry (partial write from crash).
+            Block format: a corrupted block is skipped and replay goes on
+            with the next block. A torn batch yields none of its operations.
         """
         if not os.path.exists(self.filepath):
             return
         
+        with self._write_lock:
+            if self._file is not None:
+                self._flush_buffer()  # Buffered records are part of the log
+        
         with open(self.filepath, 'rb') as f:
-            data = f.read()
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return  # mmap cannot map an empty file
+            
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
         
-        offset = 0
-        while offset < len(data):
-            try:
-                entry, offset = WALEntry.deserialize(data, offset)
-                yield entry
-            except ValueError as e:
-                # Corrupted entry (likely incomplete write during crash)
-                # This is expected - just stop reading
-                print(f"WAL: Stopped reading at offset {offset}: {e}")
-                break
+        if hasattr(mm, 'madvise'):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        
+        view = memoryview(mm)
+        try:
+            if self.block_format:
+                for entry in self._read_blocks(view, size):
+                    self.last_sequence = max(self.last_sequence, entry.sequence)
+                    yield entry
+                return
+            
+            offset = 0
+            while offset < size:
+                try:
+                    entries, offset = _decode_record(view, offset)
+                    self.last_sequence = max(self.last_sequence, entries[-1].sequence)
+                    yield from entries
+                except ValueError as e:
+                    # Corrupted entry (likely incomplete write during crash)
+                    # This is expected - just stop reading
+                    print(f"WAL: Stopped reading at offset {offset}: {e}")
+                    break
+        finally:
+            view.release()
+            mm.close()
+    
+    def _read_blocks(self, view: memoryview, size: int) -> Iterator[WALEntry]:
+        """Reassemble and decode logical records from a block-format log"""
+        return _iter_block_records(view, size, self.log_number)
+    
+    def tell(self) -> int:
+        """Current size of the log in bytes (including buffered records)"""
+        if self.block_format:
+            return self._written_offset + len(self._buffer)
+        return self._file.tell() + len(self._buffer)
     
     def close(self):
-        """Close WAL file"""
+        """Close WAL file, writing out (and for background policies syncing) the buffer"""
+        # Stop the syncer first so it never touches a closed file
+        with self._syncer_cond:
+            self._closing = True
+            self._syncer_cond.notify_all()
+        if self._syncer is not None:
+            self._syncer.join()
+            self._syncer = None
+        
+        # Let an in-flight group commit finish before closing the file
+        with self._commit_cond:
+            while self._leader_active:
+                self._commit_cond.wait()
+        
         if self._file:
+            if self.sync_policy.background and self._sync_error is None:
+                self.sync()
+            else:
+                with self._write_lock:
+                    self._flush_buffer()
             self._file.close()
             self._file = None
     
@@ -252,7 +1100,9 @@ class WAL:
         """
         Truncate (clear) the WAL file
         
-        Called after successful memtable flush to disk
+        Called after successful memtable flush to disk. last_sequence is
+        kept, but an empty log cannot restore it after a restart: the
+        owner must then resume from the highest sequence it persisted.
         """
         self.close()
         
@@ -276,3 +1126,144 @@ class WAL:
     
     def __repr__(self):
         return f"WAL(filepath={self.filepath!r})"
+
+
+def _is_batch_record(data, offset: int) -> bool:
+    """Check the key_size slot of the header for the batch marker"""
+    if len(data) < offset + 12:
+        return False
+    return _CHECKSUM.unpack_from(data, offset + 8)[0] == WriteBatch.BATCH_MARKER
+
+
+def _decode_record(data, offset: int = 0) -> Tuple[List[WALEntry], int]:
+    """Decode one logical record (single entry or batch) at offset"""
+    if _is_batch_record(data, offset):
+        return WriteBatch.deserialize(data, offset)
+    entry, next_offset = WALEntry.deserialize(data, offset)
+    return [entry], next_offset
+
+
+def _iter_block_records(view: memoryview, size: int, log_number: int,
+                        start: int = 0, stop: int = None) -> Iterator[WALEntry]:
+    """
+    Reassemble and decode logical records from a block-format log
+    
+    FULL fragments are decoded in place; multi-fragment records are
+    joined first. A bad fragment drops the record being assembled and
+    the rest of its block, and reading resumes at the next block.
+    
+    Args:
+        view: Buffer holding the whole log
+        size: Log size in bytes
+        log_number: Fragments with another log number end the log
+        start: Block-aligned offset to start reading at. Trailing
+            fragments of a record begun before it are skipped.
+        stop: Only records whose first fragment starts before this
+            offset are returned (the last one may extend past it)
+    """
+    if stop is None:
+        stop = size
+    pending = None  # Fragments of the record being reassembled
+    
+    for block_start in range(start, size, WAL.BLOCK_SIZE):
+        if block_start >= stop and pending is None:
+            return
+        block_end = min(block_start + WAL.BLOCK_SIZE, size)
+        pos = block_start
+        
+        while pos + _BLOCK_HEADER.size <= block_end:
+            crc, length, rtype, log = _BLOCK_HEADER.unpack_from(view, pos)
+            if rtype == _ZERO_TYPE and length == 0:
+                break  # Padding or preallocated space: rest of block is empty
+            
+            data_start = pos + _BLOCK_HEADER.size
+            data_end = data_start + length
+            if data_end > block_end or _fragment_crc(rtype, log, view[data_start:data_end]) != crc:
+                print(f"WAL: Skipping corrupted block at offset {block_start}")
+                pending = None
+                break
+            
+            if log != log_number:
+                return  # Stale data left in a recycled file: end of log
+            if pos >= stop and rtype in (_FULL_TYPE, _FIRST_TYPE):
+                return  # Next record belongs to the following range
+            pos = data_end
+            
+            if rtype == _FULL_TYPE:
+                record = (view, data_start)
+                pending = None
+            elif rtype == _FIRST_TYPE:
+                pending = [bytes(view[data_start:data_end])]
+                continue
+            elif rtype == _MIDDLE_TYPE and pending is not None:
+                pending.append(bytes(view[data_start:data_end]))
+                continue
+            elif rtype == _LAST_TYPE and pending is not None:
+                pending.append(bytes(view[data_start:data_end]))
+                record = (b''.join(pending), 0)
+                pending = None
+            else:
+                # Orphan MIDDLE/LAST (its FIRST was in a skipped block)
+                pending = None
+                continue
+            
+            try:
+                entries, _ = _decode_record(*record)
+            except ValueError as e:
+                print(f"WAL: Skipping corrupted record at offset {data_start}: {e}")
+                continue
+            finally:
+                record = None
+            yield from entries
+
+
+def _fragment_crc(rtype: int, log_number: int, fragment) -> int:
+    """CRC32 of a block-format fragment (type + log number + payload)"""
+    return crc32(fragment, crc32(_TYPE_AND_LOG.pack(rtype, log_number))) & 0xFFFFFFFF
+
+
+def convert_log(src_path: str, dst_path: str, log_number: int = 0) -> int:
+    """
+    Convert a v1 WAL file to the block format
+    
+    Records are copied byte for byte (batches stay atomic). Conversion
+    stops at the first corrupted v1 record, exactly like recovery would.
+    
+    Args:
+        src_path: Existing v1 log
+        dst_path: Block-format log to create (must not exist)
+        log_number: Log number stamped into every fragment
+        
+    Returns:
+        Number of logical records converted
+    """
+    if os.path.exists(dst_path):
+        raise FileExistsError(f"Destination WAL already exists: {dst_path}")
+    
+    size = os.path.getsize(src_path)
+    dst = WAL(dst_path, sync_on_write=False, block_format=True, log_number=log_number)
+    count = 0
+    try:
+        if size == 0:
+            return 0
+        with open(src_path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mm)
+        try:
+            offset = 0
+            while offset < size:
+                try:
+                    _, next_offset = _decode_record(view, offset)
+                except ValueError as e:
+                    print(f"WAL: Stopped converting at offset {offset}: {e}")
+                    break
+                dst._append(bytes(view[offset:next_offset]))
+                offset = next_offset
+                count += 1
+        finally:
+            view.release()
+            mm.close()
+        dst.sync()
+    finally:
+        dst.close()
+    return count
@@ -0,0 +1,174 @@
+"""
+Write Buffer Manager Module
+
+Purpose:
+    Caps the memory used by memtables across every store in the process.
+    Without it each store only bounds its own memtable, so dozens of
+    stores can use dozens of times the intended memory.
+
+How It Works:
+    - Stores register and report every byte their memtables grow by
+      (reserve), when a memtable is sealed (sealed) and when a flushed
+      memtable is dropped (free)
+    - Mutable memory (active memtables) above FLUSH_RATIO of the budget:
+      the store with the largest active memtable (oldest on a tie) is
+      asked to seal it, which hands it to its background flusher
+    - Total memory (active + immutable) at the budget: writers stall
+      until flushes bring it back down
+
+Usage:
+    manager = WriteBufferManager(64 * 1024 * 1024)
+    db1 = LSMTree("data1", write_buffer_manager=manager)
+    db2 = LSMTree("data2", write_buffer_manager=manager)
+"""
+
+import threading
+import time
+from typing import Dict
+
+
+class WriteBufferManager:
+    """
+    Process-wide memory budget for memtables
+    
+    Registered stores must provide switch_memtable(), which seals the
+    active memtable without waiting for the flush.
+    """
+    
+    FLUSH_RATIO = 0.875     # Seal a memtable once mutable memory reaches 7/8
+    STALL_POLL = 0.1        # Seconds between re-checks while stalled
+    
+    def __init__(self, buffer_size: int, allow_stall: bool = True):
+        """
+        Args:
+            buffer_size: Memory budget for all memtables, in bytes
+            allow_stall: Block writers while the budget is exceeded
+                (otherwise only flushes are triggered)
+        """
+        if buffer_size <= 0:
+            raise ValueError("buffer_size must be positive")
+        self.buffer_size = buffer_size
+        self.allow_stall = allow_stall
+        
+        self._cond = threading.Condition(threading.Lock())
+        self._mutable = {}      # store -> bytes in its active memtable
+        self._since = {}        # store -> when its active memtable was started
+        self._pending = set()   # Stores asked to seal, not sealed yet
+        self._total = 0         # Active + immutable bytes of all stores
+        self._immutable = {}    # store -> bytes in sealed, unflushed memtables
+        self._flushes_triggered = 0
+        self._stalls = 0
+        self._stall_time = 0.0
+    
+    def register(self, store) -> None:
+        """Start tracking a store"""
+        with self._cond:
+            self._mutable.setdefault(store, 0)
+            self._immutable.setdefault(store, 0)
+            self._since.setdefault(store, time.monotonic())
+    
+    def unregister(self, store) -> None:
+        """Stop tracking a store and forget all memory charged to it"""
+        with self._cond:
+            self._total -= self._mutable.pop(store, 0) + self._immutable.pop(store, 0)
+            self._since.pop(store, None)
+            self._pending.discard(store)
+            self._cond.notify_all()
+    
+    def reserve(self, store, nbytes: int) -> None:
+        """Charge memtable growth (may be negative) to a store's active memtable"""
+        with self._cond:
+            if store not in self._mutable:
+                return
+            self._mutable[store] += nbytes
+            self._total += nbytes
+            if nbytes < 0:
+                self._cond.notify_all()
+    
+    def sealed(self, store, nbytes: int) -> None:
+        """A store sealed its active memtable of nbytes (0 if it was empty)"""
+        with self._cond:
+            self._pending.discard(store)
+            if store not in self._mutable:
+                return
+            self._mutable[store] -= nbytes
+            self._immutable[store] += nbytes
+            self._since[store] = time.monotonic()
+    
+    def free(self, store, nbytes: int) -> None:
+        """A store dropped a flushed memtable of nbytes"""
+        with self._cond:
+            if store not in self._immutable:
+                return
+            self._immutable[store] -= nbytes
+            self._total -= nbytes
+            self._cond.notify_all()
+    
+    def enforce(self) -> None:
+        """
+        Trigger a flush and/or stall the calling writer if needed
+        
+        Called by writers after each write, holding no store lock.
+        """
+        with self._cond:
+            victim = self._pick_victim()
+            if victim is not None:
+                self._pending.add(victim)
+                self._flushes_triggered += 1
+        
+        if victim is not None:
+            victim.switch_memtable()
+        
+        if self.allow_stall:
+            self._stall()
+    
+    def _pick_victim(self):
+        """Largest active memtable (oldest on a tie) not already being sealed"""
+        mutable = sum(self._mutable.values())
+        mutable -= sum(self._mutable[store] for store in self._pending)
+        if mutable < self.buffer_size * self.FLUSH_RATIO:
+            return None
+        
+        victim = None
+        for store, nbytes in self._mutable.items():
+            if store in self._pending or nbytes <= 0:
+                continue
+            if victim is None or (nbytes, -self._since[store]) > (
+                    self._mutable[victim], -self._since[victim]):
+                victim = store
+        return victim
+    
+    def _stall(self) -> None:
+        """Wait while over budget and some flush can still free memory"""
+        with self._cond:
+            if self._total < self.buffer_size:
+                return
+            self._stalls += 1
+            start = time.monotonic()
+            while (self._total >= self.buffer_size
+                   and (sum(self._immutable.values()) > 0 or self._pending)):
+                self._cond.wait(self.STALL_POLL)
+            self._stall_time += time.monotonic() - start
+    
+    @property
+    def total_bytes(self) -> int:
+        """Memory charged to all registered stores"""
+        return self._total
+    
+    @property
+    def stats(self) -> Dict[str, float]:
+        """Snapshot of usage and counters"""
+        with self._cond:
+            return {
+                'total_bytes': self._total,
+                'mutable_bytes': sum(self._mutable.values()),
+                'buffer_size': self.buffer_size,
+                'stores': len(self._mutable),
+                'flushes_triggered': self._flushes_triggered,
+                'stalls': self._stalls,
+                'stall_time': self._stall_time,
+            }
+    
+    def __repr__(self):
+        return (f"WriteBufferManager(total={self._total}/{self.buffer_size} bytes, "
+                f"stores={len(self._mutable)})")
@@ -12,14 +12,42 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
 # Import test modules
-from test_wal import TestWALEntry, TestWAL
+from test_wal import (
+    TestWALEntry,
+    TestWAL,
+    TestWALGroupCommit,
+    TestWriteBatch,
+    TestWALBlockFormat,
+    TestWALSyncPolicy
+)
+from test_segmented_wal import TestSegmentedWAL
+from test_recovery import TestParallelReplay
 from test_memtable import TestMemtable, TestMemtableIterator
+from test_arena_memtable import TestArenaMemtable
+from test_skiplist_memtable import TestSkipListMemtable
 from test_sstable import (
     TestSSTableWriter, 
     TestSSTableReader, 
     TestSSTableLarge,
     TestSSTableFromMemtable,
-    TestSSTableCorruption
+    TestSSTableCorruption,
+    TestSSTableSequence,
+    TestSSTableBlocks,
+    TestSSTableBloomFilter,
+    TestSSTableBlockCache,
+    TestSSTableMmap
+)
+from test_bloom_filter import TestBloomFilter
+from test_block_cache import TestBlockCache
+from test_table_cache import TestTableCache
+from test_merging_iterator import TestMergingIterator
+from test_lsm_tree import TestLSMTree, TestManifest
+from test_write_buffer_manager import TestWriteBufferManager
+from test_compaction import (
+    TestLeveledCompaction,
+    TestTieredCompaction,
+    TestSubcompactions,
+    TestLSMTreeCompaction
 )
 
 
@@ -38,11 +66,19 @@ def run_all_tests():
     print("Loading WAL tests...")
     suite.addTests(loader.loadTestsFromTestCase(TestWALEntry))
     suite.addTests(loader.loadTestsFromTestCase(TestWAL))
+    suite.addTests(loader.loadTestsFromTestCase(TestWALGroupCommit))
+    suite.addTests(loader.loadTestsFromTestCase(TestWriteBatch))
+    suite.addTests(loader.loadTestsFromTestCase(TestWALBlockFormat))
+    suite.addTests(loader.loadTestsFromTestCase(TestWALSyncPolicy))
+    suite.addTests(loader.loadTestsFromTestCase(TestSegmentedWAL))
+    suite.addTests(loader.loadTestsFromTestCase(TestParallelReplay))
     
     # Memtable tests
     print("Loading Memtable tests...")
     suite.addTests(loader.loadTestsFromTestCase(TestMemtable))
     suite.addTests(loader.loadTestsFromTestCase(TestMemtableIterator))
+    suite.addTests(loader.loadTestsFromTestCase(TestArenaMemtable))
+    suite.addTests(loader.loadTestsFromTestCase(TestSkipListMemtable))
     
     # SSTable tests
     print("Loading SSTable tests...")
@@ -51,6 +87,25 @@ def run_all_tests():
     suite.addTests(loader.loadTestsFromTestCase(TestSSTableLarge))
     suite.addTests(loader.loadTestsFromTestCase(TestSSTableFromMemtable))
     suite.addTests(loader.loadTestsFromTestCase(TestSSTableCorruption))
+    suite.addTests(loader.loadTestsFromTestCase(TestSSTableSequence))
+    suite.addTests(loader.loadTestsFromTestCase(TestSSTableBlocks))
+    suite.addTests(loader.loadTestsFromTestCase(TestSSTableBloomFilter))
+    suite.addTests(loader.loadTestsFromTestCase(TestBloomFilter))
+    suite.addTests(loader.loadTestsFromTestCase(TestSSTableBlockCache))
+    suite.addTests(loader.loadTestsFromTestCase(TestSSTableMmap))
+    suite.addTests(loader.loadTestsFromTestCase(TestBlockCache))
+    suite.addTests(loader.loadTestsFromTestCase(TestTableCache))
+    suite.addTests(loader.loadTestsFromTestCase(TestMergingIterator))
+    
+    # Store tests
+    print("Loading LSMTree tests...")
+    suite.addTests(loader.loadTestsFromTestCase(TestLSMTree))
+    suite.addTests(loader.loadTestsFromTestCase(TestManifest))
+    suite.addTests(loader.loadTestsFromTestCase(TestWriteBufferManager))
+    suite.addTests(loader.loadTestsFromTestCase(TestLeveledCompaction))
+    suite.addTests(loader.loadTestsFromTestCase(TestTieredCompaction))
+    suite.addTests(loader.loadTestsFromTestCase(TestSubcompactions))
+    suite.addTests(loader.loadTestsFromTestCase(TestLSMTreeCompaction))
     
     print()
     print("=" * 70)
@@ -0,0 +1,168 @@
+"""
+Test suite for ArenaMemtable
+
+Tests:
+    - Put, get, overwrite and delete
+    - Sorted iteration across bucket splits
+    - Sequence numbers (stale writes ignored)
+    - Records larger than an arena chunk
+    - Memory accounting and is_full
+    - Same contents as Memtable for a random workload
+"""
+
+import unittest
+import random
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from arena_memtable import ArenaMemtable
+from memtable import Memtable
+
+
+class TestArenaMemtable(unittest.TestCase):
+    """Test arena-backed memtable operations"""
+    
+    def test_put_get_overwrite(self):
+        """Test basic put/get and overwriting a key"""
+        memtable = ArenaMemtable()
+        memtable.put(b"key1", b"value1")
+        memtable.put(b"key2", b"")
+        memtable.put(b"key1", b"value1-new")
+        
+        self.assertEqual(memtable.get(b"key1"), b"value1-new")
+        self.assertEqual(memtable.get(b"key2"), b"")
+        self.assertIsNone(memtable.get(b"missing"))
+        self.assertEqual(len(memtable), 2)
+    
+    def test_delete(self):
+        """Test tombstones hide the key but stay in the memtable"""
+        memtable = ArenaMemtable()
+        memtable.put(b"key1", b"value1", sequence=1)
+        memtable.delete(b"key1", sequence=2)
+        memtable.delete(b"never-written", sequence=3)
+        
+        self.assertIsNone(memtable.get(b"key1"))
+        self.assertEqual(memtable.get_entry(b"key1"), (ArenaMemtable.TOMBSTONE, 2))
+        self.assertIs(ArenaMemtable.TOMBSTONE, Memtable.TOMBSTONE)
+        self.assertEqual(memtable.num_entries(), 2)
+    
+    def test_sorted_iteration(self):
+        """Test iteration order stays sorted across bucket splits"""
+        memtable = ArenaMemtable()
+        keys = [f"key{i:05d}".encode() for i in range(5000)]
+        shuffled = keys[:]
+        random.Random(1).shuffle(shuffled)
+        for key in shuffled:
+            memtable.put(key, key[::-1])
+        
+        self.assertGreater(len(memtable._buckets), 1)
+        self.assertEqual([k for k, _ in memtable.iter_all()], keys)
+        self.assertEqual(memtable.get(b"key04321"), b"12340yek")
+    
+    def test_sequence_numbers(self):
+        """Test a write older than the stored entry is ignored"""
+        memtable = ArenaMemtable()
+        memtable.put(b"key", b"new", sequence=10)
+        memtable.put(b"key", b"old", sequence=5)
+        memtable.delete(b"key", sequence=7)
+        
+        self.assertEqual(memtable.get_entry(b"key"), (b"new", 10))
+        self.assertEqual(memtable.max_sequence, 10)
+        self.assertEqual(list(memtable.iter_entries()), [(b"key", b"new", 10)])
+    
+    def test_record_larger_than_chunk(self):
+        """Test a record bigger than the chunk size gets its own chunk"""
+        memtable = ArenaMemtable(chunk_size=1024)
+        big = bytes(range(256)) * 20
+        memtable.put(b"small", b"x")
+        memtable.put(b"big", big)
+        memtable.put(b"after", b"y")
+        
+        self.assertEqual(memtable.get(b"big"), big)
+        self.assertEqual(memtable.get(b"after"), b"y")
+        self.assertGreaterEqual(len(memtable._chunks[1]), len(big))
+    
+    def test_memory_accounting(self):
+        """Test size_bytes counts allocated chunks and drives is_full"""
+        memtable = ArenaMemtable(max_size_bytes=64 * 1024, chunk_size=16 * 1024)
+        self.assertEqual(memtable.size_bytes(), 0)
+        
+        memtable.put(b"key", b"value")
+        self.assertGreaterEqual(memtable.size_bytes(), 16 * 1024)
+        self.assertFalse(memtable.is_full())
+        
+        i = 0
+        while not memtable.is_full():
+            memtable.put(f"key{i:06d}".encode(), b"v" * 100)
+            i += 1
+        self.assertGreaterEqual(memtable.size_bytes(), 64 * 1024)
+        # No more than one chunk of slack past the budget
+        self.assertLess(memtable.size_bytes(), 64 * 1024 + 16 * 1024 + 8 * i)
+        
+        memtable.clear()
+        self.assertTrue(memtable.is_empty())
+        self.assertEqual(memtable.size_bytes(), 0)
+        self.assertEqual(memtable.max_sequence, 0)
+    
+    def test_small_budget_caps_chunk_size(self):
+        """Test a budget below the chunk size still holds many records"""
+        memtable = ArenaMemtable(max_size_bytes=64 * 1024)
+        self.assertEqual(memtable.chunk_size, 64 * 1024 // ArenaMemtable.MIN_CHUNKS)
+        
+        memtable.put(b"key", b"value")
+        self.assertFalse(memtable.is_full())
+        
+        i = 0
+        while not memtable.is_full():
+            memtable.put(f"key{i:06d}".encode(), b"v" * 100)
+            i += 1
+        self.assertGreater(i, 300)
+    
+    def test_matches_memtable(self):
+        """Test a random workload leaves the same contents as Memtable"""
+        rng = random.Random(7)
+        arena = ArenaMemtable(chunk_size=4096)
+        reference = Memtable()
+        for _ in range(10000):
+            key = str(rng.randrange(2000)).encode()
+            sequence = rng.randrange(1000)
+            if rng.random() < 0.2:
+                arena.delete(key, sequence)
+                reference.delete(key, sequence)
+            else:
+                value = rng.randbytes(rng.randrange(200))
+                arena.put(key, value, sequence)
+                reference.put(key, value, sequence)
+        
+        self.assertEqual(list(arena.iter_entries()), list(reference.iter_entries()))
+    
+    def test_type_checks(self):
+        """Test keys and values must be bytes"""
+        memtable = ArenaMemtable()
+        with self.assertRaises(TypeError):
+            memtable.put("key", b"value")
+        with self.assertRaises(TypeError):
+            memtable.put(b"key", "value")
+        with self.assertRaises(TypeError):
+            memtable.get("key")
+
+
+def run_tests():
+    """Run all ArenaMemtable tests"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    
+    suite.addTests(loader.loadTestsFromTestCase(TestArenaMemtable))
+    
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+    
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,134 @@
+"""
+Test suite for BlockCache
+
+Tests:
+    - LRU eviction within the byte budget
+    - Low-priority (scan-resistant) inserts
+    - Pinned entries
+    - Counters and concurrent use
+"""
+
+import unittest
+import sys
+import threading
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from block_cache import BlockCache
+
+
+class TestBlockCache(unittest.TestCase):
+    """Test BlockCache operations"""
+    
+    def setUp(self):
+        self.cache = BlockCache(1000, shard_bits=0)  # One shard: exact LRU order
+    
+    def test_lookup_and_insert(self):
+        """Test hits, misses and replacing an entry"""
+        self.assertIsNone(self.cache.lookup((1, 0)))
+        self.cache.insert((1, 0), b"a" * 100, 100)
+        self.assertEqual(self.cache.lookup((1, 0)), b"a" * 100)
+        self.cache.insert((1, 0), b"b" * 50, 50)
+        self.assertEqual(self.cache.lookup((1, 0)), b"b" * 50)
+        self.assertEqual(self.cache.usage, 50)
+        
+        stats = self.cache.stats
+        self.assertEqual((stats['hits'], stats['misses'], stats['inserts']), (2, 1, 2))
+        self.assertEqual((stats['entries'], stats['capacity']), (1, 1000))
+    
+    def test_lru_eviction(self):
+        """Test the least recently used entries go first once over budget"""
+        for offset in range(10):
+            self.cache.insert((1, offset), offset, 100)
+        self.cache.lookup((1, 0))  # Now the most recently used
+        self.cache.insert((1, 10), 10, 250)
+        
+        self.assertEqual(self.cache.stats['evictions'], 3)
+        self.assertEqual(self.cache.lookup((1, 0)), 0)
+        for offset in (1, 2, 3):
+            self.assertIsNone(self.cache.lookup((1, offset)))
+        self.assertEqual(self.cache.lookup((1, 4)), 4)
+        self.assertLessEqual(self.cache.usage, 1000)
+    
+    def test_low_priority_inserts(self):
+        """Test a one-pass scan does not evict the hot entries"""
+        for offset in range(8):
+            self.cache.insert((1, offset), offset, 100)
+        for offset in range(1000):
+            self.cache.insert((2, offset), offset, 100, low_priority=True)
+        
+        for offset in range(8):
+            self.assertEqual(self.cache.lookup((1, offset)), offset)
+        self.assertIsNone(self.cache.lookup((2, 999)))
+        
+        # The first two took the free space; hit once, a low-priority
+        # entry is promoted like any other, the other is evicted first
+        self.assertEqual(self.cache.lookup((2, 0)), 0)
+        self.cache.insert((3, 0), 0, 100)
+        self.assertIsNone(self.cache.lookup((2, 1)))
+        self.assertEqual(self.cache.lookup((2, 0)), 0)
+        self.assertEqual(self.cache.lookup((1, 0)), 0)
+    
+    def test_pinned_entries(self):
+        """Test pinned entries count against the budget but are never evicted"""
+        self.cache.insert((1, 0), "index", 600, pinned=True)
+        for offset in range(10):
+            self.cache.insert((2, offset), offset, 100)
+        
+        self.assertEqual(self.cache.lookup((1, 0)), "index")
+        self.assertEqual(self.cache.stats['pinned_usage'], 600)
+        self.assertEqual(self.cache.usage, 1000)
+        self.assertEqual(sum(self.cache.lookup((2, offset)) is not None
+                             for offset in range(10)), 4)
+        
+        self.cache.release((1, 0))
+        self.assertIsNone(self.cache.lookup((1, 0)))
+        self.assertEqual(self.cache.stats['pinned_usage'], 0)
+        self.assertEqual(self.cache.usage, 400)
+    
+    def test_new_ids_are_unique(self):
+        """Test every reader gets its own file id"""
+        ids = {self.cache.new_id() for _ in range(100)}
+        self.assertEqual(len(ids), 100)
+    
+    def test_concurrent_use(self):
+        """Test shards keep their accounting under concurrent threads"""
+        cache = BlockCache(64 * 1024, shard_bits=3)
+        
+        def worker(n):
+            for i in range(2000):
+                key = (n, i % 300)
+                if cache.lookup(key) is None:
+                    cache.insert(key, b"x" * 64, 64, low_priority=i % 3 == 0)
+        
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        stats = cache.stats
+        self.assertEqual(stats['hits'] + stats['misses'], 8000)
+        self.assertEqual(stats['inserts'] - stats['evictions'], stats['entries'])
+        self.assertEqual(stats['usage'], stats['entries'] * 64)
+        self.assertLessEqual(stats['usage'], 64 * 1024)
+
+
+def run_tests():
+    """Run all BlockCache tests"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    
+    suite.addTests(loader.loadTestsFromTestCase(TestBlockCache))
+    
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+    
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
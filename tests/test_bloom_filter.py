@@ -0,0 +1,90 @@
+"""
+Test suite for BloomFilter
+
+Tests:
+    - No false negatives
+    - False positive rate close to the bits-per-key target
+    - Batch construction matches probing one key at a time
+    - Block layout and validation
+"""
+
+import unittest
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from bloom_filter import BloomFilter, key_hash
+
+
+class TestBloomFilter(unittest.TestCase):
+    """Test BloomFilter construction and probing"""
+    
+    def setUp(self):
+        self.keys = [f"user:{i:08d}".encode() for i in range(0, 20000, 2)]
+        self.absent = [f"user:{i:08d}".encode() for i in range(1, 20000, 2)]
+    
+    def _false_positive_rate(self, bits_per_key):
+        bloom = BloomFilter(BloomFilter.build([key_hash(k) for k in self.keys], bits_per_key))
+        return sum(bloom.might_contain(key) for key in self.absent) / len(self.absent)
+    
+    def test_no_false_negatives(self):
+        """Test every added key is reported as possibly present"""
+        bloom = BloomFilter(BloomFilter.build([key_hash(k) for k in self.keys], 10))
+        self.assertTrue(all(bloom.might_contain(key) for key in self.keys))
+    
+    def test_false_positive_rate(self):
+        """Test about 1% false positives at 10 bits per key, fewer with more bits"""
+        rate = self._false_positive_rate(10)
+        self.assertLess(rate, 0.02)
+        self.assertGreater(self._false_positive_rate(4), rate)
+        self.assertLess(self._false_positive_rate(20), rate)
+    
+    def test_build_matches_probing(self):
+        """Test the batched build sets exactly the bits a probe tests"""
+        hashes = [key_hash(key) for key in self.keys[:100]]
+        data = BloomFilter.build(hashes, 10)
+        num_bits = (len(data) - 4) * 8
+        expected = bytearray(len(data) - 4)
+        for h in hashes:
+            for i in range(BloomFilter.num_probes_for(10)):
+                bit = ((h & 0xFFFFFFFF) + i * (h >> 32)) % num_bits
+                expected[bit >> 3] |= 1 << (bit & 7)
+        self.assertEqual(data[:-4], bytes(expected))
+    
+    def test_layout(self):
+        """Test the block size, probe count and validation"""
+        data = BloomFilter.build([key_hash(key) for key in self.keys], 10)
+        bloom = BloomFilter(data)
+        self.assertEqual(len(bloom), len(self.keys) * 10 // 8)
+        self.assertEqual(bloom.num_probes, 7)
+        
+        empty = BloomFilter(BloomFilter.build([], 10))
+        self.assertEqual(len(empty), BloomFilter.MIN_BITS // 8)
+        self.assertFalse(empty.might_contain(b"key"))
+        
+        with self.assertRaises(ValueError):
+            BloomFilter(b"\x00")
+    
+    def test_key_hash_is_stable(self):
+        """Test key hashes don't depend on the process (files outlive it)"""
+        self.assertEqual(key_hash(b"key"), 0xf54ca9c3adcc7cce)  # 8-byte BLAKE2b, little-endian
+
+
+def run_tests():
+    """Run all BloomFilter tests"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    
+    suite.addTests(loader.loadTestsFromTestCase(TestBloomFilter))
+    
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+    
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,400 @@
+"""
+Test suite for leveled compaction
+
+Tests:
+    - Level scores and picking (L0 by file count, deeper levels by size)
+    - Trivial moves and tombstone dropping in the bottommost level
+    - Ingest level selection
+    - Size-tiered picking: tiers of similar runs, space amplification,
+      run count limit
+    - Subcompactions: key ranges from sparse indexes, worker processes
+      producing the same result as one merge
+    - LSMTree end to end: disjoint levels, correct reads, reopen
+"""
+
+import unittest
+import tempfile
+import shutil
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from unittest import mock
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import compaction
+from compaction import (Compaction, LeveledCompaction, TieredCompaction,
+                        run_compaction, subcompaction_ranges)
+from lsm_tree import LSMTree
+from manifest import FileMetadata
+from sstable import SSTableReader, SSTableWriter
+
+
+def meta(number, level, smallest, largest, size=1000):
+    return FileMetadata(number, level, smallest, largest, number, number, 10, size)
+
+
+class TestLeveledCompaction(unittest.TestCase):
+    """Test the leveled compaction picker"""
+    
+    def setUp(self):
+        self.strategy = LeveledCompaction(num_levels=4, level0_file_trigger=2,
+                                          max_bytes_for_level_base=2000,
+                                          level_size_multiplier=10)
+    
+    def test_level_scores(self):
+        """Test L0 is scored by file count and deeper levels by bytes"""
+        levels = [[meta(5, 0, b"a", b"c")],
+                  [meta(3, 1, b"a", b"b", 3000)],
+                  [meta(1, 2, b"a", b"z", 10000)],
+                  []]
+        self.assertEqual(self.strategy.level_scores(levels), [0.5, 1.5, 0.5])
+        self.assertEqual(self.strategy.max_bytes_for_level(3), 200000)
+        self.assertTrue(self.strategy.needs_compaction(levels))
+        
+        compaction = self.strategy.pick(levels)
+        self.assertEqual((compaction.level, compaction.output_level), (1, 2))
+        self.assertEqual([m.number for m in compaction.inputs], [3, 1])
+        self.assertTrue(compaction.drop_tombstones)
+        self.assertFalse(compaction.is_trivial_move)
+        
+        levels[1] = []
+        self.assertIsNone(self.strategy.pick(levels))
+    
+    def test_pick_level0(self):
+        """Test an L0 compaction takes every L0 file and the L1 files they overlap"""
+        levels = [[meta(6, 0, b"d", b"f"), meta(5, 0, b"a", b"c")],
+                  [meta(1, 1, b"a", b"b", 500), meta(2, 1, b"e", b"g", 500),
+                   meta(3, 1, b"x", b"z", 500)],
+                  [meta(4, 2, b"c", b"d")],
+                  []]
+        compaction = self.strategy.pick(levels)
+        self.assertEqual(compaction.level, 0)
+        self.assertEqual([m.number for m in compaction.inputs], [6, 5, 1, 2])
+        self.assertFalse(compaction.drop_tombstones)   # L2 may hold older "c"/"d"
+        self.assertEqual(compaction.input_bytes, 3000)
+    
+    def test_round_robin_and_trivial_move(self):
+        """Test deeper levels are compacted one file at a time across the key space"""
+        levels = [[],
+                  [meta(1, 1, b"a", b"b", 1500), meta(2, 1, b"c", b"d", 1500)],
+                  [meta(3, 2, b"c", b"c")],
+                  []]
+        first = self.strategy.pick(levels)
+        self.assertEqual([m.number for m in first.inputs], [1])
+        self.assertTrue(first.is_trivial_move)
+        
+        second = self.strategy.pick(levels)
+        self.assertEqual([m.number for m in second.inputs], [2, 3])
+        self.assertFalse(second.is_trivial_move)
+        
+        third = self.strategy.pick(levels)   # Wraps around
+        self.assertEqual([m.number for m in third.inputs], [1])
+    
+    def test_ingest_level(self):
+        """Test ingested files go to the deepest level with no overlap above"""
+        levels = [[meta(5, 0, b"a", b"c")],
+                  [meta(3, 1, b"m", b"p")],
+                  [],
+                  [meta(1, 3, b"x", b"z")]]
+        self.assertEqual(self.strategy.ingest_level(levels, b"b", b"b"), 0)
+        self.assertEqual(self.strategy.ingest_level(levels, b"n", b"n"), 0)
+        self.assertEqual(self.strategy.ingest_level(levels, b"d", b"e"), 3)
+        self.assertEqual(self.strategy.ingest_level(levels, b"q", b"y"), 2)
+        self.assertFalse(self.strategy.stall_writes(levels))
+        
+        with self.assertRaises(ValueError):
+            LeveledCompaction(num_levels=1)
+
+
+class TestTieredCompaction(unittest.TestCase):
+    """Test the size-tiered compaction picker"""
+    
+    def setUp(self):
+        self.strategy = TieredCompaction(min_merge_width=3, max_merge_width=4,
+                                         max_sorted_runs=6, stop_sorted_runs=8)
+    
+    def _runs(self, *sizes):
+        """Runs newest first, one per size"""
+        return [[meta(len(sizes) - i, 0, b"a", b"z", size) for i, size in enumerate(sizes)]]
+    
+    def test_similar_runs_merged(self):
+        """Test adjacent runs of similar size are merged, newest tier first"""
+        self.assertIsNone(self.strategy.pick(self._runs(1000, 1000, 9000)))
+        
+        compaction = self.strategy.pick(self._runs(1000, 1000, 1500, 9000))
+        self.assertEqual([m.file_size for m in compaction.inputs], [1000, 1000, 1500])
+        self.assertEqual((compaction.level, compaction.output_level), (0, 0))
+        self.assertFalse(compaction.drop_tombstones)
+        
+        # The newest runs don't form a tier; older ones do (width capped)
+        levels = self._runs(100, 5000, 5000, 5000, 5000, 5000, 90000)
+        compaction = self.strategy.pick(levels)
+        self.assertEqual([m.number for m in compaction.inputs], [6, 5, 4, 3])
+    
+    def test_space_amplification(self):
+        """Test everything is merged once newer runs outgrow the oldest"""
+        levels = self._runs(1000, 3000, 2000)
+        self.assertEqual(self.strategy.size_amplification(levels[0]), 200)
+        self.assertIsNone(self.strategy.pick(levels))
+        
+        levels = self._runs(1000, 1100, 3000, 2000)
+        compaction = self.strategy.pick(levels)
+        self.assertEqual(len(compaction.inputs), 4)
+        self.assertTrue(compaction.drop_tombstones)
+    
+    def test_run_limit(self):
+        """Test the newest runs are merged regardless of size once there are too many"""
+        levels = self._runs(1, 10, 100, 1000, 10000, 100000)
+        compaction = self.strategy.pick(levels)
+        self.assertEqual([m.file_size for m in compaction.inputs], [1, 10, 100])
+        self.assertFalse(self.strategy.stall_writes(levels))
+        self.assertTrue(self.strategy.stall_writes(self._runs(*[10 ** i for i in range(8)])))
+        self.assertEqual(self.strategy.ingest_level(levels, b"a", b"b"), 0)
+        
+        with self.assertRaises(ValueError):
+            TieredCompaction(min_merge_width=4, max_merge_width=3)
+
+
+class TestSubcompactions(unittest.TestCase):
+    """Test compactions split by key range over worker processes"""
+    
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.next_number = 100
+    
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+    
+    def _input(self, number, level, keys, sequence):
+        path = os.path.join(self.test_dir, f"{number:06d}.sst")
+        writer = SSTableWriter(path)
+        for i in keys:
+            writer.add(b"key%05d" % i, None if i % 11 == 0 else b"v%d" % sequence, sequence)
+        writer.finalize()
+        reader = SSTableReader(path)
+        return FileMetadata(number, level, reader.first_key, reader.last_key, sequence,
+                            sequence, reader.num_entries, os.path.getsize(path)), reader
+    
+    def _compaction(self):
+        inputs = [self._input(1, 0, range(0, 3000, 2), 3),
+                  self._input(2, 1, range(0, 3000, 3), 2),
+                  self._input(3, 1, range(3000, 4000), 1)]
+        readers = {meta.number: reader for meta, reader in inputs}
+        return Compaction(0, 1, [meta for meta, _ in inputs], True), readers
+    
+    def _new_output(self):
+        self.next_number += 1
+        return self.next_number, os.path.join(self.test_dir, f"{self.next_number:06d}.sst")
+    
+    def test_ranges(self):
+        """Test ranges are disjoint, cover everything and are cut at index keys"""
+        job, readers = self._compaction()
+        self.assertEqual(subcompaction_ranges(job, readers, 4, min_bytes=10 ** 9),
+                         [(None, None)])
+        
+        ranges = subcompaction_ranges(job, readers, 4, min_bytes=0)
+        self.assertEqual(len(ranges), 4)
+        self.assertIsNone(ranges[0][0])
+        self.assertIsNone(ranges[-1][1])
+        index_keys = {key for reader in readers.values() for key, _ in reader.index}
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start)
+            self.assertIn(start, index_keys)
+        
+        # Every range holds a similar number of blocks (~BLOCK_SIZE bytes each)
+        blocks = [sum(1 for key in index_keys if (start is None or key >= start)
+                      and (end is None or key < end)) for start, end in ranges]
+        self.assertLessEqual(max(blocks) - min(blocks), 1)
+        entries = sum(1 for start, end in ranges for reader in readers.values()
+                      for _ in reader.iter_entries(start, end))
+        self.assertEqual(entries, 1500 + 1000 + 1000)
+    
+    def test_same_result_as_single_merge(self):
+        """Test worker outputs match one merge and are numbered in key order"""
+        job, readers = self._compaction()
+        single, single_counters = run_compaction(job, readers, self._new_output, 8 * 1024)
+        expected = [entry for _, reader in single for entry in reader.iter_entries()]
+        
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            outputs, counters = run_compaction(
+                job, readers, self._new_output, 8 * 1024, executor=pool,
+                max_subcompactions=3, min_subcompaction_bytes=0,
+                scratch_prefix=os.path.join(self.test_dir, "scratch-"))
+        
+        self.assertGreater(len(outputs), 3)
+        self.assertEqual([entry for _, reader in outputs for entry in reader.iter_entries()],
+                         expected)
+        self.assertEqual(counters, single_counters)
+        numbers = [meta.number for meta, _ in outputs]
+        self.assertEqual(numbers, sorted(numbers))
+        for prev, (meta, reader) in zip(outputs, outputs[1:]):
+            self.assertLess(prev[0].largest, meta.smallest)
+            self.assertEqual(meta.num_entries, reader.num_entries)
+            self.assertEqual(meta.level, 1)
+        self.assertEqual([name for name in os.listdir(self.test_dir) if 'scratch' in name], [])
+
+
+class TestLSMTreeCompaction(unittest.TestCase):
+    """Test compaction inside LSMTree"""
+    
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.db_dir = os.path.join(self.test_dir, 'db')
+    
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+    
+    def _strategy(self):
+        return LeveledCompaction(num_levels=4, level0_file_trigger=2,
+                                 max_bytes_for_level_base=16 * 1024,
+                                 level_size_multiplier=4, target_file_size=4 * 1024)
+    
+    def _check_levels(self, db):
+        for files in db.levels()[1:]:
+            for prev, meta in zip(files, files[1:]):
+                self.assertLess(prev.largest, meta.smallest)
+    
+    def test_compaction_end_to_end(self):
+        """Test overwrites and deletes are merged down and reads stay correct"""
+        expected = {}
+        with LSMTree(self.db_dir, memtable_size=4 * 1024, compaction=self._strategy()) as db:
+            for rnd in range(4):
+                for i in range(rnd, 600, 3):
+                    key = f"key{i:04d}".encode()
+                    value = f"value{i}-{rnd}".encode() * 3
+                    db.put(key, value)
+                    expected[key] = value
+                for i in range(rnd, 600, 17):
+                    key = f"key{i:04d}".encode()
+                    db.delete(key)
+                    expected[key] = None
+            db.flush()
+            db.wait_for_compactions()
+            
+            self.assertGreater(db.stats['compactions'], 0)
+            self.assertGreater(db.stats['compaction_bytes_written'], 0)
+            self.assertLess(len(db.levels()[0]), 2)
+            self.assertTrue(any(db.levels()[2:]))
+            self._check_levels(db)
+            for key, value in expected.items():
+                self.assertEqual(db.get(key), value)
+            
+            live = set(db.levels()[0] + db.levels()[1] + db.levels()[2] + db.levels()[3])
+            self.assertEqual(set(db.sstables()), live)
+            on_disk = [name for name in os.listdir(self.db_dir) if name.endswith('.sst')]
+            self.assertEqual(sorted(on_disk),
+                             sorted(os.path.basename(db._table_path(m.number)) for m in live))
+        
+        with LSMTree(self.db_dir, memtable_size=4 * 1024, compaction=self._strategy()) as db:
+            self._check_levels(db)
+            for key, value in expected.items():
+                self.assertEqual(db.get(key), value)
+    
+    def test_tiered_compaction(self):
+        """Test a tiered store keeps few runs in L0 and reads stay correct"""
+        expected = {}
+        strategy = TieredCompaction(min_merge_width=2, max_sorted_runs=4)
+        with LSMTree(self.db_dir, memtable_size=4 * 1024, compaction=strategy) as db:
+            for rnd in range(3):
+                for i in range(rnd, 400, 2):
+                    key = f"key{i:04d}".encode()
+                    expected[key] = f"value{i}-{rnd}".encode()
+                    db.put(key, expected[key])
+                db.delete(b"key0010")
+                expected[b"key0010"] = None
+            db.flush()
+            db.wait_for_compactions()
+            
+            self.assertGreater(db.stats['compactions'], 0)
+            self.assertEqual(db.stats['trivial_moves'], 0)
+            self.assertLess(len(db.levels()[0]), 4)
+            self.assertEqual(len(db.levels()), 1)
+            for key, value in expected.items():
+                self.assertEqual(db.get(key), value)
+    
+    def test_strategy_without_level(self):
+        """Test a store with files below L0 does not open with a tiered strategy"""
+        path = os.path.join(self.test_dir, 'external.sst')
+        writer = SSTableWriter(path)
+        writer.add(b"k", b"v")
+        writer.finalize()
+        with LSMTree(self.db_dir, compaction=self._strategy()) as db:
+            db.ingest_external_file([path])
+            self.assertEqual(db.sstables()[0].level, 3)
+        
+        with self.assertRaises(ValueError):
+            LSMTree(self.db_dir, compaction=TieredCompaction())
+    
+    def test_subcompactions(self):
+        """Test a store splitting compactions over worker processes"""
+        strategy = LeveledCompaction(num_levels=3, level0_file_trigger=4,
+                                     max_bytes_for_level_base=10 ** 9)
+        with mock.patch.object(compaction, 'MIN_SUBCOMPACTION_BYTES', 0):
+            with LSMTree(self.db_dir, memtable_size=8 * 1024, compaction=strategy,
+                         max_subcompactions=2) as db:
+                for i in range(1200):
+                    db.put(b"key%05d" % (i * 7 % 1200), b"v%d" % i)
+                db.flush()
+                db.wait_for_compactions()
+                
+                self.assertGreater(db.stats['compactions'], 0)
+                self.assertGreater(len(db.levels()[1]), 1)
+                self._check_levels(db)
+                for i in range(1200):
+                    self.assertEqual(db.get(b"key%05d" % (i * 7 % 1200)), b"v%d" % i)
+    
+    def test_tombstones_reclaimed(self):
+        """Test deleting everything leaves no entries once compacted to the bottom"""
+        strategy = LeveledCompaction(num_levels=2, level0_file_trigger=1)
+        with LSMTree(self.db_dir, memtable_size=4 * 1024, compaction=strategy) as db:
+            for i in range(200):
+                db.put(f"key{i:04d}".encode(), b"v" * 50)
+            db.flush()
+            for i in range(200):
+                db.delete(f"key{i:04d}".encode())
+            db.flush()
+            db.wait_for_compactions()
+            
+            self.assertEqual(db.levels()[0], [])
+            self.assertEqual(sum(meta.num_entries for meta in db.sstables()), 0)
+            self.assertIsNone(db.get(b"key0100"))
+    
+    def test_ingest_skips_levels(self):
+        """Test an ingested file lands below levels it does not overlap"""
+        with LSMTree(self.db_dir, compaction=self._strategy()) as db:
+            db.put(b"a", b"1")
+            db.flush()
+            
+            path = os.path.join(self.test_dir, 'external.sst')
+            writer = SSTableWriter(path)
+            writer.add(b"x", b"2")
+            writer.finalize()
+            db.ingest_external_file([path])
+            
+            self.assertEqual([m.level for m in db.sstables()], [0, 3])
+            self.assertEqual(db.get(b"x"), b"2")
+            self.assertEqual(db.get(b"a"), b"1")
+
+
+def run_tests():
+    """Run all compaction tests"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    
+    suite.addTests(loader.loadTestsFromTestCase(TestLeveledCompaction))
+    suite.addTests(loader.loadTestsFromTestCase(TestTieredCompaction))
+    suite.addTests(loader.loadTestsFromTestCase(TestSubcompactions))
+    suite.addTests(loader.loadTestsFromTestCase(TestLSMTreeCompaction))
+    
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+    
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,408 @@
+"""
+Test suite for LSMTree and Manifest
+
+Tests:
+    - Put, get, delete across memtables and SSTables
+    - Background flush: SSTables created, WAL segments released
+    - Write stalls when the immutable queue is full
+    - Recovery from WAL + SSTables after reopen
+    - Manifest persistence and orphan cleanup
+    - Ingestion of externally built SSTables
+    - Bloom filter counters
+    - Block cache shared by stores
+    - Open SSTables bounded by max_open_files
+"""
+
+import unittest
+import tempfile
+import shutil
+import os
+import sys
+import threading
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from block_cache import BlockCache
+from lsm_tree import LSMTree
+from compaction import LeveledCompaction
+from manifest import FileMetadata, Manifest
+from sstable import SSTableWriter
+from wal import WriteBatch
+
+
+class TestLSMTree(unittest.TestCase):
+    """Test LSMTree store operations"""
+    
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.db_dir = os.path.join(self.test_dir, 'db')
+    
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+    
+    def test_put_get_delete(self):
+        """Test basic operations in the active memtable"""
+        with LSMTree(self.db_dir) as db:
+            seq1 = db.put(b"key1", b"value1")
+            seq2 = db.put(b"key2", b"value2")
+            db.delete(b"key1")
+            
+            self.assertEqual(seq2, seq1 + 1)
+            self.assertIsNone(db.get(b"key1"))
+            self.assertEqual(db.get(b"key2"), b"value2")
+            self.assertIsNone(db.get(b"missing"))
+            
+            with self.assertRaises(TypeError):
+                db.put("key", b"value")
+    
+    def test_reads_across_sstables(self):
+        """Test newer memtable entries and tombstones shadow SSTables"""
+        with LSMTree(self.db_dir) as db:
+            db.put(b"a", b"1")
+            db.put(b"b", b"1")
+            db.put(b"c", b"1")
+            db.flush()
+            db.put(b"a", b"2")
+            db.delete(b"b")
+            db.flush()
+            db.put(b"a", b"3")
+            
+            self.assertEqual(len(db.sstables()), 2)
+            self.assertEqual(db.get(b"a"), b"3")
+            self.assertIsNone(db.get(b"b"))  # Tombstone in the newer SSTable
+            self.assertEqual(db.get(b"c"), b"1")
+    
+    def test_write_batch(self):
+        """Test a WriteBatch is applied with consecutive sequences"""
+        with LSMTree(self.db_dir) as db:
+            batch = WriteBatch()
+            batch.put(b"k1", b"v1")
+            batch.put(b"k2", b"v2")
+            batch.delete(b"k1")
+            first = db.write(batch)
+            
+            self.assertEqual(db.last_sequence, first + 2)
+            self.assertIsNone(db.get(b"k1"))
+            self.assertEqual(db.get(b"k2"), b"v2")
+    
+    def test_background_flush(self):
+        """Test full memtables are flushed and their WAL segments released"""
+        with LSMTree(self.db_dir, memtable_size=4 * 1024) as db:
+            for i in range(500):
+                db.put(f"key{i:04d}".encode(), b"v" * 50)
+            db.flush()
+            db._wal.wait_for_recycling()
+            
+            self.assertGreater(db.stats['flushes'], 1)
+            self.assertEqual(db.num_immutable_memtables, 0)
+            self.assertEqual(db._wal.segments(), [db._wal.active_number])
+            for i in range(500):
+                self.assertEqual(db.get(f"key{i:04d}".encode()), b"v" * 50)
+            
+            db.wait_for_compactions()
+            manifest = Manifest(self.db_dir)
+            self.assertEqual(sorted(manifest.files), sorted(m.number for m in db.sstables()))
+            self.assertEqual(manifest.last_sequence, 500)
+    
+    def test_reads_from_immutable_memtables(self):
+        """Test sealed memtables stay readable while the flusher is busy"""
+        db = LSMTree(self.db_dir, memtable_size=1024, max_immutable_memtables=4)
+        release = threading.Event()
+        write_sstable = db._write_sstable
+        
+        def slow_write(memtable):
+            release.wait()
+            return write_sstable(memtable)
+        
+        db._write_sstable = slow_write
+        try:
+            # Stay below the queue limit: a full queue would stall this thread
+            keys = []
+            while db.num_immutable_memtables < 2:
+                keys.append(f"key{len(keys):04d}".encode())
+                db.put(keys[-1], b"v" * 40)
+            
+            for key in keys:
+                self.assertEqual(db.get(key), b"v" * 40)
+        finally:
+            release.set()
+        
+        db.flush()
+        self.assertEqual(db.num_immutable_memtables, 0)
+        self.assertEqual(db.get(b"key0000"), b"v" * 40)
+        db.close()
+    
+    def test_write_stall(self):
+        """Test writers block while max_immutable_memtables are queued"""
+        db = LSMTree(self.db_dir, memtable_size=1024, max_immutable_memtables=1)
+        release = threading.Event()
+        write_sstable = db._write_sstable
+        
+        def slow_write(memtable):
+            release.wait()
+            return write_sstable(memtable)
+        
+        db._write_sstable = slow_write
+        
+        def writer():
+            for i in range(200):
+                db.put(f"key{i:04d}".encode(), b"v" * 40)
+        
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            # The writer seals one memtable, then stalls on the second seal
+            for _ in range(100):
+                if db.stats['stalls']:
+                    break
+                thread.join(timeout=0.05)
+            self.assertTrue(thread.is_alive())
+            self.assertEqual(db.stats['stalls'], 1)
+            self.assertEqual(db.num_immutable_memtables, 1)
+        finally:
+            release.set()
+            thread.join()
+        
+        self.assertGreater(db.stats['stall_time'], 0)
+        self.assertEqual(db.get(b"key0199"), b"v" * 40)
+        db.close()
+    
+    def test_recovery(self):
+        """Test SSTables and unflushed WAL data survive a reopen"""
+        with LSMTree(self.db_dir, memtable_size=4 * 1024) as db:
+            for i in range(300):
+                db.put(f"key{i:04d}".encode(), f"value{i}".encode())
+            db.delete(b"key0000")
+            last = db.last_sequence
+        
+        with LSMTree(self.db_dir, memtable_size=4 * 1024) as db:
+            self.assertEqual(db.last_sequence, last)
+            self.assertIsNone(db.get(b"key0000"))
+            for i in range(1, 300):
+                self.assertEqual(db.get(f"key{i:04d}".encode()), f"value{i}".encode())
+            self.assertEqual(db.put(b"new", b"x"), last + 1)
+    
+    def test_recovery_overflowing_memtable(self):
+        """Test a replay larger than one memtable is flushed and not replayed again"""
+        with LSMTree(self.db_dir, memtable_size=1024 * 1024) as db:
+            for i in range(300):
+                db.put(f"key{i:04d}".encode(), b"v" * 50)
+        
+        no_compaction = LeveledCompaction(level0_file_trigger=1000)  # Keep L0 as flushed
+        with LSMTree(self.db_dir, memtable_size=4 * 1024, compaction=no_compaction) as db:
+            tables = len(db.sstables())
+            self.assertGreater(tables, 1)
+            self.assertEqual(db.get(b"key0299"), b"v" * 50)
+        
+        with LSMTree(self.db_dir, memtable_size=4 * 1024, compaction=no_compaction) as db:
+            self.assertEqual(len(db.sstables()), tables)
+            self.assertEqual(db.get(b"key0000"), b"v" * 50)
+    
+    def test_orphan_sstables_removed(self):
+        """Test SSTables missing from the manifest are deleted on open"""
+        with LSMTree(self.db_dir) as db:
+            db.put(b"key", b"value")
+            db.flush()
+            live = [m.number for m in db.sstables()]
+        
+        orphan = os.path.join(self.db_dir, '000099.sst')
+        with open(orphan, 'wb') as f:
+            f.write(b"partial")
+        
+        with LSMTree(self.db_dir) as db:
+            self.assertFalse(os.path.exists(orphan))
+            self.assertEqual([m.number for m in db.sstables()], live)
+            self.assertEqual(db.get(b"key"), b"value")
+
+    
+    def _external_file(self, name, keys, value=b"ext"):
+        """Build an SSTable offline, outside the store"""
+        path = os.path.join(self.test_dir, name)
+        writer = SSTableWriter(path)
+        for key in keys:
+            writer.add(key, None if value is None else value + key)
+        writer.finalize()
+        return path
+    
+    def test_bloom_filter_stats(self):
+        """Test absent keys are ruled out by the SSTable filters, counted per store"""
+        strategy = LeveledCompaction(level0_file_trigger=2)
+        with LSMTree(self.db_dir, compaction=strategy) as db:
+            for i in range(0, 400, 2):
+                db.put(b"key%04d" % i, b"v")
+            db.flush()
+            for i in range(1, 399, 2):
+                self.assertIsNone(db.get(b"key%04d" % i))
+            self.assertEqual(db.get(b"key0200"), b"v")
+            
+            stats = db.filter_stats()
+            self.assertEqual(stats['hits'] + stats['misses'], 200)
+            self.assertEqual(stats['false_positives'], stats['hits'] - 1)
+            self.assertGreater(stats['misses'], 190)
+            
+            # Counters of compacted-away files are kept
+            db.put(b"key0001", b"v")
+            db.flush()
+            db.wait_for_compactions()
+            self.assertEqual(db.stats['compactions'], 1)
+            self.assertEqual(db.filter_stats(), stats)
+        
+        with LSMTree(os.path.join(self.test_dir, 'nofilter'), bloom_bits_per_key=0) as db:
+            db.put(b"a", b"1")
+            db.put(b"c", b"1")
+            db.flush()
+            self.assertIsNone(db.get(b"b"))
+            self.assertEqual(db.filter_stats(), {'hits': 0, 'misses': 0, 'false_positives': 0})
+    
+    def test_block_cache(self):
+        """Test stores share one cache, and only live SSTables stay pinned in it"""
+        cache = BlockCache(1024 * 1024)
+        strategy = LeveledCompaction(level0_file_trigger=2)
+        with LSMTree(self.db_dir, block_cache=cache, compaction=strategy) as db, \
+                LSMTree(os.path.join(self.test_dir, 'other'), block_cache=cache) as other:
+            for i in range(300):
+                db.put(b"key%04d" % i, b"v" * 50)
+                other.put(b"key%04d" % i, b"w" * 50)
+            db.flush()
+            other.flush()
+            for _ in range(2):
+                self.assertEqual(db.get(b"key0100"), b"v" * 50)
+                self.assertEqual(other.get(b"key0100"), b"w" * 50)
+            stats = cache.stats
+            self.assertEqual((stats['misses'], stats['hits']), (2, 2))
+            pinned = stats['pinned_usage']
+            self.assertGreater(pinned, 0)
+            
+            # Compaction inputs are released, the output is pinned
+            db.put(b"key0100", b"new")
+            db.flush()
+            db.wait_for_compactions()
+            self.assertEqual(len(db.sstables()), 1)
+            self.assertEqual(db.get(b"key0100"), b"new")
+            self.assertEqual(cache.stats['pinned_usage'], pinned)
+        self.assertEqual(cache.stats['pinned_usage'], 0)
+    
+    def test_max_open_files(self):
+        """Test only max_open_files readers stay open, the rest reopen on demand"""
+        strategy = LeveledCompaction(level0_file_trigger=100)
+        for _ in range(2):  # Written, then reopened
+            with LSMTree(self.db_dir, compaction=strategy, max_open_files=2) as db:
+                for table in range(6):
+                    db.put(b"key%d" % table, b"value%d" % table)
+                    db.flush()
+                for _ in range(2):
+                    for table in range(6):
+                        self.assertEqual(db.get(b"key%d" % table), b"value%d" % table)
+                
+                stats = db.table_cache.stats
+                self.assertEqual(stats['open_files'], 2)
+                self.assertGreater(stats['evictions'], 0)
+                self.assertGreater(stats['misses'], 0)
+                self.assertGreater(db.filter_stats()['hits'], 0)  # Kept across evictions
+        self.assertEqual(len(db.sstables()), 12)
+    
+    def test_ingest_external_file(self):
+        """Test ingested entries shadow older writes and are shadowed by newer ones"""
+        first = self._external_file('a.sst', [b"k%03d" % i for i in range(0, 100)])
+        second = self._external_file('b.sst', [b"k%03d" % i for i in range(200, 300)])
+        with LSMTree(self.db_dir) as db:
+            db.put(b"k050", b"old")          # Unflushed, older than the ingest
+            db.put(b"other", b"x")
+            sequence = db.ingest_external_file([second, first])
+            
+            self.assertEqual(sequence, 3)
+            self.assertEqual(db.get(b"k050"), b"extk050")
+            self.assertEqual(db.get(b"k250"), b"extk250")
+            self.assertEqual(db.get(b"other"), b"x")
+            self.assertIsNone(db.get(b"k150"))
+            self.assertEqual(db.put(b"k051", b"new"), sequence + 1)
+            self.assertEqual(db.get(b"k051"), b"new")
+            self.assertEqual(db.stats['files_ingested'], 2)
+            self.assertTrue(os.path.exists(first))
+            ingested = [m for m in db.sstables() if m.global_sequence]
+            self.assertEqual(sorted((m.smallest, m.largest) for m in ingested),
+                             [(b"k000", b"k099"), (b"k200", b"k299")])
+        
+        with LSMTree(self.db_dir) as db:
+            self.assertEqual(db.get(b"k050"), b"extk050")
+            self.assertEqual(db.get(b"k051"), b"new")
+            self.assertEqual(db.last_sequence, sequence + 1)
+    
+    def test_ingest_rejects_invalid_files(self):
+        """Test bad input is rejected and nothing is left in the store"""
+        low = self._external_file('low.sst', [b"a", b"m"])
+        high = self._external_file('high.sst', [b"k", b"z"])
+        empty = self._external_file('empty.sst', [])
+        corrupt = self._external_file('corrupt.sst', [b"q"])
+        with open(corrupt, 'r+b') as f:
+            f.seek(30)
+            f.write(b"\xff")
+        
+        with LSMTree(self.db_dir) as db:
+            for paths in ([low, high], [empty], [low, corrupt]):
+                with self.assertRaises(ValueError):
+                    db.ingest_external_file(paths)
+            self.assertEqual(db.sstables(), [])
+            self.assertEqual([n for n in os.listdir(self.db_dir) if n.endswith('.sst')], [])
+            
+            db.ingest_external_file([high], move=True)
+            self.assertFalse(os.path.exists(high))
+            self.assertEqual(db.get(b"z"), b"extz")
+            self.assertIsNone(db.get(b"a"))
+
+class TestManifest(unittest.TestCase):
+    """Test manifest persistence"""
+    
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+    
+    def test_apply_and_reload(self):
+        """Test changes survive reopening the manifest"""
+        manifest = Manifest(self.test_dir)
+        first = manifest.new_file_number()
+        second = manifest.new_file_number()
+        manifest.apply(added=[FileMetadata(first, 0, b"a", b"m", 1, 10)], log_number=3)
+        manifest.apply(added=[FileMetadata(second, 1, b"\x00", b"\xff", 11, 20)],
+                       removed=[first])
+        
+        reloaded = Manifest(self.test_dir)
+        self.assertEqual(list(reloaded.files), [second])
+        self.assertEqual(reloaded.files[second].smallest, b"\x00")
+        self.assertEqual(reloaded.log_number, 3)
+        self.assertEqual(reloaded.last_sequence, 20)
+        self.assertEqual(reloaded.new_file_number(), second + 1)
+        self.assertEqual(reloaded.files_at(1), [reloaded.files[second]])
+        self.assertFalse(os.path.exists(reloaded.path + '.tmp'))
+    
+    def test_overlaps(self):
+        """Test key range intersection"""
+        meta = FileMetadata(1, 0, b"c", b"f")
+        self.assertTrue(meta.overlaps(b"a", b"c"))
+        self.assertTrue(meta.overlaps(b"d", b"e"))
+        self.assertTrue(meta.overlaps(None, None))
+        self.assertFalse(meta.overlaps(b"g", None))
+        self.assertFalse(meta.overlaps(None, b"b"))
+
+
+def run_tests():
+    """Run all LSMTree tests"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    
+    suite.addTests(loader.loadTestsFromTestCase(TestLSMTree))
+    suite.addTests(loader.loadTestsFromTestCase(TestManifest))
+    
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+    
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
@@ -6,11 +6,14 @@ Tests:
     - Delete operations (tombstones)
     - Size tracking and threshold
     - Sorted iteration
+    - Bulk inserts (put_many / update_sorted)
     - Edge cases
 """
 
 import unittest
+import random
 import sys
+import tracemalloc
 from pathlib import Path
 
 # Add src to path
@@ -109,6 +112,38 @@ class TestMemtable(unittest.TestCase):
         
         self.assertTrue(small_memtable.is_full())
     
+    def test_memory_usage_breakdown(self):
+        """Test memory_usage() parts add up and drive is_full"""
+        self.memtable.put(b"key1", b"v" * 100, sequence=1000)
+        usage = self.memtable.memory_usage()
+        
+        self.assertEqual(usage['total'], usage['payload'] + usage['index'] + usage['overhead'])
+        self.assertEqual(usage['total'], self.memtable.size_bytes())
+        self.assertGreaterEqual(usage['payload'], 4 + 100)
+        self.assertGreater(usage['index'], 0)
+        self.assertGreater(usage['overhead'], 0)
+        
+        # A tombstone frees the value object
+        self.memtable.delete(b"key1", sequence=1001)
+        self.assertLess(self.memtable.memory_usage()['payload'], usage['payload'])
+    
+    def test_memory_usage_matches_allocations(self):
+        """Test the reported size is close to what Python really allocates"""
+        rng = random.Random(1)
+        pairs = [(rng.randbytes(16), rng.randbytes(100)) for _ in range(20000)]
+        memtable = Memtable()
+        
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        for sequence, (key, value) in enumerate(pairs, 1000):
+            memtable.put(key, value, sequence)
+        allocated = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        
+        # Pairs were allocated up front: count their objects too
+        objects = sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in pairs)
+        self.assertAlmostEqual(memtable.size_bytes() / (allocated + objects), 1.0, delta=0.2)
+    
     def test_num_entries(self):
         """Test num_entries() returns correct count"""
         self.assertEqual(self.memtable.num_entries(), 0)
@@ -183,6 +218,73 @@ class TestMemtable(unittest.TestCase):
         with self.assertRaises(TypeError):
             self.memtable.put(b"key", "string_value")
     
+    def test_sequence_numbers(self):
+        """Test entries keep their sequence and older writes are ignored"""
+        self.memtable.put(b"key1", b"v5", sequence=5)
+        self.memtable.put(b"key1", b"v3", sequence=3)  # Arrives late
+        self.memtable.delete(b"key2", sequence=7)
+        
+        self.assertEqual(self.memtable.get(b"key1"), b"v5")
+        self.assertEqual(self.memtable.get_entry(b"key1"), (b"v5", 5))
+        self.assertEqual(self.memtable.get_entry(b"key2"), (Memtable.TOMBSTONE, 7))
+        self.assertIsNone(self.memtable.get_entry(b"missing"))
+        self.assertEqual(self.memtable.max_sequence, 7)
+        self.assertEqual(list(self.memtable.iter_entries()),
+                         [(b"key1", b"v5", 5), (b"key2", Memtable.TOMBSTONE, 7)])
+    
+    def test_unsequenced_write_wins(self):
+        """Test a write without a sequence replaces a sequenced entry"""
+        self.memtable.put(b"key", b"v1", sequence=5)
+        self.memtable.put(b"key", b"v2")
+        self.assertEqual(self.memtable.get(b"key"), b"v2")
+        
+        self.memtable.delete(b"key")
+        self.assertIsNone(self.memtable.get(b"key"))
+        self.assertEqual(self.memtable.max_sequence, 5)
+    
+    def test_put_many_matches_put(self):
+        """Test bulk inserts store the same entries and size as single puts"""
+        rng = random.Random(7)
+        keys = sorted({rng.randbytes(8) for _ in range(500)})
+        cases = [
+            keys[:200],                                   # Sorted, empty memtable
+            keys[200:300],                                # Sorted, after last key
+            rng.sample(keys[300:], len(keys) - 300),      # Random, all new
+            keys[150:250] + keys[150:160],                # Overlaps and repeats
+        ]
+        bulk = Memtable(max_size_bytes=1 << 30)
+        single = Memtable(max_size_bytes=1 << 30)
+        sequence = 1
+        for batch in cases:
+            pairs = [(key, None if key[0] < 32 else key * 2) for key in batch]
+            bulk.put_many(pairs, sequence)
+            for i, (key, value) in enumerate(pairs):
+                if value is None:
+                    single.delete(key, sequence + i)
+                else:
+                    single.put(key, value, sequence + i)
+            sequence += len(pairs)
+        
+        self.assertEqual(list(bulk.iter_entries()), list(single.iter_entries()))
+        self.assertEqual(bulk.memory_usage(), single.memory_usage())
+        self.assertEqual(bulk.max_sequence, single.max_sequence)
+        
+        bulk.put_many([(keys[0], b"new")])  # Unsequenced: always applies
+        self.assertEqual(bulk.get(keys[0]), b"new")
+    
+    def test_put_many_validation(self):
+        """Test invalid input is rejected before anything is inserted"""
+        with self.assertRaises(TypeError):
+            self.memtable.put_many([(b"a", b"1"), ("b", b"2")])
+        with self.assertRaises(TypeError):
+            self.memtable.put_many([(b"a", b"1"), (b"b", "2")])
+        with self.assertRaises(ValueError):
+            self.memtable.update_sorted([(b"a", b"1"), (b"c", b"3"), (b"b", b"2")])
+        self.assertTrue(self.memtable.is_empty())
+        
+        self.memtable.update_sorted(iter([(b"a", b"1"), (b"b", b"2")]), sequence=10)
+        self.assertEqual(self.memtable.get_entry(b"b"), (b"2", 11))
+    
     def test_tombstone_in_iteration(self):
         """Test that tombstones appear in iteration"""
         self.memtable.put(b"key1", b"value1")
@@ -0,0 +1,113 @@
+"""
+Test suite for MergingIterator
+
+Tests:
+    - Sorted merge of memtables, SSTables and plain iterables
+    - Newest version wins on duplicate keys (by sequence, then source order)
+    - Tombstones emitted as None or dropped
+    - Lazy: sources are consumed one entry at a time
+"""
+
+import unittest
+import tempfile
+import shutil
+import os
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from memtable import Memtable
+from merging_iterator import MergingIterator
+from skiplist_memtable import SkipListMemtable
+from sstable import SSTableReader, SSTableWriter
+
+
+class TestMergingIterator(unittest.TestCase):
+    """Test MergingIterator operations"""
+    
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+    
+    def _sstable(self, name, entries):
+        path = os.path.join(self.test_dir, name)
+        writer = SSTableWriter(path)
+        for key, value, sequence in entries:
+            writer.add(key, value, sequence)
+        writer.finalize()
+        return SSTableReader(path)
+    
+    def test_newest_version_wins(self):
+        """Test duplicate keys resolve to the highest sequence in any source"""
+        older = self._sstable('1.sst', [(b"a", b"a1", 1), (b"b", b"b1", 2), (b"d", b"d1", 3)])
+        newer = self._sstable('2.sst', [(b"b", b"b2", 4), (b"c", None, 5), (b"d", b"d2", 6)])
+        memtable = Memtable()
+        memtable.put(b"a", b"a3", 7)
+        memtable.delete(b"d", 8)
+        memtable.put(b"b", b"stale", 3)   # Older than the SSTable's b
+        
+        merged = MergingIterator([memtable, newer, older])
+        self.assertEqual(list(merged), [
+            (b"a", b"a3", 7),
+            (b"b", b"b2", 4),
+            (b"c", None, 5),
+            (b"d", None, 8),
+        ])
+        self.assertEqual(merged.num_shadowed, 5)
+    
+    def test_drop_tombstones(self):
+        """Test deleted keys disappear together with the versions they shadow"""
+        memtable = SkipListMemtable()
+        memtable.delete(b"a", 5)
+        memtable.put(b"c", b"c5", 6)
+        base = [(b"a", b"a1", 1), (b"b", None, 2), (b"c", b"c1", 3)]
+        
+        merged = MergingIterator([memtable, base], drop_tombstones=True)
+        self.assertEqual(list(merged), [(b"c", b"c5", 6)])
+        self.assertEqual(merged.num_tombstones_dropped, 2)
+    
+    def test_equal_sequences_prefer_first_source(self):
+        """Test sources given first win when sequences tie (v1 files)"""
+        newer = [(b"k", b"new", 0)]
+        older = [(b"j", b"j", 0), (b"k", b"old", 0)]
+        self.assertEqual(list(MergingIterator([newer, older])),
+                         [(b"j", b"j", 0), (b"k", b"new", 0)])
+        self.assertEqual(list(MergingIterator([])), [])
+        self.assertEqual(list(MergingIterator([[], Memtable()])), [])
+    
+    def test_lazy_consumption(self):
+        """Test sources are read one entry at a time, not materialized"""
+        consumed = []
+        
+        def source(name, keys):
+            for key in keys:
+                consumed.append(name)
+                yield key, b"v", 1
+        
+        merged = iter(MergingIterator([source('x', [b"a", b"c", b"e"]),
+                                       source('y', [b"b", b"d"])]))
+        self.assertEqual(next(merged)[0], b"a")
+        self.assertEqual(len(consumed), 3)   # One lookahead per source
+        self.assertEqual([key for key, _, _ in merged], [b"b", b"c", b"d", b"e"])
+
+
+def run_tests():
+    """Run all MergingIterator tests"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    
+    suite.addTests(loader.loadTestsFromTestCase(TestMergingIterator))
+    
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+    
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,209 @@
+"""
+Test suite for parallel WAL recovery
+
+Tests:
+    - Parallel replay matches sequential read_all (v1 and block format)
+    - Replay stops at the first corrupted v1 record
+    - Corrupted blocks are skipped in block format
+    - Full memtables are handed to the flush callback
+    - SegmentedWAL.replay
+"""
+
+import unittest
+import tempfile
+import os
+import shutil
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from recovery import parallel_replay
+from segmented_wal import SegmentedWAL
+from wal import WAL, WALEntry, WriteBatch
+from memtable import Memtable
+
+
+def sequential_state(wal: WAL) -> dict:
+    """Replay with read_all into a fresh memtable, return key -> entry"""
+    memtable = Memtable(max_size_bytes=1 << 40)
+    for entry in wal.read_all():
+        if entry.is_tombstone:
+            memtable.delete(entry.key, entry.sequence)
+        else:
+            memtable.put(entry.key, entry.value, entry.sequence)
+    return {key: (value, seq) for key, value, seq in memtable.iter_entries()}
+
+
+def memtable_state(memtable: Memtable) -> dict:
+    return {key: (value, seq) for key, value, seq in memtable.iter_entries()}
+
+
+class TestParallelReplay(unittest.TestCase):
+    """Test multi-process WAL replay"""
+    
+    def setUp(self):
+        """Create temporary directory for each test"""
+        self.test_dir = tempfile.mkdtemp()
+        self.wal_path = os.path.join(self.test_dir, "test.wal")
+    
+    def tearDown(self):
+        """Clean up temporary directory"""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+    
+    def _fill(self, wal: WAL, count: int = 2000) -> None:
+        """Mix of puts, overwrites, deletes, batches and large values"""
+        for i in range(count):
+            key = f"key{i % 700:04d}".encode()
+            if i % 97 == 0:
+                batch = WriteBatch()
+                batch.put(key, b"batched")
+                batch.delete(b"key0001")
+                wal.write_batch(batch)
+            elif i % 13 == 0:
+                wal.write(key, None)
+            elif i % 250 == 0:
+                wal.write(key, bytes(range(256)) * 200)  # Spans blocks
+            else:
+                wal.write(key, f"value{i}".encode())
+    
+    def test_v1_matches_sequential(self):
+        """Test ranges resynchronise on record boundaries in v1 logs"""
+        wal = WAL(self.wal_path, sync_on_write=False)
+        self._fill(wal)
+        expected = sequential_state(wal)
+        wal.close()
+        
+        memtable = Memtable(max_size_bytes=1 << 40)
+        count, last_sequence = parallel_replay(
+            [self.wal_path], memtable, workers=3, range_bytes=4096)
+        
+        self.assertEqual(memtable_state(memtable), expected)
+        self.assertEqual(last_sequence, wal.last_sequence)
+        self.assertGreater(count, 2000)
+    
+    def test_v1_false_boundary_in_values(self):
+        """Test values that look like records do not cut the replay short"""
+        fake = b"".join(WALEntry(f"fake{i}".encode(), b"x" * 20, i).serialize()
+                        for i in range(3))
+        wal = WAL(self.wal_path, sync_on_write=False)
+        for i in range(3000):
+            wal.write(f"key{i:05d}".encode(), fake * 4)
+        expected = sequential_state(wal)
+        wal.close()
+        
+        memtable = Memtable(max_size_bytes=1 << 40)
+        count, last_sequence = parallel_replay(
+            [self.wal_path], memtable, workers=1, range_bytes=64 * 1024)
+        
+        self.assertEqual(count, 3000)
+        self.assertEqual(last_sequence, 3000)
+        self.assertEqual(memtable_state(memtable), expected)
+    
+    def test_v1_stops_at_corruption(self):
+        """Test nothing after the first bad v1 record is replayed"""
+        wal = WAL(self.wal_path, sync_on_write=False)
+        self._fill(wal)
+        wal.close()
+        
+        with open(self.wal_path, 'r+b') as f:
+            f.seek(os.path.getsize(self.wal_path) // 2)
+            f.write(b"\xff" * 8)
+        
+        expected = sequential_state(WAL(self.wal_path, sync_on_write=False))
+        memtable = Memtable(max_size_bytes=1 << 40)
+        parallel_replay([self.wal_path], memtable, workers=3, range_bytes=4096)
+        
+        self.assertEqual(memtable_state(memtable), expected)
+    
+    def test_v1_torn_tail(self):
+        """Test a torn last record is dropped like in read_all"""
+        wal = WAL(self.wal_path, sync_on_write=False)
+        self._fill(wal, count=500)
+        wal.close()
+        with open(self.wal_path, 'ab') as f:
+            f.write(b"\x01" * 10)
+        
+        expected = sequential_state(WAL(self.wal_path, sync_on_write=False))
+        memtable = Memtable(max_size_bytes=1 << 40)
+        parallel_replay([self.wal_path], memtable, workers=2, range_bytes=2048)
+        
+        self.assertEqual(memtable_state(memtable), expected)
+    
+    def test_block_format_with_corrupted_block(self):
+        """Test block ranges reassemble fragments and skip bad blocks"""
+        wal = WAL(self.wal_path, sync_on_write=False, block_format=True, log_number=7)
+        self._fill(wal)
+        wal.close()
+        
+        with open(self.wal_path, 'r+b') as f:
+            f.seek(2 * WAL.BLOCK_SIZE + 100)
+            f.write(b"\x00garbage\x00")
+        
+        expected = sequential_state(
+            WAL(self.wal_path, sync_on_write=False, block_format=True, log_number=7))
+        memtable = Memtable(max_size_bytes=1 << 40)
+        parallel_replay([self.wal_path], memtable, workers=3, block_format=True,
+                        log_numbers=[7], range_bytes=WAL.BLOCK_SIZE)
+        
+        self.assertEqual(memtable_state(memtable), expected)
+    
+    def test_flush_when_memtable_full(self):
+        """Test full memtables are handed to the flush callback"""
+        wal = WAL(self.wal_path, sync_on_write=False)
+        for i in range(1000):
+            wal.write(f"key{i:04d}".encode(), b"x" * 100)
+        wal.close()
+        
+        flushed = []
+        
+        def flush(memtable):
+            flushed.append(memtable_state(memtable))
+        
+        memtable = Memtable(max_size_bytes=16 * 1024)
+        count, _ = parallel_replay([self.wal_path], memtable, workers=2,
+                                   flush=flush, range_bytes=8192)
+        
+        self.assertEqual(count, 1000)
+        self.assertGreater(len(flushed), 1)
+        recovered = {}
+        for state in flushed + [memtable_state(memtable)]:
+            recovered.update(state)
+        self.assertEqual(len(recovered), 1000)
+    
+    def test_segmented_wal_replay(self):
+        """Test SegmentedWAL.replay covers every segment and sequence"""
+        wal_dir = os.path.join(self.test_dir, "wal")
+        with SegmentedWAL(wal_dir, segment_size=4096, sync_on_write=False) as wal:
+            for i in range(300):
+                wal.write(f"key{i:03d}".encode(), b"v" * 40)
+            wal.write(b"key000", None)
+        
+        with SegmentedWAL(wal_dir, sync_on_write=False) as wal:
+            memtable = Memtable()
+            count = wal.replay(memtable, workers=2)
+            
+            self.assertEqual(count, 301)
+            self.assertEqual(wal.last_sequence, 301)
+            self.assertIsNone(memtable.get(b"key000"))
+            self.assertEqual(memtable.get(b"key299"), b"v" * 40)
+            self.assertEqual(wal.write(b"next", b"v"), 302)
+
+
+def run_tests():
+    """Run all recovery tests"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    
+    suite.addTests(loader.loadTestsFromTestCase(TestParallelReplay))
+    
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+    
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
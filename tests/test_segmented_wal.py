@@ -0,0 +1,188 @@
+"""
+Test suite for SegmentedWAL
+
+Tests:
+    - Writes and recovery across segments
+    - Rotation on memtable seal and size-based rollover
+    - Releasing, deleting and recycling obsolete segments
+    - Skipping already flushed segments on recovery
+    - Writes racing with rotate() + release()
+"""
+
+import unittest
+import tempfile
+import os
+import shutil
+import sys
+import threading
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from segmented_wal import SegmentedWAL
+from wal import WriteBatch
+
+
+class TestSegmentedWAL(unittest.TestCase):
+    """Test segmented WAL operations"""
+    
+    def setUp(self):
+        """Create temporary directory for each test"""
+        self.test_dir = tempfile.mkdtemp()
+        self.wal_dir = os.path.join(self.test_dir, "wal")
+    
+    def tearDown(self):
+        """Clean up temporary directory"""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+    
+    def test_write_and_read_across_rotation(self):
+        """Test entries from all segments are recovered in order"""
+        with SegmentedWAL(self.wal_dir, sync_on_write=False) as wal:
+            wal.write(b"key1", b"value1")
+            sealed = wal.rotate()
+            wal.write(b"key2", None)
+            batch = WriteBatch()
+            batch.put(b"key3", b"value3")
+            wal.write_batch(batch)
+            
+            self.assertEqual(sealed, 1)
+            self.assertEqual(wal.active_number, 2)
+        
+        with SegmentedWAL(self.wal_dir, sync_on_write=False) as wal:
+            keys = [e.key for e in wal.read_all()]
+            # A fresh segment is started on open
+            self.assertEqual(wal.active_number, 3)
+        
+        self.assertEqual(keys, [b"key1", b"key2", b"key3"])
+    
+    def test_release_skips_flushed_segments(self):
+        """Test released segments are removed and not replayed"""
+        wal = SegmentedWAL(self.wal_dir, sync_on_write=False, max_recycled=0)
+        wal.write(b"flushed", b"x")
+        sealed = wal.rotate()
+        wal.write(b"live", b"y")
+        
+        wal.release(sealed + 1)
+        wal.wait_for_recycling()
+        
+        self.assertEqual(wal.segments(), [2])
+        self.assertEqual([e.key for e in wal.read_all()], [b"live"])
+        wal.close()
+    
+    def test_min_segment_on_recovery(self):
+        """Test recovery can start after the last flushed segment"""
+        with SegmentedWAL(self.wal_dir, sync_on_write=False) as wal:
+            wal.write(b"old", b"x")
+            wal.rotate()
+            wal.write(b"new", b"y")
+        
+        with SegmentedWAL(self.wal_dir, sync_on_write=False) as wal:
+            keys = [e.key for e in wal.read_all(min_segment=2)]
+        
+        self.assertEqual(keys, [b"new"])
+    
+    def test_reopen_continues_sequence(self):
+        """Test reopening resumes numbering after the newest segment"""
+        with SegmentedWAL(self.wal_dir, sync_on_write=False) as wal:
+            wal.write(b"key1", b"value1")
+            wal.rotate()
+            wal.write(b"key2", b"value2")
+        
+        with SegmentedWAL(self.wal_dir, sync_on_write=False) as wal:
+            self.assertEqual(wal.last_sequence, 2)
+            self.assertEqual(wal.write(b"key3", b"value3"), 3)
+        
+        with SegmentedWAL(self.wal_dir, sync_on_write=False) as wal:
+            self.assertEqual([e.sequence for e in wal.read_all()], [1, 2, 3])
+    
+    def test_recycled_segment_is_reused(self):
+        """Test obsolete segments are renamed and reused empty"""
+        wal = SegmentedWAL(self.wal_dir, sync_on_write=False, max_recycled=1)
+        wal.write(b"key1", b"value1")
+        sealed = wal.rotate()
+        wal.release(sealed + 1)
+        wal.wait_for_recycling()
+        
+        self.assertIn("recycle-000001.wal", os.listdir(self.wal_dir))
+        
+        wal.rotate()
+        self.assertEqual(wal.active_number, 3)
+        self.assertNotIn("recycle-000001.wal", os.listdir(self.wal_dir))
+        self.assertEqual(os.path.getsize(wal.segment_path(3)), 0)
+        
+        wal.write(b"key2", b"value2")
+        self.assertEqual([e.key for e in wal.read_all()], [b"key2"])
+        wal.close()
+    
+    def test_block_format_recycling_keeps_blocks(self):
+        """Test a recycled block-format segment is reused without truncation"""
+        wal = SegmentedWAL(self.wal_dir, sync_on_write=False, block_format=True)
+        for i in range(20):
+            wal.write(f"old{i}".encode(), b"x" * 100)
+        sealed = wal.rotate()
+        wal.release(sealed + 1)
+        wal.wait_for_recycling()
+        wal.rotate()
+        
+        # Segment 3 is the renamed segment 1, stale fragments still on disk
+        wal.write(b"new", b"y")
+        self.assertGreater(os.path.getsize(wal.segment_path(3)), 0)
+        self.assertEqual([e.key for e in wal.read_all(min_segment=3)], [b"new"])
+        wal.close()
+    
+    def test_size_based_rollover(self):
+        """Test the active segment rolls over at segment_size"""
+        with SegmentedWAL(self.wal_dir, segment_size=1024, sync_on_write=False) as wal:
+            for i in range(100):
+                wal.write(f"key{i:03d}".encode(), b"v" * 50)
+            
+            self.assertGreater(len(wal.segments()), 1)
+            keys = [e.key for e in wal.read_all()]
+        
+        self.assertEqual(keys, [f"key{i:03d}".encode() for i in range(100)])
+
+    
+    def test_writes_racing_with_release(self):
+        """Test a released segment is not closed under an in-flight write"""
+        wal = SegmentedWAL(self.wal_dir, sync_on_write=False)
+        errors = []
+        
+        def writer(n):
+            try:
+                for i in range(500):
+                    wal.write(f"key{n}-{i:03d}".encode(), b"v" * 20)
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for _ in range(50):
+            sealed = wal.rotate()
+            wal.release(sealed + 1)
+        for thread in threads:
+            thread.join()
+        wal.wait_for_recycling()
+        
+        self.assertEqual(errors, [])
+        self.assertEqual(wal.last_sequence, 2000)
+        wal.close()
+
+
+def run_tests():
+    """Run all SegmentedWAL tests"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    
+    suite.addTests(loader.loadTestsFromTestCase(TestSegmentedWAL))
+    
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+    
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,136 @@
+"""
+Test suite for SkipListMemtable
+
+Tests:
+    - Put, get, overwrite and delete
+    - Sequence numbers (stale writes ignored)
+    - Same contents as Memtable for a random workload
+    - Lock-free readers running alongside concurrent writers
+"""
+
+import unittest
+import random
+import sys
+import threading
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from skiplist_memtable import SkipListMemtable
+from memtable import Memtable
+
+
+class TestSkipListMemtable(unittest.TestCase):
+    """Test skiplist memtable operations"""
+    
+    def test_put_get_delete(self):
+        """Test basic operations and tombstones"""
+        memtable = SkipListMemtable()
+        memtable.put(b"key2", b"value2", sequence=1)
+        memtable.put(b"key1", b"value1", sequence=2)
+        memtable.put(b"key1", b"value1-new", sequence=3)
+        memtable.delete(b"key2", sequence=4)
+        
+        self.assertEqual(memtable.get(b"key1"), b"value1-new")
+        self.assertIsNone(memtable.get(b"key2"))
+        self.assertEqual(memtable.get_entry(b"key2"), (SkipListMemtable.TOMBSTONE, 4))
+        self.assertIsNone(memtable.get_entry(b"missing"))
+        self.assertEqual([k for k, _ in memtable.iter_all()], [b"key1", b"key2"])
+        self.assertEqual(len(memtable), 2)
+    
+    def test_sequence_numbers(self):
+        """Test a write older than the stored entry is ignored"""
+        memtable = SkipListMemtable()
+        memtable.put(b"key", b"new", sequence=10)
+        memtable.put(b"key", b"old", sequence=5)
+        
+        self.assertEqual(memtable.get_entry(b"key"), (b"new", 10))
+        self.assertEqual(memtable.max_sequence, 10)
+    
+    def test_size_and_clear(self):
+        """Test size tracking, is_full and clear"""
+        memtable = SkipListMemtable(max_size_bytes=10 * 1024)
+        i = 0
+        while not memtable.is_full():
+            memtable.put(f"key{i:05d}".encode(), b"v" * 100)
+            i += 1
+        self.assertGreaterEqual(memtable.size_bytes(), 10 * 1024)
+        
+        memtable.clear()
+        self.assertTrue(memtable.is_empty())
+        self.assertEqual(memtable.size_bytes(), 0)
+        self.assertIsNone(memtable.get(b"key00000"))
+    
+    def test_matches_memtable(self):
+        """Test a random workload leaves the same contents as Memtable"""
+        rng = random.Random(3)
+        skiplist = SkipListMemtable()
+        reference = Memtable()
+        for _ in range(10000):
+            key = str(rng.randrange(2000)).encode()
+            sequence = rng.randrange(1000)
+            if rng.random() < 0.2:
+                skiplist.delete(key, sequence)
+                reference.delete(key, sequence)
+            else:
+                value = rng.randbytes(rng.randrange(50))
+                skiplist.put(key, value, sequence)
+                reference.put(key, value, sequence)
+        
+        self.assertEqual(list(skiplist.iter_entries()), list(reference.iter_entries()))
+        self.assertGreater(skiplist.size_bytes(), 0)
+    
+    def test_concurrent_readers_and_writers(self):
+        """Test readers never see a wrong value or unsorted scan mid-insert"""
+        memtable = SkipListMemtable()
+        errors = []
+        done = threading.Event()
+        
+        def writer(start):
+            for i in range(start, 4000, 4):
+                key = f"key{i:05d}".encode()
+                memtable.put(key, key + b"-value", sequence=i)
+        
+        def reader():
+            rng = random.Random()
+            while not done.is_set():
+                key = f"key{rng.randrange(4000):05d}".encode()
+                value = memtable.get(key)
+                if value is not None and value != key + b"-value":
+                    errors.append(f"bad value for {key!r}: {value!r}")
+                keys = [k for k, _ in memtable.iter_all()]
+                if keys != sorted(keys):
+                    errors.append("unsorted scan")
+        
+        readers = [threading.Thread(target=reader) for _ in range(4)]
+        writers = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+        for thread in readers + writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        done.set()
+        for thread in readers:
+            thread.join()
+        
+        self.assertEqual(errors, [])
+        self.assertEqual(len(memtable), 4000)
+        self.assertEqual(memtable.get(b"key03999"), b"key03999-value")
+
+
+def run_tests():
+    """Run all SkipListMemtable tests"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    
+    suite.addTests(loader.loadTestsFromTestCase(TestSkipListMemtable))
+    
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+    
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
@@ -8,19 +8,27 @@ Tests:
     - Checksum verification
     - Range queries
     - Large files
+    - One open file per reader, shared by threads
+    - Bloom filter block
+    - Block cache
+    - Memory-mapped reads
 """
 
 import unittest
 import tempfile
 import os
 import shutil
+import struct
 import sys
+import threading
+from binascii import crc32
 from pathlib import Path
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
 from sstable import SSTableWriter, SSTableReader
+from block_cache import BlockCache
 from memtable import Memtable
 
 
@@ -131,6 +139,30 @@ class TestSSTableReader(unittest.TestCase):
             value = self.reader.get(key)
             self.assertEqual(value, expected_value)
     
+    def test_key_range(self):
+        """Test first_key and last_key without a full scan"""
+        self.assertEqual(self.reader.first_key, b"key000")
+        self.assertEqual(self.reader.last_key, b"key099")
+        
+        empty_path = os.path.join(self.test_dir, "empty.sst")
+        SSTableWriter(empty_path).finalize()
+        empty = SSTableReader(empty_path)
+        self.assertIsNone(empty.first_key)
+        self.assertIsNone(empty.last_key)
+    
+    def test_iter_entries_range(self):
+        """Test iter_entries(start, end) seeks into the file and stops at end"""
+        keys = [key for key, _, _ in self.reader.iter_entries(b"key037", b"key052")]
+        self.assertEqual(keys, [f"key{i:03d}".encode() for i in range(37, 52)])
+        
+        self.assertEqual(len(list(self.reader.iter_entries(b"key090"))), 10)
+        self.assertEqual(len(list(self.reader.iter_entries(end_key=b"key005"))), 5)
+        self.assertEqual(list(self.reader.iter_entries(b"key5", b"key6")), [])
+        self.assertEqual(next(self.reader.iter_entries(b"key0985")), (b"key099", b"value99", 0))
+        
+        unchecked = SSTableReader(self.sst_path, verify_checksum=False)
+        self.assertEqual(unchecked.get(b"key042"), b"value42")
+    
     def test_random_reads(self):
         """Test random access reads"""
         test_indices = [0, 25, 50, 75, 99]
@@ -199,6 +231,35 @@ class TestSSTableReader(unittest.TestCase):
         self.assertEqual(self.reader.num_entries, 100)
         self.assertTrue(hasattr(self.reader, 'index'))
         self.assertGreater(len(self.reader.index), 0)
+    
+    def test_file_handle(self):
+        """Test the reader keeps its file open until close()"""
+        os.remove(self.sst_path)  # Still readable through the open descriptor
+        self.assertEqual(self.reader.get(b"key050"), b"value50")
+        self.assertEqual(len(list(self.reader.iter_all())), 100)
+        
+        self.reader.close()
+        self.reader.close()
+        with self.assertRaises(ValueError):
+            self.reader.get(b"key050")
+    
+    def test_concurrent_reads(self):
+        """Test threads share one reader (reads don't move a file position)"""
+        errors = []
+        
+        def worker(n):
+            for i in range(n, 100, 4):
+                if self.reader.get(f"key{i:03d}".encode()) != f"value{i}".encode():
+                    errors.append(i)
+            if len(list(self.reader.iter_all())) != 100:
+                errors.append(n)
+        
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
 
 
 class TestSSTableLarge(unittest.TestCase):
@@ -344,6 +405,413 @@ class TestSSTableCorruption(unittest.TestCase):
         self.assertIn("magic number", str(ctx.exception))
 
 
+class TestSSTableSequence(unittest.TestCase):
+    """Test sequence numbers in SSTable entries and v1 compatibility"""
+    
+    def setUp(self):
+        """Create temporary directory"""
+        self.test_dir = tempfile.mkdtemp()
+        self.sst_path = os.path.join(self.test_dir, "seq.sst")
+    
+    def tearDown(self):
+        """Clean up temporary directory"""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+    
+    def test_sequence_round_trip(self):
+        """Test sequences are stored per entry"""
+        writer = SSTableWriter(self.sst_path)
+        writer.add(b"key1", b"value1", sequence=7)
+        writer.add(b"key2", None, sequence=3)
+        writer.finalize()
+        
+        self.assertEqual(writer.smallest_sequence, 3)
+        self.assertEqual(writer.largest_sequence, 7)
+        
+        reader = SSTableReader(self.sst_path)
+        self.assertEqual(reader.version, 4)
+        self.assertEqual(list(reader.iter_entries()),
+                         [(b"key1", b"value1", 7), (b"key2", None, 3)])
+        self.assertEqual(reader.get_entry(b"key1"), (b"value1", 7))
+        self.assertEqual(reader.get_entry(b"key2"), (None, 3))  # Tombstone
+        self.assertIsNone(reader.get_entry(b"key3"))  # Missing
+    
+    def _write_flat_file(self, version, entries):
+        """Build a v1 or v2 file by hand: header, entries, index, footer"""
+        data = bytearray(struct.pack('<QIQ I', SSTableWriter.MAGIC_NUMBER, version,
+                                     len(entries), 0))
+        index = []
+        for i, (key, value) in enumerate(entries):
+            if i % 16 == 0:
+                index.append((key, len(data)))
+            value_size = SSTableWriter.TOMBSTONE_MARKER if value is None else len(value)
+            if version == 1:
+                data += struct.pack('<II', len(key), value_size)
+            else:
+                data += struct.pack('<IIQ', len(key), value_size, i + 1)
+            data += key + (value or b'')
+        index_offset = len(data)
+        for key, offset in index:
+            data += struct.pack('<I', len(key)) + key + struct.pack('<Q', offset)
+        data += struct.pack('<Q', index_offset)
+        data += struct.pack('<Q', crc32(bytes(data)) & 0xFFFFFFFF)
+        with open(self.sst_path, 'wb') as f:
+            f.write(data)
+    
+    def test_read_v1_file(self):
+        """Test files written in the v1 format are still readable"""
+        entries = [(f"key{i:02d}".encode(), f"value{i}".encode()) for i in range(20)]
+        entries.append((b"key99", None))
+        self._write_flat_file(1, entries)
+        
+        reader = SSTableReader(self.sst_path)
+        
+        self.assertEqual(reader.version, 1)
+        self.assertEqual(reader.get(b"key17"), b"value17")
+        self.assertEqual(reader.get_entry(b"key03"), (b"value3", 0))
+        self.assertEqual(reader.get_entry(b"key99"), (None, 0))
+        self.assertEqual(len(list(reader.iter_all())), 21)
+    
+    def test_read_v2_file(self):
+        """Test files written in the flat v2 format are still readable"""
+        entries = [(f"key{i:02d}".encode(), f"value{i}".encode()) for i in range(40)]
+        self._write_flat_file(2, entries)
+        
+        reader = SSTableReader(self.sst_path)
+        self.assertEqual(reader.version, 2)
+        self.assertEqual(reader.get_entry(b"key33"), (b"value33", 34))
+        self.assertEqual((reader.first_key, reader.last_key), (b"key00", b"key39"))
+        self.assertEqual(len(list(reader.iter_entries(b"key17", b"key20"))), 3)
+        self.assertEqual(list(reader.iter_entries())[5], (b"key05", b"value5", 6))
+        
+        mapped = SSTableReader(self.sst_path, use_mmap=True, copy_values=True)
+        self.assertEqual(mapped.get_entry(b"key33"), (b"value33", 34))
+        self.assertIsNone(mapped.get_entry(b"key33x"))
+        self.assertEqual(mapped.last_key, b"key39")
+        self.assertEqual(list(mapped.iter_entries(b"key17", b"key20")),
+                         list(reader.iter_entries(b"key17", b"key20")))
+        self.assertEqual(list(mapped.iter_entries()), list(reader.iter_entries()))
+        mapped.close()
+    
+    def test_read_v3_file(self):
+        """Test block files without a filter block (v3) are still readable"""
+        writer = SSTableWriter(self.sst_path, block_size=256, bits_per_key=0)
+        for i in range(100):
+            writer.add(f"key{i:03d}".encode(), f"value{i}".encode(), i)
+        writer.finalize()
+        
+        # Same blocks and index: rewrite the header and the 16-byte v3 footer
+        with open(self.sst_path, 'rb') as f:
+            data = f.read()
+        filter_offset, index_offset, _ = struct.unpack('<QQQ', data[-24:])
+        self.assertEqual(filter_offset, index_offset)  # No filter block
+        header = struct.pack('<QIQ I', SSTableWriter.MAGIC_NUMBER, 3, 100, 0)
+        index = data[index_offset:-24]
+        with open(self.sst_path, 'wb') as f:
+            f.write(header + data[24:-24])
+            f.write(struct.pack('<QQ', index_offset, crc32(index, crc32(header))))
+        
+        reader = SSTableReader(self.sst_path)
+        self.assertEqual(reader.version, 3)
+        self.assertIsNone(reader.bloom)
+        self.assertEqual(reader.get_entry(b"key042"), (b"value42", 42))
+        self.assertIsNone(reader.get_entry(b"key042x"))
+        self.assertEqual(len(list(reader.iter_entries())), 100)
+
+
+class TestSSTableBlocks(unittest.TestCase):
+    """Test the block-based v3 format"""
+    
+    def setUp(self):
+        """Create temporary directory and a file of many small blocks"""
+        self.test_dir = tempfile.mkdtemp()
+        self.sst_path = os.path.join(self.test_dir, "blocks.sst")
+        self.entries = [(f"user:{i:06d}".encode(), None if i % 9 == 0 else b"v" * (i % 50), i)
+                        for i in range(0, 3000, 2)]
+        writer = SSTableWriter(self.sst_path, block_size=512)
+        for key, value, sequence in self.entries:
+            writer.add(key, value, sequence)
+        writer.finalize()
+        self.reader = SSTableReader(self.sst_path)
+    
+    def tearDown(self):
+        """Clean up temporary directory"""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+    
+    def _corrupt(self, offset):
+        with open(self.sst_path, 'r+b') as f:
+            f.seek(offset)
+            byte = f.read(1)
+            f.seek(offset)
+            f.write(bytes([byte[0] ^ 0xFF]))
+    
+    def test_lookups(self):
+        """Test every key, the gaps between keys and keys past the ends"""
+        self.assertGreater(len(self.reader.index), 50)
+        for key, value, sequence in self.entries:
+            self.assertEqual(self.reader.get_entry(key), (value, sequence))
+            self.assertIsNone(self.reader.get_entry(key + b"0"))   # Between two keys
+        self.assertIsNone(self.reader.get_entry(b"user:"))
+        self.assertIsNone(self.reader.get_entry(b"zzz"))
+        self.assertEqual(list(self.reader.iter_entries()), self.entries)
+        self.assertEqual(self.reader.first_key, b"user:000000")
+        self.assertEqual(self.reader.last_key, b"user:002998")
+    
+    def test_prefix_compression(self):
+        """Test shared key prefixes are stored once per restart interval"""
+        flat_size = sum(16 + len(key) + len(value or b"") for key, value, _ in self.entries)
+        self.assertLess(os.path.getsize(self.sst_path), flat_size)
+        
+        # Shared prefixes longer than the 2-byte field still round-trip
+        long_path = os.path.join(self.test_dir, "long.sst")
+        writer = SSTableWriter(long_path)
+        keys = [b"p" * 70000 + b"a", b"p" * 70000 + b"b", b"q"]
+        for key in keys:
+            writer.add(key, key[-1:])
+        writer.finalize()
+        reader = SSTableReader(long_path)
+        self.assertEqual([key for key, _, _ in reader.iter_entries()], keys)
+        self.assertEqual(reader.get(keys[1]), b"b")
+    
+    def test_corrupt_block_is_isolated(self):
+        """Test a bad block fails the reads that touch it, and only those"""
+        block = 10
+        self._corrupt(self.reader.index[block][1] + 5)
+        
+        with self.assertRaises(ValueError) as ctx:
+            SSTableReader(self.sst_path)  # Full verification on open
+        self.assertIn("block 10", str(ctx.exception))
+        
+        reader = SSTableReader(self.sst_path, verify_checksum=False)
+        bad_key = self.reader.index[block][0]
+        with self.assertRaises(ValueError):
+            reader.get(bad_key)
+        with self.assertRaises(ValueError):
+            list(reader.iter_entries())
+        self.assertEqual(reader.get(self.entries[1][0]), self.entries[1][1])
+        self.assertEqual(reader.get(self.entries[-1][0]), self.entries[-1][1])
+    
+    def test_corrupt_index(self):
+        """Test the header and index are checked on every open"""
+        self._corrupt(self.reader.index_offset + 3)
+        with self.assertRaises(ValueError) as ctx:
+            SSTableReader(self.sst_path, verify_checksum=False)
+        self.assertIn("index", str(ctx.exception))
+
+
+class TestSSTableBloomFilter(unittest.TestCase):
+    """Test the v4 filter block"""
+    
+    def setUp(self):
+        """Create temporary directory and a file of the even keys"""
+        self.test_dir = tempfile.mkdtemp()
+        self.sst_path = os.path.join(self.test_dir, "bloom.sst")
+        self.keys = [f"user:{i:06d}".encode() for i in range(0, 4000, 2)]
+        writer = SSTableWriter(self.sst_path)
+        for i, key in enumerate(self.keys):
+            writer.add(key, None if i % 7 == 0 else b"value", i)
+        writer.finalize()
+        self.reader = SSTableReader(self.sst_path)
+    
+    def tearDown(self):
+        """Clean up temporary directory"""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+    
+    def test_absent_keys_skip_reads(self):
+        """Test the filter rules out absent keys before any block is read"""
+        absent = [f"user:{i:06d}".encode() for i in range(1, 3998, 2)]  # Inside the key range
+        self.assertIsNotNone(self.reader.bloom)
+        for key in absent:
+            self.assertIsNone(self.reader.get_entry(key))
+        
+        stats = self.reader.filter_stats
+        self.assertEqual(stats['hits'] + stats['misses'], len(absent))
+        self.assertEqual(stats['false_positives'], stats['hits'])
+        self.assertLess(stats['false_positives'], len(absent) * 0.03)
+        
+        # Ruled out keys never touch the file
+        os.remove(self.sst_path)
+        for key in absent:
+            if not self.reader.bloom.might_contain(key):
+                self.assertIsNone(self.reader.get(key))
+    
+    def test_present_keys_found(self):
+        """Test no key in the file is ruled out, tombstones included"""
+        for i, key in enumerate(self.keys):
+            self.assertEqual(self.reader.get_entry(key), (None if i % 7 == 0 else b"value", i))
+        self.assertEqual(self.reader.filter_stats,
+                         {'hits': len(self.keys), 'misses': 0, 'false_positives': 0})
+    
+    def test_bits_per_key(self):
+        """Test the filter size follows bits_per_key, and 0 writes none"""
+        sizes = {}
+        for bits_per_key in (0, 5, 20):
+            path = os.path.join(self.test_dir, f"bits{bits_per_key}.sst")
+            writer = SSTableWriter(path, bits_per_key=bits_per_key)
+            for key in self.keys:
+                writer.add(key, b"value")
+            writer.finalize()
+            reader = SSTableReader(path)
+            sizes[bits_per_key] = len(reader.bloom) if reader.bloom else 0
+            self.assertIsNone(reader.get(b"user:000001"))
+            self.assertEqual(reader.get(b"user:000002"), b"value")
+        
+        self.assertEqual(sizes[0], 0)
+        self.assertEqual(sizes[5], len(self.keys) * 5 // 8)
+        self.assertEqual(sizes[20], len(self.keys) * 20 // 8)
+    
+    def test_corrupt_filter(self):
+        """Test the filter block is checked with the index on open"""
+        with open(self.sst_path, 'r+b') as f:
+            f.seek(self.reader.filter_offset + 10)
+            byte = f.read(1)
+            f.seek(self.reader.filter_offset + 10)
+            f.write(bytes([byte[0] ^ 0xFF]))
+        with self.assertRaises(ValueError):
+            SSTableReader(self.sst_path, verify_checksum=False)
+
+
+class TestSSTableBlockCache(unittest.TestCase):
+    """Test reads through a shared BlockCache"""
+    
+    def setUp(self):
+        """Create temporary directory and a file of about 100 blocks"""
+        self.test_dir = tempfile.mkdtemp()
+        self.sst_path = os.path.join(self.test_dir, "cached.sst")
+        writer = SSTableWriter(self.sst_path, block_size=1024)
+        for i in range(1000):
+            writer.add(f"key{i:04d}".encode(), b"v" * 100, i)
+        writer.finalize()
+        self.cache = BlockCache(1024 * 1024)
+        self.reader = SSTableReader(self.sst_path, block_cache=self.cache)
+    
+    def tearDown(self):
+        """Clean up temporary directory"""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+    
+    def test_lookups_hit_the_cache(self):
+        """Test a block is read once, then served from the cache"""
+        self.assertEqual(self.reader.get(b"key0500"), b"v" * 100)
+        stats = self.cache.stats
+        self.assertEqual((stats['hits'], stats['misses']), (0, 1))
+        
+        self.assertEqual(self.reader.get_entry(b"key0501"), (b"v" * 100, 501))
+        self.assertEqual(self.cache.stats['hits'], 1)
+    
+    def test_scans_fill_the_cache(self):
+        """Test a scan caches its blocks for later lookups and scans"""
+        self.assertEqual(len(list(self.reader.iter_entries())), 1000)
+        misses = self.cache.stats['misses']
+        self.assertEqual(misses, len(self.reader.index))
+        
+        self.assertEqual(len(list(self.reader.iter_entries(b"key0100", b"key0200"))), 100)
+        self.assertEqual(self.reader.get(b"key0999"), b"v" * 100)
+        self.assertEqual(self.cache.stats['misses'], misses)
+    
+    def test_low_priority_scan(self):
+        """Test a low-priority scan does not evict blocks lookups use"""
+        cache = BlockCache(20 * 1024, shard_bits=0)
+        reader = SSTableReader(self.sst_path, block_cache=cache)
+        hot = [f"key{i:04d}".encode() for i in range(0, 100, 9)]
+        for key in hot:
+            reader.get(key)
+        
+        self.assertEqual(len(list(reader.iter_entries(low_priority=True))), 1000)
+        for key in hot:
+            reader.get(key)
+        self.assertEqual(cache.stats['misses'], len(reader.index))  # Every block once
+        
+        list(reader.iter_entries())  # A normal scan does evict them
+        misses = cache.stats['misses']
+        reader.get(hot[0])
+        self.assertEqual(cache.stats['misses'], misses + 1)
+    
+    def test_index_and_filter_pinned(self):
+        """Test the index and filter count against the budget until close()"""
+        pinned = self.cache.stats['pinned_usage']
+        footer_start = os.path.getsize(self.sst_path) - 24
+        self.assertEqual(pinned, footer_start - self.reader.filter_offset)  # Filter + index
+        
+        other = SSTableReader(self.sst_path, block_cache=self.cache)
+        self.assertEqual(self.cache.stats['pinned_usage'], 2 * pinned)
+        other.close()
+        self.reader.close()
+        self.reader.close()
+        self.assertEqual(self.cache.stats['pinned_usage'], 0)
+        with self.assertRaises(ValueError):
+            self.reader.get(b"key0001")  # The file is closed too
+
+
+class TestSSTableMmap(unittest.TestCase):
+    """Test the memory-mapped reader mode"""
+    
+    def setUp(self):
+        """Create temporary directory and a block file with tombstones"""
+        self.test_dir = tempfile.mkdtemp()
+        self.sst_path = os.path.join(self.test_dir, "mapped.sst")
+        self.entries = [(f"key{i:04d}".encode(), None if i % 10 == 3 else b"v%d" % i, i)
+                        for i in range(1000)]
+        writer = SSTableWriter(self.sst_path, block_size=512)
+        for key, value, sequence in self.entries:
+            writer.add(key, value, sequence)
+        writer.finalize()
+        self.reader = SSTableReader(self.sst_path, use_mmap=True)
+    
+    def tearDown(self):
+        """Clean up temporary directory"""
+        self.reader.close()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+    
+    def test_matches_buffered_reads(self):
+        """Test lookups and scans return what the pread path does"""
+        buffered = SSTableReader(self.sst_path)
+        for key in [key for key, _, _ in self.entries] + [b"key", b"key0500x", b"zzz"]:
+            self.assertEqual(self.reader.get_entry(key), buffered.get_entry(key))
+        self.assertEqual(list(self.reader.iter_entries()), self.entries)
+        self.assertEqual(list(self.reader.iter_entries(b"key0100", b"key0200")),
+                         self.entries[100:200])
+        self.assertEqual(list(self.reader.get_range(b"key0995")),
+                         [(key, value) for key, value, _ in self.entries[995:]])
+        self.assertEqual((self.reader.first_key, self.reader.last_key), (b"key0000", b"key0999"))
+    
+    def test_value_types(self):
+        """Test values are slices of the mapping, or bytes with copy_values"""
+        value = self.reader.get(b"key0001")
+        self.assertIsInstance(value, memoryview)
+        self.assertEqual(value, b"v1")
+        self.assertIsInstance(next(self.reader.iter_all())[1], memoryview)
+        self.assertIsInstance(next(self.reader.iter_entries())[0], bytes)
+        
+        copying = SSTableReader(self.sst_path, use_mmap=True, copy_values=True)
+        self.assertIsInstance(copying.get(b"key0001"), bytes)
+        self.assertIsInstance(next(copying.iter_all())[1], bytes)
+        copying.close()
+    
+    def test_corrupt_block_detected(self):
+        """Test a mapped block is CRC-checked before its entries are used"""
+        offset = self.reader.index[10][1] + 5
+        with open(self.sst_path, 'r+b') as f:
+            f.seek(offset)
+            byte = f.read(1)
+            f.seek(offset)
+            f.write(bytes([byte[0] ^ 0xFF]))
+        
+        reader = SSTableReader(self.sst_path, verify_checksum=False, use_mmap=True)
+        with self.assertRaises(ValueError):
+            reader.get(reader.index[10][0])
+        self.assertIsNotNone(reader.get_entry(b"key0000"))
+        with self.assertRaises(ValueError):
+            list(reader.iter_entries())
+        reader.close()
+    
+    def test_close_with_values_outstanding(self):
+        """Test values handed out stay valid after close()"""
+        value = self.reader.get(b"key0999")
+        self.reader.close()
+        self.assertEqual(value, b"v999")
+        with self.assertRaises(ValueError):
+            self.reader.get(b"key0999")
+
+
 def run_tests():
     """Run all SSTable tests"""
     loader = unittest.TestLoader()
@@ -354,6 +822,11 @@ def run_tests():
     suite.addTests(loader.loadTestsFromTestCase(TestSSTableLarge))
     suite.addTests(loader.loadTestsFromTestCase(TestSSTableFromMemtable))
     suite.addTests(loader.loadTestsFromTestCase(TestSSTableCorruption))
+    suite.addTests(loader.loadTestsFromTestCase(TestSSTableSequence))
+    suite.addTests(loader.loadTestsFromTestCase(TestSSTableBlocks))
+    suite.addTests(loader.loadTestsFromTestCase(TestSSTableBloomFilter))
+    suite.addTests(loader.loadTestsFromTestCase(TestSSTableBlockCache))
+    suite.addTests(loader.loadTestsFromTestCase(TestSSTableMmap))
     
     runner = unittest.TextTestRunner(verbosity=2)
     result = runner.run(suite)
@@ -0,0 +1,153 @@
+"""
+Test suite for TableCache
+
+Tests:
+    - LRU bound on open readers
+    - Readers in use are closed on their last release
+    - Files that are no longer live are not cached
+    - Filter counters of closed readers
+    - Concurrent acquire/release
+"""
+
+import unittest
+import sys
+import threading
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from table_cache import TableCache
+
+
+class FakeReader:
+    """Stands in for an SSTableReader: records close()"""
+    
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+        self.filter_stats = {'hits': 0, 'misses': 0, 'false_positives': 0}
+    
+    def close(self):
+        self.closed = True
+
+
+class TestTableCache(unittest.TestCase):
+    """Test TableCache operations"""
+    
+    def setUp(self):
+        self.opened = []
+        self.cache = TableCache(self._open, max_open_files=3)
+        for number in range(1, 6):
+            self.cache.insert(number, self._open(number))
+    
+    def _open(self, number):
+        if number == 404:
+            raise FileNotFoundError(number)
+        reader = FakeReader(number)
+        self.opened.append(reader)
+        return reader
+    
+    def _use(self, number):
+        reader = self.cache.acquire(number)
+        self.cache.release(reader)
+        return reader
+    
+    def test_lru_bound(self):
+        """Test the least recently used readers are closed past the limit"""
+        self.assertEqual([reader.closed for reader in self.opened],
+                         [True, True, False, False, False])
+        self.assertEqual(self.cache.stats['evictions'], 2)
+        
+        self._use(3)            # Now the most recently used
+        reader = self._use(1)   # Reopened, evicting 4
+        self.assertIsNot(reader, self.opened[0])
+        self.assertTrue(self.opened[3].closed)
+        self.assertFalse(self.opened[2].closed)
+        self.assertIs(self._use(1), reader)
+        
+        stats = self.cache.stats
+        self.assertEqual((stats['hits'], stats['misses'], stats['open_files']), (2, 1, 3))
+    
+    def test_in_use_reader_closed_on_release(self):
+        """Test eviction never closes a reader still acquired"""
+        reader = self.cache.acquire(3)
+        self.assertIs(self.cache.acquire(3), reader)  # Two acquires
+        self.cache.evict(3)
+        self.assertFalse(reader.closed)
+        self.assertEqual(self.cache.stats['open_files'], 3)
+        
+        self.cache.release(reader)
+        self.assertFalse(reader.closed)
+        self.cache.release(reader)
+        self.assertTrue(reader.closed)
+        self.assertEqual(self.cache.stats['open_files'], 2)
+    
+    def test_files_no_longer_live(self):
+        """Test a reader opened for an evicted file serves one caller only"""
+        self.cache.evict(1)
+        reader = self.cache.acquire(1)  # A lookup on an old version
+        self.assertFalse(reader.closed)
+        self.cache.release(reader)
+        self.assertTrue(reader.closed)
+        self.assertIsNot(self._use(1), reader)
+        
+        with self.assertRaises(FileNotFoundError):
+            self.cache.acquire(404)
+        
+        self.cache.close()
+        self.assertTrue(all(reader.closed for reader in self.opened))
+    
+    def test_filter_stats_kept(self):
+        """Test counters of closed readers are still in the totals"""
+        for reader in self.opened[2:]:  # The open ones
+            reader.filter_stats['misses'] += 1
+        self.assertEqual(self.cache.filter_stats()['misses'], 3)
+        self.cache.evict(5)
+        self.assertTrue(self.opened[4].closed)
+        self.assertEqual(self.cache.filter_stats()['misses'], 3)
+    
+    def test_concurrent_use(self):
+        """Test concurrent lookups never see a closed reader"""
+        cache = TableCache(self._open, max_open_files=4)
+        for number in range(20):
+            cache.insert(number, self._open(number))
+        errors = []
+        
+        def worker(n):
+            for i in range(2000):
+                reader = cache.acquire((n * 7 + i) % 20)
+                if reader.closed:
+                    errors.append(reader.number)
+                cache.release(reader)
+        
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(errors, [])
+        stats = cache.stats
+        self.assertEqual(stats['hits'] + stats['misses'], 8000)
+        self.assertEqual(stats['open_files'], 4)
+        open_readers = [reader for reader in self.opened if not reader.closed]
+        self.assertEqual(len(open_readers), 4 + 3)  # + the setUp cache's
+
+
+def run_tests():
+    """Run all TableCache tests"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    
+    suite.addTests(loader.loadTestsFromTestCase(TestTableCache))
+    
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+    
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
@@ -8,19 +8,27 @@ Tests:
     - Checksum verification
     - Corruption detection
     - Large entries
+    - Group commit with concurrent writers
+    - Atomic write batches
+    - Block format (fragments, preallocation, corrupt block skipping)
+    - Vectored bulk writes
+    - Sync policies, write buffer and background syncer
 """
 
 import unittest
 import tempfile
 import os
 import shutil
+import threading
+import time
 from pathlib import Path
 
 # Add src to path
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
-from wal import WAL, WALEntry
+from wal import WAL, WALEntry, WriteBatch, SyncPolicy, encode_records, convert_log
+from memtable import Memtable
 
 
 class TestWALEntry(unittest.TestCase):
@@ -122,6 +130,27 @@ class TestWALEntry(unittest.TestCase):
         self.assertEqual(recovered.value, b"")
         self.assertFalse(recovered.is_tombstone)
     
+    def test_deserialize_from_memoryview(self):
+        """Test deserializing in place from a memoryview buffer"""
+        data = b"junk" + WALEntry(b"key", b"value").serialize()
+        view = memoryview(bytearray(data))
+        
+        recovered, offset = WALEntry.deserialize(view, 4)
+        
+        self.assertEqual(recovered.key, b"key")
+        self.assertEqual(recovered.value, b"value")
+        self.assertIsInstance(recovered.key, bytes)
+        self.assertEqual(offset, len(data))
+    
+    def test_encoder_matches_serialize(self):
+        """Test the vectored encoder produces the same bytes as serialize()"""
+        ops = [(b"key1", b"value1"), (b"key2", None), (b"key3", b"")]
+        
+        encoded = b''.join(encode_records(ops, 5))
+        expected = b''.join(WALEntry(k, v, 5 + i).serialize() for i, (k, v) in enumerate(ops))
+        
+        self.assertEqual(encoded, expected)
+    
     def test_type_validation(self):
         """Test type validation for key and value"""
         # Key must be bytes
@@ -264,6 +293,83 @@ class TestWAL(unittest.TestCase):
             self.assertEqual(entry.key, expected_key)
             self.assertEqual(entry.value, expected_value)
     
+    def test_read_all_is_lazy(self):
+        """Test recovery can stop early and releases the mapping"""
+        with WAL(self.wal_path, sync_on_write=False) as wal:
+            for i in range(100):
+                wal.write(f"key{i}".encode(), b"value")
+        
+        wal = WAL(self.wal_path, sync_on_write=False)
+        reader = wal.read_all()
+        first = [next(reader).key for _ in range(3)]
+        reader.close()
+        
+        self.assertEqual(first, [b"key0", b"key1", b"key2"])
+        
+        # Mapping released: truncating the file must still work
+        wal.truncate()
+        self.assertEqual(list(wal.read_all()), [])
+        wal.close()
+    
+    def test_sequence_numbers(self):
+        """Test sequence numbers are assigned, logged and recovered"""
+        with WAL(self.wal_path) as wal:
+            self.assertEqual(wal.write(b"key1", b"value1"), 1)
+            self.assertEqual(wal.write(b"key2", None), 2)
+            batch = WriteBatch()
+            batch.put(b"key3", b"value3")
+            batch.put(b"key4", b"value4")
+            self.assertEqual(wal.write_batch(batch), 3)
+            self.assertEqual(wal.write(b"key5", b"value5", sequence=100), 100)
+        
+        wal = WAL(self.wal_path, sync_on_write=False)
+        sequences = [e.sequence for e in wal.read_all()]
+        
+        self.assertEqual(sequences, [1, 2, 3, 4, 100])
+        # Recovery restores the counter
+        self.assertEqual(wal.last_sequence, 100)
+        self.assertEqual(wal.write(b"key6", b"value6"), 101)
+        wal.close()
+    
+    def test_reopen_continues_sequence(self):
+        """Test reopening a log resumes numbering without a read_all()"""
+        with WAL(self.wal_path) as wal:
+            wal.write(b"key1", b"value1")
+            wal.write(b"key2", b"value2")
+        
+        with WAL(self.wal_path) as wal:
+            self.assertEqual(wal.last_sequence, 2)
+            self.assertEqual(wal.write(b"key3", b"value3"), 3)
+        
+        with WAL(self.wal_path) as wal:
+            self.assertEqual([e.sequence for e in wal.read_all()], [1, 2, 3])
+    
+    def test_write_many(self):
+        """Test bulk writes with one writev (more buffers than IOV_MAX)"""
+        ops = [(f"key{i:04d}".encode(), None if i % 7 == 0 else b"v" * (i % 50))
+               for i in range(1500)]
+        
+        with WAL(self.wal_path) as wal:
+            first = wal.write_many(ops)
+            self.assertEqual(first, 1)
+            self.assertEqual(wal.num_syncs, 1)
+            self.assertEqual(wal.write(b"last", b"x"), 1501)
+        
+        with WAL(self.wal_path, sync_on_write=False) as wal:
+            entries = list(wal.read_all())
+        
+        self.assertEqual(len(entries), 1501)
+        self.assertEqual([(e.key, e.value) for e in entries[:-1]], ops)
+        self.assertEqual([e.sequence for e in entries[:3]], [1, 2, 3])
+    
+    def test_write_many_type_validation(self):
+        """Test bulk writes validate keys and values"""
+        with WAL(self.wal_path) as wal:
+            with self.assertRaises(TypeError):
+                wal.write_many([(b"key", "value")])
+            with self.assertRaises(TypeError):
+                wal.write_many([("key", b"value")])
+    
     def test_context_manager(self):
         """Test WAL as context manager"""
         with WAL(self.wal_path) as wal:
@@ -286,6 +392,401 @@ class TestWAL(unittest.TestCase):
         self.assertFalse(os.path.exists(self.wal_path))
 
 
+class TestWALGroupCommit(unittest.TestCase):
+    """Test group commit with concurrent writers"""
+    
+    def setUp(self):
+        """Create temporary directory for each test"""
+        self.test_dir = tempfile.mkdtemp()
+        self.wal_path = os.path.join(self.test_dir, "group.wal")
+    
+    def tearDown(self):
+        """Clean up temporary directory"""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+    
+    def test_single_writer(self):
+        """Test group commit degenerates to one fsync per write"""
+        with WAL(self.wal_path, group_commit=True) as wal:
+            wal.write(b"key1", b"value1")
+            wal.write(b"key2", None)
+            self.assertEqual(wal.num_syncs, 2)
+        
+        with WAL(self.wal_path, sync_on_write=False) as wal:
+            entries = list(wal.read_all())
+        
+        self.assertEqual([e.key for e in entries], [b"key1", b"key2"])
+        self.assertTrue(entries[1].is_tombstone)
+    
+    def test_concurrent_writers(self):
+        """Test all records from concurrent writers are recovered"""
+        num_threads = 8
+        per_thread = 50
+        wal = WAL(self.wal_path, group_commit=True)
+        
+        def writer(tid):
+            for i in range(per_thread):
+                wal.write(f"t{tid}-k{i}".encode(), f"v{i}".encode())
+        
+        threads = [threading.Thread(target=writer, args=(t,)) for t in range(num_threads)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        # Groups share fsyncs, so there can never be more syncs than writes
+        self.assertLessEqual(wal.num_syncs, num_threads * per_thread)
+        wal.close()
+        
+        with WAL(self.wal_path, sync_on_write=False) as wal:
+            entries = list(wal.read_all())
+        
+        self.assertEqual(len(entries), num_threads * per_thread)
+        
+        # Per-thread order must be preserved
+        for tid in range(num_threads):
+            keys = [e.key for e in entries if e.key.startswith(f"t{tid}-".encode())]
+            expected = [f"t{tid}-k{i}".encode() for i in range(per_thread)]
+            self.assertEqual(keys, expected)
+
+
+class TestWriteBatch(unittest.TestCase):
+    """Test atomic multi-key write batches"""
+    
+    def setUp(self):
+        """Create temporary directory for each test"""
+        self.test_dir = tempfile.mkdtemp()
+        self.wal_path = os.path.join(self.test_dir, "batch.wal")
+    
+    def tearDown(self):
+        """Clean up temporary directory"""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+    
+    def _make_batch(self):
+        batch = WriteBatch()
+        batch.put(b"key1", b"value1")
+        batch.delete(b"key2")
+        batch.put(b"key3", b"")
+        return batch
+    
+    def test_serialize_deserialize(self):
+        """Test batch round trip through one record"""
+        serialized = self._make_batch().serialize()
+        entries, offset = WriteBatch.deserialize(serialized)
+        
+        self.assertEqual(offset, len(serialized))
+        self.assertEqual([(e.key, e.value) for e in entries],
+                         [(b"key1", b"value1"), (b"key2", None), (b"key3", b"")])
+    
+    def test_batch_and_entries_interleaved(self):
+        """Test read_all expands batches between single entries"""
+        with WAL(self.wal_path) as wal:
+            wal.write(b"before", b"x")
+            wal.write_batch(self._make_batch())
+            wal.write(b"after", b"y")
+            self.assertEqual(wal.num_syncs, 3)
+        
+        with WAL(self.wal_path, sync_on_write=False) as wal:
+            keys = [e.key for e in wal.read_all()]
+        
+        self.assertEqual(keys, [b"before", b"key1", b"key2", b"key3", b"after"])
+    
+    def test_torn_batch_is_all_or_nothing(self):
+        """Test a partially written batch yields none of its operations"""
+        with WAL(self.wal_path) as wal:
+            wal.write(b"before", b"x")
+        
+        # Simulate crash in the middle of writing the batch record
+        serialized = self._make_batch().serialize()
+        with open(self.wal_path, 'ab') as f:
+            f.write(serialized[:len(serialized) - 6])
+        
+        with WAL(self.wal_path, sync_on_write=False) as wal:
+            keys = [e.key for e in wal.read_all()]
+        
+        self.assertEqual(keys, [b"before"])
+    
+    def test_apply_to_memtable(self):
+        """Test applying a batch to a memtable"""
+        memtable = Memtable()
+        memtable.put(b"key2", b"old", sequence=1)
+        
+        self._make_batch().apply_to(memtable, sequence=10)
+        
+        self.assertEqual(memtable.get(b"key1"), b"value1")
+        self.assertIsNone(memtable.get(b"key2"))
+        self.assertEqual(memtable.get(b"key3"), b"")
+        self.assertEqual(memtable.get_entry(b"key3"), (b"", 12))
+    
+    def test_empty_batch(self):
+        """Test empty batch writes nothing"""
+        with WAL(self.wal_path) as wal:
+            wal.write_batch(WriteBatch())
+            self.assertEqual(wal.num_syncs, 0)
+        
+        self.assertEqual(os.path.getsize(self.wal_path), 0)
+    
+    def test_type_validation(self):
+        """Test batch operations validate types"""
+        batch = WriteBatch()
+        with self.assertRaises(TypeError):
+            batch.put("key", b"value")
+        with self.assertRaises(TypeError):
+            batch.put(b"key", "value")
+        with self.assertRaises(TypeError):
+            batch.delete("key")
+
+
+class TestWALBlockFormat(unittest.TestCase):
+    """Test the 32 KiB block WAL format"""
+    
+    def setUp(self):
+        """Create temporary directory for each test"""
+        self.test_dir = tempfile.mkdtemp()
+        self.wal_path = os.path.join(self.test_dir, "block.wal")
+    
+    def tearDown(self):
+        """Clean up temporary directory"""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+    
+    def _read(self, **kwargs):
+        with WAL(self.wal_path, sync_on_write=False, block_format=True, **kwargs) as wal:
+            return list(wal.read_all())
+    
+    def test_write_and_read(self):
+        """Test small, multi-block and batch records round trip"""
+        big_value = bytes(range(256)) * 400  # ~100 KB, spans several blocks
+        with WAL(self.wal_path, block_format=True) as wal:
+            wal.write(b"key1", b"value1")
+            wal.write(b"big", big_value)
+            batch = WriteBatch()
+            batch.put(b"key2", b"value2")
+            batch.delete(b"key1")
+            wal.write_batch(batch)
+        
+        entries = self._read()
+        
+        self.assertEqual([e.key for e in entries], [b"key1", b"big", b"key2", b"key1"])
+        self.assertEqual(entries[1].value, big_value)
+        self.assertTrue(entries[3].is_tombstone)
+    
+    def test_write_many(self):
+        """Test bulk writes are framed per record"""
+        ops = [(f"key{i:03d}".encode(), b"w" * 1000) for i in range(100)]
+        with WAL(self.wal_path, block_format=True) as wal:
+            wal.write_many(ops)
+        
+        self.assertEqual([(e.key, e.value) for e in self._read()], ops)
+    
+    def test_preallocation(self):
+        """Test the file is preallocated in whole blocks"""
+        if not hasattr(os, 'posix_fallocate'):
+            self.skipTest("posix_fallocate not available")
+        
+        with WAL(self.wal_path, block_format=True, preallocate_bytes=WAL.BLOCK_SIZE * 4) as wal:
+            wal.write(b"key1", b"value1")
+            self.assertLess(wal.tell(), WAL.BLOCK_SIZE)
+            allocated = wal.preallocate_bytes
+        
+        if allocated:  # Filesystem supports fallocate
+            self.assertEqual(os.path.getsize(self.wal_path), WAL.BLOCK_SIZE * 4)
+        self.assertEqual([e.key for e in self._read()], [b"key1"])
+    
+    def test_reopen_appends(self):
+        """Test reopening continues after existing records, not the file end"""
+        with WAL(self.wal_path, block_format=True) as wal:
+            wal.write(b"key1", b"value1")
+        with WAL(self.wal_path, block_format=True) as wal:
+            wal.write(b"key2", b"value2")
+        
+        self.assertEqual([e.key for e in self._read()], [b"key1", b"key2"])
+    
+    def test_corrupted_block_is_skipped(self):
+        """Test replay continues after a corrupted block"""
+        value = b"v" * 1000
+        with WAL(self.wal_path, sync_on_write=False, block_format=True) as wal:
+            for i in range(100):  # ~100 KB: four blocks
+                wal.write(f"key{i:03d}".encode(), value)
+        
+        # Corrupt a byte in the middle of the second block
+        with open(self.wal_path, 'r+b') as f:
+            f.seek(WAL.BLOCK_SIZE + WAL.BLOCK_SIZE // 2)
+            byte = f.read(1)
+            f.seek(-1, os.SEEK_CUR)
+            f.write(bytes([byte[0] ^ 0xFF]))
+        
+        keys = [e.key for e in self._read()]
+        
+        self.assertIn(b"key000", keys)
+        self.assertIn(b"key099", keys)  # Records after the bad block survive
+        self.assertLess(len(keys), 100)
+        self.assertEqual(keys, sorted(keys))
+    
+    def test_stale_log_number_ends_log(self):
+        """Test data from a recycled file is ignored"""
+        with WAL(self.wal_path, block_format=True, log_number=1) as wal:
+            for i in range(10):
+                wal.write(f"old{i}".encode(), b"x" * 100)
+        
+        # Reuse the same file as log number 2 without truncating it
+        with WAL(self.wal_path, block_format=True, log_number=2) as wal:
+            wal.write(b"new", b"y")
+        
+        self.assertEqual([e.key for e in self._read(log_number=2)], [b"new"])
+    
+    def test_group_commit(self):
+        """Test group commit frames concurrent records correctly"""
+        wal = WAL(self.wal_path, block_format=True, group_commit=True)
+        
+        def writer(tid):
+            for i in range(30):
+                wal.write(f"t{tid}-{i:02d}".encode(), b"z" * 500)
+        
+        threads = [threading.Thread(target=writer, args=(t,)) for t in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wal.close()
+        
+        self.assertEqual(len(self._read()), 120)
+    
+    def test_convert_v1_log(self):
+        """Test converting a v1 log keeps every record and batch"""
+        v1_path = os.path.join(self.test_dir, "v1.wal")
+        with WAL(v1_path) as wal:
+            wal.write(b"key1", b"value1")
+            batch = WriteBatch()
+            batch.put(b"key2", b"value2")
+            batch.put(b"key3", b"value3")
+            wal.write_batch(batch)
+        
+        count = convert_log(v1_path, self.wal_path)
+        
+        self.assertEqual(count, 2)
+        self.assertEqual([e.key for e in self._read()], [b"key1", b"key2", b"key3"])
+
+class TestWALSyncPolicy(unittest.TestCase):
+    """Test sync policies, the write buffer and WAL.sync()"""
+    
+    def setUp(self):
+        """Create temporary directory for each test"""
+        self.test_dir = tempfile.mkdtemp()
+        self.wal_path = os.path.join(self.test_dir, "sync.wal")
+    
+    def tearDown(self):
+        """Clean up temporary directory"""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+    
+    def _wait_for(self, condition, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("Timed out waiting for the background syncer")
+            time.sleep(0.005)
+    
+    def test_policy_constructors(self):
+        """Test the factory methods and argument checks"""
+        self.assertEqual(SyncPolicy.always().mode, SyncPolicy.ALWAYS)
+        self.assertEqual(SyncPolicy.every(10).interval_ms, 10)
+        self.assertEqual(SyncPolicy.bytes(4096).max_bytes, 4096)
+        self.assertFalse(SyncPolicy.os().background)
+        self.assertEqual(repr(SyncPolicy.every(5)), "SyncPolicy.every(5)")
+        
+        with self.assertRaises(ValueError):
+            SyncPolicy.every(0)
+        with self.assertRaises(ValueError):
+            SyncPolicy.bytes(-1)
+    
+    def test_sync_on_write_maps_to_policy(self):
+        """Test the legacy flag still selects always() / os()"""
+        with WAL(self.wal_path) as wal:
+            self.assertEqual(wal.sync_policy.mode, SyncPolicy.ALWAYS)
+            self.assertEqual(wal.buffer_size, 0)
+            wal.write(b"key", b"value")
+            self.assertEqual(wal.num_syncs, 1)
+        
+        with WAL(self.wal_path, sync_on_write=False) as wal:
+            self.assertEqual(wal.sync_policy.mode, SyncPolicy.OS)
+            self.assertEqual(wal.buffer_size, 0)  # Writes reach the file at once
+            wal.write(b"key2", b"value2")
+            self.assertEqual(os.path.getsize(self.wal_path), wal.tell())
+    
+    def test_os_policy_buffers_writes(self):
+        """Test records stay in the user-space buffer until needed"""
+        wal = WAL(self.wal_path, sync_policy=SyncPolicy.os())
+        wal.write(b"key1", b"value1")
+        wal.write(b"key2", None)
+        
+        self.assertEqual(os.path.getsize(self.wal_path), 0)
+        self.assertGreater(wal.tell(), 0)
+        # Readers see buffered records
+        self.assertEqual([e.key for e in wal.read_all()], [b"key1", b"key2"])
+        
+        wal.write_many([(b"key3", b"value3")])
+        wal.close()
+        
+        self.assertEqual(wal.num_syncs, 0)
+        with WAL(self.wal_path, sync_on_write=False) as wal:
+            self.assertEqual([e.key for e in wal.read_all()], [b"key1", b"key2", b"key3"])
+    
+    def test_buffer_written_when_full(self):
+        """Test a full buffer is written out without a sync"""
+        with WAL(self.wal_path, sync_policy=SyncPolicy.os(), buffer_size=1024) as wal:
+            for i in range(100):
+                wal.write(f"key{i:03d}".encode(), b"v" * 20)
+            
+            self.assertGreater(os.path.getsize(self.wal_path), 0)
+            self.assertEqual(wal.num_syncs, 0)
+    
+    def test_explicit_sync_barrier(self):
+        """Test sync() writes the buffer out and fsyncs"""
+        with WAL(self.wal_path, sync_policy=SyncPolicy.os()) as wal:
+            wal.write(b"key", b"value")
+            wal.sync()
+            
+            self.assertEqual(os.path.getsize(self.wal_path), wal.tell())
+            self.assertEqual(wal.num_syncs, 1)
+    
+    def test_interval_policy(self):
+        """Test the syncer thread syncs on its timer"""
+        wal = WAL(self.wal_path, sync_policy=SyncPolicy.every(5))
+        wal.write(b"key", b"value")
+        
+        self._wait_for(lambda: wal.num_syncs >= 1)
+        self.assertEqual(os.path.getsize(self.wal_path), wal.tell())
+        wal.close()
+        self.assertIsNone(wal._syncer)
+    
+    def test_bytes_policy(self):
+        """Test the syncer thread syncs once enough bytes are pending"""
+        with WAL(self.wal_path, sync_policy=SyncPolicy.bytes(4096)) as wal:
+            wal.write(b"small", b"v")
+            time.sleep(0.05)
+            self.assertEqual(wal.num_syncs, 0)
+            
+            for i in range(100):
+                wal.write(f"key{i:03d}".encode(), b"v" * 100)
+            self._wait_for(lambda: wal.num_syncs >= 1)
+        
+        with WAL(self.wal_path, sync_on_write=False) as wal:
+            self.assertEqual(len(list(wal.read_all())), 101)
+    
+    def test_block_format_buffered(self):
+        """Test buffered block-format writes reopen at the right offset"""
+        policy = SyncPolicy.every(10)
+        with WAL(self.wal_path, block_format=True, sync_policy=policy) as wal:
+            for i in range(50):
+                wal.write(f"key{i:03d}".encode(), b"v" * 1000)
+        
+        with WAL(self.wal_path, block_format=True, sync_policy=policy) as wal:
+            wal.write(b"after", b"reopen")
+        
+        with WAL(self.wal_path, block_format=True, sync_on_write=False) as wal:
+            entries = list(wal.read_all())
+        self.assertEqual(len(entries), 51)
+        self.assertEqual(entries[-1].key, b"after")
+
+
 def run_tests():
     """Run all WAL tests"""
     loader = unittest.TestLoader()
@@ -293,6 +794,10 @@ def run_tests():
     
     suite.addTests(loader.loadTestsFromTestCase(TestWALEntry))
     suite.addTests(loader.loadTestsFromTestCase(TestWAL))
+    suite.addTests(loader.loadTestsFromTestCase(TestWALGroupCommit))
+    suite.addTests(loader.loadTestsFromTestCase(TestWriteBatch))
+    suite.addTests(loader.loadTestsFromTestCase(TestWALBlockFormat))
+    suite.addTests(loader.loadTestsFromTestCase(TestWALSyncPolicy))
     
     runner = unittest.TextTestRunner(verbosity=2)
     result = runner.run(suite)
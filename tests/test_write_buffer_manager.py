@@ -0,0 +1,165 @@
+"""
+Test suite for WriteBufferManager
+
+Tests:
+    - Accounting of reserved, sealed and freed memory
+    - Victim selection: largest active memtable, oldest on a tie
+    - Writers stall at the budget until a flush frees memory
+    - Stores sharing a manager stay within the budget
+"""
+
+import unittest
+import tempfile
+import shutil
+import os
+import sys
+import threading
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from lsm_tree import LSMTree
+from write_buffer_manager import WriteBufferManager
+
+
+class FakeStore:
+    """Store that seals its whole active memtable when asked"""
+    
+    def __init__(self, manager):
+        self.manager = manager
+        self.switches = 0
+    
+    def switch_memtable(self):
+        self.switches += 1
+        self.manager.sealed(self, self.manager._mutable[self])
+
+
+class TestWriteBufferManager(unittest.TestCase):
+    """Test WriteBufferManager operations"""
+    
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+    
+    def test_accounting(self):
+        """Test reserve, sealed, free and unregister update the total"""
+        manager = WriteBufferManager(1000)
+        store = FakeStore(manager)
+        manager.register(store)
+        
+        manager.reserve(store, 300)
+        manager.sealed(store, 200)
+        self.assertEqual(manager.total_bytes, 300)
+        self.assertEqual(manager.stats['mutable_bytes'], 100)
+        
+        manager.free(store, 200)
+        self.assertEqual(manager.total_bytes, 100)
+        
+        manager.unregister(store)
+        self.assertEqual(manager.total_bytes, 0)
+        manager.reserve(store, 50)  # Ignored once unregistered
+        self.assertEqual(manager.total_bytes, 0)
+        
+        with self.assertRaises(ValueError):
+            WriteBufferManager(0)
+    
+    def test_victim_selection(self):
+        """Test the largest active memtable is sealed, the oldest on a tie"""
+        manager = WriteBufferManager(1000, allow_stall=False)
+        old, new, large = FakeStore(manager), FakeStore(manager), FakeStore(manager)
+        for store in (old, new, large):
+            manager.register(store)
+        
+        manager.reserve(old, 200)
+        manager.reserve(new, 200)
+        manager.enforce()  # Below FLUSH_RATIO
+        self.assertEqual(old.switches + new.switches, 0)
+        
+        manager.reserve(large, 500)
+        manager.enforce()
+        self.assertEqual(large.switches, 1)
+        
+        manager.reserve(old, 250)
+        manager.reserve(new, 250)
+        manager.enforce()  # 450 each: the oldest is sealed
+        self.assertEqual((old.switches, new.switches), (1, 0))
+        
+        manager.reserve(new, 100)
+        manager.enforce()  # Only the unsealed 550 counts
+        self.assertEqual(new.switches, 0)
+        manager.reserve(new, 400)
+        manager.enforce()
+        self.assertEqual(new.switches, 1)
+        self.assertEqual(manager.stats['flushes_triggered'], 3)
+    
+    def test_stall_until_free(self):
+        """Test a writer over the budget blocks until memory is freed"""
+        manager = WriteBufferManager(1000)
+        store = FakeStore(manager)
+        manager.register(store)
+        manager.reserve(store, 1000)
+        
+        done = threading.Event()
+        
+        def writer():
+            manager.enforce()  # Seals the memtable, then stalls
+            done.set()
+        
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            self.assertFalse(done.wait(0.3))
+            self.assertEqual(store.switches, 1)
+            self.assertEqual(manager.stats['stalls'], 1)
+        finally:
+            manager.free(store, 1000)
+            thread.join()
+        
+        self.assertTrue(done.is_set())
+        self.assertGreater(manager.stats['stall_time'], 0)
+    
+    def test_shared_budget(self):
+        """Test stores flush early to keep their combined memtables in budget"""
+        manager = WriteBufferManager(16 * 1024)
+        dbs = [LSMTree(os.path.join(self.test_dir, f"db{i}"),
+                       memtable_size=1024 * 1024, write_buffer_manager=manager)
+               for i in range(3)]
+        peak = 0
+        for i in range(600):
+            dbs[i % 3].put(f"key{i:04d}".encode(), b"v" * 50)
+            peak = max(peak, manager.total_bytes)
+        
+        for db in dbs:
+            db.flush()
+        self.assertGreater(manager.stats['flushes_triggered'], 0)
+        self.assertGreater(sum(db.stats['flushes'] for db in dbs), 3)
+        # One write can overshoot the budget before the writer stalls
+        self.assertLess(peak, 16 * 1024 + 1024)
+        for i in range(600):
+            self.assertEqual(dbs[i % 3].get(f"key{i:04d}".encode()), b"v" * 50)
+        
+        for db in dbs:
+            db.close()
+        self.assertEqual(manager.total_bytes, 0)
+        self.assertEqual(manager.stats['stores'], 0)
+
+
+def run_tests():
+    """Run all WriteBufferManager tests"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    
+    suite.addTests(loader.loadTestsFromTestCase(TestWriteBufferManager))
+    
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+    
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,40 @@
+"""
+Convert a v1 WAL file to the block format
+
+Usage:
+    python tools/convert_wal.py old.wal new.wal [--log-number N] [--replace]
+
+With --replace the converted log is renamed over the original.
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from wal import convert_log
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('src', help='existing v1 WAL file')
+    parser.add_argument('dst', help='block-format WAL file to create')
+    parser.add_argument('--log-number', type=int, default=0,
+                        help='log number stamped into every fragment')
+    parser.add_argument('--replace', action='store_true',
+                        help='rename the converted log over the source')
+    args = parser.parse_args()
+    
+    count = convert_log(args.src, args.dst, log_number=args.log_number)
+    print(f"Converted {count} records: {args.src} -> {args.dst}")
+    
+    if args.replace:
+        os.replace(args.dst, args.src)
+        print(f"Replaced {args.src}")
+
+
+if __name__ == '__main__':
+    main()